@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+一括挿入ベンチマーク
+合成データ（既定10万地名）で insert_place の逐次挿入と insert_places_bulk を比較
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bungo_map.core.database import Database
+from bungo_map.core.models import Author, Work, Place
+
+
+PLACE_NAMES = ['東京', '京都', '大阪', '松山市', '道後温泉', '鎌倉', '津軽', '本郷', '上野', '浅草']
+
+
+def make_places(work_ids, count: int):
+    """合成地名データを生成"""
+    rng = random.Random(42)
+    places = []
+    for i in range(count):
+        name = rng.choice(PLACE_NAMES)
+        places.append(Place(
+            work_id=rng.choice(work_ids),
+            place_name=name,
+            before_text="前文" * 10,
+            sentence=f"{name}へ向かう汽車の中で{i}番目の文を読んだ",
+            after_text="後文" * 10,
+            confidence=0.8,
+            extraction_method="benchmark"
+        ))
+    return places
+
+
+def prepare_db(db_path: str):
+    """作者・作品を用意したデータベースを作成"""
+    db = Database(db_path)
+    author_ids = db.insert_authors_bulk(Author(name=f"作者{i}") for i in range(10))
+    work_ids = db.insert_works_bulk(
+        Work(author_id=author_id, title=f"作品{j}") for author_id in author_ids for j in range(10)
+    )
+    return db, work_ids
+
+
+def run(label: str, insert, places) -> float:
+    """挿入処理を計測して rows/秒 を返す"""
+    start = time.perf_counter()
+    insert(places)
+    elapsed = time.perf_counter() - start
+    rate = len(places) / elapsed
+    print(f"  {label:<28} {len(places):>7}件  {elapsed:8.2f}秒  {rate:>10,.0f} rows/秒")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='一括挿入ベンチマーク')
+    parser.add_argument('--rows', type=int, default=100000, help='挿入する地名数')
+    parser.add_argument('--batch-size', type=int, default=1000, help='executemanyのバッチサイズ')
+    args = parser.parse_args()
+
+    print(f"⚡ 一括挿入ベンチマーク: {args.rows:,}件")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db, work_ids = prepare_db(os.path.join(temp_dir, 'row.db'))
+        places = make_places(work_ids, args.rows)
+        row_rate = run("insert_place (逐次)", lambda ps: [db.insert_place(p) for p in ps], places)
+        db.close()
+
+        db, work_ids = prepare_db(os.path.join(temp_dir, 'bulk.db'))
+        places = make_places(work_ids, args.rows)
+        bulk_rate = run("insert_places_bulk", lambda ps: db.insert_places_bulk(ps, args.batch_size), places)
+        db.close()
+
+    print(f"🎉 高速化: {bulk_rate / row_rate:.1f}倍")
+
+
+if __name__ == "__main__":
+    main()
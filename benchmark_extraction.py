@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+地名抽出ベンチマーク
+辞書照合（Aho–Corasick）と正規表現の選択（|）を辞書の語数を変えて文字/秒で比較し、
+作品全文の抽出を文ごとの走査と全文1回の走査で比較し、
+GiNZA の文ごとの再解析とチャンク1回の解析を文/秒で比較し、
+GiNZA 入力のチャンク分割を変更前の方式と比較し、
+nlp.pipe による一括抽出のプロセス数ごとのスケーリングを作品/秒で計測
+"""
+
+import argparse
+import os
+import random
+import re
+import time
+
+from bungo_map.core.models import Work
+from bungo_map.extractors.dictionary_matcher import AhoCorasickMatcher
+from bungo_map.extractors.simple_place_extractor import FAMOUS_PLACES, SimplePlaceExtractor
+from bungo_map.extractors.text_chunker import chunk_spans
+
+
+# 坊っちゃん（青空文庫キャッシュ）
+DEFAULT_TEXT = 'data/aozora_cache/752_14964.html.txt'
+
+
+def load_text(path: str) -> str:
+    """ベンチマーク用テキスト（なければ合成文）"""
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            return f.read()
+    return "東京の学校を卒業してから四国の松山に赴任した。" * 10000
+
+
+def make_dictionary(size: int):
+    """有名地名に合成語（漢字2〜5文字）を加えた辞書"""
+    rng = random.Random(42)
+    kanji = [chr(code) for code in range(0x4E00, 0x4E00 + 3000)]
+    words = dict.fromkeys(FAMOUS_PLACES)
+    while len(words) < size:
+        words[''.join(rng.choice(kanji) for _ in range(rng.randint(2, 5)))] = None
+    return list(words)[:size]
+
+
+def chars_per_second(func, text: str) -> float:
+    start = time.perf_counter()
+    func(text)
+    return len(text) / (time.perf_counter() - start)
+
+
+def best_of(func, repeat: int = 5) -> float:
+    """最速の実行時間（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark_full_text(text: str):
+    """作品全文の抽出: 文ごとに各パターン vs 全文を1回ずつ走査"""
+    per_sentence = SimplePlaceExtractor(single_pass=False)
+    single_pass = SimplePlaceExtractor()
+
+    def fields(places):
+        return [(p.place_name, p.sentence, p.before_text, p.after_text, p.confidence, p.extraction_method)
+                for p in places]
+
+    expected = fields(per_sentence.extract_places_from_text(1, text))
+    assert fields(single_pass.extract_places_from_text(1, text)) == expected, "抽出結果が一致しません"
+
+    slow = best_of(lambda: per_sentence.extract_places_from_text(1, text))
+    fast = best_of(lambda: single_pass.extract_places_from_text(1, text))
+    print(f"\n📖 全文抽出（{len(text):,}文字, 地名{len(expected)}件, 結果一致）")
+    print(f"  文ごと {slow * 1000:.1f}ms → 全文1回 {fast * 1000:.1f}ms ({slow / fast:.1f}倍)")
+
+
+def legacy_split_text_by_size(text: str, max_chars: int):
+    """変更前のチャンク分割（連結のたびに全体を再エンコード）"""
+    chunks = []
+    current_chunk = ""
+    for sentence in text.split('。'):
+        if len(current_chunk.encode('utf-8')) + len((sentence + '。').encode('utf-8')) <= max_chars:
+            current_chunk += sentence + '。'
+        else:
+            if current_chunk:
+                chunks.append(current_chunk)
+            current_chunk = sentence + '。'
+            if len(current_chunk.encode('utf-8')) > max_chars:
+                char_chunks = [current_chunk[i:i+max_chars//3] for i in range(0, len(current_chunk), max_chars//3)]
+                chunks.extend(char_chunks[:-1])
+                current_chunk = char_chunks[-1] if char_chunks else ""
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+
+def benchmark_chunking(text: str, max_bytes_values=(40000, 400000)):
+    """チャンク分割: 文字列連結＋再エンコード（変更前） vs 位置のみ返す線形分割"""
+    print(f"\n✂️ チャンク分割（{len(text):,}文字）")
+    for max_bytes in max_bytes_values:
+        slow = best_of(lambda: legacy_split_text_by_size(text, max_bytes), repeat=3)
+        fast = best_of(lambda: chunk_spans(text, max_bytes), repeat=3)
+        count = len(chunk_spans(text, max_bytes))
+        print(f"  上限{max_bytes:>7,}バイト  {count:>3}チャンク  "
+              f"{slow * 1000:.1f}ms → {fast * 1000:.1f}ms ({slow / fast:.1f}倍)")
+
+
+def benchmark_ginza(text: str):
+    """GiNZA: チャンク解析後に文ごとに再解析（変更前） vs チャンクのDocから直接取得"""
+    try:
+        from bungo_map.extractors.ginza_place_extractor import MAX_CHUNK_BYTES, GinzaPlaceExtractor
+    except ImportError:
+        print("\n⚠️ spaCy / GiNZA が未インストールのため GiNZA ベンチマークをスキップ")
+        return
+
+    extractor = GinzaPlaceExtractor()
+    chunks = [text[start:end] for start, end in chunk_spans(text, MAX_CHUNK_BYTES)]
+
+    def double_parse():
+        count = 0
+        for chunk in chunks:
+            for sent in extractor.nlp(chunk).sents:
+                extractor.nlp(sent.text.strip())
+                count += 1
+        return count
+
+    def single_parse():
+        sentences, entities = [], []
+        for chunk in chunks:
+            extractor._collect_sentences(extractor.nlp(chunk), sentences, entities)
+        return len(sentences)
+
+    print(f"\n🧠 GiNZA 解析（{len(chunks)}チャンク）")
+    rates = []
+    for label, func in [('文ごとに再解析', double_parse), ('チャンク1回', single_parse)]:
+        start = time.perf_counter()
+        sentence_count = func()
+        rate = sentence_count / (time.perf_counter() - start)
+        rates.append(rate)
+        print(f"  {label:<12} {sentence_count:>6}文  {rate:>8,.0f} 文/秒")
+    print(f"  🎉 高速化: {rates[1] / rates[0]:.1f}倍")
+
+
+def benchmark_ginza_pipe(text: str, processes, works_count: int = 8, batch_size: int = 16):
+    """GiNZA 一括抽出: 作品ごとの逐次解析 vs nlp.pipe（プロセス数別）"""
+    try:
+        from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
+    except ImportError:
+        print("\n⚠️ spaCy / GiNZA が未インストールのため一括抽出ベンチマークをスキップ")
+        return
+
+    extractor = GinzaPlaceExtractor()
+    works = [Work(work_id=i, content=text) for i in range(1, works_count + 1)]
+
+    start = time.perf_counter()
+    expected = [extractor.extract_places_from_text(w.work_id, w.content) for w in works]
+    baseline = works_count / (time.perf_counter() - start)
+
+    print(f"\n🧵 GiNZA 一括抽出（{works_count}作品, batch_size={batch_size}）")
+    print(f"  {'逐次':<12} {baseline:>8.2f} 作品/秒")
+    for n_process in processes:
+        start = time.perf_counter()
+        results = extractor.extract_many(works, batch_size=batch_size, n_process=n_process)
+        rate = works_count / (time.perf_counter() - start)
+        # parser 無効化で文境界が変わりうるため地名の件数のみ比較
+        same = [len(r) for r in results] == [len(e) for e in expected]
+        print(f"  {'n_process=' + str(n_process):<12} {rate:>8.2f} 作品/秒  "
+              f"({rate / baseline:.1f}倍{', 件数一致' if same else ', 件数差あり'})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='地名抽出ベンチマーク')
+    parser.add_argument('--text', default=DEFAULT_TEXT, help='対象テキスト')
+    parser.add_argument('--sizes', default='164,1000,10000,100000', help='辞書の語数（カンマ区切り）')
+    parser.add_argument('--regex-sample', type=int, default=20000, help='正規表現で照合する文字数')
+    parser.add_argument('--skip-ginza', action='store_true', help='GiNZA ベンチマークを省略')
+    parser.add_argument('--processes', default=f'1,{os.cpu_count() or 1}', help='一括抽出のプロセス数（カンマ区切り）')
+    args = parser.parse_args()
+
+    text = load_text(args.text)
+    sample = text[:args.regex_sample]
+    print(f"⚡ 辞書照合ベンチマーク: {len(text):,}文字")
+    print(f"  {'語数':>8}  {'構築':>8}  {'Aho–Corasick':>16}  {'正規表現(|)':>16}")
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        words = make_dictionary(size)
+
+        start = time.perf_counter()
+        matcher = AhoCorasickMatcher(words)
+        build_seconds = time.perf_counter() - start
+        automaton_rate = chars_per_second(matcher.find_first, text)
+
+        pattern = re.compile('(?:' + '|'.join(map(re.escape, words)) + ')')
+        regex_rate = chars_per_second(pattern.findall, sample)
+
+        print(f"  {size:>8,}  {build_seconds:>7.2f}s  {automaton_rate:>11,.0f} 文字/秒  "
+              f"{regex_rate:>11,.0f} 文字/秒")
+
+    benchmark_full_text(text)
+    benchmark_chunking(text)
+    if not args.skip_ginza:
+        benchmark_ginza(text)
+        benchmark_ginza_pipe(text, [int(value) for value in args.processes.split(',')])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫テキスト正規化ベンチマーク
+変更前の実装（正規表現の置換と行の分割・連結を10回以上繰り返す）と
+1回の走査で処理する実装を、ゴールデンファイルと坊っちゃんに記法を付けた本文で文字/秒で比較
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import time
+
+from bungo_map.extractors.aozora_normalizer import normalize_aozora_text
+
+
+GOLDEN_DIR = 'tests/golden/aozora_normalizer'
+
+# 坊っちゃん（青空文庫キャッシュ、正規化済み）
+DEFAULT_TEXT = 'data/aozora_cache/752_14964.html.txt'
+
+
+# ===========================================
+# 変更前の実装（比較用）
+# ===========================================
+
+def legacy_remove_metadata(text: str) -> str:
+    lines = text.split('\n')
+    content_lines = []
+    in_content = False
+    for line in lines:
+        line = line.strip()
+        if not in_content:
+            if (line.startswith('底本：') or line.startswith('入力：') or
+                    line.startswith('校正：') or line.startswith('※') or
+                    '------' in line or line == '' or
+                    '青空文庫' in line):
+                continue
+            else:
+                in_content = True
+        if in_content and ('底本：' in line or '入力：' in line or '校正：' in line):
+            break
+        if in_content:
+            content_lines.append(line)
+    return '\n'.join(content_lines)
+
+
+def legacy_normalize(raw_text: str) -> str:
+    """変更前の正規化（ヘッダー・フッター → ルビ → 注記 → 空白の順に全体を処理）"""
+    text = legacy_remove_metadata(raw_text)
+    text = re.sub(r'｜([^《]+)《[^》]+》', r'\1', text)
+    text = re.sub(r'([一-龯]+)《[^》]+》', r'\1', text)
+    text = re.sub(r'《[^》]*》', '', text)
+    text = text.replace('｜', '')
+    text = re.sub(r'［＃[^］]*］', '', text)
+    text = re.sub(r'〔[^〕]*〕', '', text)
+    text = re.sub(r'※[^\n]*\n', '', text)
+    text = re.sub(r'＊', '', text)
+    text = re.sub(r'\r\n', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = re.sub(r'　+', '　', text)
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return text.strip()
+
+
+# ===========================================
+# 入力
+# ===========================================
+
+def with_markup(body: str, seed: int = 0) -> str:
+    """正規化済みの本文に青空文庫の記法（ヘッダー・字下げ・ルビ・注記・外字・フッター・CRLF）を付ける"""
+    rng = random.Random(seed)
+
+    def ruby(match):
+        word = match.group()
+        r = rng.random()
+        if r < 0.08:
+            return word + '《るび》'
+        if r < 0.11:
+            return '｜' + word + '《るび》'
+        if r < 0.13:
+            return word + '［＃「' + word + '」に傍点］'
+        return word
+
+    lines = []
+    for line in body.split('\n'):
+        if line:
+            line = '　' + re.sub(r'[一-龯]{2,4}', ruby, line)
+            if rng.random() < 0.01:
+                lines.append('［＃改ページ］')
+        lines.append(line)
+    header = "作品名\n著者名\n\n" + "-" * 55 + "\n【テキスト中に現れる記号について】\n\n《》：ルビ\n" + "-" * 55 + "\n\n"
+    footer = "\n\n\n\n底本：「全集」出版社\n入力：入力者\n校正：校正者\n"
+    return (header + '\n'.join(lines) + footer).replace('\n', '\r\n')
+
+
+def read_exact(path: str) -> str:
+    with open(path, encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+def load_inputs(text_path: str):
+    inputs = [(os.path.basename(path)[:-4], read_exact(path))
+              for path in sorted(glob.glob(os.path.join(GOLDEN_DIR, '*.txt')))
+              if not path.endswith('.expected.txt')]
+    if os.path.exists(text_path):
+        inputs.append((os.path.basename(text_path), with_markup(read_exact(text_path))))
+    return [(name, text) for name, text in inputs if len(text) >= 1000]
+
+
+def best_of(func, text: str, repeat: int) -> float:
+    """最速の実行時間（秒）"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='青空文庫テキスト正規化ベンチマーク')
+    parser.add_argument('--text', default=DEFAULT_TEXT, help='記法を付けて計測する本文')
+    parser.add_argument('--repeat', type=int, default=20, help='計測回数（最速値を採用）')
+    args = parser.parse_args()
+
+    print("⚡ 青空文庫テキスト正規化ベンチマーク")
+    print(f"  {'入力':<24} {'文字数':>9}  {'変更前':>14}  {'1回の走査':>14}  {'高速化':>6}")
+    total_legacy = total_single = total_chars = 0
+    for name, text in load_inputs(args.text):
+        assert normalize_aozora_text(text) == legacy_normalize(text), f"出力が一致しません: {name}"
+        legacy = best_of(legacy_normalize, text, args.repeat)
+        single = best_of(normalize_aozora_text, text, args.repeat)
+        total_legacy += legacy
+        total_single += single
+        total_chars += len(text)
+        print(f"  {name:<24} {len(text):>9,}  {len(text) / legacy:>9,.0f} 文字/秒  "
+              f"{len(text) / single:>9,.0f} 文字/秒  {legacy / single:>5.1f}倍")
+    if total_chars:
+        print(f"  🎉 合計 {total_chars:,}文字（出力一致）: {total_legacy * 1000:.1f}ms → {total_single * 1000:.1f}ms "
+              f"({total_legacy / total_single:.1f}倍)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テキストキャッシュ管理コマンド
+青空文庫テキストストアの統計・不要ファイルの削除・検証・旧形式キャッシュの取り込み
+"""
+
+import click
+from bungo_map.extractors.text_store import NORMALIZED, RAW, TextStore
+
+
+@click.group()
+def cache():
+    """📦 青空文庫テキストキャッシュ"""
+    pass
+
+
+def format_bytes(size: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f}{unit}" if unit == 'B' else f"{size:.1f}{unit}"
+        size /= 1024
+
+
+@cache.command()
+@click.option('--cache-dir', default='data/aozora_cache', help='キャッシュディレクトリ')
+def stats(cache_dir: str):
+    """件数・元のサイズ・圧縮後のサイズ"""
+    store = TextStore(cache_dir)
+    result = store.get_stats()
+    store.close()
+
+    labels = {RAW: '取得した本文', NORMALIZED: '正規化テキスト'}
+    click.echo(f"📦 テキストキャッシュ: {cache_dir}")
+    for variant in (RAW, NORMALIZED):
+        entry = result['variants'].get(variant, {'entries': 0, 'size': 0})
+        click.echo(f"  {labels[variant]:<8} {entry['entries']:>6}件  {format_bytes(entry['size'])}")
+    click.echo(f"  圧縮ファイル     {result['blobs']:>6}件  {format_bytes(result['size'])} → "
+               f"{format_bytes(result['stored_size'])} ({result['compression_ratio']:.1f}倍)")
+
+
+@cache.command()
+@click.option('--cache-dir', default='data/aozora_cache', help='キャッシュディレクトリ')
+@click.option('--legacy', is_flag=True, help='旧形式のキャッシュファイル（*.txt, raw/）も削除')
+def gc(cache_dir: str, legacy: bool):
+    """参照されない圧縮ファイル・書き込み途中の一時ファイルを削除（取り込みの停止中に実行）"""
+    store = TextStore(cache_dir)
+    removed = store.gc(legacy=legacy)
+    store.close()
+    click.echo(f"🧹 削除: 索引 {removed['blobs']}件, ファイル {removed['files']}件 ({format_bytes(removed['bytes'])})")
+
+
+@cache.command()
+@click.option('--cache-dir', default='data/aozora_cache', help='キャッシュディレクトリ')
+@click.option('--repair', is_flag=True, help='欠損・破損したファイルの索引を削除（次回の取得で取り直す）')
+def verify(cache_dir: str, repair: bool):
+    """圧縮ファイルを展開して内容のハッシュを照合"""
+    store = TextStore(cache_dir)
+    result = store.verify(repair=repair)
+    store.close()
+
+    problems = [('欠損', digest) for digest in result['missing']] + [('破損', digest) for digest in result['corrupt']]
+    if not problems:
+        click.echo(f"✅ {result['checked']}件のファイルを検証しました（問題なし）")
+        return
+    click.echo(f"❌ {result['checked']}件中 {len(problems)}件に問題があります")
+    for kind, digest in problems:
+        click.echo(f"  {kind}: {digest}")
+    if result['repaired']:
+        click.echo("🔧 問題のある索引を削除しました")
+
+
+@cache.command('import-legacy')
+@click.option('--cache-dir', default='data/aozora_cache', help='キャッシュディレクトリ')
+@click.option('--db-path', default='data/bungo_production.db', help='作品のURLを読むデータベース')
+def import_legacy(cache_dir: str, db_path: str):
+    """旧形式のキャッシュ（URL末尾のファイル名）を登録済み作品のURLで取り込む"""
+    from bungo_map.core.database import init_db
+    from bungo_map.extractors.aozora_extractor import AozoraExtractor
+
+    db = init_db(db_path)
+    urls = [work['aozora_url'] for author in db.search_authors("", limit=1000000)
+            for work in db.get_works_by_author(author['author_id']) if work['aozora_url']]
+    urls += [work['text_url'] for work in AozoraExtractor(cache_dir).get_sample_works()]
+
+    store = TextStore(cache_dir)
+    imported = store.import_legacy(urls)
+    store.close()
+    click.echo(f"📥 旧形式のキャッシュを取り込みました: {imported}件（gc --legacy で旧ファイルを削除）")
+
+
+if __name__ == "__main__":
+    cache()
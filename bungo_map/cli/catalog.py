@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫カタログコマンド
+作品一覧CSVの取り込み・作品検索・統計
+"""
+
+import time
+
+import click
+from bungo_map.extractors.aozora_catalog import CATALOG_URL, AozoraCatalog
+
+
+@click.group()
+def catalog():
+    """📚 青空文庫カタログ"""
+    pass
+
+
+@catalog.command()
+@click.argument('source', default=CATALOG_URL)
+@click.option('--catalog-path', default='data/aozora_catalog.db', help='カタログのデータベース')
+def load(source: str, catalog_path: str):
+    """作品一覧CSV（list_person_all_extended、ZIP可）を取り込む（SOURCE はファイルかURL）"""
+    if source.startswith(('http://', 'https://')):
+        import requests
+        from bungo_map.extractors.aozora_downloader import USER_AGENT
+
+        click.echo(f"⬇️ ダウンロード中: {source}")
+        response = requests.get(source, headers={'User-Agent': USER_AGENT}, timeout=60)
+        response.raise_for_status()
+        content = response.content
+    else:
+        with open(source, 'rb') as f:
+            content = f.read()
+
+    store = AozoraCatalog(catalog_path)
+    start = time.time()
+    rows = store.load_csv(content, source)
+    stats = store.get_stats()
+    store.close()
+    click.echo(f"✅ 取り込み完了: {rows}行（作品 {stats['works']}件, 人物 {stats['authors']}人, {time.time() - start:.1f}秒）")
+
+
+@catalog.command()
+@click.argument('title')
+@click.option('--author', '-a', help='著者名')
+@click.option('--limit', default=10, help='表示件数')
+@click.option('--catalog-path', default='data/aozora_catalog.db', help='カタログのデータベース')
+def search(title: str, author: str, limit: int, catalog_path: str):
+    """作品名（と著者名）で検索"""
+    store = AozoraCatalog(catalog_path)
+    start = time.perf_counter()
+    matches = store.search(title, author, limit=limit)
+    elapsed = time.perf_counter() - start
+    store.close()
+
+    if not matches:
+        click.echo(f"❌ 見つかりません: {title}")
+        return
+    click.echo(f"🔍 {len(matches)}件 ({matches[0].kind}, {elapsed * 1e6:.0f}µs)")
+    for match in matches:
+        entry = match.entry
+        score = f" {match.score:.2f}" if match.kind == 'fuzzy' else ""
+        click.echo(f"  [{entry.work_id}] {entry.title} / {entry.author} ({entry.role}){score}")
+        click.echo(f"      {entry.url or entry.card_url}")
+
+
+@catalog.command()
+@click.option('--catalog-path', default='data/aozora_catalog.db', help='カタログのデータベース')
+def stats(catalog_path: str):
+    """作品数・人物数・取り込み元"""
+    store = AozoraCatalog(catalog_path)
+    result = store.get_stats()
+    store.close()
+    click.echo(f"📚 青空文庫カタログ: {catalog_path}")
+    click.echo(f"  作品 {result['works']}件, 人物 {result['authors']}人")
+    if result.get('loaded_at'):
+        click.echo(f"  取り込み: {result['loaded_at']} ({result.get('source', '')})")
+
+
+if __name__ == "__main__":
+    catalog()
@@ -10,13 +10,15 @@ from bungo_map.core.database import init_db
 from bungo_map.extractors.wikipedia_extractor import WikipediaExtractor
 from bungo_map.extractors.place_extractor import PlaceExtractor
 from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
+from bungo_map.extractors.ner_cache import EntityCache
 
 
 class DataCollector:
     """データ収集パイプライン"""
     
-    def __init__(self, db_path: str = "data/bungo_production.db"):
+    def __init__(self, db_path: str = "data/bungo_production.db", ner_cache_path: str = "data/ner_cache.db"):
         self.db = init_db(db_path)
+        self.ner_cache_path = ner_cache_path
         self.wiki_extractor = WikipediaExtractor()
         self.place_extractor = PlaceExtractor()
         self.ginza_extractor = None  # 遅延初期化
@@ -24,7 +26,8 @@ class DataCollector:
     def _get_ginza_extractor(self):
         """GiNZA抽出器の遅延初期化"""
         if self.ginza_extractor is None:
-            self.ginza_extractor = GinzaPlaceExtractor()
+            cache = EntityCache(self.ner_cache_path) if self.ner_cache_path else None
+            self.ginza_extractor = GinzaPlaceExtractor(cache=cache)
         return self.ginza_extractor
         
     def collect_author_data(self, author_name: str, limit: int = 5, use_ginza: bool = False) -> dict:
@@ -48,29 +51,32 @@ class DataCollector:
             result["stats"]["authors"] = 1
             click.echo(f"✅ 作者情報登録: {author_name} (ID: {author_id})")
             
-            # 2. 作品情報を取得・挿入
+            # 2. 作品情報を取得・一括挿入
             works = self.wiki_extractor.extract_works_data(author_id, author_name, limit)
-            for work in works:
-                work_id = self.db.insert_work(work)
+            work_ids = self.db.insert_works_bulk(works)
+            
+            extracted_places = []
+            for work, work_id in zip(works, work_ids):
                 work.work_id = work_id
                 result["works"].append(work)
                 result["stats"]["works"] += 1
                 click.echo(f"  📖 作品登録: {work.title} (ID: {work_id})")
                 
-                # 3. 地名情報を抽出・挿入
+                # 3. 地名情報を抽出
                 if use_ginza:
                     # GiNZAによる本格的な地名抽出（模擬テキスト使用）
-                    places = self._extract_with_ginza(work_id, work.title)
+                    extracted_places.extend(self._extract_with_ginza(work_id, work.title))
                 else:
                     # サンプルデータによる地名抽出
-                    places = self.place_extractor.extract_places(work_id, work.title)
-                
-                for place in places:
-                    place_id = self.db.insert_place(place)
-                    place.place_id = place_id
-                    result["places"].append(place)
-                    result["stats"]["places"] += 1
-                    click.echo(f"    📍 地名登録: {place.place_name} (信頼度: {place.confidence:.2f})")
+                    extracted_places.extend(self.place_extractor.extract_places(work_id, work.title))
+            
+            # 4. 地名情報を一括挿入
+            place_ids = self.db.insert_places_bulk(extracted_places)
+            for place, place_id in zip(extracted_places, place_ids):
+                place.place_id = place_id
+                result["places"].append(place)
+                result["stats"]["places"] += 1
+                click.echo(f"    📍 地名登録: {place.place_name} (信頼度: {place.confidence:.2f})")
         
         return result
     
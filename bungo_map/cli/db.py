@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+データベース管理コマンド
+スキーママイグレーション・インデックス再構築などのメンテナンス機能
+"""
+
+import click
+import time
+from bungo_map.core.database import Database, init_db
+
+
+@click.group()
+def db():
+    """🗄️ データベース管理コマンド"""
+    pass
+
+
+@db.command('rebuild-index')
+@click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
+def rebuild_index(db_path: str):
+    """全文検索・空間インデックスを再構築"""
+    start_time = time.time()
+    database = init_db(db_path)
+    counts = database.rebuild_search_index()
+    spatial_count = database.rebuild_spatial_index()
+    database.close()
+
+    if counts:
+        click.echo("🔎 全文検索インデックス再構築完了:")
+        for table, count in counts.items():
+            click.echo(f"  - {table}: {count}件")
+    else:
+        click.echo("❌ このSQLiteではFTS5（trigram）が利用できません")
+
+    if database.spatial_enabled:
+        click.echo(f"🗺️ 空間インデックス再構築完了: {spatial_count}件")
+    else:
+        click.echo("❌ このSQLiteではR*Treeが利用できません")
+
+    click.echo(f"⚡ 実行時間: {time.time() - start_time:.2f}秒")
+
+
+@db.command()
+@click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
+@click.option('--status', 'show_status', is_flag=True, help='適用状況の表示のみ（マイグレーションは実行しない）')
+@click.option('--target', type=int, help='適用する最大バージョン')
+@click.option('--no-backup', is_flag=True, help='破壊的なマイグレーションの前にバックアップを作成しない')
+def migrate(db_path: str, show_status: bool, target: int, no_backup: bool):
+    """スキーママイグレーションを適用（既存テーブルを作り直す手順の前にはバックアップを作成）"""
+    database = Database(db_path, auto_migrate=False)
+
+    try:
+        status = database.get_schema_status()
+        click.echo(f"🗄️ スキーマバージョン: {status['version']}")
+
+        if show_status:
+            for row in status['applied']:
+                click.echo(f"  ✅ {row['version']:03d} {row['description']} ({row['applied_at']})")
+            for migration in status['pending']:
+                note = "（破壊的: bungo db migrate で適用）" if migration.destructive else ""
+                click.echo(f"  ⏳ {migration.version:03d} {migration.description}{note}")
+            return
+
+        if not status['pending']:
+            click.echo("✅ スキーマは最新です")
+            return
+
+        destructive = [m for m in status['pending'] if m.destructive and (target is None or m.version <= target)]
+        if destructive and not no_backup:
+            backup_path = database.backup(f"{db_path}.v{status['version']}.bak")
+            click.echo(f"💾 バックアップ作成: {backup_path}")
+
+        start_time = time.time()
+        applied = database.migrate(
+            target=target,
+            on_apply=lambda m: click.echo(f"  ✅ {m.version:03d} {m.description}")
+        )
+        click.echo(f"🎉 マイグレーション完了: {len(applied)}件適用 → バージョン {database.get_schema_status()['version']}")
+        click.echo(f"⚡ 実行時間: {time.time() - start_time:.2f}秒")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    db()
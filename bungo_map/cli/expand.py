@@ -15,6 +15,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 sys.path.insert(0, project_root)
 
 from bungo_map.core.database import BungoDatabase
+from bungo_map.core.fingerprint import content_hash, needs_extraction
+from bungo_map.core.jobs import FAILED, JobLedger
 from bungo_map.extractors.wikipedia_extractor import WikipediaExtractor
 from bungo_map.extractors.aozora_extractor import AozoraExtractor
 
@@ -22,10 +24,37 @@ from bungo_map.extractors.aozora_extractor import AozoraExtractor
 class DataExpansionEngine:
     """データ拡充エンジン"""
     
-    def __init__(self, db_path: str = "data/bungo_production.db"):
+    def __init__(self, db_path: str = "data/bungo_production.db", place_extractor=None,
+                 aozora_extractor: AozoraExtractor = None, request_interval: float = 2.0):
+        """
+        初期化
+        
+        Args:
+            db_path: データベースファイルパス
+            place_extractor: 地名抽出器（省略時は GiNZA、未インストールなら軽量抽出器）
+            aozora_extractor: 青空文庫テキスト抽出器
+            request_interval: 作品ごとの待機秒数（API制限対策）
+        """
         self.db = BungoDatabase(db_path)
         self.wiki_extractor = WikipediaExtractor()
-        self.aozora_extractor = AozoraExtractor()
+        self.aozora_extractor = aozora_extractor or AozoraExtractor()
+        self.place_extractor = place_extractor  # 遅延初期化
+        self.request_interval = request_interval
+        self.ledger = JobLedger(self.db)
+    
+    def _get_place_extractor(self):
+        """地名抽出器の遅延初期化"""
+        if self.place_extractor is None:
+            try:
+                from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
+                from bungo_map.extractors.ner_cache import EntityCache
+                self.place_extractor = GinzaPlaceExtractor(cache=EntityCache())
+            except (ImportError, OSError):
+                # spaCy 未インストール（ImportError）・モデル未インストール（spacy.load の OSError）
+                from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+                print("⚠️ GiNZA が利用できないため軽量地名抽出器を使用します")
+                self.place_extractor = SimplePlaceExtractor()
+        return self.place_extractor
         
     def expand_authors(self, target_count: int = 30, test_mode: bool = False) -> Dict:
         """作者データを拡充する"""
@@ -78,12 +107,9 @@ class DataExpansionEngine:
                         # 作品情報を抽出
                         works_data = self.wiki_extractor.extract_works_data(author_id, author_name, limit=10)
                         
-                        # 作品をデータベースに追加
-                        work_count = 0
-                        for work in works_data:
-                            work_id = self.db.insert_work(work)
-                            if work_id:
-                                work_count += 1
+                        # 作品をデータベースに一括追加
+                        work_ids = self.db.insert_works_bulk(works_data)
+                        work_count = sum(1 for work_id in work_ids if work_id)
                         
                         success_count += 1
                         result = {
@@ -132,9 +158,21 @@ class DataExpansionEngine:
         
         return summary
     
-    def expand_places_for_author(self, author_name: str, force_update: bool = False) -> Dict:
-        """特定作者の地名データを拡充する"""
-        print(f"\n📍 {author_name} の地名データ拡充開始...")
+    def expand_places_for_author(self, author_name: str, force_update: bool = False,
+                                 incremental: bool = False, resume: bool = True) -> Dict:
+        """
+        特定作者の地名データを拡充する
+        
+        作品ごとの進捗をジョブ台帳に記録し、同じ条件の未完了ジョブがあれば完了済みの作品を飛ばして再開する。
+        
+        Args:
+            author_name: 作者名
+            force_update: 地名登録済みの作品も全て再抽出
+            incremental: 本文ハッシュか抽出器バージョンが前回と異なる作品だけ再抽出
+            resume: False なら未完了ジョブがあっても最初から実行
+        """
+        mode = "全件再抽出" if force_update else "差分" if incremental else "未抽出のみ"
+        print(f"\n📍 {author_name} の地名データ拡充開始... (モード: {mode})")
         
         start_time = time.time()
         
@@ -147,68 +185,124 @@ class DataExpansionEngine:
         author = authors[0]
         
         # 作者の作品を取得
-        works = self.db.get_works_by_author(author.author_id)
-        print(f"📚 {author.name} の作品数: {len(works)}作品")
+        works = self.db.get_works_by_author(author['author_id'])
+        print(f"📚 {author['name']} の作品数: {len(works)}作品")
+        
+        work_ids = [work['work_id'] for work in works]
+        fingerprints = self.db.get_work_fingerprints(work_ids)
+        existing_works = set()
+        if not (force_update or incremental):
+            existing_works = {place['work_id'] for place in self.db.get_places_by_works(work_ids)}
         
         total_places_added = 0
         results = []
         
-        for work in works:
-            print(f"\n   📖 {work.title} を処理中...")
-            
-            try:
-                # 既存の地名数確認
-                existing_places = self.db.get_places_by_work(work.work_id)
-                
-                if existing_places and not force_update:
-                    print(f"      ⏭️  既に{len(existing_places)}地名あり（スキップ）")
+        job = self.ledger.begin(
+            'expand', work_ids,
+            {'author': author['name'], 'force_update': force_update, 'incremental': incremental},
+            resume=resume
+        )
+        targets = set(job.work_ids)
+        if job.resumed:
+            print(f"🔁 ジョブ #{job.job_id} を再開: 完了済み {job.completed_before}作品を省略")
+        
+        def record(work, stage, error=None):
+            if error is None:
+                self.ledger.record(job.job_id, work['work_id'], stage)
+            else:
+                self.ledger.record(job.job_id, work['work_id'], stage, FAILED, error)
+            self.ledger.flush()
+        
+        interrupted = True
+        try:
+            for work in works:
+                if work['work_id'] not in targets:
+                    status = 'given_up' if work['work_id'] in job.given_up else 'resumed'
+                    results.append({'work_title': work['title'], 'status': status})
                     continue
                 
-                # 青空文庫から本文取得
-                aozora_url = self.aozora_extractor.search_aozora_work(work['title'], author['name'])
+                print(f"\n   📖 {work['title']} を処理中...")
+                stage = 'download'
                 
-                if aozora_url:
+                try:
+                    if not (force_update or incremental) and work['work_id'] in existing_works:
+                        print(f"      ⏭️  地名登録済み（スキップ）")
+                        results.append({'work_title': work['title'], 'status': 'skipped'})
+                        record(work, 'write')
+                        continue
+                    
+                    # 青空文庫から本文取得
+                    aozora_url = work['aozora_url'] or self.aozora_extractor.search_aozora_work(
+                        work['title'], author['name'])
+                    if not aozora_url:
+                        print(f"      ❌ 青空文庫URL取得失敗")
+                        results.append({'work_title': work['title'], 'status': 'url_error'})
+                        record(work, stage, "青空文庫URL取得失敗")
+                        continue
+                    
                     print(f"      📥 青空文庫からダウンロード中...")
                     text_content = self.aozora_extractor.download_and_extract_text(aozora_url)
-                    
-                    if text_content:
-                        print(f"      ✅ テキスト取得成功: {len(text_content)}文字")
-                        # TODO: GiNZAで地名抽出（次のステップで実装）
-                        print(f"      ⚠️ 地名抽出機能は次のステップで実装予定")
-                        
-                        result = {
-                            'work_title': work['title'],
-                            'places_added': 0,
-                            'text_length': len(text_content),
-                            'status': 'text_ready'
-                        }
-                        results.append(result)
-                    else:
+                    if not text_content:
                         print(f"      ❌ 本文取得失敗")
                         results.append({'work_title': work['title'], 'status': 'text_error'})
-                else:
-                    print(f"      ❌ 青空文庫URL取得失敗")
-                    results.append({'work_title': work['title'], 'status': 'url_error'})
+                        record(work, stage, "本文取得失敗")
+                        continue
+                    record(work, stage)
                     
-            except Exception as e:
-                print(f"      ❌ エラー: {e}")
-                results.append({'work_title': work.title, 'status': 'error', 'error': str(e)})
-            
-            # API制限対策
-            time.sleep(2)
+                    stage = 'extract'
+                    extractor = self._get_place_extractor()
+                    text_hash = content_hash(text_content)
+                    if incremental and not force_update and not needs_extraction(
+                            fingerprints.get(work['work_id']), text_hash, extractor.version):
+                        print(f"      ⏭️  本文・抽出器とも変更なし（スキップ）")
+                        results.append({'work_title': work['title'], 'status': 'unchanged'})
+                        record(work, 'write')
+                        continue
+                    
+                    print(f"      ✅ テキスト取得成功: {len(text_content)}文字")
+                    places = extractor.extract_places_from_text(work['work_id'], text_content, aozora_url)
+                    record(work, stage)
+                    
+                    # 既存の地名と差し替え（失敗時は元の地名が残る）
+                    stage = 'write'
+                    self.db.replace_work_places(work['work_id'], places, text_hash, extractor.version)
+                    record(work, stage)
+                    total_places_added += len(places)
+                    print(f"      📍 {len(places)}地名を登録")
+                    
+                    results.append({
+                        'work_title': work['title'],
+                        'places_added': len(places),
+                        'text_length': len(text_content),
+                        'status': 'extracted'
+                    })
+                        
+                except Exception as e:
+                    print(f"      ❌ エラー: {e}")
+                    results.append({'work_title': work['title'], 'status': 'error', 'error': str(e)})
+                    record(work, stage, str(e))
+                
+                # API制限対策
+                time.sleep(self.request_interval)
+            interrupted = False
+        finally:
+            self.ledger.finish(job.job_id, interrupted=interrupted)
         
         end_time = time.time()
         
+        extracted_count = sum(1 for r in results if r['status'] == 'extracted')
         summary = {
-            'author_name': author.name,
+            'author_name': author['name'],
+            'job_id': job.job_id,
             'works_processed': len(works),
+            'works_extracted': extracted_count,
             'total_places_added': total_places_added,
             'execution_time': round(end_time - start_time, 2),
             'results': results
         }
         
-        print(f"\n✅ {author.name} の地名データ拡充完了")
-        print(f"   処理作品: {len(works)}作品")
+        print(f"\n✅ {author['name']} の地名データ拡充完了")
+        print(f"   処理作品: {len(works)}作品（再抽出: {extracted_count}作品）")
         print(f"   追加地名: {total_places_added}箇所")
         print(f"   実行時間: {summary['execution_time']}秒")
         
@@ -271,21 +365,17 @@ class DataExpansionEngine:
         print(f"\n📊 **現在のデータベース状況**")
         
         authors = self.db.search_authors("", limit=1000)
-        total_works = 0
-        total_places = 0
+        works = self.db.get_works_by_authors(author['author_id'] for author in authors)
+        places = self.db.get_places_by_works(work['work_id'] for work in works)
         
-        for author in authors:
-            works = self.db.get_works_by_author(author['author_id'])
-            total_works += len(works)
-            
-            for work in works:
-                places = self.db.get_places_by_work(work['work_id'])
-                total_places += len(places)
+        works_per_author = {}
+        for work in works:
+            works_per_author[work['author_id']] = works_per_author.get(work['author_id'], 0) + 1
         
         status = {
             'authors_count': len(authors),
-            'works_count': total_works,
-            'places_count': total_places
+            'works_count': len(works),
+            'places_count': len(places)
         }
         
         print(f"   作者数: {status['authors_count']}名")
@@ -296,7 +386,7 @@ class DataExpansionEngine:
         if authors:
             print(f"\n📝 登録作者一覧:")
             for i, author in enumerate(authors[:10], 1):
-                works_count = len(self.db.get_works_by_author(author['author_id']))
+                works_count = works_per_author.get(author['author_id'], 0)
                 birth_info = f"({author['birth_year']}-{author['death_year']})" if author['birth_year'] else ""
                 print(f"   {i:2d}. {author['name']} {birth_info} - {works_count}作品")
             
@@ -317,6 +407,8 @@ def main():
                        help='対象作者名 (placesコマンド用)')
     parser.add_argument('--force', action='store_true', 
                        help='強制更新')
+    parser.add_argument('--incremental', action='store_true',
+                       help='本文か抽出器が変わった作品だけ再抽出 (placesコマンド用)')
     parser.add_argument('--test-mode', action='store_true',
                        help='テストモード（少量データで実行）')
     parser.add_argument('--db-path', type=str, default="data/bungo_production.db",
@@ -335,7 +427,7 @@ def main():
         if not args.author:
             print("❌ --author オプションで作者名を指定してください")
             return
-        result = engine.expand_places_for_author(args.author, args.force)
+        result = engine.expand_places_for_author(args.author, args.force, args.incremental)
         
     elif args.command == 'test':
         result = engine.test_wikipedia_extraction()
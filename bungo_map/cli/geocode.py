@@ -7,69 +7,93 @@
 
 import click
 import logging
+from pathlib import Path
 from typing import List
 from bungo_map.core.database import init_db
-from bungo_map.geocoding import Geocoder
+from bungo_map.geocoding import Geocoder, GeocodeCache, GeocodingResult, LocalGazetteerGeocoder
 
 
 class GeocodeManager:
     """ジオコーディング管理クラス"""
     
-    def __init__(self, db_path: str = "data/bungo_production.db"):
+    def __init__(self, db_path: str = "data/bungo_production.db",
+                 cache_path: str = "data/geocode_cache.db",
+                 gazetteer_path: str = "data/gazetteer/JP.txt",
+                 google_api_key: str = None, workers: int = 8,
+                 google_rate: float = 50.0, nominatim_rate: float = 1.0):
         self.db = init_db(db_path)
-        self.geocoder = Geocoder()
+        self.cache = GeocodeCache(cache_path)
+        self.gazetteer = self._load_gazetteer(gazetteer_path)
+        self.geocoder = Geocoder(google_api_key=google_api_key, cache_store=self.cache,
+                                 gazetteer=self.gazetteer,
+                                 google_rate=google_rate, nominatim_rate=nominatim_rate,
+                                 max_workers=workers)
         
         # ログ設定
         logging.basicConfig(level=logging.INFO)
         self.logger = logging.getLogger(__name__)
     
+    @staticmethod
+    def _load_gazetteer(path: str):
+        """ローカル地名辞書を読み込む（ファイルがなければ外部APIのみ）"""
+        if not path or not Path(path).exists():
+            return None
+        gazetteer = LocalGazetteerGeocoder(path)
+        stats = gazetteer.get_stats()
+        click.echo(f"📚 地名辞書: {stats['entries']}件 ({stats['load_seconds']:.1f}秒, "
+                   f"{stats['memory_bytes'] / 1024 / 1024:.1f}MB)")
+        return gazetteer
+    
     def geocode_missing_places(self, limit: int = None) -> dict:
-        """緯度・経度が不明な地名をジオコーディング"""
+        """緯度・経度が不明な地名をジオコーディング（地名マスタ単位で1回ずつ）"""
         
-        # 緯度・経度が未設定の地名を取得
-        places = self.db.get_places_without_coordinates(limit)
+        # 座標未設定の地名マスタを取得（同名の言及はまとめて1件）
+        masters = self.db.get_place_masters_without_coordinates(limit)
         
-        if not places:
+        if not masters:
             click.echo("✅ ジオコーディングが必要な地名はありません")
-            return {"total": 0, "success": 0, "failed": 0}
+            return {"total": 0, "success": 0, "failed": 0, "mentions": 0}
         
-        click.echo(f"🌍 ジオコーディング開始: {len(places)}件の地名を処理")
+        mention_total = sum(master.mention_count for master in masters)
+        click.echo(f"🌍 ジオコーディング開始: {len(masters)}件の地名を処理（言及{mention_total}件）")
         
         # ジオコーディング実行
-        place_names = [place.place_name for place in places]
+        place_names = [master.place_name for master in masters]
         results = self.geocoder.batch_geocode(place_names)
         
-        # 結果をデータベースに更新
-        success_count = 0
+        # 結果を地名マスタに一括反映
+        updates = []
+        updated_mentions = 0
         failed_count = 0
         
-        for place, result in zip(places, results):
+        for master, result in zip(masters, results):
             if result.lat is not None and result.lng is not None:
-                # 座標を更新
-                updated_place = place
-                updated_place.lat = result.lat
-                updated_place.lng = result.lng
-                
-                self.db.update_place(updated_place)
-                success_count += 1
-                
-                click.echo(f"✅ {place.place_name}: ({result.lat:.4f}, {result.lng:.4f}) [{result.source}]")
+                updates.append((master.master_id, result.lat, result.lng, result.source, result.confidence))
+                updated_mentions += master.mention_count
+                click.echo(f"✅ {master.place_name}: ({result.lat:.4f}, {result.lng:.4f}) [{result.source}]")
             else:
                 failed_count += 1
                 error_msg = result.error or "不明なエラー"
-                click.echo(f"❌ {place.place_name}: {error_msg}")
+                if result.transient:
+                    error_msg += "（一時的なエラー・次回実行時に再試行）"
+                click.echo(f"❌ {master.place_name}: {error_msg}")
+        
+        self.db.update_place_master_coordinates(updates)
+        success_count = len(updates)
         
         # 統計表示
         click.echo(f"\n📊 ジオコーディング結果:")
-        click.echo(f"  - 処理総数: {len(places)}件")
-        click.echo(f"  - 成功: {success_count}件")
+        click.echo(f"  - 処理総数: {len(masters)}件")
+        click.echo(f"  - 成功: {success_count}件（言及{updated_mentions}件に反映）")
         click.echo(f"  - 失敗: {failed_count}件")
-        click.echo(f"  - 成功率: {success_count/len(places)*100:.1f}%")
+        click.echo(f"  - 成功率: {success_count/len(masters)*100:.1f}%")
+        self._print_cache_hits()
         
         return {
-            "total": len(places),
+            "total": len(masters),
             "success": success_count,
-            "failed": failed_count
+            "failed": failed_count,
+            "mentions": updated_mentions
         }
     
     def test_geocoder(self, place_names: List[str]) -> None:
@@ -95,6 +119,32 @@ class GeocodeManager:
         click.echo(f"  - 成功: {stats['successful']}")
         click.echo(f"  - 失敗: {stats['failed']}")
         click.echo(f"  - 成功率: {stats['success_rate']*100:.1f}%")
+        self._print_cache_hits()
+    
+    def _print_cache_hits(self) -> None:
+        """キャッシュのヒット率を表示"""
+        stats = self.geocoder.get_cache_stats()
+        click.echo(f"  - キャッシュヒット: {stats['hits']}件 / ミス: {stats['misses']}件 "
+                   f"(ヒット率 {stats['hit_rate']*100:.1f}%)")
+        if self.gazetteer is not None:
+            click.echo(f"  - 地名辞書ヒット: {stats['gazetteer_hits']}件")
+    
+    def warm_cache_from_db(self) -> int:
+        """データベースに登録済みの座標で永続キャッシュを初期化（既存エントリは上書きしない）"""
+        masters = self.db.get_place_masters_with_coordinates()
+        added = self.cache.put_many(
+            ((master.place_name, GeocodingResult(
+                place_name=master.place_name,
+                lat=master.lat,
+                lng=master.lng,
+                confidence=master.geocode_confidence or 0.0,
+                source=master.geocode_source or "database"
+            )) for master in masters),
+            overwrite=False
+        )
+        
+        click.echo(f"🔥 キャッシュ初期化: 座標付き地名{len(masters)}件中 {added}件を追加")
+        return added
     
     def show_coordinates_status(self) -> None:
         """座標設定状況を表示"""
@@ -104,6 +154,7 @@ class GeocodeManager:
         
         click.echo("🗺️  座標設定状況:")
         click.echo(f"  - 総地名数: {total_places}")
+        click.echo(f"  - ユニーク地名数: {self.db.get_place_master_count()}")
         click.echo(f"  - 座標設定済み: {places_with_coords}")
         click.echo(f"  - 座標未設定: {places_without_coords}")
         
@@ -124,12 +175,22 @@ class GeocodeManager:
 @click.option('--limit', type=int, help='処理する地名数の上限')
 @click.option('--test', help='テスト用地名（カンマ区切り）')
 @click.option('--status', is_flag=True, help='座標設定状況を表示')
-def geocode(all: bool, limit: int, test: str, status: bool):
+@click.option('--warm-from-db', is_flag=True, help='登録済みの座標でジオコーディングキャッシュを初期化')
+@click.option('--workers', type=int, default=8, help='同時実行数')
+@click.option('--google-rate', type=float, default=50.0, help='Google Maps API の毎秒リクエスト数上限')
+@click.option('--nominatim-rate', type=float, default=1.0, help='Nominatim の毎秒リクエスト数上限')
+@click.option('--gazetteer', default='data/gazetteer/JP.txt', help='ローカル地名辞書（GeoNames TSV / CSV）')
+def geocode(all: bool, limit: int, test: str, status: bool, warm_from_db: bool,
+            workers: int, google_rate: float, nominatim_rate: float, gazetteer: str):
     """🌍 ジオコーディングコマンド"""
     
-    manager = GeocodeManager()
+    manager = GeocodeManager(gazetteer_path=gazetteer, workers=workers,
+                             google_rate=google_rate, nominatim_rate=nominatim_rate)
     
-    if status:
+    if warm_from_db:
+        manager.warm_cache_from_db()
+        
+    elif status:
         # 座標設定状況を表示
         manager.show_coordinates_status()
         
@@ -148,6 +209,7 @@ def geocode(all: bool, limit: int, test: str, status: bool):
         click.echo("  --all                       # 全地名をジオコーディング")
         click.echo("  --limit 10                  # 最大10件をジオコーディング")
         click.echo("  --test '東京,京都,松山市'     # テスト実行")
+        click.echo("  --warm-from-db              # 登録済み座標でキャッシュ初期化")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ジョブコマンド
+取り込みジョブ（pipeline run / expand --places）の進捗・残り時間・失敗した作品の表示
+"""
+
+import time
+import click
+from bungo_map.core.database import init_db
+from bungo_map.core.jobs import COMPLETED, INCOMPLETE, INTERRUPTED, RUNNING, JobLedger
+
+
+STATUS_LABELS = {
+    RUNNING: '🏃 実行中',
+    COMPLETED: '✅ 完了',
+    INCOMPLETE: '⚠️ 失敗あり',
+    INTERRUPTED: '⏸️ 中断',
+}
+
+STAGE_LABELS = {'download': 'ダウンロード', 'extract': '正規化・抽出', 'write': '書き込み'}
+
+
+@click.group()
+def jobs():
+    """🗂️ 取り込みジョブ"""
+    pass
+
+
+def format_duration(seconds: float) -> str:
+    """秒数を「1時間2分」「3分4秒」の形式に"""
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}時間{minutes}分"
+    if minutes:
+        return f"{minutes}分{seconds}秒"
+    return f"{seconds}秒"
+
+
+def format_time(timestamp: float) -> str:
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def progress_line(progress, width: int = 20) -> str:
+    """進捗バー・件数・残り時間の1行表示"""
+    filled = int(width * progress.percent / 100)
+    line = (f"[{'█' * filled}{'░' * (width - filled)}] {progress.completed}/{progress.total}作品 "
+            f"({progress.percent:.1f}%)")
+    if progress.failed:
+        line += f"  失敗 {progress.failed}件"
+    if progress.eta_seconds is not None:
+        line += f"  残り約 {format_duration(progress.eta_seconds)} ({progress.rate * 60:.1f}作品/分)"
+    return line
+
+
+@jobs.command()
+@click.argument('job_id', type=int, required=False)
+@click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
+@click.option('--limit', type=int, default=10, help='表示するジョブ数（ジョブID省略時）')
+def status(job_id: int, db_path: str, limit: int):
+    """ジョブの進捗と残り時間（ジョブID指定時は段ごとの内訳と失敗した作品）"""
+    ledger = JobLedger(init_db(db_path))
+
+    if job_id is None:
+        jobs_list = ledger.list_jobs(limit)
+        if not jobs_list:
+            click.echo("📭 ジョブはまだありません")
+            return
+        click.echo("🗂️ 取り込みジョブ:")
+        for progress in jobs_list:
+            click.echo(f"  #{progress.job_id:<4} {progress.name:<16} {STATUS_LABELS.get(progress.status, progress.status)}"
+                       f"  {progress_line(progress)}  (更新 {format_time(progress.updated_at)})")
+        return
+
+    progress = ledger.get_progress(job_id)
+    if progress is None:
+        click.echo(f"❌ ジョブが見つかりません: #{job_id}")
+        return
+
+    click.echo(f"🗂️ ジョブ #{progress.job_id} {progress.name} {STATUS_LABELS.get(progress.status, progress.status)}")
+    if progress.params:
+        click.echo("  条件: " + ", ".join(f"{key}={value}" for key, value in progress.params.items()))
+    click.echo(f"  開始: {format_time(progress.created_at)} / 更新: {format_time(progress.updated_at)}")
+    click.echo(f"  {progress_line(progress)}")
+
+    click.echo("📊 段ごとの作品数:")
+    for (stage, stage_status), count in sorted(progress.stages.items()):
+        click.echo(f"  {STAGE_LABELS.get(stage, stage):<8} {stage_status:<8} {count:>5}件")
+
+    failed = ledger.get_failed_items(job_id)
+    if failed:
+        click.echo("❌ 失敗した作品（再実行で再試行）:")
+        for item in failed:
+            click.echo(f"  {item['title'] or item['work_id']} [{STAGE_LABELS.get(item['stage'], item['stage'])}] "
+                       f"試行{item['attempts']}回: {item['error']}")
+
+
+if __name__ == "__main__":
+    jobs()
@@ -6,9 +6,20 @@
 
 import click
 from bungo_map.core.database import init_db
+from bungo_map.core.migrations import MigrationRequiredError
 
 
-@click.group()
+class BungoGroup(click.Group):
+    """マイグレーションが必要なデータベースを開いたときはトレースバックではなく案内を表示"""
+
+    def invoke(self, ctx):
+        try:
+            return super().invoke(ctx)
+        except MigrationRequiredError as e:
+            raise click.ClickException(str(e))
+
+
+@click.group(cls=BungoGroup)
 @click.version_option(version="2.0.0")
 def main():
     """🌟 文豪ゆかり地図システム v2.0"""
@@ -63,6 +74,26 @@ from .search import search
 # 検索機能をメインCLIに追加
 main.add_command(search)
 
+# データベース管理コマンドを追加
+from .db import db
+main.add_command(db)
+
+# 取り込みパイプラインコマンドを追加
+from .pipeline import pipeline
+main.add_command(pipeline)
+
+# ジョブコマンドを追加
+from .jobs import jobs
+main.add_command(jobs)
+
+# テキストキャッシュ管理コマンドを追加
+from .cache import cache
+main.add_command(cache)
+
+# 青空文庫カタログコマンドを追加
+from .catalog import catalog
+main.add_command(catalog)
+
 
 @main.command()
 @click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
@@ -117,13 +148,23 @@ def export(export_format: str, output: str, preview: bool, sample: bool):
 @click.option('--limit', type=int, help='処理する地名数の上限')
 @click.option('--test', help='テスト用地名（カンマ区切り）')
 @click.option('--status', is_flag=True, help='座標設定状況を表示')
-def geocode(all: bool, limit: int, test: str, status: bool):
+@click.option('--warm-from-db', is_flag=True, help='登録済みの座標でジオコーディングキャッシュを初期化')
+@click.option('--workers', type=int, default=8, help='同時実行数')
+@click.option('--google-rate', type=float, default=50.0, help='Google Maps API の毎秒リクエスト数上限')
+@click.option('--nominatim-rate', type=float, default=1.0, help='Nominatim の毎秒リクエスト数上限')
+@click.option('--gazetteer', default='data/gazetteer/JP.txt', help='ローカル地名辞書（GeoNames TSV / CSV）')
+def geocode(all: bool, limit: int, test: str, status: bool, warm_from_db: bool,
+            workers: int, google_rate: float, nominatim_rate: float, gazetteer: str):
     """🌍 ジオコーディング"""
     from bungo_map.cli.geocode import GeocodeManager
     
-    manager = GeocodeManager()
+    manager = GeocodeManager(gazetteer_path=gazetteer, workers=workers,
+                             google_rate=google_rate, nominatim_rate=nominatim_rate)
     
-    if status:
+    if warm_from_db:
+        manager.warm_cache_from_db()
+        
+    elif status:
         # 座標設定状況を表示
         manager.show_coordinates_status()
         
@@ -142,6 +183,7 @@ def geocode(all: bool, limit: int, test: str, status: bool):
         click.echo("  --all                       # 全地名をジオコーディング")
         click.echo("  --limit 10                  # 最大10件をジオコーディング")
         click.echo("  --test '東京,京都,松山市'     # テスト実行")
+        click.echo("  --warm-from-db              # 登録済み座標でキャッシュ初期化")
 
 
 @main.command()
@@ -149,13 +191,26 @@ def geocode(all: bool, limit: int, test: str, status: bool):
 @click.option('--test-mode', is_flag=True, help='テストモード（少量データで実行）')
 @click.option('--test-wikipedia', is_flag=True, help='Wikipedia抽出テスト')
 @click.option('--test-aozora', is_flag=True, help='青空文庫抽出テスト')
-def expand(target: int, test_mode: bool, test_wikipedia: bool, test_aozora: bool):
+@click.option('--places', 'places_author', help='地名データを拡充する作者名')
+@click.option('--force', is_flag=True, help='地名登録済みの作品も全て再抽出（--places用）')
+@click.option('--incremental', is_flag=True, help='本文か抽出器が変わった作品だけ再抽出（--places用）')
+@click.option('--fresh', is_flag=True, help='未完了のジョブを再開せず最初から実行（--places用）')
+def expand(target: int, test_mode: bool, test_wikipedia: bool, test_aozora: bool,
+           places_author: str, force: bool, incremental: bool, fresh: bool):
     """🚀 データ拡充（Wikipedia・青空文庫）"""
     from bungo_map.cli.expand import DataExpansionEngine
     
     engine = DataExpansionEngine()
     
-    if test_wikipedia:
+    if places_author:
+        result = engine.expand_places_for_author(places_author, force_update=force, incremental=incremental,
+                                                 resume=not fresh)
+        if result.get('status') == 'author_not_found':
+            click.echo(f"❌ 作者が見つかりません: {places_author}")
+        else:
+            click.echo(f"✅ 地名拡充完了: {result['works_extracted']}作品を再抽出, "
+                      f"{result['total_places_added']}箇所登録")
+    elif test_wikipedia:
         # Wikipedia抽出テスト
         engine.test_wikipedia_extraction()
     elif test_aozora:
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取り込みパイプラインコマンド
+青空文庫テキストのダウンロード・地名抽出・保存を段階並列で実行
+"""
+
+import click
+from bungo_map.core.database import init_db
+
+
+@click.group()
+def pipeline():
+    """🏭 取り込みパイプライン"""
+    pass
+
+
+def print_stats(stats) -> None:
+    """段ごとの処理件数・スループット"""
+    labels = {'download': 'ダウンロード', 'extract': '正規化・抽出', 'write': '書き込み'}
+    click.echo("📊 段ごとの処理状況:")
+    for name, stage in stats.stages.items():
+        click.echo(f"  {labels[name]:<8} {stage.items:>5}件 (失敗 {stage.failures}件)  "
+                   f"{stage.throughput:>7.2f} 件/秒  処理時間 {stage.busy_seconds:.1f}秒")
+    for item, stage, error in stats.failed:
+        click.echo(f"  ❌ {item.title} [{labels[stage]}]: {error}")
+    if stats.given_up:
+        click.echo(f"  ⛔ 試行回数の上限に達した作品: {len(stats.given_up)}件（--fresh で新しいジョブとして再実行）")
+
+
+@pipeline.command()
+@click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
+@click.option('--author', 'authors', multiple=True, help='対象の作者名（複数指定可、省略時は全作者）')
+@click.option('--sample', is_flag=True, help='サンプル作品を登録して取り込む')
+@click.option('--download-workers', type=int, default=4, help='ダウンロードのスレッド数')
+@click.option('--process-workers', type=int, default=None, help='抽出のプロセス数（既定: CPU数、0: 同一プロセス）')
+@click.option('--queue-size', type=int, default=8, help='段間キューの上限')
+@click.option('--batch-size', type=int, default=8, help='1トランザクションで書き込む作品数')
+@click.option('--no-ginza', is_flag=True, help='GiNZA を使わず正規表現の抽出器のみ使用')
+@click.option('--incremental', is_flag=True, help='本文か抽出器が変わった作品だけ地名を差し替え')
+@click.option('--fresh', is_flag=True, help='未完了のジョブを再開せず新しいジョブとして実行')
+@click.option('--max-attempts', type=int, default=3, help='作品ごとの失敗回数の上限（達した作品は再試行しない）')
+def run(db_path: str, authors, sample: bool, download_workers: int, process_workers: int,
+        queue_size: int, batch_size: int, no_ginza: bool, incremental: bool, fresh: bool, max_attempts: int):
+    """青空文庫URLが登録された作品を取り込む（中断・失敗したジョブは未完了の作品から再開）"""
+    from bungo_map.extractors.aozora_extractor import AozoraExtractor
+    from bungo_map.pipeline import (
+        IngestionPipeline, default_extractors, register_works, simple_extractors, works_from_db
+    )
+
+    db = init_db(db_path)
+    if sample:
+        register_works(db, AozoraExtractor().get_sample_works())
+    items = works_from_db(db, authors, incremental=incremental)
+    if not items:
+        click.echo("❌ 青空文庫URLが登録された作品がありません（--sample でサンプル作品を登録）")
+        return
+
+    engine = IngestionPipeline(
+        db,
+        extractor_factory=simple_extractors if no_ginza else default_extractors,
+        download_workers=download_workers,
+        process_workers=process_workers,
+        queue_size=queue_size,
+        write_batch_size=batch_size,
+    )
+    click.echo(f"🚀 パイプライン開始: {len(items)}作品 (ダウンロード {engine.download_workers}スレッド, "
+               f"抽出 {engine.process_workers}プロセス)")
+    params = {'authors': sorted(authors), 'incremental': incremental, 'ginza': not no_ginza}
+    stats = engine.run_job('pipeline', items, params, resume=not fresh, max_attempts=max_attempts)
+
+    click.echo(f"🎉 ジョブ #{stats.job_id} 完了: {stats.stages['write'].items}作品, {stats.places}地名 "
+               f"(変更なし {stats.unchanged}作品, 失敗 {len(stats.failed)}作品), {stats.elapsed:.1f}秒")
+    print_stats(stats)
+
+
+@pipeline.command('import-archive')
+@click.argument('source', type=click.Path(exists=True))
+@click.option('--db-path', default='data/bungo_production.db', help='データベースファイルのパス')
+@click.option('--limit', type=int, default=None, help='取り込む作品数の上限')
+@click.option('--process-workers', type=int, default=None, help='抽出のプロセス数（既定: CPU数、0: 同一プロセス）')
+@click.option('--queue-size', type=int, default=8, help='段間キューの上限')
+@click.option('--batch-size', type=int, default=32, help='1トランザクションで書き込む作品数')
+@click.option('--no-ginza', is_flag=True, help='GiNZA を使わず正規表現の抽出器のみ使用')
+@click.option('--fresh', is_flag=True, help='未完了のジョブを再開せず新しいジョブとして実行')
+def import_archive(source: str, db_path: str, limit: int, process_workers: int, queue_size: int,
+                   batch_size: int, no_ginza: bool, fresh: bool):
+    """青空文庫アーカイブ（aozorabunko のクローン・ZIP）から通信せずに取り込む"""
+    import os
+    from bungo_map.pipeline import (
+        ArchiveFetcher, IngestionPipeline, default_extractors, register_archive, scan_archive, simple_extractors
+    )
+
+    click.echo(f"🔍 アーカイブを走査中: {source}")
+    works = scan_archive(source, limit=limit)
+    if not works:
+        click.echo("❌ 作品のZIPが見つかりません（cards/*/files/*.zip）")
+        return
+
+    db = init_db(db_path)
+    items = register_archive(db, works)
+    click.echo(f"📚 {len(items)}作品を登録")
+
+    engine = IngestionPipeline(
+        db,
+        fetcher=ArchiveFetcher(works),
+        extractor_factory=simple_extractors if no_ginza else default_extractors,
+        process_workers=process_workers,
+        queue_size=queue_size,
+        write_batch_size=batch_size,
+    )
+    click.echo(f"🚀 取り込み開始 (抽出 {engine.process_workers}プロセス)")
+    params = {'source': os.path.abspath(source), 'limit': limit, 'ginza': not no_ginza}
+    stats = engine.run_job('archive', items, params, resume=not fresh)
+
+    click.echo(f"🎉 ジョブ #{stats.job_id} 完了: {stats.stages['write'].items}作品, {stats.places}地名 "
+               f"(失敗 {len(stats.failed)}作品), {stats.elapsed:.1f}秒")
+    print_stats(stats)
+
+
+if __name__ == "__main__":
+    pipeline()
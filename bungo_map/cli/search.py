@@ -34,11 +34,8 @@ class BungoSearchEngine:
         # 作者検索（部分一致）
         authors = self.db.search_authors(query, limit)
         
-        # 該当作者の作品一覧取得
-        works = []
-        for author in authors:
-            author_works = self.db.get_works_by_author(author['author_id'])
-            works.extend(author_works)
+        # 該当作者の作品一覧を一括取得
+        works = self.db.get_works_by_authors(author['author_id'] for author in authors)
         
         execution_time = time.time() - start_time
         
@@ -61,11 +58,8 @@ class BungoSearchEngine:
         # 作品検索（部分一致）
         works = self.db.search_works(query, limit)
         
-        # 該当作品の地名一覧取得
-        places = []
-        for work in works:
-            work_places = self.db.get_places_by_work(work['work_id'])
-            places.extend(work_places)
+        # 該当作品の地名一覧を一括取得
+        places = self.db.get_places_by_works(work['work_id'] for work in works)
         
         execution_time = time.time() - start_time
         
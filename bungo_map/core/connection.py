@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite接続管理
+接続プールによる長寿命接続の再利用とPRAGMAチューニング
+"""
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+
+# 既定のPRAGMA設定（WAL + 書き込み同期の緩和 + ページキャッシュ拡大）
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,       # 負値はKiB単位（約20MB）
+    'mmap_size': 268435456,     # 256MB
+    'temp_store': 'MEMORY',
+}
+
+
+class ConnectionManager:
+    """SQLite接続プール
+
+    各スレッドは使用中の接続を1本だけ保持し（入れ子のget_connectionは同じ接続を返す）、
+    最外側のコンテキスト終了時に接続をプールへ返却する。プールに保持する
+    アイドル接続数は pool_size で上限を設ける。
+    """
+
+    def __init__(self, db_path: Union[str, Path], pool_size: int = 5,
+                 pragmas: Optional[Dict[str, Any]] = None, timeout: float = 30.0,
+                 on_connect: Optional[Callable[[sqlite3.Connection], None]] = None):
+        """
+        初期化
+
+        Args:
+            db_path: データベースファイルパス
+            pool_size: プールに保持するアイドル接続の上限
+            pragmas: 既定値を上書きするPRAGMA設定
+            timeout: ロック待ちタイムアウト（秒）
+            on_connect: 新規接続ごとに呼ばれる初期化処理（SQL関数の登録など）
+        """
+        self.db_path = str(db_path)
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self.on_connect = on_connect
+        self.pragmas = dict(DEFAULT_PRAGMAS)
+        if pragmas:
+            self.pragmas.update(pragmas)
+
+        self._idle: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'opened': 0, 'reused': 0, 'closed': 0}
+
+    def _open(self) -> sqlite3.Connection:
+        """新規接続を作成してPRAGMAを適用"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        if self.on_connect:
+            self.on_connect(conn)
+        return conn
+
+    def _acquire(self) -> sqlite3.Connection:
+        """プールから接続を取得（なければ新規作成）"""
+        with self._lock:
+            if self._idle:
+                self._stats['reused'] += 1
+                return self._idle.pop()
+            self._stats['opened'] += 1
+        return self._open()
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        """接続をプールへ返却"""
+        # コミットされなかった変更は従来通り破棄する
+        if conn.in_transaction:
+            conn.rollback()
+
+        with self._lock:
+            if len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+            self._stats['closed'] += 1
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """接続を貸し出すコンテキストマネージャー"""
+        local = self._local
+        conn = getattr(local, 'conn', None)
+
+        # 同一スレッド内の入れ子呼び出しは同じ接続を共有
+        if conn is not None:
+            yield conn
+            return
+
+        conn = self._acquire()
+        local.conn = conn
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            local.conn = None
+            self._release(conn)
+
+    def close(self) -> None:
+        """アイドル接続を全てクローズ（以降の利用時は再接続される）"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats['closed'] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """接続統計情報"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        total = stats['opened'] + stats['reused']
+        stats['reuse_rate'] = stats['reused'] / total if total > 0 else 0.0
+        return stats
@@ -8,19 +8,64 @@ SQLiteをメインとした3階層データ管理
 import sqlite3
 import os
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from itertools import islice
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from contextlib import contextmanager
 
-from bungo_map.core.models import Author, Work, Place
+from bungo_map.core.connection import ConnectionManager
+from bungo_map.core.fulltext import ensure_fulltext_index, rebuild_fulltext_index, build_match_query
+from bungo_map.core.gazetteer import normalize_place_name, register_sql_functions
+from bungo_map.core.spatial import (
+    RTREE_TABLE, ensure_spatial_index, rebuild_spatial_index, haversine_m, radius_bbox, longitude_ranges
+)
+from bungo_map.core.migrations import (
+    MigrationRequiredError, migrate, get_schema_version, get_applied_migrations, has_legacy_places,
+    pending_migrations
+)
+from bungo_map.core.models import Author, Work, Place, PlaceMaster
+
+
+# CTEの MATERIALIZED 指定は SQLite 3.35 以降（それより前は指定なし。結果は同じで実行計画のみ異なる）
+_MATERIALIZED = 'MATERIALIZED' if sqlite3.sqlite_version_info >= (3, 35, 0) else ''
+
+
+def _batched(items: Iterable, size: int) -> Iterator[List]:
+    """イテラブルを size 件ずつのリストに分割"""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+_MENTION_COLUMNS = """work_id, master_id, place_name, before_text, sentence, after_text,
+                      aozora_url, char_start, char_end, confidence, extraction_method"""
+_MENTION_PLACEHOLDERS = ', '.join('?' * 11)
+
+
+def _mention_row(place: Place, master_id: int) -> tuple:
+    """place_mentions への挿入値"""
+    return (place.work_id, master_id, place.place_name, place.before_text, place.sentence,
+            place.after_text, place.aozora_url, place.char_start, place.char_end,
+            place.confidence, place.extraction_method)
 
 
 class Database:
     """文豪データベース管理クラス"""
     
-    def __init__(self, db_path: str = "data/bungo_production.db"):
+    def __init__(self, db_path: str = "data/bungo_production.db", pool_size: int = 5,
+                 pragmas: Optional[Dict[str, Any]] = None, auto_migrate: bool = True):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(exist_ok=True)
-        self._init_tables()
+        self.pool = ConnectionManager(self.db_path, pool_size=pool_size, pragmas=pragmas,
+                                      on_connect=register_sql_functions)
+        self.auto_migrate = auto_migrate
+        try:
+            self._init_tables()
+        except MigrationRequiredError:
+            self.pool.close()
+            raise
     
     def _init_tables(self):
         """テーブル初期化"""
@@ -52,7 +97,7 @@ class Database:
             )
             """)
             
-            # places テーブル
+            # places テーブル（マイグレーション5で place_master / place_mentions に分割され互換ビューになる）
             conn.execute("""
             CREATE TABLE IF NOT EXISTS places (
                 place_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -72,16 +117,68 @@ class Database:
             """)
             
             conn.commit()
+            
+            # インデックス・全文検索・空間インデックスはマイグレーションで管理
+            # 既存の地名を移し替える破壊的な手順は、データがあれば bungo db migrate で明示的に適用する
+            # （読み書きとも分割後のスキーマが前提のため、未適用のまま開かずにエラーにする）
+            if self.auto_migrate:
+                migrate(conn, allow_destructive=not has_legacy_places(conn))
+                pending = pending_migrations(conn)
+                if pending:
+                    names = '、'.join(f"{m.version:03d} {m.description}" for m in pending)
+                    raise MigrationRequiredError(
+                        f"未適用のマイグレーションがあります（{names}）。"
+                        f"`bungo db migrate --db-path {self.db_path}` で適用してください（適用前にバックアップを作成します）"
+                    )
+            self._detect_features(conn)
+    
+    def _detect_features(self, conn):
+        """全文検索・空間インデックスの有無を確認"""
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.fts_enabled = 'places_fts' in tables
+        self.spatial_enabled = RTREE_TABLE in tables
+    
+    def migrate(self, target: Optional[int] = None, on_apply=None) -> List[Any]:
+        """未適用のスキーママイグレーションを適用"""
+        with self.get_connection() as conn:
+            applied = migrate(conn, target=target, on_apply=on_apply)
+            self._detect_features(conn)
+            return applied
+    
+    def backup(self, dest_path: str) -> str:
+        """データベースのバックアップを作成（SQLiteのオンラインバックアップ）"""
+        with self.get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            dest = sqlite3.connect(dest_path)
+            try:
+                conn.backup(dest)
+            finally:
+                dest.close()
+        return dest_path
+    
+    def get_schema_status(self) -> Dict[str, Any]:
+        """スキーマバージョンと適用済み・未適用のマイグレーション"""
+        with self.get_connection() as conn:
+            return {
+                'version': get_schema_version(conn),
+                'applied': get_applied_migrations(conn),
+                'pending': pending_migrations(conn),
+            }
     
     @contextmanager
     def get_connection(self):
-        """データベース接続コンテキストマネージャー"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        try:
+        """データベース接続コンテキストマネージャー（プールから貸し出し）"""
+        with self.pool.connection() as conn:
             yield conn
-        finally:
-            conn.close()
+    
+    def close(self):
+        """プール中の接続をクローズ"""
+        self.pool.close()
+    
+    def get_connection_stats(self) -> Dict[str, Any]:
+        """接続プール統計（新規接続数・再利用数）"""
+        return self.pool.get_stats()
     
     def insert_author(self, author: Author) -> int:
         """作者挿入"""
@@ -93,7 +190,8 @@ class Database:
             )
             conn.commit()
             
-            if cursor.lastrowid:
+            # 接続は再利用されるため lastrowid ではなく挿入件数で判定する
+            if cursor.rowcount == 1:
                 return cursor.lastrowid
             
             # 既存作者のIDを取得
@@ -111,7 +209,7 @@ class Database:
             )
             conn.commit()
             
-            if cursor.lastrowid:
+            if cursor.rowcount == 1:
                 return cursor.lastrowid
             
             # 既存作品のIDを取得
@@ -123,20 +221,194 @@ class Database:
             return result[0] if result else None
     
     def insert_place(self, place: Place) -> int:
-        """地名挿入"""
+        """地名挿入（地名マスタへの登録と言及の追加）"""
         with self.get_connection() as conn:
+            master_id = self._resolve_master_ids(conn, [place])[0]
+            # places はビューのため lastrowid が取れるよう実テーブルへ書き込む
             cursor = conn.execute(
-                """INSERT OR REPLACE INTO places 
-                   (work_id, place_name, lat, lng, before_text, sentence, after_text, 
-                    aozora_url, confidence, extraction_method)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (place.work_id, place.place_name, place.lat, place.lng, 
-                 place.before_text, place.sentence, place.after_text,
-                 place.aozora_url, place.confidence, place.extraction_method)
+                f"INSERT INTO place_mentions ({_MENTION_COLUMNS}) VALUES ({_MENTION_PLACEHOLDERS})",
+                _mention_row(place, master_id)
             )
             conn.commit()
             return cursor.lastrowid
     
+    def _resolve_master_ids(self, conn, places: List[Place]) -> List[int]:
+        """地名を正規化名で地名マスタに登録し、各地名の master_id を返す"""
+        keys = [normalize_place_name(p.place_name) for p in places]
+        
+        first = {}
+        for key, place in zip(keys, places):
+            first.setdefault(key, place)
+        conn.executemany(
+            "INSERT OR IGNORE INTO place_master (place_name, normalized_name) VALUES (?, ?)",
+            [(place.place_name, key) for key, place in first.items()]
+        )
+        
+        # 座標付きで登録された地名は、マスタが未設定なら最初の座標を採用
+        with_coords = {}
+        for key, place in zip(keys, places):
+            if place.lat is not None and place.lng is not None:
+                with_coords.setdefault(key, place)
+        if with_coords:
+            conn.executemany(
+                """UPDATE place_master SET lat = ?, lng = ?, geocode_source = 'extraction'
+                   WHERE normalized_name = ? AND lat IS NULL""",
+                [(place.lat, place.lng, key) for key, place in with_coords.items()]
+            )
+        
+        id_map = {}
+        for batch in _batched(first, 500):
+            placeholders = ','.join('?' * len(batch))
+            cursor = conn.execute(
+                f"SELECT normalized_name, master_id FROM place_master WHERE normalized_name IN ({placeholders})",
+                batch
+            )
+            id_map.update(cursor.fetchall())
+        return [id_map[key] for key in keys]
+    
+    # ===========================================
+    # 一括挿入メソッド（単一トランザクション）
+    # ===========================================
+    
+    def insert_authors_bulk(self, authors: Iterable[Author], batch_size: int = 1000) -> List[int]:
+        """作者一括挿入（既存作者は既存IDを返す）"""
+        author_ids = []
+        with self.get_connection() as conn:
+            for batch in _batched(authors, batch_size):
+                conn.executemany(
+                    """INSERT OR IGNORE INTO authors (name, wikipedia_url, birth_year, death_year)
+                       VALUES (?, ?, ?, ?)""",
+                    [(a.name, a.wikipedia_url, a.birth_year, a.death_year) for a in batch]
+                )
+                
+                names = list({a.name for a in batch})
+                placeholders = ','.join('?' * len(names))
+                cursor = conn.execute(
+                    f"SELECT name, author_id FROM authors WHERE name IN ({placeholders})", names
+                )
+                id_map = dict(cursor.fetchall())
+                author_ids.extend(id_map.get(a.name) for a in batch)
+            
+            conn.commit()
+        return author_ids
+    
+    def insert_works_bulk(self, works: Iterable[Work], batch_size: int = 1000) -> List[int]:
+        """作品一括挿入（既存作品は既存IDを返す）"""
+        work_ids = []
+        with self.get_connection() as conn:
+            for batch in _batched(works, batch_size):
+                conn.executemany(
+                    """INSERT OR IGNORE INTO works (author_id, title, wiki_url, aozora_url, content)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    [(w.author_id, w.title, w.wiki_url, w.aozora_url, w.content) for w in batch]
+                )
+                
+                keys = list({(w.author_id, w.title) for w in batch})
+                placeholders = ','.join(['(?, ?)'] * len(keys))
+                params = [value for key in keys for value in key]
+                cursor = conn.execute(
+                    f"""SELECT author_id, title, work_id FROM works
+                        WHERE (author_id, title) IN (VALUES {placeholders})""",
+                    params
+                )
+                id_map = {(row[0], row[1]): row[2] for row in cursor.fetchall()}
+                work_ids.extend(id_map.get((w.author_id, w.title)) for w in batch)
+            
+            conn.commit()
+        return work_ids
+    
+    def insert_places_bulk(self, places: Iterable[Place], batch_size: int = 1000) -> List[int]:
+        """地名一括挿入（挿入順のplace_idを返す）"""
+        with self.get_connection() as conn:
+            place_ids = self._insert_mentions(conn, places, batch_size)
+            conn.commit()
+        return place_ids
+    
+    def _insert_mentions(self, conn, places: Iterable[Place], batch_size: int = 1000) -> List[int]:
+        """地名言及を挿入して挿入順のplace_idを返す（コミットは呼び出し側）"""
+        place_ids = []
+        for batch in _batched(places, batch_size):
+            master_ids = self._resolve_master_ids(conn, batch)
+            conn.executemany(
+                f"INSERT INTO place_mentions ({_MENTION_COLUMNS}) VALUES ({_MENTION_PLACEHOLDERS})",
+                [_mention_row(p, master_id) for p, master_id in zip(batch, master_ids)]
+            )
+            
+            # 書き込みロック保持中のAUTOINCREMENTは連番になる
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+            place_ids.extend(range(last_id - len(batch) + 1, last_id + 1))
+        return place_ids
+    
+    def replace_work_places(self, work_id: int, places: Iterable[Place],
+                            content_hash: Optional[str] = None,
+                            extractor_version: Optional[str] = None) -> List[int]:
+        """
+        作品の地名を差し替え
+        
+        既存の言及の削除・新しい言及の挿入・作品のフィンガープリント更新を1トランザクションで行い、
+        途中で失敗した場合は元の地名が残る。地名マスタ（座標）は削除しない。
+        
+        Returns:
+            List[int]: 挿入順のplace_id
+        """
+        return self.replace_works_places([(work_id, places, content_hash, extractor_version)])[0]
+    
+    def replace_works_places(self, entries: Iterable[Tuple[int, Iterable[Place], Optional[str], Optional[str]]]
+                             ) -> List[List[int]]:
+        """
+        複数作品の地名を1トランザクションで差し替え
+        
+        Args:
+            entries: (work_id, 地名, 本文ハッシュ, 抽出器バージョン) のイテラブル
+            
+        Returns:
+            List[List[int]]: 作品ごとの挿入順のplace_id
+        """
+        entries = [(work_id, list(places), content_hash, version)
+                   for work_id, places, content_hash, version in entries]
+        for work_id, places, _, _ in entries:
+            if any(place.work_id != work_id for place in places):
+                raise ValueError(f"work_id が {work_id} 以外の地名が含まれています")
+        
+        with self.get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                work_ids = [(entry[0],) for entry in entries]
+                conn.executemany("DELETE FROM place_mentions WHERE work_id = ?", work_ids)
+                inserted = self._insert_mentions(conn, (place for entry in entries for place in entry[1]))
+                conn.executemany(
+                    """UPDATE works SET content_hash = ?, extractor_version = ?, extracted_at = CURRENT_TIMESTAMP
+                       WHERE work_id = ?""",
+                    [(content_hash, version, work_id) for work_id, _, content_hash, version in entries]
+                )
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        
+        place_ids = []
+        position = 0
+        for _, places, _, _ in entries:
+            place_ids.append(inserted[position:position + len(places)])
+            position += len(places)
+        return place_ids
+    
+    def get_work_fingerprints(self, work_ids: Iterable[int], batch_size: int = 500) -> Dict[int, Tuple[Optional[str], Optional[str]]]:
+        """作品ごとの (本文ハッシュ, 抽出器バージョン)（未抽出の作品は含まない）"""
+        fingerprints = {}
+        with self.get_connection() as conn:
+            for batch in _batched(dict.fromkeys(work_ids), batch_size):
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(
+                    f"""SELECT work_id, content_hash, extractor_version FROM works
+                        WHERE work_id IN ({placeholders}) AND content_hash IS NOT NULL""",
+                    batch
+                )
+                fingerprints.update((row[0], (row[1], row[2])) for row in cursor.fetchall())
+        return fingerprints
+    
     def get_author_by_name(self, name: str) -> Optional[Author]:
         """作者名で検索"""
         with self.get_connection() as conn:
@@ -173,7 +445,7 @@ class Database:
         """座標が未設定の地名を取得"""
         query = """
         SELECT place_id, work_id, place_name, lat, lng, 
-               before_text, sentence, after_text, confidence
+               before_text, sentence, after_text, confidence, master_id
         FROM places 
         WHERE lat IS NULL OR lng IS NULL
         ORDER BY place_id
@@ -196,14 +468,81 @@ class Database:
                     before_text=row[5],
                     sentence=row[6],
                     after_text=row[7],
-                    confidence=row[8]
+                    confidence=row[8],
+                    master_id=row[9]
                 )
                 places.append(place)
         
         return places
     
+    # ===========================================
+    # 地名マスタ（正規化名単位の座標）
+    # ===========================================
+    
+    def get_place_master_count(self) -> int:
+        """地名マスタの件数（ユニーク地名数）"""
+        with self.get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM place_master").fetchone()[0]
+    
+    def get_place_masters_without_coordinates(self, limit: int = None) -> List[PlaceMaster]:
+        """座標が未設定の地名マスタを取得（言及数付き）"""
+        query = """
+        SELECT pm.master_id, pm.place_name, pm.normalized_name,
+               (SELECT COUNT(*) FROM place_mentions m WHERE m.master_id = pm.master_id)
+        FROM place_master pm
+        WHERE pm.lat IS NULL OR pm.lng IS NULL
+        ORDER BY pm.master_id
+        """
+        params = ()
+        if limit:
+            query += " LIMIT ?"
+            params = (limit,)
+        
+        with self.get_connection() as conn:
+            cursor = conn.execute(query, params)
+            return [PlaceMaster(master_id=row[0], place_name=row[1], normalized_name=row[2],
+                                mention_count=row[3])
+                    for row in cursor.fetchall()]
+    
+    def get_place_masters_with_coordinates(self) -> List[PlaceMaster]:
+        """座標が設定済みの地名マスタを取得"""
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                """SELECT master_id, place_name, normalized_name, lat, lng,
+                          geocode_source, geocode_confidence
+                   FROM place_master
+                   WHERE lat IS NOT NULL AND lng IS NOT NULL
+                   ORDER BY master_id"""
+            )
+            return [PlaceMaster(master_id=row[0], place_name=row[1], normalized_name=row[2],
+                                lat=row[3], lng=row[4], geocode_source=row[5],
+                                geocode_confidence=row[6])
+                    for row in cursor.fetchall()]
+    
+    def update_place_master_coordinates(self, updates: Iterable[tuple]) -> int:
+        """
+        地名マスタの座標を一括更新（同名の全言及に反映される）
+        
+        Args:
+            updates: (master_id, lat, lng, geocode_source, geocode_confidence) のイテラブル
+        
+        Returns:
+            int: 更新件数
+        """
+        with self.get_connection() as conn:
+            cursor = conn.executemany(
+                """UPDATE place_master
+                   SET lat = ?, lng = ?, geocode_source = ?, geocode_confidence = ?,
+                       geocoded_at = CURRENT_TIMESTAMP
+                   WHERE master_id = ?""",
+                [(lat, lng, source, confidence, master_id)
+                 for master_id, lat, lng, source, confidence in updates]
+            )
+            conn.commit()
+            return cursor.rowcount
+    
     def update_place(self, place: Place) -> bool:
-        """地名情報を更新"""
+        """地名情報を更新（座標は地名マスタ経由で同名の全言及に反映される）"""
         try:
             with self.get_connection() as conn:
                 query = """
@@ -237,92 +576,323 @@ class Database:
     
     def search_authors(self, query: str, limit: int = 50) -> List[Dict]:
         """作者検索（部分一致）"""
+        match = build_match_query(query) if self.fts_enabled else None
+        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT author_id, name, wikipedia_url, birth_year, death_year
-                   FROM authors 
-                   WHERE name LIKE ? 
-                   ORDER BY name
-                   LIMIT ?""",
-                (f"%{query}%", limit)
-            )
+            if match:
+                cursor = conn.execute(
+                    """SELECT a.author_id, a.name, a.wikipedia_url, a.birth_year, a.death_year
+                       FROM authors_fts f
+                       JOIN authors a ON a.author_id = f.rowid
+                       WHERE authors_fts MATCH ?
+                       ORDER BY f.rank, a.name
+                       LIMIT ?""",
+                    (match, limit)
+                )
+            else:
+                cursor = conn.execute(
+                    """SELECT author_id, name, wikipedia_url, birth_year, death_year
+                       FROM authors 
+                       WHERE name LIKE ? 
+                       ORDER BY name
+                       LIMIT ?""",
+                    (f"%{query}%", limit)
+                )
             
             columns = ['author_id', 'name', 'wikipedia_url', 'birth_year', 'death_year']
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
     def search_works(self, query: str, limit: int = 50) -> List[Dict]:
         """作品検索（部分一致）- 作者名も含む"""
+        match = build_match_query(query) if self.fts_enabled else None
+        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT w.work_id, w.author_id, w.title, w.wiki_url, w.aozora_url,
-                          a.name as author_name
-                   FROM works w
-                   JOIN authors a ON w.author_id = a.author_id
-                   WHERE w.title LIKE ? OR a.name LIKE ?
-                   ORDER BY a.name, w.title
-                   LIMIT ?""",
-                (f"%{query}%", f"%{query}%", limit)
-            )
+            if match:
+                # 作品名ヒットと作者名ヒットを統合し、最良スコア順に並べる
+                # （ヒット集合を先に確定させ、元テーブルの走査ごとのFTS評価を避ける）
+                cursor = conn.execute(
+                    f"""WITH author_hits AS {_MATERIALIZED} (
+                           SELECT rowid AS author_id, rank AS score
+                           FROM authors_fts WHERE authors_fts MATCH :q
+                       ),
+                       work_hits AS {_MATERIALIZED} (
+                           SELECT rowid AS work_id, rank AS score
+                           FROM works_fts WHERE works_fts MATCH :q
+                           UNION ALL
+                           SELECT w2.work_id, ah.score
+                           FROM author_hits ah JOIN works w2 ON w2.author_id = ah.author_id
+                       )
+                       SELECT w.work_id, w.author_id, w.title, w.wiki_url, w.aozora_url,
+                              a.name as author_name
+                       FROM (SELECT work_id, MIN(score) AS score FROM work_hits GROUP BY work_id) h
+                       JOIN works w ON w.work_id = h.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       ORDER BY h.score, a.name, w.title
+                       LIMIT :limit""",
+                    {'q': match, 'limit': limit}
+                )
+            else:
+                cursor = conn.execute(
+                    """SELECT w.work_id, w.author_id, w.title, w.wiki_url, w.aozora_url,
+                              a.name as author_name
+                       FROM works w
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE w.title LIKE ? OR a.name LIKE ?
+                       ORDER BY a.name, w.title
+                       LIMIT ?""",
+                    (f"%{query}%", f"%{query}%", limit)
+                )
             
             columns = ['work_id', 'author_id', 'title', 'wiki_url', 'aozora_url', 'author_name']
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
     def search_places(self, query: str, limit: int = 100) -> List[Dict]:
         """地名検索（部分一致）- 作者名・作品名も含む"""
+        match = build_match_query(query) if self.fts_enabled else None
+        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
-                          p.before_text, p.sentence, p.after_text, p.confidence,
-                          w.title as work_title, a.name as author_name
-                   FROM places p
-                   JOIN works w ON p.work_id = w.work_id
-                   JOIN authors a ON w.author_id = a.author_id
-                   WHERE p.place_name LIKE ? OR a.name LIKE ? OR w.title LIKE ?
-                   ORDER BY a.name, w.title, p.place_name
-                   LIMIT ?""",
-                (f"%{query}%", f"%{query}%", f"%{query}%", limit)
-            )
+            if match:
+                # 地名・作品名・作者名それぞれのヒットを統合
+                cursor = conn.execute(
+                    f"""WITH author_hits AS {_MATERIALIZED} (
+                           SELECT rowid AS author_id, rank AS score
+                           FROM authors_fts WHERE authors_fts MATCH :q
+                       ),
+                       work_hits AS {_MATERIALIZED} (
+                           SELECT rowid AS work_id, rank AS score
+                           FROM works_fts WHERE works_fts MATCH :q
+                           UNION ALL
+                           SELECT w2.work_id, ah.score
+                           FROM author_hits ah JOIN works w2 ON w2.author_id = ah.author_id
+                       ),
+                       place_hits AS {_MATERIALIZED} (
+                           SELECT rowid AS place_id, rank AS score
+                           FROM places_fts WHERE places_fts MATCH :place_q
+                           UNION ALL
+                           SELECT p2.place_id, wh.score
+                           FROM work_hits wh JOIN places p2 ON p2.work_id = wh.work_id
+                       )
+                       SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                              p.before_text, p.sentence, p.after_text, p.confidence,
+                              w.title as work_title, a.name as author_name
+                       FROM (SELECT place_id, MIN(score) AS score FROM place_hits GROUP BY place_id) h
+                       JOIN places p ON p.place_id = h.place_id
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       ORDER BY h.score, a.name, w.title, p.place_name
+                       LIMIT :limit""",
+                    {'q': match, 'place_q': build_match_query(query, 'place_name'), 'limit': limit}
+                )
+            else:
+                cursor = conn.execute(
+                    """SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                              p.before_text, p.sentence, p.after_text, p.confidence,
+                              w.title as work_title, a.name as author_name
+                       FROM places p
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE p.place_name LIKE ? OR a.name LIKE ? OR w.title LIKE ?
+                       ORDER BY a.name, w.title, p.place_name
+                       LIMIT ?""",
+                    (f"%{query}%", f"%{query}%", f"%{query}%", limit)
+                )
             
             columns = ['place_id', 'work_id', 'place_name', 'latitude', 'longitude',
                       'before_text', 'sentence', 'after_text', 'confidence',
                       'work_title', 'author_name']
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
-    def get_works_by_author(self, author_id: int) -> List[Dict]:
-        """特定作者の全作品取得"""
+    def search_place_contexts(self, query: str, limit: int = 100) -> List[Dict]:
+        """地名の文脈（文・前後文）の全文検索"""
+        match = build_match_query(query) if self.fts_enabled else None
+        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT w.work_id, w.author_id, w.title, w.wiki_url, w.aozora_url,
-                          a.name as author_name
-                   FROM works w
-                   JOIN authors a ON w.author_id = a.author_id
-                   WHERE w.author_id = ?
-                   ORDER BY w.title""",
-                (author_id,)
-            )
+            if match:
+                cursor = conn.execute(
+                    """SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                              p.before_text, p.sentence, p.after_text, p.confidence,
+                              w.title as work_title, a.name as author_name
+                       FROM places_fts f
+                       JOIN places p ON p.place_id = f.rowid
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE places_fts MATCH ?
+                       ORDER BY f.rank
+                       LIMIT ?""",
+                    (build_match_query(query, '{sentence before_text after_text}'), limit)
+                )
+            else:
+                pattern = f"%{query}%"
+                cursor = conn.execute(
+                    """SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                              p.before_text, p.sentence, p.after_text, p.confidence,
+                              w.title as work_title, a.name as author_name
+                       FROM places p
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE p.sentence LIKE ? OR p.before_text LIKE ? OR p.after_text LIKE ?
+                       ORDER BY p.place_id
+                       LIMIT ?""",
+                    (pattern, pattern, pattern, limit)
+                )
             
-            columns = ['work_id', 'author_id', 'title', 'wiki_url', 'aozora_url', 'author_name']
+            columns = ['place_id', 'work_id', 'place_name', 'latitude', 'longitude',
+                      'before_text', 'sentence', 'after_text', 'confidence',
+                      'work_title', 'author_name']
             return [dict(zip(columns, row)) for row in cursor.fetchall()]
     
+    def rebuild_search_index(self) -> Dict[str, int]:
+        """全文検索インデックスを再構築（既存データベース用）"""
+        with self.get_connection() as conn:
+            self.fts_enabled = ensure_fulltext_index(conn)
+            if not self.fts_enabled:
+                return {}
+            counts = rebuild_fulltext_index(conn)
+            conn.commit()
+            return counts
+    
+    def rebuild_spatial_index(self) -> int:
+        """空間インデックスを再構築（既存データベース用）"""
+        with self.get_connection() as conn:
+            self.spatial_enabled = ensure_spatial_index(conn)
+            if not self.spatial_enabled:
+                return 0
+            count = rebuild_spatial_index(conn)
+            conn.commit()
+            return count
+    
+    # ===========================================
+    # 空間検索メソッド（地図表示用）
+    # ===========================================
+    
+    def places_in_bbox(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                       limit: Optional[int] = 1000) -> List[Dict]:
+        """矩形範囲（地図の表示領域）内の地名取得（min_lng > max_lng は日付変更線跨ぎ）"""
+        places = []
+        with self.get_connection() as conn:
+            for lng_from, lng_to in longitude_ranges(min_lng, max_lng):
+                remaining = limit - len(places) if limit else -1
+                if remaining == 0:
+                    break
+                places.extend(self._query_bbox(conn, min_lat, lng_from, max_lat, lng_to, remaining))
+        return places
+    
+    def _query_bbox(self, conn, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                    limit: int) -> List[Dict]:
+        """矩形検索（R*Treeで候補を絞り、元の座標で厳密に判定）"""
+        if self.spatial_enabled:
+            source = f"""FROM {RTREE_TABLE} r
+                       JOIN places p ON p.master_id = r.id
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE r.max_lat >= :min_lat AND r.min_lat <= :max_lat
+                         AND r.max_lng >= :min_lng AND r.min_lng <= :max_lng
+                         AND"""
+        else:
+            source = """FROM places p
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE"""
+        
+        cursor = conn.execute(
+            f"""SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                       p.before_text, p.sentence, p.after_text, p.confidence,
+                       w.title as work_title, a.name as author_name
+                {source} p.lat BETWEEN :min_lat AND :max_lat
+                         AND p.lng BETWEEN :min_lng AND :max_lng
+                LIMIT :limit""",
+            {'min_lat': min_lat, 'max_lat': max_lat, 'min_lng': min_lng, 'max_lng': max_lng,
+             'limit': limit}
+        )
+        
+        columns = ['place_id', 'work_id', 'place_name', 'latitude', 'longitude',
+                  'before_text', 'sentence', 'after_text', 'confidence',
+                  'work_title', 'author_name']
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def places_near(self, lat: float, lng: float, radius_m: float, limit: int = 100) -> List[Dict]:
+        """指定地点から半径 radius_m メートル以内の地名を近い順に取得"""
+        min_lat, min_lng, max_lat, max_lng = radius_bbox(lat, lng, radius_m)
+        candidates = self.places_in_bbox(min_lat, min_lng, max_lat, max_lng, limit=None)
+        
+        # 矩形の角に含まれる候補を大円距離で除外
+        places = []
+        for place in candidates:
+            distance = haversine_m(lat, lng, place['latitude'], place['longitude'])
+            if distance <= radius_m:
+                place['distance_m'] = distance
+                places.append(place)
+        
+        places.sort(key=lambda place: place['distance_m'])
+        return places[:limit]
+    
+    def get_works_by_author(self, author_id: int) -> List[Dict]:
+        """特定作者の全作品取得"""
+        return self.get_works_by_authors([author_id])
+    
+    def get_works_by_authors(self, author_ids: Iterable[int], batch_size: int = 500) -> List[Dict]:
+        """
+        複数作者の作品を IN (...) でまとめて取得
+        
+        Returns:
+            List[Dict]: author_ids の順、作者内は作品名順
+        """
+        author_ids = list(dict.fromkeys(author_ids))
+        columns = ['work_id', 'author_id', 'title', 'wiki_url', 'aozora_url', 'author_name']
+        grouped = {author_id: [] for author_id in author_ids}
+        
+        with self.get_connection() as conn:
+            for batch in _batched(author_ids, batch_size):
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(
+                    f"""SELECT w.work_id, w.author_id, w.title, w.wiki_url, w.aozora_url,
+                              a.name as author_name
+                       FROM works w
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE w.author_id IN ({placeholders})
+                       ORDER BY w.title""",
+                    batch
+                )
+                for row in cursor.fetchall():
+                    grouped[row[1]].append(dict(zip(columns, row)))
+        
+        return [work for author_id in author_ids for work in grouped[author_id]]
+    
     def get_places_by_work(self, work_id: int) -> List[Dict]:
         """特定作品の全地名取得"""
+        return self.get_places_by_works([work_id])
+    
+    def get_places_by_works(self, work_ids: Iterable[int], batch_size: int = 500) -> List[Dict]:
+        """
+        複数作品の地名を IN (...) でまとめて取得
+        
+        Returns:
+            List[Dict]: work_ids の順、作品内は地名順
+        """
+        work_ids = list(dict.fromkeys(work_ids))
+        columns = ['place_id', 'work_id', 'place_name', 'latitude', 'longitude',
+                  'before_text', 'sentence', 'after_text', 'confidence',
+                  'work_title', 'author_name']
+        grouped = {work_id: [] for work_id in work_ids}
+        
         with self.get_connection() as conn:
-            cursor = conn.execute(
-                """SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
-                          p.before_text, p.sentence, p.after_text, p.confidence,
-                          w.title as work_title, a.name as author_name
-                   FROM places p
-                   JOIN works w ON p.work_id = w.work_id
-                   JOIN authors a ON w.author_id = a.author_id
-                   WHERE p.work_id = ?
-                   ORDER BY p.place_name""",
-                (work_id,)
-            )
-            
-            columns = ['place_id', 'work_id', 'place_name', 'latitude', 'longitude',
-                      'before_text', 'sentence', 'after_text', 'confidence',
-                      'work_title', 'author_name']
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            for batch in _batched(work_ids, batch_size):
+                placeholders = ','.join('?' * len(batch))
+                cursor = conn.execute(
+                    f"""SELECT p.place_id, p.work_id, p.place_name, p.lat, p.lng,
+                              p.before_text, p.sentence, p.after_text, p.confidence,
+                              w.title as work_title, a.name as author_name
+                       FROM places p
+                       JOIN works w ON p.work_id = w.work_id
+                       JOIN authors a ON w.author_id = a.author_id
+                       WHERE p.work_id IN ({placeholders})
+                       ORDER BY p.place_name""",
+                    batch
+                )
+                for row in cursor.fetchall():
+                    grouped[row[1]].append(dict(zip(columns, row)))
+        
+        return [place for work_id in work_ids for place in grouped[work_id]]
     
     def get_statistics(self) -> Dict[str, Any]:
         """詳細な統計情報取得"""
@@ -330,7 +900,7 @@ class Database:
             stats = {}
             
             # 基本カウント
-            for table in ['authors', 'works', 'places']:
+            for table in ['authors', 'works', 'places', 'place_master']:
                 cursor = conn.execute(f"SELECT COUNT(*) FROM {table}")
                 stats[f'{table}_count'] = cursor.fetchone()[0]
             
@@ -348,8 +918,8 @@ class Database:
 class BungoDB(Database):
     """文豪データベース（拡張版）"""
     
-    def __init__(self, db_path: str = "data/bungo_production.db"):
-        super().__init__(db_path)
+    def __init__(self, db_path: str = "data/bungo_production.db", **kwargs):
+        super().__init__(db_path, **kwargs)
     
     def upsert_author(self, name: str, wikipedia_url: str = None) -> int:
         """作者の挿入または更新"""
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+作品本文のフィンガープリント
+正規化した本文のハッシュと抽出器バージョンで、再抽出が必要な作品を判定する
+"""
+
+import hashlib
+import re
+from typing import Optional, Tuple
+
+
+_LINE_SPACES = re.compile(r'[ \t　]+(?=\n)|(?<=\n)[ \t　]+')
+_BLANK_LINES = re.compile(r'\n{2,}')
+
+
+def normalize_for_fingerprint(text: str) -> str:
+    """抽出結果に影響しない差分（改行コード・行頭行末の空白・空行の数）を吸収"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _LINE_SPACES.sub('', '\n' + text + '\n')
+    return _BLANK_LINES.sub('\n', text).strip()
+
+
+def content_hash(text: Optional[str]) -> str:
+    """正規化した本文の SHA-256（16進）"""
+    return hashlib.sha256(normalize_for_fingerprint(text or '').encode('utf-8')).hexdigest()
+
+
+def needs_extraction(stored: Optional[Tuple[Optional[str], Optional[str]]],
+                     current_hash: str, extractor_version: str) -> bool:
+    """保存済みの (本文ハッシュ, 抽出器バージョン) と異なれば再抽出が必要"""
+    return stored is None or tuple(stored) != (current_hash, extractor_version)
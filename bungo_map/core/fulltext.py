@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文検索インデックス（FTS5 trigram）
+形態素解析なしで日本語の部分一致検索をインデックス化する
+"""
+
+import sqlite3
+from typing import List, Optional, Tuple
+
+
+# trigramトークナイザは3文字未満のクエリにマッチできない
+MIN_QUERY_LENGTH = 3
+
+FtsSpec = Tuple[str, str, str, Tuple[str, ...]]
+
+# (FTSテーブル, 元テーブル, 主キー, 索引対象カラム)
+FTS_SPECS: List[FtsSpec] = [
+    ('authors_fts', 'authors', 'author_id', ('name',)),
+    ('works_fts', 'works', 'work_id', ('title',)),
+    ('places_fts', 'place_mentions', 'place_id', ('place_name', 'sentence', 'before_text', 'after_text')),
+]
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+    return cursor.fetchone() is not None
+
+
+def _create_triggers(conn: sqlite3.Connection, fts: str, source: str, key: str,
+                     columns: Tuple[str, ...]) -> None:
+    """元テーブルとFTSテーブルを同期するトリガーを作成"""
+    cols = ', '.join(columns)
+    new_values = ', '.join(f'new.{c}' for c in columns)
+    old_values = ', '.join(f'old.{c}' for c in columns)
+    changed = ' OR '.join(f'old.{c} IS NOT new.{c}' for c in columns)
+
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {source} BEGIN
+        INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new_values});
+    END
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {source} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old_values});
+    END
+    """)
+    # 座標更新などの索引対象外カラムの変更ではFTSを更新しない
+    conn.execute(f"""
+    CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {source} WHEN {changed} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.{key}, {old_values});
+        INSERT INTO {fts}(rowid, {cols}) VALUES (new.{key}, {new_values});
+    END
+    """)
+
+
+def fulltext_available(conn: sqlite3.Connection) -> bool:
+    """FTS5（trigramトークナイザ）が利用可能か（一時テーブルを作成して確認）"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts_probe USING fts5(text, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.fts_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def ensure_fulltext_index(conn: sqlite3.Connection, specs: List[FtsSpec] = FTS_SPECS) -> bool:
+    """
+    FTSテーブルとトリガーを作成（新規作成時は既存データから構築）
+
+    Args:
+        conn: データベース接続
+        specs: 作成するFTSテーブル定義（マイグレーションでは当時の定義を渡す）
+
+    Returns:
+        bool: FTS5（trigram）が利用可能か
+    """
+    try:
+        for fts, source, key, columns in specs:
+            created = not _table_exists(conn, fts)
+            conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {', '.join(columns)},
+                content='{source}', content_rowid='{key}', tokenize='trigram'
+            )
+            """)
+            _create_triggers(conn, fts, source, key, columns)
+
+            if created:
+                conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        return True
+
+    except sqlite3.OperationalError as e:
+        # FTS5またはtrigramトークナイザ非対応のSQLite
+        print(f"⚠️ 全文検索インデックスを利用できません: {e}")
+        return False
+
+
+def rebuild_fulltext_index(conn: sqlite3.Connection, specs: List[FtsSpec] = FTS_SPECS) -> dict:
+    """FTSインデックスを元テーブルから再構築"""
+    counts = {}
+    for fts, source, _, _ in specs:
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+        conn.execute(f"INSERT INTO {fts}({fts}) VALUES ('optimize')")
+        counts[fts] = conn.execute(f"SELECT COUNT(*) FROM {source}").fetchone()[0]
+    return counts
+
+
+def build_match_query(query: str, column: Optional[str] = None) -> Optional[str]:
+    """
+    検索語をFTS5のフレーズクエリに変換
+
+    Returns:
+        Optional[str]: MATCH式（trigramで検索できない短いクエリはNone）
+    """
+    query = query.strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        return None
+
+    phrase = '"' + query.replace('"', '""') + '"'
+    if column:
+        return f'{column} : {phrase}'
+    return phrase
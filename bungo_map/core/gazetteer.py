@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+地名マスタ（ガゼッティア）
+作品中の地名言及を正規化名単位の地名マスタへ集約するためのユーティリティ
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from typing import Iterable, Optional
+
+
+# SQLから呼び出す正規化関数名（トリガー・マイグレーションで使用）
+NORMALIZE_FUNCTION = 'normalize_place_name'
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_place_name(name: Optional[str]) -> Optional[str]:
+    """
+    地名を照合用に正規化
+
+    NFKC正規化（全角英数・半角カナの統一）、空白除去、「ヶ」「ケ」の統一を行う。
+    """
+    if name is None:
+        return None
+    normalized = unicodedata.normalize('NFKC', name)
+    normalized = _WHITESPACE.sub('', normalized)
+    return normalized.replace('ヶ', 'ケ')
+
+
+def choose_canonical_name(names: Iterable[str]) -> str:
+    """表記ゆれの中から代表表記を選ぶ（最頻出、同数なら先に現れた表記）"""
+    return Counter(names).most_common(1)[0][0]
+
+
+def register_sql_functions(conn) -> None:
+    """接続に正規化関数を登録"""
+    conn.create_function(NORMALIZE_FUNCTION, 1, normalize_place_name, deterministic=True)
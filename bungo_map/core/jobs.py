@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取り込みジョブ台帳
+作品ごとに処理済みの段と状態を記録し、中断・失敗したジョブを未完了の作品だけで再開する
+"""
+
+import json
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bungo_map.core.database import Database, _batched
+
+
+# 作品の状態（stage は最後に記録した段）
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+# 全段の最後（この段が done なら作品は完了）
+FINAL_STAGE = 'write'
+
+# ジョブの状態
+RUNNING = 'running'
+COMPLETED = 'completed'
+INCOMPLETE = 'incomplete'     # 失敗した作品が残っている
+INTERRUPTED = 'interrupted'   # Ctrl-C などで途中終了
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+
+@dataclass
+class JobRun:
+    """begin の結果（今回処理する作品）"""
+    job_id: int
+    work_ids: List[int]
+    resumed: bool = False
+    completed_before: int = 0                             # 前回までに完了していた作品数
+    given_up: List[int] = field(default_factory=list)     # 失敗の回数が上限に達した作品
+
+
+@dataclass
+class JobProgress:
+    """ジョブの進捗"""
+    job_id: int
+    name: str
+    status: str
+    total: int
+    completed: int
+    failed: int
+    params: Dict[str, Any]
+    created_at: float
+    updated_at: float
+    finished_at: Optional[float]
+    rate: float                 # 今回の実行での完了作品数/秒
+    stages: Dict[Tuple[str, str], int] = field(default_factory=dict)   # (段, 状態) → 作品数
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.completed
+
+    @property
+    def percent(self) -> float:
+        return 100.0 * self.completed / self.total if self.total else 100.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """実行中のジョブの残り時間の見込み（完了速度が未計測なら None）"""
+        if self.status != RUNNING or self.rate <= 0:
+            return None
+        return self.remaining / self.rate
+
+
+class JobLedger:
+    """ジョブ台帳（段ごとの記録はまとめて書き込む）"""
+
+    def __init__(self, db: Database, clock: Callable[[], float] = time.time):
+        """
+        初期化
+
+        Args:
+            db: 台帳を保存するデータベース（マイグレーション7で jobs / job_items を作成済み）
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.db = db
+        self.clock = clock
+        self._pending: Dict[Tuple[int, int], Tuple[str, str, Optional[str], float]] = {}
+        self._lock = threading.Lock()
+
+    # ===========================================
+    # ジョブの開始・終了
+    # ===========================================
+
+    def begin(self, name: str, work_ids: Iterable[int], params: Optional[Dict[str, Any]] = None,
+              resume: bool = True, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> JobRun:
+        """
+        ジョブを開始（同じ名前・パラメータの未完了ジョブがあれば再開）
+
+        再開時は完了済みの作品を除き、失敗の回数（試行回数）が上限に達した作品も除く。
+        未処理の作品・中断した作品は回数に数えず、常に再試行する。
+
+        Returns:
+            JobRun: ジョブIDと今回処理する作品
+        """
+        work_ids = list(dict.fromkeys(work_ids))
+        params_json = json.dumps(params or {}, ensure_ascii=False, sort_keys=True)
+        now = self.clock()
+
+        with self.db.get_connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = None
+                if resume:
+                    row = conn.execute(
+                        """SELECT job_id FROM jobs WHERE name = ? AND params = ? AND status != ?
+                           ORDER BY job_id DESC LIMIT 1""",
+                        (name, params_json, COMPLETED)
+                    ).fetchone()
+                if row:
+                    job_id = row[0]
+                    conn.execute("UPDATE jobs SET status = ?, resumed_at = ?, updated_at = ?, finished_at = NULL "
+                                 "WHERE job_id = ?", (RUNNING, now, now, job_id))
+                else:
+                    job_id = conn.execute(
+                        """INSERT INTO jobs (name, params, status, created_at, resumed_at, updated_at)
+                           VALUES (?, ?, ?, ?, ?, ?)""",
+                        (name, params_json, RUNNING, now, now, now)
+                    ).lastrowid
+
+                # 今回初めて対象になった作品を追加
+                conn.executemany(
+                    """INSERT OR IGNORE INTO job_items (job_id, work_id, stage, status, updated_at)
+                       VALUES (?, ?, 'download', ?, ?)""",
+                    [(job_id, work_id, PENDING, now) for work_id in work_ids]
+                )
+                state = self._item_states(conn, job_id, work_ids)
+
+                run = JobRun(job_id, [], resumed=row is not None)
+                for work_id in work_ids:
+                    stage, status, attempts = state[work_id]
+                    if stage == FINAL_STAGE and status == DONE:
+                        run.completed_before += 1
+                    elif status == FAILED and attempts >= max_attempts:
+                        # 失敗の回数が上限に達した作品（未処理・中断した作品は回数に数えず必ず再試行）
+                        run.given_up.append(work_id)
+                    else:
+                        run.work_ids.append(work_id)
+
+                conn.executemany(
+                    """UPDATE job_items SET error = NULL,
+                           status = CASE WHEN status = ? THEN ? ELSE status END,
+                           started_at = COALESCE(started_at, ?), updated_at = ?
+                       WHERE job_id = ? AND work_id = ?""",
+                    [(FAILED, PENDING, now, now, job_id, work_id) for work_id in run.work_ids]
+                )
+                conn.execute("UPDATE jobs SET total = (SELECT COUNT(*) FROM job_items WHERE job_id = ?) "
+                             "WHERE job_id = ?", (job_id, job_id))
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        return run
+
+    @staticmethod
+    def _item_states(conn, job_id: int, work_ids: List[int]) -> Dict[int, Tuple[str, str, int]]:
+        states = {}
+        for batch in _batched(work_ids, 500):
+            cursor = conn.execute(
+                f"""SELECT work_id, stage, status, attempts FROM job_items
+                    WHERE job_id = ? AND work_id IN ({','.join('?' * len(batch))})""",
+                [job_id, *batch]
+            )
+            states.update((row[0], (row[1], row[2], row[3])) for row in cursor.fetchall())
+        return states
+
+    def finish(self, job_id: int, interrupted: bool = False) -> str:
+        """記録を書き込んでジョブの状態を確定（未完了の作品があれば incomplete）"""
+        self.flush()
+        now = self.clock()
+        with self.db.get_connection() as conn:
+            remaining = conn.execute(
+                "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND NOT (stage = ? AND status = ?)",
+                (job_id, FINAL_STAGE, DONE)
+            ).fetchone()[0]
+            if interrupted:
+                status = INTERRUPTED
+            else:
+                status = COMPLETED if remaining == 0 else INCOMPLETE
+            conn.execute("UPDATE jobs SET status = ?, updated_at = ?, finished_at = ? WHERE job_id = ?",
+                         (status, now, None if interrupted else now, job_id))
+            conn.commit()
+        return status
+
+    # ===========================================
+    # 段ごとの記録
+    # ===========================================
+
+    def record(self, job_id: int, work_id: int, stage: str, status: str = DONE,
+               error: Optional[str] = None) -> None:
+        """作品の段の結果を記録（flush までメモリに保持）"""
+        with self._lock:
+            self._pending[(job_id, work_id)] = (stage, status, error, self.clock())
+
+    def flush(self) -> int:
+        """保持中の記録を1トランザクションで書き込む"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        # 試行回数は失敗を記録したときだけ増やす
+        rows = [(stage, status, error, updated_at, int(status == FAILED), job_id, work_id)
+                for (job_id, work_id), (stage, status, error, updated_at) in pending.items()]
+        updated: Dict[int, float] = {}
+        for (job_id, _), (_, _, _, updated_at) in pending.items():
+            updated[job_id] = max(updated.get(job_id, updated_at), updated_at)
+        with self.db.get_connection() as conn:
+            conn.executemany(
+                """UPDATE job_items SET stage = ?, status = ?, error = ?, updated_at = ?,
+                       attempts = attempts + ?
+                   WHERE job_id = ? AND work_id = ?""",
+                rows
+            )
+            conn.executemany("UPDATE jobs SET updated_at = ? WHERE job_id = ?",
+                             [(updated_at, job_id) for job_id, updated_at in updated.items()])
+            conn.commit()
+        return len(rows)
+
+    # ===========================================
+    # 進捗
+    # ===========================================
+
+    def get_progress(self, job_id: int) -> Optional[JobProgress]:
+        """ジョブの進捗（存在しなければ None）"""
+        with self.db.get_connection() as conn:
+            job = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            stages = {(row[0], row[1]): row[2] for row in conn.execute(
+                "SELECT stage, status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY stage, status", (job_id,)
+            )}
+            # 今回の実行で完了した作品数から完了速度を求める
+            done_since_resume = conn.execute(
+                """SELECT COUNT(*) FROM job_items
+                   WHERE job_id = ? AND stage = ? AND status = ? AND updated_at >= ?""",
+                (job_id, FINAL_STAGE, DONE, job['resumed_at'])
+            ).fetchone()[0]
+
+        elapsed = job['updated_at'] - job['resumed_at']
+        return JobProgress(
+            job_id=job['job_id'],
+            name=job['name'],
+            status=job['status'],
+            total=job['total'],
+            completed=stages.get((FINAL_STAGE, DONE), 0),
+            failed=sum(count for (_, status), count in stages.items() if status == FAILED),
+            params=json.loads(job['params']),
+            created_at=job['created_at'],
+            updated_at=job['updated_at'],
+            finished_at=job['finished_at'],
+            rate=done_since_resume / elapsed if elapsed > 0 else 0.0,
+            stages=stages,
+        )
+
+    def list_jobs(self, limit: int = 10) -> List[JobProgress]:
+        """新しい順のジョブ一覧"""
+        with self.db.get_connection() as conn:
+            job_ids = [row[0] for row in conn.execute("SELECT job_id FROM jobs ORDER BY job_id DESC LIMIT ?", (limit,))]
+        return [self.get_progress(job_id) for job_id in job_ids]
+
+    def get_failed_items(self, job_id: int) -> List[Dict[str, Any]]:
+        """失敗した作品（段・試行回数・エラー）"""
+        with self.db.get_connection() as conn:
+            cursor = conn.execute(
+                """SELECT i.work_id, w.title, i.stage, i.attempts, i.error, i.updated_at
+                   FROM job_items i LEFT JOIN works w ON w.work_id = i.work_id
+                   WHERE i.job_id = ? AND i.status = ?
+                   ORDER BY i.work_id""",
+                (job_id, FAILED)
+            )
+            return [dict(row) for row in cursor.fetchall()]
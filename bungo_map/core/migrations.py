@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+スキーママイグレーション
+schema_version テーブルで適用済みバージョンを管理し、未適用の手順を順番に適用する
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from bungo_map.core.fulltext import FtsSpec, ensure_fulltext_index, fulltext_available
+from bungo_map.core.gazetteer import (
+    NORMALIZE_FUNCTION, choose_canonical_name, normalize_place_name, register_sql_functions
+)
+from bungo_map.core.spatial import ensure_spatial_index
+
+
+class MigrationRequiredError(RuntimeError):
+    """明示的な適用（bungo db migrate）が必要なマイグレーションが残っている"""
+
+
+@dataclass
+class Migration:
+    """マイグレーション手順"""
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    destructive: bool = False   # 既存のテーブルを削除して作り直す（データのあるデータベースには自動適用しない）
+    depends_on: Tuple[int, ...] = ()   # 先に適用されている必要がある手順（破壊的な手順を飛ばしたときの判定用）
+
+
+def _add_secondary_indexes(conn: sqlite3.Connection) -> None:
+    """作品別・地名別の検索とJOIN用のインデックス"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_places_work_id ON places(work_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_places_place_name ON places(place_name)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_works_author_id ON works(author_id)")
+    # 座標未設定の地名だけを対象にした部分インデックス（get_places_without_coordinates用）
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_places_ungeocoded ON places(place_id)
+    WHERE lat IS NULL OR lng IS NULL
+    """)
+
+
+def _analyze(conn: sqlite3.Connection) -> None:
+    """クエリプランナー用の統計情報を収集"""
+    conn.execute("ANALYZE")
+
+
+# 各手順は適用当時のスキーマを前提にするため、索引定義はここで固定する
+_PLACES_FTS_COLUMNS = ('place_name', 'sentence', 'before_text', 'after_text')
+
+
+def _fulltext_specs(places_source: str) -> List[FtsSpec]:
+    return [
+        ('authors_fts', 'authors', 'author_id', ('name',)),
+        ('works_fts', 'works', 'work_id', ('title',)),
+        ('places_fts', places_source, 'place_id', _PLACES_FTS_COLUMNS),
+    ]
+
+
+def _add_fulltext_index(conn: sqlite3.Connection) -> None:
+    # FTS5（trigram）非対応のSQLiteでは作成せずに適用済みとし、対応環境で開いたときに restore_fulltext_index で作成する
+    ensure_fulltext_index(conn, _fulltext_specs('places'))
+
+
+def _add_spatial_index(conn: sqlite3.Connection) -> None:
+    ensure_spatial_index(conn, table='places_rtree', source='places', key='place_id')
+
+
+def _split_place_master(conn: sqlite3.Connection) -> None:
+    """
+    places を地名マスタ（place_master）と地名言及（place_mentions）に分割
+
+    座標は正規化名ごとに1行で保持し、places は互換ビューとして残す。
+    place_id は言及IDとしてそのまま引き継ぐ。
+    """
+    register_sql_functions(conn)
+
+    conn.execute("""
+    CREATE TABLE place_master (
+        master_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        place_name TEXT NOT NULL,
+        normalized_name TEXT UNIQUE NOT NULL,
+        lat REAL,
+        lng REAL,
+        geocode_source TEXT,
+        geocode_confidence REAL,
+        geocoded_at TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    conn.execute("""
+    CREATE TABLE place_mentions (
+        place_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        work_id INTEGER NOT NULL,
+        master_id INTEGER NOT NULL,
+        place_name TEXT NOT NULL,
+        before_text TEXT,
+        sentence TEXT,
+        after_text TEXT,
+        aozora_url TEXT,
+        char_start INTEGER,
+        char_end INTEGER,
+        confidence REAL DEFAULT 0.0,
+        extraction_method TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (work_id) REFERENCES works (work_id),
+        FOREIGN KEY (master_id) REFERENCES place_master (master_id)
+    )
+    """)
+
+    # 正規化名ごとに代表表記と最初に設定された座標を採用
+    masters = {}
+    for name, lat, lng in conn.execute("SELECT place_name, lat, lng FROM places ORDER BY place_id"):
+        entry = masters.setdefault(normalize_place_name(name), {'names': [], 'coords': None})
+        entry['names'].append(name)
+        if entry['coords'] is None and lat is not None and lng is not None:
+            entry['coords'] = (lat, lng)
+
+    conn.executemany(
+        """INSERT INTO place_master (place_name, normalized_name, lat, lng, geocode_source)
+           VALUES (?, ?, ?, ?, ?)""",
+        [(choose_canonical_name(entry['names']), normalized,
+          *(entry['coords'] or (None, None)), 'legacy' if entry['coords'] else None)
+         for normalized, entry in masters.items()]
+    )
+    conn.execute(f"""
+    INSERT INTO place_mentions
+        (place_id, work_id, master_id, place_name, before_text, sentence, after_text,
+         aozora_url, confidence, extraction_method, created_at)
+    SELECT p.place_id, p.work_id, pm.master_id, p.place_name, p.before_text, p.sentence,
+           p.after_text, p.aozora_url, p.confidence, p.extraction_method, p.created_at
+    FROM places p
+    JOIN place_master pm ON pm.normalized_name = {NORMALIZE_FUNCTION}(p.place_name)
+    """)
+
+    # 旧テーブルと紐づく索引・トリガーも合わせて削除される
+    conn.execute("DROP TABLE places")
+    conn.execute("DROP TABLE IF EXISTS places_fts")
+    conn.execute("DROP TABLE IF EXISTS places_rtree")
+
+    conn.execute("CREATE INDEX idx_place_mentions_work_id ON place_mentions(work_id)")
+    conn.execute("CREATE INDEX idx_place_mentions_master_id ON place_mentions(master_id)")
+    conn.execute("""
+    CREATE INDEX idx_place_master_ungeocoded ON place_master(master_id)
+    WHERE lat IS NULL OR lng IS NULL
+    """)
+
+    # 既存クエリ用の互換ビュー（座標は地名マスタから引く）
+    conn.execute("""
+    CREATE VIEW places AS
+    SELECT m.place_id, m.work_id, m.place_name, pm.lat, pm.lng,
+           m.before_text, m.sentence, m.after_text, m.aozora_url,
+           m.confidence, m.extraction_method, m.created_at,
+           m.master_id, m.char_start, m.char_end
+    FROM place_mentions m
+    JOIN place_master pm ON pm.master_id = m.master_id
+    """)
+    conn.execute(f"""
+    CREATE TRIGGER places_insert INSTEAD OF INSERT ON places BEGIN
+        INSERT OR IGNORE INTO place_master (place_name, normalized_name)
+        VALUES (new.place_name, {NORMALIZE_FUNCTION}(new.place_name));
+        UPDATE place_master SET lat = new.lat, lng = new.lng, geocode_source = 'extraction'
+        WHERE normalized_name = {NORMALIZE_FUNCTION}(new.place_name)
+          AND lat IS NULL AND new.lat IS NOT NULL AND new.lng IS NOT NULL;
+        INSERT INTO place_mentions
+            (place_id, work_id, master_id, place_name, before_text, sentence, after_text,
+             aozora_url, char_start, char_end, confidence, extraction_method)
+        SELECT new.place_id, new.work_id, master_id, new.place_name, new.before_text,
+               new.sentence, new.after_text, new.aozora_url, new.char_start, new.char_end,
+               COALESCE(new.confidence, 0.0), new.extraction_method
+        FROM place_master WHERE normalized_name = {NORMALIZE_FUNCTION}(new.place_name);
+    END
+    """)
+    # 地名の変更は言及の付け替え、座標の変更は地名マスタ（同名の全言及）に反映
+    conn.execute(f"""
+    CREATE TRIGGER places_update INSTEAD OF UPDATE ON places BEGIN
+        INSERT OR IGNORE INTO place_master (place_name, normalized_name)
+        VALUES (new.place_name, {NORMALIZE_FUNCTION}(new.place_name));
+        UPDATE place_mentions SET
+            work_id = new.work_id,
+            master_id = (SELECT master_id FROM place_master
+                         WHERE normalized_name = {NORMALIZE_FUNCTION}(new.place_name)),
+            place_name = new.place_name, before_text = new.before_text,
+            sentence = new.sentence, after_text = new.after_text, aozora_url = new.aozora_url,
+            char_start = new.char_start, char_end = new.char_end,
+            confidence = new.confidence, extraction_method = new.extraction_method
+        WHERE place_id = old.place_id;
+        UPDATE place_master SET lat = new.lat, lng = new.lng
+        WHERE master_id = (SELECT master_id FROM place_mentions WHERE place_id = old.place_id)
+          AND (lat IS NOT new.lat OR lng IS NOT new.lng);
+    END
+    """)
+    conn.execute("""
+    CREATE TRIGGER places_delete INSTEAD OF DELETE ON places BEGIN
+        DELETE FROM place_mentions WHERE place_id = old.place_id;
+    END
+    """)
+
+    # 統計は新テーブルに限定する（FTS/R*Treeの内部テーブルに空の統計が残ると
+    # 件数増加後も内部クエリの実行計画が最適化されず、挿入が大幅に遅くなる）
+    conn.execute("ANALYZE place_master")
+    conn.execute("ANALYZE place_mentions")
+
+    ensure_fulltext_index(conn, [('places_fts', 'place_mentions', 'place_id', _PLACES_FTS_COLUMNS)])
+    ensure_spatial_index(conn, table='place_master_rtree', source='place_master', key='master_id')
+
+
+def _add_work_fingerprints(conn: sqlite3.Connection) -> None:
+    """作品ごとの本文ハッシュ・抽出器バージョン（差分再抽出の判定用）"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(works)")}
+    for name, type_ in (('content_hash', 'TEXT'), ('extractor_version', 'TEXT'), ('extracted_at', 'TIMESTAMP')):
+        if name not in columns:
+            conn.execute(f"ALTER TABLE works ADD COLUMN {name} {type_}")
+
+
+def _add_job_ledger(conn: sqlite3.Connection) -> None:
+    """取り込みジョブと作品ごとの進捗（中断後の再開・失敗分の再試行用）"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS jobs (
+        job_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        params TEXT NOT NULL DEFAULT '{}',
+        status TEXT NOT NULL DEFAULT 'running',
+        total INTEGER NOT NULL DEFAULT 0,
+        created_at REAL NOT NULL,
+        resumed_at REAL NOT NULL,
+        updated_at REAL NOT NULL,
+        finished_at REAL
+    )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_name ON jobs(name, params, job_id)")
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS job_items (
+        job_id INTEGER NOT NULL,
+        work_id INTEGER NOT NULL,
+        stage TEXT NOT NULL,
+        status TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        started_at REAL,
+        updated_at REAL NOT NULL,
+        PRIMARY KEY (job_id, work_id),
+        FOREIGN KEY (job_id) REFERENCES jobs (job_id)
+    ) WITHOUT ROWID
+    """)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "セカンダリインデックス追加", _add_secondary_indexes),
+    Migration(2, "統計情報収集 (ANALYZE)", _analyze),
+    Migration(3, "全文検索インデックス (FTS5 trigram)", _add_fulltext_index),
+    Migration(4, "空間インデックス (R*Tree)", _add_spatial_index),
+    Migration(5, "地名マスタと地名言及の分割", _split_place_master, destructive=True),
+    Migration(6, "作品本文のフィンガープリント", _add_work_fingerprints),
+    Migration(7, "取り込みジョブ台帳", _add_job_ledger),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def ensure_version_table(conn: sqlite3.Connection) -> None:
+    """schema_version テーブル作成"""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+
+def get_applied_versions(conn: sqlite3.Connection) -> Set[int]:
+    """適用済みのバージョン"""
+    ensure_version_table(conn)
+    return {row[0] for row in conn.execute("SELECT version FROM schema_version")}
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """
+    現在のスキーマバージョン（未管理のデータベースは0）
+
+    破壊的な手順を飛ばして後続の手順を適用した場合は、飛ばした手順の直前のバージョン。
+    """
+    applied = get_applied_versions(conn)
+    version = 0
+    for migration in MIGRATIONS:
+        if migration.version not in applied:
+            break
+        version = migration.version
+    return version
+
+
+def get_applied_migrations(conn: sqlite3.Connection) -> List[Dict]:
+    """適用済みマイグレーション一覧"""
+    ensure_version_table(conn)
+    cursor = conn.execute("SELECT version, description, applied_at FROM schema_version ORDER BY version")
+    return [{'version': row[0], 'description': row[1], 'applied_at': row[2]} for row in cursor.fetchall()]
+
+
+def has_legacy_places(conn: sqlite3.Connection) -> bool:
+    """分割前の places テーブルに地名が登録されているか（破壊的な手順で移し替えるデータがあるか）"""
+    row = conn.execute("SELECT type FROM sqlite_master WHERE name = 'places'").fetchone()
+    if row is None or row[0] != 'table':
+        return False
+    return conn.execute("SELECT EXISTS (SELECT 1 FROM places)").fetchone()[0] == 1
+
+
+def pending_migrations(conn: sqlite3.Connection) -> List[Migration]:
+    """未適用のマイグレーション一覧"""
+    applied = get_applied_versions(conn)
+    return [m for m in MIGRATIONS if m.version not in applied]
+
+
+def restore_fulltext_index(conn: sqlite3.Connection) -> bool:
+    """
+    マイグレーション3の適用時に作成できなかった全文検索インデックスを作成
+
+    FTS5（trigram）非対応のSQLiteで適用したデータベースを対応環境で開いた場合に、既存データから構築する。
+
+    Returns:
+        bool: 作成したか
+    """
+    applied = get_applied_versions(conn)
+    if 3 not in applied:
+        return False
+    # 地名の索引対象はマイグレーション5の適用前後で異なる
+    specs = _fulltext_specs('place_mentions' if 5 in applied else 'places')
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if all(fts in tables for fts, _, _, _ in specs) or not fulltext_available(conn):
+        return False
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        created = ensure_fulltext_index(conn, specs)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return created
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None,
+            on_apply: Optional[Callable[[Migration], None]] = None,
+            allow_destructive: bool = True) -> List[Migration]:
+    """
+    未適用のマイグレーションを順番に適用
+
+    各手順は個別のトランザクションで実行され、失敗した手順はロールバックされる。
+
+    Args:
+        conn: データベース接続
+        target: 適用する最大バージョン（省略時は最新）
+        on_apply: 手順適用後に呼ばれるコールバック
+        allow_destructive: False なら破壊的な手順（とそれに依存する手順）を飛ばし、それ以外の手順は適用する
+
+    Returns:
+        List[Migration]: 今回適用した手順
+    """
+    if conn.in_transaction:
+        conn.commit()
+    ensure_version_table(conn)
+
+    applied = []
+    skipped: Set[int] = set()
+    for migration in MIGRATIONS:
+        if target is not None and migration.version > target:
+            break
+        if (migration.destructive and not allow_destructive) or skipped.intersection(migration.depends_on):
+            if migration.version not in get_applied_versions(conn):
+                skipped.add(migration.version)
+            continue
+
+        # 書き込みロックを取ってから再確認（同時起動したプロセスとの競合対策）
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if migration.version in get_applied_versions(conn):
+                conn.rollback()
+                continue
+
+            migration.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                (migration.version, migration.description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        applied.append(migration)
+        if on_apply:
+            on_apply(migration)
+
+    restore_fulltext_index(conn)
+    if applied:
+        conn.execute("PRAGMA optimize")
+    return applied
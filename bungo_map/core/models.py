@@ -47,4 +47,21 @@ class Place:
     aozora_url: Optional[str] = None
     confidence: float = 0.0
     extraction_method: Optional[str] = None
+    created_at: Optional[datetime] = None
+    char_start: Optional[int] = None
+    char_end: Optional[int] = None
+    master_id: Optional[int] = None
+
+
+@dataclass
+class PlaceMaster:
+    """地名マスタモデル（正規化名ごとの座標）"""
+    master_id: Optional[int] = None
+    place_name: str = ""
+    normalized_name: str = ""
+    lat: Optional[float] = None
+    lng: Optional[float] = None
+    geocode_source: Optional[str] = None
+    geocode_confidence: Optional[float] = None
+    mention_count: int = 0
     created_at: Optional[datetime] = None 
\ No newline at end of file
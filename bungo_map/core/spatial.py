@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+空間インデックス（SQLite R*Tree）
+地名座標の矩形検索・半径検索を支援する
+"""
+
+import math
+import sqlite3
+from typing import List, Tuple
+
+
+EARTH_RADIUS_M = 6371008.8
+
+# 座標は地名マスタ単位で保持するため、R*Treeのidは master_id
+RTREE_TABLE = 'place_master_rtree'
+RTREE_SOURCE = 'place_master'
+RTREE_KEY = 'master_id'
+
+
+def ensure_spatial_index(conn: sqlite3.Connection, table: str = RTREE_TABLE,
+                         source: str = RTREE_SOURCE, key: str = RTREE_KEY) -> bool:
+    """
+    R*Treeテーブルと同期トリガーを作成（新規作成時は既存座標から構築）
+
+    Args:
+        conn: データベース接続
+        table: R*Treeテーブル名
+        source: lat/lng カラムを持つ元テーブル
+        key: 元テーブルの主キー
+
+    Returns:
+        bool: R*Treeが利用可能か
+    """
+    try:
+        created = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ).fetchone() is None
+
+        conn.execute(f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING rtree(
+            id, min_lat, max_lat, min_lng, max_lng
+        )
+        """)
+
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {source}
+        WHEN new.lat IS NOT NULL AND new.lng IS NOT NULL BEGIN
+            INSERT INTO {table} VALUES (new.{key}, new.lat, new.lat, new.lng, new.lng);
+        END
+        """)
+        # ジオコーディングによる座標設定・変更もこのトリガーで反映される
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF lat, lng ON {source} BEGIN
+            DELETE FROM {table} WHERE id = old.{key};
+            INSERT INTO {table}
+            SELECT new.{key}, new.lat, new.lat, new.lng, new.lng
+            WHERE new.lat IS NOT NULL AND new.lng IS NOT NULL;
+        END
+        """)
+        conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {source} BEGIN
+            DELETE FROM {table} WHERE id = old.{key};
+        END
+        """)
+
+        if created:
+            rebuild_spatial_index(conn, table, source, key)
+        return True
+
+    except sqlite3.OperationalError as e:
+        # R*Tree拡張なしでビルドされたSQLite
+        print(f"⚠️ 空間インデックスを利用できません: {e}")
+        return False
+
+
+def rebuild_spatial_index(conn: sqlite3.Connection, table: str = RTREE_TABLE,
+                          source: str = RTREE_SOURCE, key: str = RTREE_KEY) -> int:
+    """R*Treeを元テーブルの座標から再構築"""
+    conn.execute(f"DELETE FROM {table}")
+    conn.execute(f"""
+    INSERT INTO {table}
+    SELECT {key}, lat, lat, lng, lng FROM {source}
+    WHERE lat IS NOT NULL AND lng IS NOT NULL
+    """)
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def haversine_m(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """2点間の大円距離（メートル）"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lng: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """
+    中心と半径を内包する矩形
+
+    Returns:
+        (min_lat, min_lng, max_lat, max_lng)。経度180度を跨ぐ場合は min_lng > max_lng
+    """
+    d_lat = math.degrees(radius_m / EARTH_RADIUS_M)
+    min_lat = max(-90.0, lat - d_lat)
+    max_lat = min(90.0, lat + d_lat)
+
+    # 極を含む場合や高緯度では経度方向は全範囲
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if min_lat <= -90.0 or max_lat >= 90.0 or cos_lat <= 1e-12:
+        return min_lat, -180.0, max_lat, 180.0
+
+    d_lng = math.degrees(radius_m / (EARTH_RADIUS_M * cos_lat))
+    if d_lng >= 180.0:
+        return min_lat, -180.0, max_lat, 180.0
+
+    min_lng = lng - d_lng
+    max_lng = lng + d_lng
+    if min_lng < -180.0:
+        min_lng += 360.0
+    if max_lng > 180.0:
+        max_lng -= 360.0
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def longitude_ranges(min_lng: float, max_lng: float) -> List[Tuple[float, float]]:
+    """経度範囲を日付変更線で分割"""
+    if min_lng <= max_lng:
+        return [(min_lng, max_lng)]
+    return [(min_lng, 180.0), (-180.0, max_lng)]
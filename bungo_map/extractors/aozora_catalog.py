@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫カタログ
+公開されている作品一覧（list_person_all_extended の CSV）を SQLite に取り込み、
+作品名・著者名から図書カード・テキストZIP・HTMLのURLを通信せずに引く
+"""
+
+import csv
+import difflib
+import io
+import re
+import time
+import unicodedata
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bungo_map.core.connection import ConnectionManager
+
+
+CATALOG_URL = "https://www.aozora.gr.jp/index_pages/list_person_all_extended_utf8.zip"
+
+# 照合の種類（優先順）
+EXACT = 'exact'             # 表記どおり一致
+NORMALIZED = 'normalized'   # 空白・記号・全角半角・カタカナ/ひらがな・異体字の違いを除いて一致
+READING = 'reading'         # 読みと一致
+FUZZY = 'fuzzy'             # 類似度が閾値以上
+
+# CSVの列名 → テーブルの列名
+_COLUMNS = {
+    '作品ID': 'work_id',
+    '作品名': 'title',
+    '作品名読み': 'title_reading',
+    '副題': 'subtitle',
+    '人物ID': 'person_id',
+    '姓': 'last_name',
+    '名': 'first_name',
+    '姓読み': 'last_name_reading',
+    '名読み': 'first_name_reading',
+    '役割フラグ': 'role',
+    '図書カードURL': 'card_url',
+    'テキストファイルURL': 'text_url',
+    'XHTML/HTMLファイルURL': 'html_url',
+}
+
+_IGNORED = re.compile(r'[\s・･「」『』（）()\[\]【】〈〉、。，．,.!！?？:：;；\-‐－―〜~]')
+_VARIANTS = str.maketrans({'鷗': '鴎', '﨑': '崎', '髙': '高', '邊': '辺', '邉': '辺'})
+
+
+def normalize_key(text: Optional[str]) -> str:
+    """照合用の正規化（NFKC・空白と記号の除去・カタカナをひらがなに・一部の異体字の統一）"""
+    if not text:
+        return ""
+    text = unicodedata.normalize('NFKC', text).translate(_VARIANTS).lower()
+    text = ''.join(chr(ord(c) - 0x60) if 'ァ' <= c <= 'ヶ' else c for c in text)
+    return _IGNORED.sub('', text)
+
+
+@dataclass
+class CatalogEntry:
+    """カタログの作品"""
+    work_id: int
+    title: str
+    title_reading: str
+    subtitle: str
+    author: str
+    author_reading: str
+    role: str
+    card_url: str
+    text_url: str
+    html_url: str
+
+    @property
+    def url(self) -> str:
+        """本文のURL（テキストZIPを優先、なければHTML）"""
+        return self.text_url or self.html_url
+
+
+@dataclass
+class CatalogMatch:
+    """照合結果"""
+    entry: CatalogEntry
+    kind: str
+    score: float
+
+
+class AozoraCatalog:
+    """青空文庫カタログ（作品名・著者名の正規化キーに索引付き）"""
+
+    def __init__(self, db_path: str = "data/aozora_catalog.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.pool = ConnectionManager(self.db_path, pool_size=2)
+        self._authors: Optional[Dict[str, List[str]]] = None   # 著者名・読みのキー → 著者名のキー（あいまい照合用）
+        self._titles: Optional[List[str]] = None
+        self._init_tables()
+
+    def _init_tables(self):
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS catalog (
+                work_id INTEGER NOT NULL,
+                person_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                title_reading TEXT NOT NULL DEFAULT '',
+                subtitle TEXT NOT NULL DEFAULT '',
+                author TEXT NOT NULL,
+                author_reading TEXT NOT NULL DEFAULT '',
+                role TEXT NOT NULL DEFAULT '',
+                card_url TEXT NOT NULL DEFAULT '',
+                text_url TEXT NOT NULL DEFAULT '',
+                html_url TEXT NOT NULL DEFAULT '',
+                title_key TEXT NOT NULL,
+                title_reading_key TEXT NOT NULL,
+                author_key TEXT NOT NULL,
+                author_reading_key TEXT NOT NULL,
+                PRIMARY KEY (work_id, person_id)
+            ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_title ON catalog(title, author)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_title_key ON catalog(title_key, author_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_title_reading_key ON catalog(title_reading_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_author_key ON catalog(author_key)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_catalog_author_reading_key ON catalog(author_reading_key)")
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS catalog_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+            """)
+            conn.commit()
+
+    # ===========================================
+    # 取り込み
+    # ===========================================
+
+    @staticmethod
+    def _read_rows(source: bytes) -> Iterator[Dict[str, str]]:
+        """CSV（ZIPの中のCSVも可、UTF-8 / Shift_JIS）の行"""
+        if source[:4] == b'PK\x03\x04':
+            with zipfile.ZipFile(io.BytesIO(source)) as archive:
+                name = next(n for n in archive.namelist() if n.lower().endswith('.csv'))
+                source = archive.read(name)
+        for encoding in ('utf-8-sig', 'cp932'):
+            try:
+                text = source.decode(encoding)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            raise ValueError("CSVの文字コードを判定できません")
+        yield from csv.DictReader(io.StringIO(text, newline=''))
+
+    @staticmethod
+    def _to_row(record: Dict[str, str]) -> Optional[tuple]:
+        values = {column: (record.get(header) or '').strip() for header, column in _COLUMNS.items()}
+        if not values['work_id'].isdigit() or not values['title']:
+            return None
+        author = values['last_name'] + values['first_name']
+        author_reading = values['last_name_reading'] + values['first_name_reading']
+        return (
+            int(values['work_id']), int(values['person_id'] or 0), values['title'], values['title_reading'],
+            values['subtitle'], author, author_reading, values['role'],
+            values['card_url'], values['text_url'], values['html_url'],
+            normalize_key(values['title']), normalize_key(values['title_reading']),
+            normalize_key(author), normalize_key(author_reading),
+        )
+
+    def load_csv(self, source: bytes, source_name: str = "") -> int:
+        """
+        作品一覧のCSVで置き換え（1トランザクション）
+
+        Args:
+            source: CSV または CSV を含むZIPの内容
+            source_name: 取り込み元（記録用）
+
+        Returns:
+            int: 取り込んだ行数（作品 × 人物）
+        """
+        rows = [row for row in map(self._to_row, self._read_rows(source)) if row is not None]
+        with self.pool.connection() as conn:
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM catalog")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO catalog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+                conn.executemany("INSERT OR REPLACE INTO catalog_meta (key, value) VALUES (?, ?)", [
+                    ('source', source_name), ('loaded_at', time.strftime('%Y-%m-%d %H:%M:%S')),
+                ])
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            conn.execute("ANALYZE catalog")
+        self._authors = self._titles = None
+        return len(rows)
+
+    def load_file(self, path: str) -> int:
+        """ファイル（CSV・ZIP）から取り込む"""
+        return self.load_csv(Path(path).read_bytes(), str(path))
+
+    def get_stats(self) -> Dict[str, object]:
+        with self.pool.connection() as conn:
+            works, authors = conn.execute(
+                "SELECT COUNT(DISTINCT work_id), COUNT(DISTINCT person_id) FROM catalog"
+            ).fetchone()
+            meta = dict(conn.execute("SELECT key, value FROM catalog_meta").fetchall())
+        return {'works': works, 'authors': authors, **meta}
+
+    def is_empty(self) -> bool:
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT 1 FROM catalog LIMIT 1").fetchone() is None
+
+    # ===========================================
+    # 照合
+    # ===========================================
+
+    _SELECT = """SELECT work_id, title, title_reading, subtitle, author, author_reading, role,
+                        card_url, text_url, html_url FROM catalog"""
+
+    def _query(self, where: str, params: Tuple) -> List[CatalogEntry]:
+        with self.pool.connection() as conn:
+            # 著者を優先し、同じ作品の翻訳者・編者などの行は後ろに回す
+            cursor = conn.execute(f"{self._SELECT} WHERE {where} ORDER BY role != '著者', work_id", params)
+            return [CatalogEntry(*row) for row in cursor.fetchall()]
+
+    def _author_keys(self, author: str, cutoff: float) -> List[str]:
+        """著者名の正規化キー（読み・あいまい一致を含む）"""
+        key = normalize_key(author)
+        if self._authors is None:
+            with self.pool.connection() as conn:
+                authors: Dict[str, List[str]] = {}
+                for author_key, reading_key in conn.execute(
+                        "SELECT DISTINCT author_key, author_reading_key FROM catalog"):
+                    authors.setdefault(author_key, []).append(author_key)
+                    authors.setdefault(reading_key, []).append(author_key)
+                self._authors = authors
+        if key in self._authors:
+            return list(dict.fromkeys(self._authors[key]))
+        close = difflib.get_close_matches(key, list(self._authors), n=3, cutoff=cutoff)
+        return list(dict.fromkeys(k for match in close for k in self._authors[match]))
+
+    def _title_keys(self) -> List[str]:
+        """作品名の正規化キー（あいまい照合用、初回に読み込んで保持）"""
+        if self._titles is None:
+            with self.pool.connection() as conn:
+                self._titles = [row[0] for row in conn.execute("SELECT DISTINCT title_key FROM catalog")]
+        return self._titles
+
+    def search(self, title: str, author: Optional[str] = None, limit: int = 10,
+               fuzzy: bool = True, cutoff: float = 0.6) -> List[CatalogMatch]:
+        """
+        作品名（と著者名）で検索
+
+        完全一致 → 正規化キーの一致 → 読みの一致 → あいまい一致の順に試し、最初に見つかった段階の結果を返す。
+        """
+        title_key = normalize_key(title)
+        author_key = normalize_key(author) if author else None
+
+        stages = [
+            (EXACT, "title = ?" + (" AND author = ?" if author else ""),
+             (title, author) if author else (title,)),
+            (NORMALIZED, "title_key = ?" + (" AND (author_key = ? OR author_reading_key = ?)" if author else ""),
+             (title_key, author_key, author_key) if author else (title_key,)),
+            (READING, "title_reading_key = ?" + (" AND (author_key = ? OR author_reading_key = ?)" if author else ""),
+             (title_key, author_key, author_key) if author else (title_key,)),
+        ]
+        for kind, where, params in stages:
+            entries = self._query(where, params)
+            if entries:
+                return [CatalogMatch(entry, kind, 1.0) for entry in entries[:limit]]
+
+        if not fuzzy or not title_key:
+            return []
+        if author:
+            # 著者名のゆれを許して著者の作品に絞る
+            keys = self._author_keys(author, cutoff)
+            if not keys:
+                return []
+            candidates = self._query(f"author_key IN ({','.join('?' * len(keys))})", tuple(keys))
+            title_keys = {normalize_key(entry.title) for entry in candidates}
+        else:
+            candidates = None
+            title_keys = self._title_keys()
+
+        close = difflib.get_close_matches(title_key, title_keys, n=limit, cutoff=cutoff)
+        if not close:
+            return []
+        if candidates is None:
+            candidates = self._query(f"title_key IN ({','.join('?' * len(close))})", tuple(close))
+        scores = {key: difflib.SequenceMatcher(None, title_key, key).ratio() for key in close}
+        matches = [CatalogMatch(entry, FUZZY, scores[normalize_key(entry.title)])
+                   for entry in candidates if normalize_key(entry.title) in scores]
+        matches.sort(key=lambda match: (-match.score, match.entry.role != '著者', match.entry.work_id))
+        return matches[:limit]
+
+    def find(self, title: str, author: Optional[str] = None, **kwargs) -> Optional[CatalogEntry]:
+        """最も一致する作品（なければ None）"""
+        matches = self.search(title, author, limit=1, **kwargs)
+        return matches[0].entry if matches else None
+
+    def iter_entries(self, author: Optional[str] = None) -> Iterable[CatalogEntry]:
+        """カタログの作品（著者名の指定があれば正規化キーで絞り込み）"""
+        if author:
+            key = normalize_key(author)
+            return self._query("author_key = ? OR author_reading_key = ?", (key, key))
+        return self._query("1", ())
+
+    def close(self):
+        self.pool.close()
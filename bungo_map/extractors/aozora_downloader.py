@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫ダウンローダー
+ホストごとの同時接続数制限・接続の再利用・ETag/Last-Modified による再検証・
+一時的な失敗の再試行（指数バックオフ）付きで本文を並行ダウンロードする
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .text_store import RAW, TextStore
+
+
+USER_AGENT = 'BungoMapBot/2.0 (Educational Research Purpose)'
+
+# 再試行する応答（レート制限・サーバー側の一時的な障害）
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class DownloadResult:
+    """ダウンロード結果"""
+    url: str
+    content: Optional[bytes] = None
+    content_type: str = ""
+    status_code: Optional[int] = None
+    not_modified: bool = False     # 304（キャッシュ済みの本文を返した）
+    attempts: int = 0
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class AozoraDownloader:
+    """本文の並行ダウンローダー（複数スレッドから共有可能）"""
+
+    def __init__(self, store: Optional[TextStore] = None, max_per_host: int = 2,
+                 timeout: float = 30.0, max_retries: int = 3, backoff: float = 1.0,
+                 headers: Optional[Dict[str, str]] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        初期化
+
+        Args:
+            store: 取得した本文と検証用ヘッダー（ETag/Last-Modified）の保存先（省略時は既定のテキストストア）
+            max_per_host: ホストごとの同時接続数の上限
+            timeout: 1リクエストのタイムアウト（秒）
+            max_retries: 一時的な失敗（接続エラー・タイムアウト・429・5xx）の最大リトライ回数
+            backoff: リトライ間隔の初期値（秒、試行ごとに2倍）
+            headers: 追加のリクエストヘッダー
+            sleep: 待機関数
+        """
+        self.store = store or TextStore()
+        self.max_per_host = max(1, max_per_host)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.headers = {'User-Agent': USER_AGENT, **(headers or {})}
+        self.sleep = sleep
+
+        self._local = threading.local()
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats = {'downloaded': 0, 'not_modified': 0, 'retries': 0, 'failed': 0}
+
+    # ===========================================
+    # 接続
+    # ===========================================
+
+    @property
+    def session(self) -> requests.Session:
+        """スレッドごとのセッション（keep-alive で接続を再利用）"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_per_host)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        return session
+
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+            return slot
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    # ===========================================
+    # キャッシュ（本文と検証用ヘッダー）
+    # ===========================================
+
+    def _read_cache(self, url: str):
+        """保存済みの (本文, 索引の項目)（なければ None）"""
+        entry = self.store.get_entry(url, RAW)
+        if entry is None:
+            return None
+        content = self.store.get(url, RAW)
+        return (content, entry) if content is not None else None
+
+    # ===========================================
+    # ダウンロード
+    # ===========================================
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        delay = self.backoff * (2 ** (attempt - 1))
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                try:
+                    delay = max(delay, parsedate_to_datetime(retry_after).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+        return delay
+
+    def download(self, url: str, revalidate: bool = True) -> DownloadResult:
+        """
+        本文をダウンロード
+
+        保存済みの本文があれば ETag/Last-Modified で条件付きリクエストを送り、
+        304 なら保存済みの本文を返す。revalidate=False なら保存済みの本文を通信せずに返す。
+        """
+        result = DownloadResult(url)
+        cached = self._read_cache(url)
+        if cached is not None and not revalidate:
+            result.content, result.content_type = cached[0], cached[1].get('content_type', '')
+            result.not_modified = True
+            return result
+
+        headers = {}
+        if cached is not None:
+            if cached[1].get('etag'):
+                headers['If-None-Match'] = cached[1]['etag']
+            if cached[1].get('last_modified'):
+                headers['If-Modified-Since'] = cached[1]['last_modified']
+
+        slot = self._host_slot(url)
+        while True:
+            result.attempts += 1
+            response = None
+            try:
+                with slot:
+                    response = self.session.get(url, headers=headers, timeout=self.timeout)
+                    content = response.content
+                result.status_code = response.status_code
+                retryable = response.status_code in RETRY_STATUSES
+                error = None if retryable else self._check_status(response)
+            except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+                retryable, error = True, str(e)
+            except requests.RequestException as e:
+                # 不正なURL・リダイレクト過多など（再試行しても変わらないため作品ごとの失敗にする）
+                retryable, error = False, str(e)
+
+            if retryable and result.attempts <= self.max_retries:
+                self._count('retries')
+                self.sleep(self._retry_delay(result.attempts, response))
+                continue
+            break
+
+        result.error = error or (f"HTTP {result.status_code}" if retryable else None)
+        if result.error is None and response.status_code == 304 and cached is None:
+            result.error = "保存済みの本文がないのに 304 が返されました"
+        if result.error:
+            self._count('failed')
+            return result
+
+        if response.status_code == 304:
+            result.content, result.content_type = cached[0], cached[1].get('content_type', '')
+            result.not_modified = True
+            self._count('not_modified')
+            return result
+
+        result.content = content
+        result.content_type = response.headers.get('content-type', '').lower()
+        self.store.put(url, RAW, content, content_type=result.content_type,
+                       etag=response.headers.get('ETag', ''),
+                       last_modified=response.headers.get('Last-Modified', ''))
+        self._count('downloaded')
+        return result
+
+    @staticmethod
+    def _check_status(response: requests.Response) -> Optional[str]:
+        if response.status_code == 304:
+            return None
+        try:
+            response.raise_for_status()
+        except requests.HTTPError as e:
+            return str(e)
+        return None
+
+    def download_many(self, urls: Iterable[str], concurrency: int = 8,
+                      revalidate: bool = True) -> Dict[str, DownloadResult]:
+        """
+        複数の本文を並行ダウンロード
+
+        全体の同時実行数は concurrency、ホストごとの同時接続数は max_per_host まで。
+
+        Returns:
+            Dict[str, DownloadResult]: URL → 結果（入力順、重複は1回だけ取得）
+        """
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(urls)))) as executor:
+            futures = {url: executor.submit(self.download, url, revalidate) for url in urls}
+            return {url: future.result() for url, future in futures.items()}
+
+    def get_stats(self) -> Dict[str, int]:
+        """取得・未変更（304）・リトライ・失敗の件数"""
+        with self._lock:
+            return dict(self._stats)
@@ -5,37 +5,63 @@
 実際の青空文庫からテキストを取得し、地名抽出可能な形に正規化
 """
 
+import os
 import requests
-import re
 import time
 import zipfile
 import io
-import os
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, quote
 from bs4 import BeautifulSoup
 import json
 
+from .aozora_catalog import AozoraCatalog
+from .aozora_downloader import USER_AGENT, AozoraDownloader
+from .aozora_normalizer import normalize_aozora_text
+from .text_store import TextStore
+
 
 class AozoraExtractor:
     """青空文庫テキスト抽出器"""
     
-    def __init__(self, cache_dir: str = "data/aozora_cache"):
+    def __init__(self, cache_dir: str = "data/aozora_cache", downloader: Optional[AozoraDownloader] = None,
+                 catalog: Optional[AozoraCatalog] = None, catalog_path: str = "data/aozora_catalog.db"):
         self.base_url = "https://www.aozora.gr.jp"
         self.api_url = "https://pubserver1.herokuapp.com/api/v0.1/books"
         self.cache_dir = cache_dir
         
-        # セッション設定
+        # セッション設定（API検索用）
         self.session = requests.Session()
         self.session.headers.update({
-            'User-Agent': 'BungoMapBot/2.0 (Educational Research Purpose)'
+            'User-Agent': USER_AGENT
         })
         
-        # キャッシュディレクトリ作成
-        os.makedirs(cache_dir, exist_ok=True)
+        # 取得した本文・正規化テキストの保存先（内容のハッシュで圧縮保存、索引はSQLite）
+        self.store = downloader.store if downloader else TextStore(cache_dir)
+        
+        # 本文のダウンロード（接続の再利用・再検証・リトライ）
+        self.downloader = downloader or AozoraDownloader(self.store)
         
-        # APIの利用可能性確認
-        self.api_available = self._check_api_availability()
+        # 作品検索は取り込み済みのカタログを優先（なければ初回の検索時にAPIの利用可能性を確認）
+        self._catalog = catalog
+        self.catalog_path = catalog_path
+        self._api_available = None
+    
+    @property
+    def catalog(self) -> Optional[AozoraCatalog]:
+        """作品カタログ（未取り込みなら None）"""
+        if self._catalog is None and os.path.exists(self.catalog_path):
+            self._catalog = AozoraCatalog(self.catalog_path)
+        if self._catalog is not None and self._catalog.is_empty():
+            return None
+        return self._catalog
+    
+    @property
+    def api_available(self) -> bool:
+        """青空文庫APIが利用可能か（初回アクセス時に確認して保持）"""
+        if self._api_available is None:
+            self._api_available = self._check_api_availability()
+        return self._api_available
         
     def _check_api_availability(self) -> bool:
         """青空文庫APIの利用可能性をチェック"""
@@ -49,6 +75,11 @@ class AozoraExtractor:
         """青空文庫で作品のURLを検索"""
         print(f"🔍 青空文庫検索: {author_name} - {work_title}")
         
+        # カタログがあれば通信せずに照合
+        catalog = self.catalog
+        if catalog is not None:
+            return self._search_via_catalog(catalog, work_title, author_name)
+        
         # APIが利用可能な場合は使用
         if self.api_available:
             return self._search_via_api(work_title, author_name)
@@ -56,6 +87,23 @@ class AozoraExtractor:
         # フォールバック: 直接検索
         return self._search_via_direct(work_title, author_name)
     
+    def _search_via_catalog(self, catalog: AozoraCatalog, work_title: str, author_name: str) -> Optional[str]:
+        """
+        カタログで作品検索（完全一致 → 正規化 → 読み）
+
+        あいまい一致は別作品を取り違えるため自動では採用せず、候補として表示するだけにする。
+        """
+        matches = catalog.search(work_title, author_name, limit=1, fuzzy=False)
+        if not matches or not matches[0].entry.url:
+            print(f"❌ カタログに見つかりません: {work_title}")
+            candidates = catalog.search(work_title, author_name, limit=3)
+            if candidates:
+                print(f"💡 近い作品: {', '.join(f'{c.entry.title}（{c.entry.author}）' for c in candidates)}")
+            return None
+        match = matches[0]
+        print(f"✅ カタログ検索成功: {match.entry.title} ({match.kind})")
+        return match.entry.url
+    
     def _search_via_api(self, work_title: str, author_name: str) -> Optional[str]:
         """API経由で作品検索"""
         try:
@@ -110,30 +158,89 @@ class AozoraExtractor:
         if not text_url:
             return None
         
-        # キャッシュファイル名生成
-        cache_filename = self._get_cache_filename(text_url)
-        cache_path = os.path.join(self.cache_dir, cache_filename)
-        
         # キャッシュ確認
-        if os.path.exists(cache_path):
-            print(f"📁 キャッシュから読み込み: {cache_filename}")
-            with open(cache_path, 'r', encoding='utf-8') as f:
-                return f.read()
+        cached = self.read_cached_text(text_url)
+        if cached is not None:
+            return cached
         
         try:
             print(f"📥 テキストダウンロード: {text_url}")
-            response = self.session.get(text_url, timeout=30)
-            response.raise_for_status()
-            
-            # コンテンツタイプを確認してHTML/テキストを判定
-            content_type = response.headers.get('content-type', '').lower()
+            content, content_type = self.fetch_raw(text_url)
+        except Exception as e:
+            print(f"❌ テキストダウンロードエラー: {e}")
+            return None
+        
+        return self.extract_text(content, content_type, text_url)
+    
+    def read_cached_text(self, text_url: str) -> Optional[str]:
+        """キャッシュ済みの正規化テキスト（なければ None、未登録のURLはファイルを参照しない）"""
+        text = self.store.get_text(text_url)
+        if text is not None:
+            print(f"📁 キャッシュから読み込み: {text_url}")
+        return text
+    
+    def fetch_raw(self, text_url: str) -> Tuple[bytes, str]:
+        """
+        テキストをダウンロード（通信のみ、失敗時は例外）
+        
+        Returns:
+            Tuple[bytes, str]: 本文のバイト列と Content-Type
+        """
+        result = self.downloader.download(text_url)
+        if not result.ok:
+            raise IOError(result.error)
+        return result.content, result.content_type
+    
+    def download_many(self, text_urls: List[str], concurrency: int = 8,
+                      revalidate: bool = False) -> Dict[str, Optional[str]]:
+        """
+        複数の作品を並行ダウンロードして正規化
+        
+        Args:
+            text_urls: 本文URL
+            concurrency: 全体の同時ダウンロード数（ホストごとの上限はダウンローダーの max_per_host）
+            revalidate: 正規化済みキャッシュがあっても条件付きリクエストで更新を確認
+                        （未更新なら正規化済みキャッシュをそのまま使う）
             
-            if 'html' in content_type or text_url.endswith('.html'):
+        Returns:
+            Dict[str, Optional[str]]: URL → 正規化テキスト（取得失敗は None）
+        """
+        texts: Dict[str, Optional[str]] = {}
+        targets = []
+        for url in dict.fromkeys(text_urls):
+            cached = None if revalidate else self.read_cached_text(url)
+            if cached is not None:
+                texts[url] = cached
+            else:
+                targets.append(url)
+        
+        print(f"📥 並行ダウンロード: {len(targets)}件 (同時 {concurrency})")
+        for url, result in self.downloader.download_many(targets, concurrency).items():
+            if not result.ok:
+                print(f"❌ テキストダウンロードエラー: {url} ({result.error})")
+                texts[url] = None
+                continue
+            if result.not_modified:
+                cached = self.read_cached_text(url)
+                if cached is not None:
+                    texts[url] = cached
+                    continue
+            texts[url] = self.extract_text(result.content, result.content_type, url)
+        return {url: texts[url] for url in dict.fromkeys(text_urls)}
+    
+    def extract_text(self, content: bytes, content_type: str, text_url: str) -> Optional[str]:
+        """ダウンロードした本文（テキスト・HTML・ZIP）をデコード・正規化してキャッシュに保存"""
+        try:
+            if text_url.endswith('.zip') or content[:4] == b'PK\x03\x04':
+                # ZIPの場合は中のテキストファイルを展開（メモリ上）
+                content = self.read_zip_text(content)
+                raw_text = self._decode_content(content)
+            elif 'html' in content_type or text_url.endswith('.html'):
                 # HTMLファイルの場合
-                raw_text = self._extract_text_from_html(response.content)
+                raw_text = self._extract_text_from_html(content)
             else:
                 # テキストファイルの場合
-                raw_text = self._decode_content(response.content)
+                raw_text = self._decode_content(content)
             
             if not raw_text:
                 print(f"❌ テキスト抽出失敗")
@@ -147,16 +254,24 @@ class AozoraExtractor:
                 return None
             
             # キャッシュ保存
-            with open(cache_path, 'w', encoding='utf-8') as f:
-                f.write(normalized_text)
+            self.store.put_text(text_url, normalized_text)
             
             print(f"✅ テキスト取得完了: {len(normalized_text)}文字")
             return normalized_text
             
         except Exception as e:
-            print(f"❌ テキストダウンロードエラー: {e}")
+            print(f"❌ テキスト抽出エラー: {e}")
             return None
     
+    @staticmethod
+    def read_zip_text(content: bytes) -> bytes:
+        """青空文庫のZIPから本文のテキストファイル（CP932）を取り出す"""
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            names = sorted(name for name in archive.namelist() if name.lower().endswith('.txt'))
+            if not names:
+                raise ValueError("ZIPにテキストファイルがありません")
+            return archive.read(names[0])
+    
     def _extract_text_from_html(self, content: bytes) -> Optional[str]:
         """HTMLファイルからテキストを抽出"""
         try:
@@ -195,8 +310,8 @@ class AozoraExtractor:
     
     def _decode_content(self, content: bytes) -> Optional[str]:
         """コンテンツのエンコーディングを検出してデコード"""
-        # 青空文庫は主にShift_JIS
-        encodings = ['shift_jis', 'utf-8', 'euc-jp']
+        # 青空文庫はShift_JISと表記されるが実体はCP932（①や髙などの機種依存文字を含む）
+        encodings = ['cp932', 'utf-8', 'euc-jp']
         
         for encoding in encodings:
             try:
@@ -204,114 +319,15 @@ class AozoraExtractor:
             except UnicodeDecodeError:
                 continue
         
-        # 最後の手段: エラーを無視してShift_JISでデコード
+        # 最後の手段: エラーを無視してCP932でデコード
         try:
-            return content.decode('shift_jis', errors='ignore')
+            return content.decode('cp932', errors='ignore')
         except:
             return None
     
     def normalize_aozora_text(self, raw_text: str) -> str:
-        """青空文庫テキストの正規化"""
-        text = raw_text
-        
-        # 1. ヘッダー・フッター除去
-        text = self._remove_metadata(text)
-        
-        # 2. ルビ記法処理
-        text = self._process_ruby(text)
-        
-        # 3. 注記・記法除去
-        text = self._remove_annotations(text)
-        
-        # 4. 改行・空白正規化
-        text = self._normalize_whitespace(text)
-        
-        return text.strip()
-    
-    def _remove_metadata(self, text: str) -> str:
-        """ヘッダー・フッター情報を除去"""
-        lines = text.split('\n')
-        content_lines = []
-        in_content = False
-        
-        for line in lines:
-            line = line.strip()
-            
-            # ヘッダー終了・本文開始の検出
-            if not in_content:
-                # メタデータ行をスキップ
-                if (line.startswith('底本：') or line.startswith('入力：') or 
-                    line.startswith('校正：') or line.startswith('※') or
-                    '------' in line or line == '' or 
-                    '青空文庫' in line):
-                    continue
-                else:
-                    # 本文開始
-                    in_content = True
-            
-            # フッター検出で終了
-            if in_content and ('底本：' in line or '入力：' in line or '校正：' in line):
-                break
-            
-            if in_content:
-                content_lines.append(line)
-        
-        return '\n'.join(content_lines)
-    
-    def _process_ruby(self, text: str) -> str:
-        """ルビ記法を処理"""
-        # ｜漢字《かんじ》 → 漢字
-        text = re.sub(r'｜([^《]+)《[^》]+》', r'\1', text)
-        
-        # 漢字《かんじ》 → 漢字
-        text = re.sub(r'([一-龯]+)《[^》]+》', r'\1', text)
-        
-        # 残ったルビ記号除去
-        text = re.sub(r'《[^》]*》', '', text)
-        text = text.replace('｜', '')
-        
-        return text
-    
-    def _remove_annotations(self, text: str) -> str:
-        """注記・記法を除去"""
-        # ［＃...］記法除去
-        text = re.sub(r'［＃[^］]*］', '', text)
-        
-        # 〔...〕編者注除去
-        text = re.sub(r'〔[^〕]*〕', '', text)
-        
-        # ※注釈行除去
-        text = re.sub(r'※[^\n]*\n', '', text)
-        
-        # その他の記号
-        text = re.sub(r'＊', '', text)
-        
-        return text
-    
-    def _normalize_whitespace(self, text: str) -> str:
-        """空白・改行を正規化"""
-        # Windows改行統一
-        text = re.sub(r'\r\n', '\n', text)
-        
-        # 連続改行を2つまでに制限
-        text = re.sub(r'\n{3,}', '\n\n', text)
-        
-        # 全角スペースの連続を1つに
-        text = re.sub(r'　+', '　', text)
-        
-        # 行頭・行末のスペース除去
-        lines = text.split('\n')
-        lines = [line.strip() for line in lines]
-        
-        return '\n'.join(lines)
-    
-    def _get_cache_filename(self, url: str) -> str:
-        """キャッシュファイル名を生成"""
-        # URLから安全なファイル名を生成
-        filename = re.sub(r'[^\w\-_.]', '_', url.split('/')[-1])
-        if not filename.endswith('.txt'):
-            filename += '.txt'
-        return filename
+        """青空文庫テキストの正規化（ヘッダー・フッター・ルビ・注記・空白を1回の走査で処理）"""
+        return normalize_aozora_text(raw_text)
     
     def get_sample_works(self) -> List[Dict]:
         """テスト用のサンプル作品情報"""
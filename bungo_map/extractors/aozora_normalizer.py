@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫テキストの正規化（1回の走査）
+ヘッダー・フッターの検出、ルビ（《》・｜）、注記（［＃…］・〔〕・※）、空白・改行の整理を
+1つの正規表現で記法と空白だけを拾いながら先頭から順に処理する
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+
+# ヘッダーとして読み飛ばす行（空行・区切り線・青空文庫の説明・底本/入力/校正・※で始まる行）
+_HEADER_LINE = re.compile(
+    r'[^\S\n]*(?:(?:底本：|入力：|校正：|※)[^\n]*|[^\n]*(?:------|青空文庫)[^\n]*)?(?:\n|\Z)'
+)
+_LEADING_SPACE = re.compile(r'[^\S\n]*')
+
+# 本文中で処理する記法と空白（これ以外の文字はそのまま出力に切り出す）
+# 先頭を文字クラスにして候補の文字まで高速に読み飛ばし、続きは先頭の文字ごとに後読みで分ける
+_TOKEN = re.compile(
+    r'[\s《［〔｜＊※底入校](?:'
+    r'(?<=\s)\s*'                                       # 空白・改行の連続
+    r'|(?<=《)[^《》]*》|(?<=［)＃[^］]*］|(?<=〔)[^〕]*〕'    # ルビ・入力者注・編者注
+    r'|(?<=[｜＊※])'                                     # ルビの始まり・＊・※（※から行末まで除く）
+    r'|(?<=底)本：|(?<=入)力：|(?<=校)正：'                # この行から後はフッター
+    r')'
+)
+_FULLWIDTH_SPACES = re.compile('　+')
+
+_IDEOGRAPHIC_SPACE = '　'
+
+
+def _merge(held: Tuple[List[str], int], pieces: List[str]) -> Tuple[List[str], int]:
+    """
+    ※で終わった行の※より前と次の行をつなぐ（つなぎ目の全角スペースの連続は1つに）
+
+    Returns:
+        Tuple: (つないだ行, 次の行の添字のずれ)
+    """
+    left = held[0][:held[1]]
+    if left and pieces and left[-1][-1:] == _IDEOGRAPHIC_SPACE and pieces[0][:1] == _IDEOGRAPHIC_SPACE:
+        if len(pieces[0]) > 1:
+            pieces = [pieces[0][1:]] + pieces[1:]
+        else:
+            return left + pieces[1:], len(left) - 1
+    return left + pieces, len(left)
+
+
+def normalize_aozora_text(raw_text: str) -> str:
+    """
+    青空文庫テキストの正規化
+
+    - ヘッダー: 先頭の空行・区切り線・青空文庫の説明などの行を読み飛ばす
+    - フッター: 「底本：」「入力：」「校正：」を含む行から後を除く
+    - ルビ・注記: 《…》・｜・［＃…］・〔…〕・＊ を除き、※から行末まで（改行を含む）を除いて次の行とつなぐ
+      （最後の行の※は改行がないため残す）
+    - 空白: 各行の前後の空白を除き、空行の連続を1行に、全角スペースの連続を1つにする
+
+    変更前の実装（置換を順に繰り返す方式）と同じ結果になる。閉じていない《・［＃・〔がある場合のみ異なることがある。
+    """
+    text = raw_text
+
+    # ヘッダー
+    pos = 0
+    while True:
+        match = _HEADER_LINE.match(text, pos)
+        if match is None or match.end() == pos:
+            break
+        pos = match.end()
+    pos = _LEADING_SPACE.match(text, pos).end()
+
+    lines: List[str] = []
+    previous_empty = False
+    pieces: List[str] = []              # 現在の行の出力
+    note: Optional[int] = None          # 現在の行で※が現れた位置（pieces の添字）
+    held: Optional[Tuple[List[str], int]] = None   # ※で終わった前の行（次の行がフッターなら※以降も残す）
+
+    def finish(line_pieces: List[str]):
+        nonlocal previous_empty
+        line = ''.join(line_pieces)
+        if line:
+            lines.append(line.strip())
+            previous_empty = False
+        elif not previous_empty:
+            # 空行の連続は1行に（記法を除いて空白だけが残った行はまとめない）
+            lines.append('')
+            previous_empty = True
+
+    last = pos
+    footer = False
+    for match in _TOKEN.finditer(text, pos):
+        start, end = match.span()
+        if start > last:
+            pieces.append(text[last:start])
+        last = end
+        head = text[start]
+
+        if head in '《［〔｜＊':
+            # ルビ・注記（除く）
+            continue
+        if head == '※':
+            # 行末で※以降を除く（次の行がフッターなら残す）
+            if note is None:
+                note = len(pieces)
+            pieces.append('※')
+            continue
+        if head in '底入校':
+            footer = True
+            break
+
+        # 空白・改行
+        space = text[start:end]
+        newlines = space.count('\n')
+        if newlines == 1 and held is None and note is None:
+            # 多くの行はここで確定する
+            finish(pieces)
+            pieces = []
+            continue
+        if not newlines:
+            if _IDEOGRAPHIC_SPACE in space:
+                if len(space) > 1:
+                    space = _FULLWIDTH_SPACES.sub(_IDEOGRAPHIC_SPACE, space)
+                if space[0] == _IDEOGRAPHIC_SPACE and pieces and pieces[-1][-1:] == _IDEOGRAPHIC_SPACE:
+                    space = space[1:]
+            if space:
+                pieces.append(space)
+            continue
+        # 改行ごとに行を確定（改行前後の空白は行頭・行末の空白として除く）
+        for _ in range(newlines):
+            if held is not None:
+                pieces, offset = _merge(held, pieces)
+                if note is not None:
+                    note += offset
+                held = None
+            if note is not None:
+                held = (pieces, note)
+                note = None
+            else:
+                finish(pieces)
+            pieces = []
+
+    if footer:
+        # フッターの行は除き、※で終わった前の行はそのまま最後の行にする
+        if held is not None:
+            finish(held[0])
+    else:
+        if last < len(text):
+            pieces.append(text[last:])
+        finish(_merge(held, pieces)[0] if held is not None else pieces)
+
+    return '\n'.join(lines).strip()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+辞書照合エンジン（Aho–Corasick法）
+地名辞書をオートマトンに一度だけ構築し、テキスト全体を1回の線形走査で照合する
+"""
+
+import re
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Tuple, Union
+
+
+# 遷移表のキー: (状態番号 << 21) | 文字コード（Unicodeは21ビットに収まる）
+_CHAR_BITS = 21
+
+
+class DictionaryMatch(NamedTuple):
+    """照合結果（テキスト中の位置と登録値）"""
+    start: int
+    end: int
+    word: str
+    value: Any
+
+
+class AhoCorasickMatcher:
+    """Aho–Corasick オートマトンによる多語照合器"""
+
+    def __init__(self, words: Iterable[Union[str, Tuple[str, Any]]] = ()):
+        """
+        初期化
+
+        Args:
+            words: 登録語、または (登録語, 値) のイテラブル
+        """
+        # 状態ごとの情報は配列、遷移は1つの辞書にまとめて保持（状態ごとの辞書より省メモリ）
+        self._goto: Dict[int, int] = {}
+        self._fail: List[int] = [0]
+        self._depth: List[int] = [0]
+        self._word: List[int] = [-1]        # その状態で終わる登録語の番号
+        self._output_link: List[int] = [0]  # 失敗遷移をたどって最初に見つかる登録語の状態
+        self._words: List[str] = []
+        self._values: List[Any] = []
+        self._first_chars = re.compile('(?!)')  # 登録語の先頭文字（初期状態で読み飛ばす位置の検索用）
+        self._built = True
+
+        for entry in words:
+            if isinstance(entry, str):
+                self.add(entry)
+            else:
+                self.add(*entry)
+        self.build()
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        state = 0
+        for ch in word:
+            state = self._goto.get((state << _CHAR_BITS) | ord(ch))
+            if state is None:
+                return False
+        return self._word[state] >= 0
+
+    def add(self, word: str, value: Any = None) -> bool:
+        """
+        登録語を追加（登録済みの語は先に登録した値を残す）
+
+        Returns:
+            bool: 新規に追加したか
+        """
+        if not word:
+            return False
+
+        state = 0
+        for ch in word:
+            key = (state << _CHAR_BITS) | ord(ch)
+            next_state = self._goto.get(key)
+            if next_state is None:
+                next_state = len(self._fail)
+                self._goto[key] = next_state
+                self._fail.append(0)
+                self._depth.append(self._depth[state] + 1)
+                self._word.append(-1)
+                self._output_link.append(0)
+            state = next_state
+
+        if self._word[state] >= 0:
+            return False
+        self._word[state] = len(self._words)
+        self._words.append(word)
+        self._values.append(value)
+        self._built = False
+        return True
+
+    def build(self) -> None:
+        """失敗遷移と出力リンクを構築（幅優先）"""
+        if self._built:
+            return
+
+        children: Dict[int, List[Tuple[int, int]]] = {}
+        for key, child in self._goto.items():
+            children.setdefault(key >> _CHAR_BITS, []).append((key & ((1 << _CHAR_BITS) - 1), child))
+
+        first_codes = sorted(code for code, _ in children.get(0, ()))
+        if first_codes:
+            self._first_chars = re.compile('[' + ''.join(re.escape(chr(code)) for code in first_codes) + ']')
+
+        queue = deque()
+        for _, child in children.get(0, ()):
+            self._fail[child] = 0
+            self._output_link[child] = 0
+            queue.append(child)
+
+        while queue:
+            state = queue.popleft()
+            for code, child in children.get(state, ()):
+                fallback = self._fail[state]
+                while True:
+                    target = self._goto.get((fallback << _CHAR_BITS) | code)
+                    if target is not None or fallback == 0:
+                        break
+                    fallback = self._fail[fallback]
+                self._fail[child] = target if target is not None and target != child else 0
+                suffix = self._fail[child]
+                self._output_link[child] = suffix if self._word[suffix] >= 0 else self._output_link[suffix]
+                queue.append(child)
+
+        self._built = True
+
+    def iter_matches(self, text: str) -> Iterator[DictionaryMatch]:
+        """重なりを含む全ての一致を終了位置順に列挙"""
+        words = self._words
+        values = self._values
+        for start, end, index in self._scan(text):
+            yield DictionaryMatch(start, end, words[index], values[index])
+
+    def _scan(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """重なりを含む全ての一致を (開始, 終了, 登録語の番号) で終了位置順に列挙"""
+        if not self._built:
+            self.build()
+
+        goto = self._goto
+        fail = self._fail
+        word_at = self._word
+        output_link = self._output_link
+        depth = self._depth
+        skip_to = self._first_chars.search
+
+        state = 0
+        end = 0
+        length = len(text)
+        while end < length:
+            if state == 0:
+                # 初期状態ではどの登録語の先頭でもない文字を正規表現エンジンで読み飛ばす
+                candidate = skip_to(text, end)
+                if candidate is None:
+                    break
+                end = candidate.start()
+            code = ord(text[end])
+            end += 1
+            while True:
+                next_state = goto.get((state << _CHAR_BITS) | code)
+                if next_state is not None:
+                    state = next_state
+                    break
+                if state == 0:
+                    break
+                state = fail[state]
+
+            out = state if word_at[state] >= 0 else output_link[state]
+            while out:
+                yield end - depth[out], end, word_at[out]
+                out = output_link[out]
+
+    def _select(self, scanned: List[Tuple[int, int, int]]) -> List[DictionaryMatch]:
+        """開始位置順に並べた一致から、前の一致と重ならないものを出現順に選ぶ"""
+        selected = []
+        position = 0
+        for start, end, index in scanned:
+            if start >= position:
+                selected.append(DictionaryMatch(start, end, self._words[index], self._values[index]))
+                position = end
+        return selected
+
+    def find_longest(self, text: str) -> List[DictionaryMatch]:
+        """重ならない最左最長一致を出現順に返す"""
+        return self._select(sorted(self._scan(text), key=lambda m: (m[0], -m[1])))
+
+    def find_first(self, text: str) -> List[DictionaryMatch]:
+        """
+        重ならない最左一致を出現順に返す（同じ位置では先に登録した語を優先）
+
+        登録順に並べた正規表現の選択（a|b|...）で先頭から検索した結果と同じになる。
+        """
+        return self._select(sorted(self._scan(text), key=lambda m: (m[0], m[2])))
+
+
+def load_place_dictionary(path: Union[str, Path], default_value: Any = None) -> Iterator[Tuple[str, Any]]:
+    """
+    地名辞書ファイルを読み込む
+
+    1行1語。タブ区切りの2列目があれば値（分類名など）として返す。空行と # で始まる行は無視。
+    """
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\r\n')
+            if not line or line.startswith('#'):
+                continue
+            word, _, value = line.partition('\t')
+            word = word.strip()
+            if word:
+                yield word, (value.strip() or default_value)
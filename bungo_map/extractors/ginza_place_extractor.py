@@ -5,14 +5,48 @@ GiNZA NLP地名抽出器
 """
 
 import spacy
-from typing import List, Dict, Tuple
-from bungo_map.core.models import Place
+from typing import Iterable, List, Dict, Optional, Sequence, Tuple
+from bungo_map.core.models import Place, Work
+from .ner_cache import CachedEntity, EntityCache, model_key
+from .text_chunker import chunk_spans, sentence_spans
+
+
+# 抽出ロジックを変更したら上げる（作品の差分再抽出の判定に使用）
+EXTRACTOR_VERSION = '2'
+
+# 文単位キャッシュ利用時の抽出方式（version に付ける）
+SENTENCE_CACHE_MODE = 'sentence-cache'
+
+# GiNZAの地名ラベル
+PLACE_LABELS = ('Province', 'City', 'County', 'GPE', 'LOC')
+
+# GiNZAの制限（約49KB）を考慮したチャンクの上限（安全マージンを設けて40KB）
+MAX_CHUNK_BYTES = 40000
+
+# 一括抽出で使わないコンポーネント（モデルに存在するものだけ無効化）
+UNUSED_PIPES = ('parser', 'lemmatizer', 'morphologizer', 'attribute_ruler',
+                'compound_splitter', 'bunsetu_recognizer')
+
+# parser を無効化したときの文分割
+SENTENCIZER = 'bungo_sentencizer'
+SENTENCE_PUNCTUATION = ['。', '！', '？', '!', '?']
 
 
 class GinzaPlaceExtractor:
     """GiNZAを使った高度な地名抽出器"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[EntityCache] = None):
+        """
+        初期化
+        
+        Args:
+            cache: 文単位の固有表現キャッシュ（指定時は文ごとに照会し、未登録の文だけ解析）
+        
+        キャッシュ利用時は句読点・改行で文分割し、固有表現も文ごとに単独で解析するため、
+        チャンク単位で解析する場合と地名・前後の文脈が異なることがある。
+        抽出結果を区別できるよう version に抽出方式を含める。
+        """
+        self.cache = cache
         try:
             self.nlp = spacy.load('ja_ginza')
             print("✅ GiNZA (ja_ginza) モデル読み込み完了")
@@ -20,59 +54,200 @@ class GinzaPlaceExtractor:
             print("⚠️ ja_ginza モデルが見つかりません。ja_core_news_smを使用します。")
             self.nlp = spacy.load('ja_core_news_sm')
             print("✅ ja_core_news_sm モデル読み込み完了")
+        self.model_key = model_key(self.nlp)
+        self.version = f"ginza/{EXTRACTOR_VERSION}/{self.model_key}"
+        if cache is not None:
+            self.version += f"/{SENTENCE_CACHE_MODE}"
     
     def extract_places_from_text(self, work_id: int, text: str, aozora_url: str = None) -> List[Place]:
         """テキストから地名を抽出"""
-        places = []
+        if self.cache is not None:
+            return self._extract_with_cache(work_id, text, aozora_url)
         
-        # GiNZAの制限（約49KB）を考慮してテキストを分割
-        max_chars = 40000  # 安全マージンを設けて40KB
-        text_chunks = self._split_text_by_size(text, max_chars)
+        # GiNZAの制限（約49KB）を考慮してテキストを分割（位置のみ保持し、解析時に切り出す）
+        spans = chunk_spans(text, MAX_CHUNK_BYTES)
         
-        print(f"📝 テキスト分割: {len(text_chunks)}チャンク")
+        print(f"📝 テキスト分割: {len(spans)}チャンク")
         
-        all_sentences = []
-        for chunk_idx, chunk in enumerate(text_chunks):
+        # チャンクごとに1回だけ解析し、文分割と固有表現を同じDocから取り出す
+        sentences = []
+        entities = []  # (文番号, 固有表現)
+        for chunk_idx, (start, end) in enumerate(spans):
             try:
-                doc = self.nlp(chunk)
-                chunk_sentences = [sent.text.strip() for sent in doc.sents]
-                all_sentences.extend(chunk_sentences)
-                print(f"   チャンク{chunk_idx + 1}: {len(chunk_sentences)}文")
+                doc = self.nlp(text[start:end])
             except Exception as e:
                 print(f"⚠️ チャンク{chunk_idx + 1}の解析エラー: {e}")
                 continue
+            
+            sentence_count = self._collect_sentences(doc, sentences, entities)
+            print(f"   チャンク{chunk_idx + 1}: {sentence_count}文")
         
-        print(f"📄 総文数: {len(all_sentences)}")
-        sentences = all_sentences
+        print(f"📄 総文数: {len(sentences)}")
         
-        for i, sentence in enumerate(sentences):
-            # 各文を解析
-            sent_doc = self.nlp(sentence)
+        return self._build_places(work_id, sentences, entities, aozora_url)
+    
+    def extract_many(self, works: Iterable[Work], batch_size: int = 16, n_process: int = 1,
+                     disable: Sequence[str] = UNUSED_PIPES) -> List[List[Place]]:
+        """
+        複数作品から地名を一括抽出
+        
+        全作品のチャンクを nlp.pipe に流し、作品ごとの結果を入力順に組み立てる。
+        
+        Args:
+            works: 本文（content）付きの作品
+            batch_size: nlp.pipe のバッチサイズ
+            n_process: 解析プロセス数（-1 で全コア）
+            disable: 無効化するコンポーネント（parser を含む場合は句読点で文分割）
             
-            # 地名候補を抽出（GiNZAのラベル）
-            for ent in sent_doc.ents:
-                if ent.label_ in ['Province', 'City', 'County', 'GPE', 'LOC']:  # GiNZAの地名ラベル
-                    # 前後の文脈を取得
-                    before_text = sentences[i-1] if i > 0 else ""
-                    after_text = sentences[i+1] if i < len(sentences)-1 else ""
-                    
-                    # 信頼度計算（簡易版）
-                    confidence = self._calculate_confidence(ent, sentence)
-                    
-                    place = Place(
-                        work_id=work_id,
-                        place_name=ent.text,
-                        before_text=before_text[:500],  # 500文字に制限
-                        sentence=sentence,
-                        after_text=after_text[:500],   # 500文字に制限
-                        aozora_url=aozora_url,
-                        confidence=confidence,
-                        extraction_method="ginza_nlp"
-                    )
-                    places.append(place)
+        Returns:
+            List[List[Place]]: works と同じ順序の作品ごとの地名リスト
+        """
+        works = list(works)
+        disabled = [name for name in disable if name in self.nlp.pipe_names]
+        
+        if self.cache is not None:
+            # キャッシュ利用時は文単位で解析するため文分割のコンポーネントは不要
+            print(f"🚀 一括抽出（キャッシュ利用）: {len(works)}作品")
+            # 全作品の未登録の文（重複は1回）をまとめて1回の nlp.pipe で解析する
+            work_sentences = [self._split_sentences(work.content or "") for work in works]
+            with self.nlp.select_pipes(disable=disabled):
+                found, parsed = self._lookup_entities([s for sentences in work_sentences for s in sentences],
+                                                      batch_size=batch_size, n_process=n_process)
+            total = sum(len(sentences) for sentences in work_sentences)
+            print(f"📄 総文数: {total} (解析: {parsed})")
+            return [self._places_from_cache(work.work_id, sentences, found, work.aozora_url)
+                    for work, sentences in zip(works, work_sentences)]
+        
+        def chunk_stream():
+            for work_index, work in enumerate(works):
+                text = work.content or ""
+                for start, end in chunk_spans(text, MAX_CHUNK_BYTES):
+                    yield text[start:end], work_index
+        
+        sentences = [[] for _ in works]
+        entities = [[] for _ in works]
+        results: List[List[Place]] = [[] for _ in works]
+        
+        def finish(work_index: int):
+            work = works[work_index]
+            results[work_index] = self._build_places(work.work_id, sentences[work_index],
+                                                     entities[work_index], work.aozora_url)
+            # 組み立て済みの作品のDocは解放する
+            sentences[work_index], entities[work_index] = [], []
+        
+        use_sentencizer = 'parser' in disabled and 'senter' not in self.nlp.pipe_names
+        if use_sentencizer and SENTENCIZER not in self.nlp.component_names:
+            self.nlp.add_pipe('sentencizer', name=SENTENCIZER, config={'punct_chars': SENTENCE_PUNCTUATION})
+            self.nlp.disable_pipe(SENTENCIZER)
+        
+        print(f"🚀 一括抽出: {len(works)}作品 (batch_size={batch_size}, n_process={n_process}, "
+              f"無効化: {', '.join(disabled) or 'なし'})")
+        
+        if use_sentencizer:
+            self.nlp.enable_pipe(SENTENCIZER)
+        try:
+            with self.nlp.select_pipes(disable=disabled):
+                current = None
+                # nlp.pipe は入力順に結果を返すため、作品が切り替わった時点で前の作品を確定できる
+                for doc, work_index in self.nlp.pipe(chunk_stream(), as_tuples=True,
+                                                     batch_size=batch_size, n_process=n_process):
+                    if current is not None and work_index != current:
+                        finish(current)
+                    current = work_index
+                    self._collect_sentences(doc, sentences[work_index], entities[work_index])
+                if current is not None:
+                    finish(current)
+        finally:
+            if use_sentencizer:
+                self.nlp.disable_pipe(SENTENCIZER)
+        
+        return results
+    
+    def _extract_with_cache(self, work_id: int, text: str, aozora_url: str = None,
+                            batch_size: int = 64, n_process: int = 1) -> List[Place]:
+        """
+        文単位のキャッシュを使って地名を抽出
+        
+        句読点・改行で文分割し、キャッシュにない文（重複は1回）だけを nlp.pipe で解析して保存する。
+        """
+        sentences = self._split_sentences(text)
+        found, parsed = self._lookup_entities(sentences, batch_size=batch_size, n_process=n_process)
+        
+        print(f"📄 総文数: {len(sentences)} (キャッシュヒット: {len(sentences) - parsed}, 解析: {parsed})")
+        
+        return self._places_from_cache(work_id, sentences, found, aozora_url)
+    
+    @staticmethod
+    def _split_sentences(text: str) -> List[str]:
+        return [text[start:end] for start, end in sentence_spans(text)]
+    
+    def _lookup_entities(self, sentences: List[str], batch_size: int = 64,
+                         n_process: int = 1) -> Tuple[Dict[str, List[CachedEntity]], int]:
+        """
+        文ごとの固有表現をキャッシュから取得し、未登録の文（重複は1回）だけを1回の nlp.pipe で解析して保存
+        
+        Returns:
+            Tuple: (文 → 固有表現, 解析した文数)
+        """
+        found = self.cache.get_many(self.model_key, sentences)
+        
+        missing = [sentence for sentence in dict.fromkeys(sentences) if sentence not in found]
+        if missing:
+            parsed = []
+            for sentence, doc in zip(missing, self.nlp.pipe(missing, batch_size=batch_size, n_process=n_process)):
+                entities = [CachedEntity(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
+                found[sentence] = entities
+                parsed.append((sentence, entities))
+            self.cache.put_many(self.model_key, parsed)
+        return found, len(missing)
+    
+    def _places_from_cache(self, work_id: int, sentences: List[str], found: Dict[str, List[CachedEntity]],
+                           aozora_url: str = None) -> List[Place]:
+        """キャッシュの固有表現から作品の Place を作成"""
+        entities = [(i, ent) for i, sentence in enumerate(sentences)
+                    for ent in found[sentence] if ent.label_ in PLACE_LABELS]
+        return self._build_places(work_id, sentences, entities, aozora_url)
+    
+    def _build_places(self, work_id: int, sentences: List[str], entities: List[Tuple[int, object]],
+                      aozora_url: str = None) -> List[Place]:
+        """文と地名固有表現から前後の文脈付きの Place を作成"""
+        places = []
+        
+        for i, ent in entities:
+            sentence = sentences[i]
+            
+            # 前後の文脈を取得
+            before_text = sentences[i-1] if i > 0 else ""
+            after_text = sentences[i+1] if i < len(sentences)-1 else ""
+            
+            # 信頼度計算（簡易版）
+            confidence = self._calculate_confidence(ent, sentence)
+            
+            place = Place(
+                work_id=work_id,
+                place_name=ent.text,
+                before_text=before_text[:500],  # 500文字に制限
+                sentence=sentence,
+                after_text=after_text[:500],   # 500文字に制限
+                aozora_url=aozora_url,
+                confidence=confidence,
+                extraction_method="ginza_nlp"
+            )
+            places.append(place)
         
         return self._deduplicate_places(places)
     
+    def _collect_sentences(self, doc, sentences: List[str], entities: List[Tuple[int, object]]) -> int:
+        """Docの文と地名固有表現を追加（固有表現は文番号付き）し、追加した文数を返す"""
+        count = 0
+        for sent in doc.sents:
+            sentences.append(sent.text.strip())
+            count += 1
+            for ent in sent.ents:
+                if ent.label_ in PLACE_LABELS:
+                    entities.append((len(sentences) - 1, ent))
+        return count
+    
     def _calculate_confidence(self, entity, sentence: str) -> float:
         """地名の信頼度を計算（簡易版）"""
         base_confidence = 0.7
@@ -112,45 +287,13 @@ class GinzaPlaceExtractor:
         
         return unique_places
     
-    def _split_text_by_size(self, text: str, max_chars: int) -> List[str]:
-        """テキストを指定サイズ以下のチャンクに分割"""
-        chunks = []
-        
-        # 文単位で分割を試行（。！？で区切り）
-        sentences = text.split('。')
-        
-        current_chunk = ""
-        for sentence in sentences:
-            # 文を追加しても制限を超えない場合
-            if len(current_chunk.encode('utf-8')) + len((sentence + '。').encode('utf-8')) <= max_chars:
-                current_chunk += sentence + '。'
-            else:
-                # 現在のチャンクを保存
-                if current_chunk:
-                    chunks.append(current_chunk)
-                
-                # 新しいチャンクを開始
-                current_chunk = sentence + '。'
-                
-                # 単一の文が制限を超える場合は強制分割
-                if len(current_chunk.encode('utf-8')) > max_chars:
-                    char_chunks = [current_chunk[i:i+max_chars//3] for i in range(0, len(current_chunk), max_chars//3)]
-                    chunks.extend(char_chunks[:-1])
-                    current_chunk = char_chunks[-1] if char_chunks else ""
-        
-        # 最後のチャンクを追加
-        if current_chunk:
-            chunks.append(current_chunk)
-        
-        return chunks
-    
     def extract_with_context(self, work_id: int, text: str, context_size: int = 50) -> List[Dict]:
         """より詳細な文脈付きで地名を抽出"""
         results = []
         doc = self.nlp(text)
         
         for ent in doc.ents:
-            if ent.label_ in ['Province', 'City', 'County', 'GPE', 'LOC']:
+            if ent.label_ in PLACE_LABELS:
                 # より詳細な文脈抽出
                 start_char = max(0, ent.start_char - context_size)
                 end_char = min(len(text), ent.end_char + context_size)
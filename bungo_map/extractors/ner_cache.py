@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+固有表現キャッシュ
+文テキストとモデル名・バージョンのハッシュをキーに解析結果をSQLiteへ保存し、同一文の再解析を省く
+"""
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from bungo_map.core.connection import ConnectionManager
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# put_many の何回ごとに容量上限をチェックするか
+_EVICT_INTERVAL = 20
+
+
+class CachedEntity(NamedTuple):
+    """キャッシュ済み固有表現（spaCy の Span と同じ属性名）"""
+    text: str
+    label_: str
+    start_char: int
+    end_char: int
+
+
+def model_key(nlp) -> str:
+    """解析器のモデル名とバージョン（例: ja_ginza@5.1.2）"""
+    meta = getattr(nlp, 'meta', None) or {}
+    name = f"{meta.get('lang', '')}_{meta.get('name', '')}".strip('_') or type(nlp).__name__
+    return f"{name}@{meta.get('version', '')}"
+
+
+class EntityCache:
+    """文単位の固有表現キャッシュ（容量上限・LRU削除付き）"""
+
+    def __init__(self, db_path: str = "data/ner_cache.db", max_bytes: int = DEFAULT_MAX_BYTES,
+                 clock: Callable[[], float] = time.time):
+        """
+        初期化
+
+        Args:
+            db_path: キャッシュDBファイルのパス
+            max_bytes: 保存する解析結果の合計バイト数の上限（超過分は最終利用が古い順に削除）
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.clock = clock
+
+        self.pool = ConnectionManager(self.db_path, pool_size=2)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+        self._puts_since_evict = 0
+        self._init_table()
+
+    def _init_table(self):
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS ner_cache (
+                key BLOB PRIMARY KEY,
+                model TEXT NOT NULL,
+                entities TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_ner_cache_last_used ON ner_cache(last_used_at)")
+            conn.commit()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    @staticmethod
+    def make_key(model: str, sentence: str) -> bytes:
+        """モデルと文テキストのハッシュ"""
+        return hashlib.blake2b(f"{model}\0{sentence}".encode('utf-8'), digest_size=16).digest()
+
+    def get_many(self, model: str, sentences: Sequence[str]) -> Dict[str, List[CachedEntity]]:
+        """
+        キャッシュ済みの解析結果を一括取得
+
+        Returns:
+            Dict[str, List[CachedEntity]]: 文 → 固有表現（未登録の文は含まない）
+        """
+        keys = {self.make_key(model, sentence): sentence for sentence in dict.fromkeys(sentences)}
+        found: Dict[str, List[CachedEntity]] = {}
+        if not keys:
+            return found
+
+        key_list = list(keys)
+        with self.pool.connection() as conn:
+            # SQLiteのパラメータ数上限を避けて分割して検索
+            for i in range(0, len(key_list), 500):
+                batch = key_list[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT key, entities FROM ner_cache WHERE key IN ({','.join('?' * len(batch))})",
+                    batch
+                ).fetchall()
+                for key, entities in rows:
+                    found[keys[key]] = [CachedEntity(*entity) for entity in json.loads(entities)]
+
+            if found:
+                # LRU用に最終利用時刻を更新
+                now = self.clock()
+                conn.executemany("UPDATE ner_cache SET last_used_at = ? WHERE key = ?",
+                                 [(now, self.make_key(model, sentence)) for sentence in found])
+                conn.commit()
+
+        self._count('hits', len(found))
+        self._count('misses', len(keys) - len(found))
+        return found
+
+    def get(self, model: str, sentence: str) -> Optional[List[CachedEntity]]:
+        """1文の解析結果を取得（未登録は None）"""
+        return self.get_many(model, [sentence]).get(sentence)
+
+    def put_many(self, model: str, items: Iterable[Tuple[str, Iterable[Any]]]) -> int:
+        """
+        解析結果を一括保存
+
+        Args:
+            model: モデル名とバージョン（model_key の値）
+            items: (文, 固有表現) のイテラブル。固有表現は text, label_, start_char, end_char を持つもの
+
+        Returns:
+            int: 保存件数
+        """
+        now = self.clock()
+        rows = []
+        for sentence, entities in items:
+            payload = json.dumps([[e.text, e.label_, e.start_char, e.end_char] for e in entities],
+                                 ensure_ascii=False)
+            rows.append((self.make_key(model, sentence), model, payload, len(payload.encode('utf-8')), now, now))
+        if not rows:
+            return 0
+
+        with self.pool.connection() as conn:
+            conn.executemany(
+                """INSERT OR REPLACE INTO ner_cache (key, model, entities, size, created_at, last_used_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            conn.commit()
+
+        with self._lock:
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= _EVICT_INTERVAL
+            if due:
+                self._puts_since_evict = 0
+        if due:
+            self.evict()
+        return len(rows)
+
+    def put(self, model: str, sentence: str, entities: Iterable[Any]) -> None:
+        """1文の解析結果を保存"""
+        self.put_many(model, [(sentence, entities)])
+
+    def evict(self) -> int:
+        """容量上限を超えた分を最終利用が古い順に削除"""
+        with self.pool.connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ner_cache").fetchone()[0]
+            excess = total - self.max_bytes
+            if excess <= 0:
+                return 0
+
+            keys = []
+            freed = 0
+            for key, size in conn.execute("SELECT key, size FROM ner_cache ORDER BY last_used_at"):
+                keys.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM ner_cache WHERE key = ?", keys)
+            conn.commit()
+        self._count('evicted', len(keys))
+        return len(keys)
+
+    def clear(self, model: Optional[str] = None) -> None:
+        """全エントリ（model 指定時はそのモデルのみ）を削除"""
+        with self.pool.connection() as conn:
+            if model is None:
+                conn.execute("DELETE FROM ner_cache")
+            else:
+                conn.execute("DELETE FROM ner_cache WHERE model = ?", (model,))
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計（件数・容量・ヒット率）"""
+        with self.pool.connection() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM ner_cache").fetchone()
+
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'hit_rate': stats['hits'] / lookups if lookups > 0 else 0.0,
+        })
+        return stats
+
+    def close(self) -> None:
+        """接続をクローズ"""
+        self.pool.close()
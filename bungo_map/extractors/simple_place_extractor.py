@@ -5,17 +5,112 @@
 GiNZAが利用できない環境でも動作する地名抽出機能
 """
 
+import hashlib
 import re
+from bisect import bisect_right
 from typing import List, Dict, Optional, Tuple
 from bungo_map.core.models import Place
+from bungo_map.extractors.dictionary_matcher import AhoCorasickMatcher, load_place_dictionary
+
+
+# 有名な地名・駅名・観光地（辞書照合で抽出）
+FAMOUS_PLACES = [
+    # 東京エリア
+    '銀座', '新宿', '渋谷', '上野', '浅草', '品川', '池袋', '新橋', '有楽町', '丸の内',
+    '表参道', '原宿', '恵比寿', '六本木', '赤坂', '青山', '麻布', '目黒', '世田谷',
+    '江戸', '本郷', '神田', '日本橋', '築地', '月島', '両国', '浅草橋', '秋葉原',
+    
+    # 関東エリア
+    '横浜', '川崎', '千葉', '埼玉', '大宮', '浦和', '船橋', '柏', '所沢', '川越',
+    '鎌倉', '湘南', '箱根', '熱海', '軽井沢', '日光', '那須', '草津', '伊香保',
+    
+    # 関西エリア
+    '京都', '大阪', '神戸', '奈良', '和歌山', '滋賀', '比叡山', '嵐山', '祇園',
+    '清水', '金閣寺', '銀閣寺', '伏見', '宇治', '平安京', '難波', '梅田', '心斎橋',
+    
+    # 中部エリア
+    '名古屋', '金沢', '富山', '新潟', '長野', '松本', '諏訪', '上高地', '立山',
+    
+    # 東北エリア
+    '仙台', '青森', '盛岡', '秋田', '山形', '福島', '会津', '松島',
+    
+    # 北海道
+    '札幌', '函館', '小樽', '旭川', '釧路', '帯広', '北見',
+    
+    # 中国・四国
+    '広島', '岡山', '山口', '鳥取', '島根', '高松', '松山', '高知', '徳島',
+    
+    # 九州・沖縄
+    '福岡', '博多', '北九州', '佐賀', '長崎', '熊本', '大分', '宮崎', '鹿児島', '沖縄', '那覇',
+    
+    # 古典的・文学的地名
+    '平安京', '江戸', '駿河', '甲斐', '信濃', '越後', '陸奥', '出羽', '薩摩', '土佐',
+    '伊豆', '伊勢', '山城', '大和', '河内', '和泉', '摂津', '近江', '美濃', '尾張',
+    
+    # 海外地名（文学作品によく出る）
+    'パリ', 'ロンドン', 'ベルリン', 'ローマ', 'ウィーン', 'モスクワ', 'ペテルブルク',
+    'ニューヨーク', 'シカゴ', 'サンフランシスコ', 'ロサンゼルス',
+    '上海', '北京', '香港', 'ソウル', 'バンコク', 'マニラ',
+    
+    # 地理的特徴
+    '富士山', '阿蘇山', '霧島', '筑波山', '比叡山', '高野山',
+    '琵琶湖', '中禅寺湖', '芦ノ湖', '十和田湖',
+    '瀬戸内海', '日本海', '太平洋', '東京湾', '大阪湾', '駿河湾',
+    '利根川', '信濃川', '石狩川', '筑後川', '吉野川'
+]
+
+# 抽出ロジックを変更したら上げる（作品の差分再抽出の判定に使用）
+# 3: 辞書照合を最左最長一致から正規表現の選択と同じ登録順優先に戻した（大阪湾 → 大阪 など）
+EXTRACTOR_VERSION = '3'
+
+# 辞書照合の分類と信頼度
+FAMOUS_PLACE_CATEGORY = ('regex_有名地名', 0.85)  # 従来の正規表現抽出と同じ抽出方法名を維持
+DICTIONARY_CONFIDENCE = 0.8
+
+# 地名らしい文脈・人名と混同しやすい文脈（信頼度調整用、文ごとに判定）
+LOCATION_CONTEXTS = [re.compile(pattern) for pattern in (
+    r'[から|より|への|へと|にて|にいる|にある|を通り|を経て]',
+    r'[行く|来る|向かう|着く|発つ|出発|到着]',
+    r'[住む|滞在|訪問|旅行|見物]'
+)]
+PERSON_CONTEXTS = [re.compile(pattern) for pattern in (
+    r'[さん|君|氏|先生|様]',
+    r'[は|が][話す|言う|思う|考える]'
+)]
+
+# 前後の空白を除いた文（str.strip() と同じく \s は Unicode の空白）
+_SENTENCE = re.compile(r'[^。！？\s](?:[^。！？]*[^。！？\s])?')
 
 
 class SimplePlaceExtractor:
     """正規表現ベースの軽量地名抽出器"""
     
-    def __init__(self):
+    def __init__(self, gazetteer_path: Optional[str] = None, single_pass: bool = True):
+        """
+        初期化
+        
+        Args:
+            gazetteer_path: 追加の地名辞書ファイル（1行1語、タブ区切り2列目は分類名）
+            single_pass: 各パターンでテキスト全体を1回だけ走査する（False なら文ごとに各パターンを適用）
+        """
+        self.single_pass = single_pass
         self.place_patterns = self._build_place_patterns()
-        print("✅ 軽量地名抽出器 初期化完了")
+        self.compiled_patterns = [re.compile(info['pattern']) for info in self.place_patterns]
+        self.matcher = self._build_matcher(gazetteer_path)
+        self.version = f"simple/{EXTRACTOR_VERSION}"
+        if gazetteer_path:
+            with open(gazetteer_path, 'rb') as f:
+                self.version += f"+{hashlib.sha256(f.read()).hexdigest()[:12]}"
+        print(f"✅ 軽量地名抽出器 初期化完了（辞書 {len(self.matcher)}語）")
+    
+    def _build_matcher(self, gazetteer_path: Optional[str] = None) -> AhoCorasickMatcher:
+        """有名地名と外部地名辞書から照合オートマトンを構築"""
+        matcher = AhoCorasickMatcher((name, FAMOUS_PLACE_CATEGORY) for name in FAMOUS_PLACES)
+        if gazetteer_path:
+            for name, category in load_place_dictionary(gazetteer_path, default_value='地名辞書'):
+                matcher.add(name, (f"dictionary_{category}", DICTIONARY_CONFIDENCE))
+            matcher.build()
+        return matcher
     
     def _build_place_patterns(self) -> List[Dict]:
         """地名抽出用のパターンを構築"""
@@ -38,97 +133,132 @@ class SimplePlaceExtractor:
                 'category': '郡',
                 'confidence': 0.7
             },
-            # 有名な地名・駅名・観光地
-            {
-                'pattern': r'(?:' + '|'.join([
-                    # 東京エリア
-                    '銀座', '新宿', '渋谷', '上野', '浅草', '品川', '池袋', '新橋', '有楽町', '丸の内',
-                    '表参道', '原宿', '恵比寿', '六本木', '赤坂', '青山', '麻布', '目黒', '世田谷',
-                    '江戸', '本郷', '神田', '日本橋', '築地', '月島', '両国', '浅草橋', '秋葉原',
-                    
-                    # 関東エリア
-                    '横浜', '川崎', '千葉', '埼玉', '大宮', '浦和', '船橋', '柏', '所沢', '川越',
-                    '鎌倉', '湘南', '箱根', '熱海', '軽井沢', '日光', '那須', '草津', '伊香保',
-                    
-                    # 関西エリア
-                    '京都', '大阪', '神戸', '奈良', '和歌山', '滋賀', '比叡山', '嵐山', '祇園',
-                    '清水', '金閣寺', '銀閣寺', '伏見', '宇治', '平安京', '難波', '梅田', '心斎橋',
-                    
-                    # 中部エリア
-                    '名古屋', '金沢', '富山', '新潟', '長野', '松本', '諏訪', '上高地', '立山',
-                    
-                    # 東北エリア
-                    '仙台', '青森', '盛岡', '秋田', '山形', '福島', '会津', '松島',
-                    
-                    # 北海道
-                    '札幌', '函館', '小樽', '旭川', '釧路', '帯広', '北見',
-                    
-                    # 中国・四国
-                    '広島', '岡山', '山口', '鳥取', '島根', '高松', '松山', '高知', '徳島',
-                    
-                    # 九州・沖縄
-                    '福岡', '博多', '北九州', '佐賀', '長崎', '熊本', '大分', '宮崎', '鹿児島', '沖縄', '那覇',
-                    
-                    # 古典的・文学的地名
-                    '平安京', '江戸', '駿河', '甲斐', '信濃', '越後', '陸奥', '出羽', '薩摩', '土佐',
-                    '伊豆', '伊勢', '山城', '大和', '河内', '和泉', '摂津', '近江', '美濃', '尾張',
-                    
-                    # 海外地名（文学作品によく出る）
-                    'パリ', 'ロンドン', 'ベルリン', 'ローマ', 'ウィーン', 'モスクワ', 'ペテルブルク',
-                    'ニューヨーク', 'シカゴ', 'サンフランシスコ', 'ロサンゼルス',
-                    '上海', '北京', '香港', 'ソウル', 'バンコク', 'マニラ',
-                    
-                    # 地理的特徴
-                    '富士山', '阿蘇山', '霧島', '筑波山', '比叡山', '高野山',
-                    '琵琶湖', '中禅寺湖', '芦ノ湖', '十和田湖',
-                    '瀬戸内海', '日本海', '太平洋', '東京湾', '大阪湾', '駿河湾',
-                    '利根川', '信濃川', '石狩川', '筑後川', '吉野川'
-                ]) + r')',
-                'category': '有名地名',
-                'confidence': 0.85
-            }
         ]
     
     def extract_places_from_text(self, work_id: int, text: str, aozora_url: str = None) -> List[Place]:
         """テキストから地名を抽出してPlaceオブジェクトのリストを返す"""
+        if not self.single_pass:
+            return self._extract_per_sentence(work_id, text, aozora_url)
+        
+        spans = self._sentence_spans(text)
+        starts = [start for start, _ in spans]
+        pattern_matches = self._match_patterns(text, spans, starts)
+        dictionary_matches = self._match_dictionary(text, spans)
+        
+        places = []
+        seen = set()
+        for sentence_idx, (start, end) in enumerate(spans):
+            # 文内の順序は従来通り（パターン順 → 辞書照合）。既出の地名はここで除く
+            candidates = []
+            for candidate in pattern_matches.get(sentence_idx, []) + dictionary_matches[sentence_idx]:
+                if candidate[0] not in seen:
+                    seen.add(candidate[0])
+                    candidates.append(candidate)
+            if not candidates:
+                continue
+            
+            # 文と前後の文脈は位置から切り出す（500文字制限）
+            sentence = text[start:end]
+            before_text = self._slice_context(text, spans, sentence_idx - 1)
+            after_text = self._slice_context(text, spans, sentence_idx + 1)
+            context = self._sentence_context(sentence)
+            
+            for place_name, extraction_method, base_confidence in candidates:
+                places.append(Place(
+                    work_id=work_id,
+                    place_name=place_name,
+                    before_text=before_text,
+                    sentence=sentence,
+                    after_text=after_text,
+                    aozora_url=aozora_url,
+                    confidence=self._adjust_confidence(place_name, sentence, base_confidence, context),
+                    extraction_method=extraction_method
+                ))
+        
+        return places
+    
+    def _match_patterns(self, text: str, spans: List[Tuple[int, int]],
+                        starts: List[int]) -> Dict[int, List[Tuple[str, str, float]]]:
+        """各パターンでテキスト全体を1回ずつ走査し、一致を文ごとに振り分ける"""
+        per_sentence: Dict[int, List[Tuple[str, str, float]]] = {}
+        for pattern, info in zip(self.compiled_patterns, self.place_patterns):
+            extraction_method = f"regex_{info['category']}"
+            # パターンは句点・空白をまたがないため、文ごとに finditer した場合と同じ一致になる
+            for match in pattern.finditer(text):
+                start, end = match.span()
+                sentence_idx = bisect_right(starts, start) - 1
+                if sentence_idx >= 0 and end <= spans[sentence_idx][1]:
+                    per_sentence.setdefault(sentence_idx, []).append(
+                        (match.group(0), extraction_method, info['confidence'])
+                    )
+        return per_sentence
+    
+    @staticmethod
+    def _slice_context(text: str, spans: List[Tuple[int, int]], sentence_idx: int) -> str:
+        """前後の文（先頭500文字）"""
+        if sentence_idx < 0 or sentence_idx >= len(spans):
+            return ""
+        start, end = spans[sentence_idx]
+        return text[start:min(end, start + 500)]
+    
+    def _extract_per_sentence(self, work_id: int, text: str, aozora_url: str = None) -> List[Place]:
+        """文ごとに各パターンを適用して抽出（single_pass=False）"""
         places = []
         
-        # テキストを文に分割
-        sentences = self._split_into_sentences(text)
+        # テキストを文に分割（位置情報付き）
+        spans = self._sentence_spans(text)
+        sentences = [text[start:end] for start, end in spans]
+        
+        # 辞書照合はテキスト全体を1回だけ走査し、文ごとに振り分ける
+        dictionary_matches = self._match_dictionary(text, spans)
         
         for sentence_idx, sentence in enumerate(sentences):
             # 各パターンで地名を検索
+            candidates = []
             for pattern_info in self.place_patterns:
-                pattern = pattern_info['pattern']
-                category = pattern_info['category']
-                base_confidence = pattern_info['confidence']
+                for match in re.finditer(pattern_info['pattern'], sentence):
+                    candidates.append((match.group(0), f"regex_{pattern_info['category']}",
+                                       pattern_info['confidence']))
+            candidates.extend(dictionary_matches[sentence_idx])
+            
+            for place_name, extraction_method, base_confidence in candidates:
+                # 前後の文脈を取得
+                before_text = sentences[sentence_idx - 1] if sentence_idx > 0 else ""
+                after_text = sentences[sentence_idx + 1] if sentence_idx < len(sentences) - 1 else ""
                 
-                matches = list(re.finditer(pattern, sentence))
+                # 信頼度を調整
+                confidence = self._adjust_confidence(place_name, sentence, base_confidence)
                 
-                for match in matches:
-                    place_name = match.group(0)
-                    
-                    # 前後の文脈を取得
-                    before_text = sentences[sentence_idx - 1] if sentence_idx > 0 else ""
-                    after_text = sentences[sentence_idx + 1] if sentence_idx < len(sentences) - 1 else ""
-                    
-                    # 信頼度を調整
-                    confidence = self._adjust_confidence(place_name, sentence, base_confidence)
-                    
-                    place = Place(
-                        work_id=work_id,
-                        place_name=place_name,
-                        before_text=before_text[:500],  # 500文字制限
-                        sentence=sentence,
-                        after_text=after_text[:500],   # 500文字制限
-                        aozora_url=aozora_url,
-                        confidence=confidence,
-                        extraction_method=f"regex_{category}"
-                    )
-                    places.append(place)
+                place = Place(
+                    work_id=work_id,
+                    place_name=place_name,
+                    before_text=before_text[:500],  # 500文字制限
+                    sentence=sentence,
+                    after_text=after_text[:500],   # 500文字制限
+                    aozora_url=aozora_url,
+                    confidence=confidence,
+                    extraction_method=extraction_method
+                )
+                places.append(place)
         
         return self._deduplicate_places(places)
     
+    def _match_dictionary(self, text: str, spans: List[Tuple[int, int]]) -> List[List[Tuple[str, str, float]]]:
+        """辞書照合の結果を文ごとの (地名, 抽出方法, 信頼度) リストにする"""
+        per_sentence = [[] for _ in spans]
+        starts = [start for start, _ in spans]
+        # 従来の正規表現の選択（FAMOUS_PLACES の順）と同じく、同じ位置では先に登録した語を優先
+        for match in self.matcher.find_first(text):
+            sentence_idx = bisect_right(starts, match.start) - 1
+            if sentence_idx >= 0 and match.end <= spans[sentence_idx][1]:
+                extraction_method, confidence = match.value
+                per_sentence[sentence_idx].append((match.word, extraction_method, confidence))
+        return per_sentence
+    
+    def _sentence_spans(self, text: str) -> List[Tuple[int, int]]:
+        """_split_into_sentences と同じ文の、テキスト中の (開始, 終了) 位置"""
+        return [match.span() for match in _SENTENCE.finditer(text)]
+    
     def _split_into_sentences(self, text: str) -> List[str]:
         """テキストを文に分割"""
         # 句読点で分割
@@ -139,32 +269,24 @@ class SimplePlaceExtractor:
         
         return sentences
     
-    def _adjust_confidence(self, place_name: str, sentence: str, base_confidence: float) -> float:
-        """文脈に基づいて信頼度を調整"""
+    def _sentence_context(self, sentence: str) -> Tuple[bool, bool]:
+        """文が (地名らしい文脈か, 人名と混同しやすい文脈か)"""
+        return (any(pattern.search(sentence) for pattern in LOCATION_CONTEXTS),
+                any(pattern.search(sentence) for pattern in PERSON_CONTEXTS))
+    
+    def _adjust_confidence(self, place_name: str, sentence: str, base_confidence: float,
+                           context: Optional[Tuple[bool, bool]] = None) -> float:
+        """文脈に基づいて信頼度を調整（context は _sentence_context の判定結果）"""
         confidence = base_confidence
+        is_location, is_person = context if context is not None else self._sentence_context(sentence)
         
         # 地名らしい文脈かチェック
-        location_contexts = [
-            r'[から|より|への|へと|にて|にいる|にある|を通り|を経て]',
-            r'[行く|来る|向かう|着く|発つ|出発|到着]',
-            r'[住む|滞在|訪問|旅行|見物]'
-        ]
-        
-        for context_pattern in location_contexts:
-            if re.search(context_pattern, sentence):
-                confidence += 0.1
-                break
+        if is_location:
+            confidence += 0.1
         
         # 人名と混同しやすい場合は信頼度を下げる
-        person_contexts = [
-            r'[さん|君|氏|先生|様]',
-            r'[は|が][話す|言う|思う|考える]'
-        ]
-        
-        for person_pattern in person_contexts:
-            if re.search(person_pattern, sentence):
-                confidence -= 0.2
-                break
+        if is_person:
+            confidence -= 0.2
         
         # 長さによる調整（短すぎる地名は信頼度を下げる）
         if len(place_name) == 1:
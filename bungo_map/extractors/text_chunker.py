@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+テキスト分割
+UTF-8のバイト数が上限以下の窓に文境界で分割し、元テキスト中の位置（開始, 終了）を返す
+"""
+
+import re
+from typing import Iterator, List, Tuple
+
+
+# 文末（。！？の連続）または改行の連続までを1文とする
+_SENTENCE = re.compile(r'[^。！？\n]*(?:[。！？]+|\n+|$)')
+
+# 長すぎる文を分割するときの優先位置（読点・空白の直後）
+_SOFT_BREAK = re.compile(r'[、，,\s　]')
+
+
+def utf8_length(text: str) -> int:
+    """UTF-8でのバイト数"""
+    return len(text.encode('utf-8'))
+
+
+def _char_bytes(ch: str) -> int:
+    code = ord(ch)
+    if code < 0x80:
+        return 1
+    if code < 0x800:
+        return 2
+    if code < 0x10000:
+        return 3
+    return 4
+
+
+def _split_long_sentence(text: str, start: int, end: int, max_bytes: int) -> Iterator[Tuple[int, int]]:
+    """上限を超える1文を読点・空白の直後（なければ文字単位）で分割"""
+    while start < end:
+        size = 0
+        cut = start
+        while cut < end:
+            width = _char_bytes(text[cut])
+            if size + width > max_bytes:
+                break
+            size += width
+            cut += 1
+        if cut >= end:
+            yield start, end
+            return
+        if cut == start:
+            # 1文字が上限を超える場合でも前に進める
+            cut += 1
+        else:
+            # 窓の後半にある最後の読点・空白で区切る
+            soft = None
+            for match in _SOFT_BREAK.finditer(text, start + (cut - start) // 2, cut):
+                soft = match.end()
+            if soft is not None:
+                cut = soft
+        yield start, cut
+        start = cut
+
+
+def chunk_spans(text: str, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    テキストを文境界でUTF-8 max_bytes 以下の窓に分割
+
+    文を順に詰め、バイト数は文ごとに1回だけ数えて累積する。上限を超える文は
+    読点・空白、それもなければ文字単位で分割する。窓は隙間なく連続し、
+    text[start:end] を連結すると元のテキストに一致する。
+
+    Args:
+        text: 対象テキスト
+        max_bytes: 1窓あたりのUTF-8バイト数の上限
+
+    Returns:
+        List[Tuple[int, int]]: 元テキスト中の (開始, 終了) の位置
+    """
+    if max_bytes <= 0:
+        raise ValueError(f"max_bytes は正の値を指定してください: {max_bytes}")
+
+    spans = []
+    chunk_start = 0
+    chunk_bytes = 0
+    for match in _SENTENCE.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        size = utf8_length(match.group())
+
+        if chunk_bytes + size <= max_bytes:
+            chunk_bytes += size
+            continue
+
+        if chunk_bytes:
+            spans.append((chunk_start, start))
+        if size <= max_bytes:
+            chunk_start, chunk_bytes = start, size
+            continue
+
+        pieces = list(_split_long_sentence(text, start, end, max_bytes))
+        spans.extend(pieces[:-1])
+        chunk_start = pieces[-1][0]
+        chunk_bytes = utf8_length(text[chunk_start:end])
+
+    if chunk_bytes:
+        spans.append((chunk_start, len(text)))
+    return spans
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """文（。！？・改行区切り、前後の空白を除く）の (開始, 終了) の位置"""
+    spans = []
+    for match in _SENTENCE.finditer(text):
+        start, end = match.span()
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if start < end:
+            spans.append((start, end))
+    return spans
+
+
+def iter_chunks(text: str, max_bytes: int) -> Iterator[Tuple[int, str]]:
+    """(開始位置, 窓のテキスト) を順に返す（切り出しは1窓ずつ）"""
+    for start, end in chunk_spans(text, max_bytes):
+        yield start, text[start:end]
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫テキストストア
+本文を内容のハッシュ（SHA-256）で gzip 圧縮して保存し、URL・種別（取得した本文 / 正規化テキスト）から
+ハッシュへの索引を SQLite に持つ。同じ内容は1つのファイルにまとめ、未登録のURLはファイルを参照しない
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bungo_map.core.connection import ConnectionManager
+
+
+RAW = 'raw'                 # ダウンロードした本文（Shift_JIS のテキスト・HTML）
+NORMALIZED = 'normalized'   # 正規化済みテキスト（UTF-8）
+VARIANTS = (RAW, NORMALIZED)
+
+CODEC = 'gzip'
+_SUFFIX = '.gz'
+
+# 変更前のキャッシュ（URL末尾のファイル名 + .txt、正規化テキストをそのまま保存）
+_LEGACY_NAME = re.compile(r'[^\w\-_.]')
+
+
+def digest_of(data: bytes) -> str:
+    """内容のハッシュ（SHA-256、16進）"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def legacy_cache_filename(url: str) -> str:
+    """変更前のキャッシュファイル名"""
+    filename = _LEGACY_NAME.sub('_', url.split('/')[-1])
+    return filename if filename.endswith('.txt') else filename + '.txt'
+
+
+class TextStore:
+    """内容アドレス方式の圧縮テキストストア（複数スレッド・プロセスから共有可能）"""
+
+    def __init__(self, root: str = "data/aozora_cache", compresslevel: int = 6,
+                 clock: Callable[[], float] = time.time):
+        """
+        初期化
+
+        Args:
+            root: 保存先（索引 index.db と objects/ 以下の圧縮ファイル）
+            compresslevel: gzip の圧縮レベル
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.root = Path(root)
+        self.objects_dir = self.root / 'objects'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.compresslevel = compresslevel
+        self.clock = clock
+
+        self.pool = ConnectionManager(self.root / 'index.db', pool_size=2)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'writes': 0, 'deduplicated': 0}
+        self._init_tables()
+
+    def _init_tables(self):
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                digest TEXT PRIMARY KEY,
+                codec TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """)
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                digest TEXT NOT NULL,
+                content_type TEXT NOT NULL DEFAULT '',
+                etag TEXT NOT NULL DEFAULT '',
+                last_modified TEXT NOT NULL DEFAULT '',
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (url, variant)
+            ) WITHOUT ROWID
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_digest ON entries(digest)")
+            conn.commit()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def blob_path(self, digest: str) -> Path:
+        """圧縮ファイルのパス（ハッシュ先頭2文字ごとのディレクトリに分散）"""
+        return self.objects_dir / digest[:2] / (digest + _SUFFIX)
+
+    # ===========================================
+    # 読み書き
+    # ===========================================
+
+    def get_entry(self, url: str, variant: str = NORMALIZED) -> Optional[Dict[str, Any]]:
+        """索引の項目（ハッシュ・Content-Type・ETag/Last-Modified、未登録なら None）"""
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                """SELECT url, variant, digest, content_type, etag, last_modified, updated_at
+                   FROM entries WHERE url = ? AND variant = ?""",
+                (url, variant)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get(self, url: str, variant: str = NORMALIZED) -> Optional[bytes]:
+        """保存済みの内容（未登録・ファイル欠損なら None）"""
+        entry = self.get_entry(url, variant)
+        if entry is None:
+            self._count('misses')
+            return None
+        data = self._read_blob(entry['digest'])
+        self._count('hits' if data is not None else 'misses')
+        return data
+
+    def get_text(self, url: str) -> Optional[str]:
+        """保存済みの正規化テキスト"""
+        data = self.get(url, NORMALIZED)
+        return data.decode('utf-8') if data is not None else None
+
+    def _read_blob(self, digest: str) -> Optional[bytes]:
+        try:
+            with gzip.open(self.blob_path(digest), 'rb') as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def put(self, url: str, variant: str, data: bytes, content_type: str = '',
+            etag: str = '', last_modified: str = '') -> str:
+        """
+        内容を保存して索引を更新（同じ内容が保存済みならファイルは書かない）
+
+        Returns:
+            str: 内容のハッシュ
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"不明な種別です: {variant}")
+        digest = digest_of(data)
+        path = self.blob_path(digest)
+        now = self.clock()
+
+        with self.pool.connection() as conn:
+            known = conn.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone()
+            if known and path.exists():
+                self._count('deduplicated')
+            else:
+                # 一時ファイルに書いてから置き換え（途中で止まっても壊れたファイルを残さない）
+                path.parent.mkdir(exist_ok=True)
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                compressed = gzip.compress(data, compresslevel=self.compresslevel, mtime=0)
+                tmp.write_bytes(compressed)
+                os.replace(tmp, path)
+                conn.execute(
+                    """INSERT OR REPLACE INTO blobs (digest, codec, size, stored_size, created_at)
+                       VALUES (?, ?, ?, ?, ?)""",
+                    (digest, CODEC, len(data), len(compressed), now)
+                )
+                self._count('writes')
+            conn.execute(
+                """INSERT OR REPLACE INTO entries (url, variant, digest, content_type, etag, last_modified, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (url, variant, digest, content_type, etag, last_modified, now)
+            )
+            conn.commit()
+        return digest
+
+    def put_text(self, url: str, text: str) -> str:
+        """正規化テキストを保存"""
+        return self.put(url, NORMALIZED, text.encode('utf-8'))
+
+    def remove(self, url: str, variant: Optional[str] = None) -> int:
+        """索引から削除（ファイルは gc で削除）"""
+        with self.pool.connection() as conn:
+            if variant is None:
+                cursor = conn.execute("DELETE FROM entries WHERE url = ?", (url,))
+            else:
+                cursor = conn.execute("DELETE FROM entries WHERE url = ? AND variant = ?", (url, variant))
+            conn.commit()
+            return cursor.rowcount
+
+    # ===========================================
+    # 保守（統計・不要ファイルの削除・検証）
+    # ===========================================
+
+    def get_stats(self) -> Dict[str, Any]:
+        """種別ごとの件数・元のサイズ・保存サイズ"""
+        with self.pool.connection() as conn:
+            variants = {row[0]: {'entries': row[1], 'size': row[2] or 0} for row in conn.execute(
+                """SELECT e.variant, COUNT(*), SUM(b.size) FROM entries e
+                   LEFT JOIN blobs b ON b.digest = e.digest GROUP BY e.variant"""
+            )}
+            blobs, size, stored_size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        with self._lock:
+            counters = dict(self._stats)
+        return {
+            'variants': variants,
+            'blobs': blobs,
+            'size': size,
+            'stored_size': stored_size,
+            'compression_ratio': size / stored_size if stored_size else 0.0,
+            **counters,
+        }
+
+    def gc(self, legacy: bool = False) -> Dict[str, int]:
+        """
+        どのURLからも参照されない圧縮ファイル・書き込み途中の一時ファイルを削除
+        （取り込みの実行中には行わないこと）
+
+        Args:
+            legacy: 変更前の形式のキャッシュファイル（root 直下の *.txt と raw/）も削除
+        """
+        removed = {'blobs': 0, 'files': 0, 'bytes': 0}
+        with self.pool.connection() as conn:
+            unused = [row[0] for row in conn.execute(
+                "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)"
+            )]
+            conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in unused])
+            conn.commit()
+            known = {row[0] for row in conn.execute("SELECT digest FROM blobs")}
+        removed['blobs'] = len(unused)
+
+        # 索引にないファイル（削除した圧縮ファイル・中断した書き込みの残り）
+        for path in self.objects_dir.glob('*/*'):
+            if path.name.endswith(_SUFFIX) and path.name[:-len(_SUFFIX)] in known:
+                continue
+            removed['bytes'] += path.stat().st_size
+            path.unlink()
+            removed['files'] += 1
+
+        if legacy:
+            legacy_files = list(self.root.glob('*.txt'))
+            raw_dir = self.root / 'raw'
+            if raw_dir.is_dir():
+                legacy_files += [path for path in raw_dir.iterdir() if path.is_file()]
+            for path in legacy_files:
+                removed['bytes'] += path.stat().st_size
+                path.unlink()
+                removed['files'] += 1
+            if raw_dir.is_dir() and not any(raw_dir.iterdir()):
+                raw_dir.rmdir()
+        return removed
+
+    def verify(self, repair: bool = False) -> Dict[str, Any]:
+        """
+        圧縮ファイルを展開してハッシュを照合
+
+        Args:
+            repair: 欠損・破損したファイルを参照する索引を削除（次回の取得で取り直す）
+
+        Returns:
+            Dict: 検査件数と欠損（missing）・破損（corrupt）したハッシュ
+        """
+        with self.pool.connection() as conn:
+            digests = [row[0] for row in conn.execute(
+                "SELECT digest FROM blobs UNION SELECT digest FROM entries"
+            )]
+        missing: List[str] = []
+        corrupt: List[str] = []
+        for digest in digests:
+            path = self.blob_path(digest)
+            if not path.exists():
+                missing.append(digest)
+                continue
+            data = self._read_blob(digest)
+            if data is None or digest_of(data) != digest:
+                corrupt.append(digest)
+
+        bad = missing + corrupt
+        if repair and bad:
+            with self.pool.connection() as conn:
+                conn.executemany("DELETE FROM entries WHERE digest = ?", [(digest,) for digest in bad])
+                conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in bad])
+                conn.commit()
+            for digest in corrupt:
+                self.blob_path(digest).unlink()
+        return {'checked': len(digests), 'missing': missing, 'corrupt': corrupt, 'repaired': repair and bool(bad)}
+
+    def import_legacy(self, urls: Iterable[str]) -> int:
+        """変更前の形式のキャッシュ（URL末尾のファイル名）から、未登録のURLの正規化テキストを取り込む"""
+        imported = 0
+        for url in dict.fromkeys(urls):
+            path = self.root / legacy_cache_filename(url)
+            if not path.is_file() or self.get_entry(url, NORMALIZED) is not None:
+                continue
+            self.put(url, NORMALIZED, path.read_bytes())
+            imported += 1
+        return imported
+
+    def close(self):
+        self.pool.close()
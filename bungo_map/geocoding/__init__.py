@@ -5,6 +5,8 @@
 地名を緯度・経度に変換する機能を提供
 """
 
-from .geocoder import Geocoder
+from .geocoder import Geocoder, GeocodingResult
+from .cache import GeocodeCache
+from .local_gazetteer import LocalGazetteerGeocoder
 
-__all__ = ['Geocoder'] 
\ No newline at end of file
+__all__ = ['Geocoder', 'GeocodingResult', 'GeocodeCache', 'LocalGazetteerGeocoder']
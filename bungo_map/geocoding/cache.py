@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ジオコーディング永続キャッシュ
+正規化地名をキーにSQLiteへ結果を保存し、実行をまたいで再利用する
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from bungo_map.core.connection import ConnectionManager
+from bungo_map.core.gazetteer import normalize_place_name
+from .geocoder import GeocodingResult
+
+
+DAY = 24 * 60 * 60
+
+# 成功結果は長期間、見つからなかった結果は短期間だけ保持する
+DEFAULT_POSITIVE_TTL = 180 * DAY
+DEFAULT_NEGATIVE_TTL = 7 * DAY
+DEFAULT_MAX_ENTRIES = 50000
+
+# put の何回ごとに件数上限をチェックするか
+_EVICT_INTERVAL = 100
+
+
+class GeocodeCache:
+    """ジオコーディング結果の永続キャッシュ（TTL・LRU件数上限付き）"""
+
+    def __init__(self, db_path: str = "data/geocode_cache.db",
+                 positive_ttl: float = DEFAULT_POSITIVE_TTL,
+                 negative_ttl: float = DEFAULT_NEGATIVE_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 clock: Callable[[], float] = time.time):
+        """
+        初期化
+
+        Args:
+            db_path: キャッシュDBファイルのパス
+            positive_ttl: 座標が得られた結果の有効期間（秒）
+            negative_ttl: 見つからなかった結果の有効期間（秒）
+            max_entries: 保持する最大件数（超過分は最終利用が古い順に削除）
+            clock: 現在時刻（UNIX秒）を返す関数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self.pool = ConnectionManager(self.db_path, pool_size=2)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evicted': 0}
+        self._puts_since_evict = 0
+        self._init_table()
+
+    def _init_table(self):
+        with self.pool.connection() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS geocode_cache (
+                normalized_name TEXT PRIMARY KEY,
+                place_name TEXT NOT NULL,
+                lat REAL,
+                lng REAL,
+                formatted_address TEXT,
+                confidence REAL,
+                source TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL
+            )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_geocode_cache_last_used ON geocode_cache(last_used_at)")
+            conn.commit()
+
+    def _count(self, key: str, n: int = 1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _is_expired(self, lat: Optional[float], created_at: float, now: float) -> bool:
+        ttl = self.positive_ttl if lat is not None else self.negative_ttl
+        return now - created_at > ttl
+
+    def get(self, place_name: str) -> Optional[GeocodingResult]:
+        """キャッシュ済み結果を取得（期限切れ・未登録は None）"""
+        key = normalize_place_name(place_name)
+        now = self.clock()
+
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                """SELECT lat, lng, formatted_address, confidence, source, error, created_at
+                   FROM geocode_cache WHERE normalized_name = ?""",
+                (key,)
+            ).fetchone()
+
+            if row is None:
+                self._count('misses')
+                return None
+
+            lat, lng, address, confidence, source, error, created_at = row
+            if self._is_expired(lat, created_at, now):
+                conn.execute("DELETE FROM geocode_cache WHERE normalized_name = ?", (key,))
+                conn.commit()
+                self._count('expired')
+                self._count('misses')
+                return None
+
+            # LRU用に最終利用時刻を更新
+            conn.execute("UPDATE geocode_cache SET last_used_at = ? WHERE normalized_name = ?", (now, key))
+            conn.commit()
+
+        self._count('hits')
+        return GeocodingResult(
+            place_name=place_name, lat=lat, lng=lng, formatted_address=address,
+            confidence=confidence or 0.0, source=source or "unknown", error=error
+        )
+
+    def put(self, place_name: str, result: GeocodingResult) -> None:
+        """結果を保存（件数上限のチェックは一定回数ごと）"""
+        self._write([(place_name, result)], overwrite=True)
+
+        with self._lock:
+            self._puts_since_evict += 1
+            due = self._puts_since_evict >= _EVICT_INTERVAL
+            if due:
+                self._puts_since_evict = 0
+        if due:
+            self.evict()
+
+    def put_many(self, items: Iterable[Tuple[str, GeocodingResult]], overwrite: bool = True) -> int:
+        """
+        結果を一括保存
+
+        Args:
+            items: (地名, 結果) のイテラブル
+            overwrite: 既存エントリを上書きするか（False なら未登録のみ追加）
+
+        Returns:
+            int: 保存件数
+        """
+        saved = self._write(items, overwrite)
+        self.evict()
+        return saved
+
+    def _write(self, items: Iterable[Tuple[str, GeocodingResult]], overwrite: bool) -> int:
+        now = self.clock()
+        rows = [(normalize_place_name(name), name, r.lat, r.lng, r.formatted_address,
+                 r.confidence, r.source, r.error, now, now) for name, r in items]
+        if not rows:
+            return 0
+
+        verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+        with self.pool.connection() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                f"""{verb} INTO geocode_cache
+                    (normalized_name, place_name, lat, lng, formatted_address,
+                     confidence, source, error, created_at, last_used_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            saved = conn.total_changes - before
+            conn.commit()
+        return saved
+
+    def evict(self) -> int:
+        """件数上限を超えた分を最終利用が古い順に削除"""
+        with self.pool.connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM geocode_cache").fetchone()[0]
+            excess = total - self.max_entries
+            if excess <= 0:
+                return 0
+            conn.execute(
+                """DELETE FROM geocode_cache WHERE normalized_name IN (
+                       SELECT normalized_name FROM geocode_cache ORDER BY last_used_at LIMIT ?
+                   )""",
+                (excess,)
+            )
+            conn.commit()
+        self._count('evicted', excess)
+        return excess
+
+    def purge_expired(self) -> int:
+        """期限切れエントリを削除"""
+        now = self.clock()
+        with self.pool.connection() as conn:
+            cursor = conn.execute(
+                """DELETE FROM geocode_cache
+                   WHERE (lat IS NOT NULL AND created_at < ?) OR (lat IS NULL AND created_at < ?)""",
+                (now - self.positive_ttl, now - self.negative_ttl)
+            )
+            conn.commit()
+        self._count('expired', cursor.rowcount)
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """全エントリを削除"""
+        with self.pool.connection() as conn:
+            conn.execute("DELETE FROM geocode_cache")
+            conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """キャッシュ統計（件数・ヒット率）"""
+        with self.pool.connection() as conn:
+            total, positive = conn.execute(
+                "SELECT COUNT(*), COUNT(lat) FROM geocode_cache"
+            ).fetchone()
+
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update({
+            'entries': total,
+            'positive': positive,
+            'negative': total - positive,
+            'hit_rate': stats['hits'] / lookups if lookups > 0 else 0.0,
+        })
+        return stats
+
+    def close(self) -> None:
+        """接続をクローズ"""
+        self.pool.close()
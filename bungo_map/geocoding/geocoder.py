@@ -5,13 +5,27 @@
 地名を緯度・経度座標に変換
 """
 
+import math
 import time
 import logging
-from typing import Optional, Tuple, List, Dict, Any
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional, Tuple, List, Dict, Any
 from geopy.geocoders import Nominatim, GoogleV3
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+from geopy.exc import (
+    GeocoderTimedOut, GeocoderServiceError, GeocoderUnavailable,
+    GeocoderQuotaExceeded, GeocoderRateLimited
+)
 import googlemaps
-from dataclasses import dataclass
+from googlemaps.exceptions import ApiError, HTTPError, Timeout, TransportError
+from dataclasses import dataclass, replace
+
+from bungo_map.core.gazetteer import normalize_place_name as normalize_cache_key
+from .rate_limit import TokenBucket
+
+if TYPE_CHECKING:
+    from .cache import GeocodeCache
+    from .local_gazetteer import LocalGazetteerGeocoder
 
 
 @dataclass
@@ -24,21 +38,51 @@ class GeocodingResult:
     confidence: float = 0.0
     source: str = "unknown"
     error: Optional[str] = None
+    transient: bool = False  # タイムアウト・5xx等の一時的な失敗（キャッシュせず再試行対象）
+
+
+def is_transient_error(error: Exception) -> bool:
+    """再試行で回復しうる一時的なエラーか（タイムアウト・5xx・レート制限）"""
+    if isinstance(error, (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited)):
+        return True
+    if isinstance(error, GeocoderQuotaExceeded):
+        return False
+    if isinstance(error, HTTPError):
+        return error.status_code >= 500
+    if isinstance(error, (Timeout, TransportError)):
+        return True
+    if isinstance(error, ApiError):
+        return error.status in ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+    # 型の特定できないサービスエラー（5xx等）は一時的とみなす。認証・クエリ不正は恒久的
+    return type(error) is GeocoderServiceError
 
 
 class Geocoder:
     """地名ジオコーディングクラス"""
     
-    def __init__(self, google_api_key: Optional[str] = None, user_agent: str = "bungo-map/2.0"):
+    def __init__(self, google_api_key: Optional[str] = None, user_agent: str = "bungo-map/2.0",
+                 cache_store: Optional["GeocodeCache"] = None,
+                 gazetteer: Optional["LocalGazetteerGeocoder"] = None,
+                 google_rate: float = 50.0, nominatim_rate: float = 1.0, max_workers: int = 8):
         """
         初期化
         
         Args:
             google_api_key: Google Maps API キー
             user_agent: User-Agent文字列
+            cache_store: 実行をまたいで結果を保持する永続キャッシュ
+            gazetteer: 最初に参照するローカル地名辞書（見つからない場合のみ外部APIへ）
+            google_rate: Google Maps API の毎秒リクエスト数上限
+            nominatim_rate: Nominatim の毎秒リクエスト数上限（利用規約上は最大1）
+            max_workers: 一括ジオコーディングの同時実行数
         """
         self.logger = logging.getLogger(__name__)
         self.user_agent = user_agent
+        self.max_workers = max_workers
+        
+        # プロバイダーごとのレート制限（スレッド間で共有）
+        self.google_limiter = TokenBucket(google_rate)
+        self.nominatim_limiter = TokenBucket(nominatim_rate, capacity=1)
         
         # Nominatim (OpenStreetMap) - 無料
         self.nominatim = Nominatim(user_agent=user_agent)
@@ -48,14 +92,27 @@ class Geocoder:
         self.google_geocoder = None
         if google_api_key:
             try:
-                self.google_client = googlemaps.Client(key=google_api_key)
+                # レート制限と429の再試行はこちらで行う
+                self.google_client = googlemaps.Client(
+                    key=google_api_key,
+                    queries_per_second=max(1, math.ceil(google_rate)),
+                    retry_over_query_limit=False
+                )
                 self.google_geocoder = GoogleV3(api_key=google_api_key)
                 self.logger.info("Google Maps API クライアント初期化完了")
             except Exception as e:
                 self.logger.warning(f"Google Maps API 初期化失敗: {e}")
         
-        # キャッシュ（メモリ内）
+        # キャッシュ（メモリ内 + 永続キャッシュ）
         self.cache: Dict[str, GeocodingResult] = {}
+        self.cache_store = cache_store
+        self.gazetteer = gazetteer
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._stats_lock = threading.Lock()
+        
+        # 再試行の初回待機時間（秒、以降は指数バックオフ）
+        self.retry_delay = 2.0
         
         # 日本の地名補正辞書
         self.japan_locations = {
@@ -92,6 +149,7 @@ class Geocoder:
     
     def geocode_with_nominatim(self, place_name: str) -> GeocodingResult:
         """Nominatimでジオコーディング"""
+        self.nominatim_limiter.acquire()
         try:
             location = self.nominatim.geocode(place_name, language='ja', timeout=5)
             
@@ -115,12 +173,16 @@ class Geocoder:
                 
         except (GeocoderTimedOut, GeocoderServiceError) as e:
             self.logger.warning(f"Nominatim エラー ({place_name}): {e}")
+            if isinstance(e, GeocoderRateLimited):
+                # 429: 全ワーカーの送信を Retry-After の間止める
+                self.nominatim_limiter.pause(e.retry_after or self.retry_delay)
             return GeocodingResult(
                 place_name=place_name,
                 lat=None,
                 lng=None,
                 error=str(e),
-                source="nominatim"
+                source="nominatim",
+                transient=is_transient_error(e)
             )
     
     def geocode_with_google(self, place_name: str) -> GeocodingResult:
@@ -134,6 +196,7 @@ class Geocoder:
                 source="google"
             )
         
+        self.google_limiter.acquire()
         try:
             results = self.google_client.geocode(place_name, language='ja')
             
@@ -170,12 +233,15 @@ class Geocoder:
                 
         except Exception as e:
             self.logger.warning(f"Google Maps API エラー ({place_name}): {e}")
+            if isinstance(e, ApiError) and e.status == 'OVER_QUERY_LIMIT':
+                self.google_limiter.pause(self.retry_delay)
             return GeocodingResult(
                 place_name=place_name,
                 lat=None,
                 lng=None,
                 error=str(e),
-                source="google"
+                source="google",
+                transient=is_transient_error(e)
             )
     
     def geocode(self, place_name: str, use_cache: bool = True) -> GeocodingResult:
@@ -189,10 +255,19 @@ class Geocoder:
         Returns:
             GeocodingResult: ジオコーディング結果
         """
+        # ローカル地名辞書を最優先（キャッシュDBより速く、外部APIも不要）
+        if self.gazetteer is not None:
+            local = self.gazetteer.lookup(place_name)
+            if local is not None:
+                return local
+        
         # キャッシュをチェック
-        if use_cache and place_name in self.cache:
-            self.logger.debug(f"キャッシュヒット: {place_name}")
-            return self.cache[place_name]
+        if use_cache:
+            cached = self._get_cached(place_name)
+            if cached is not None:
+                return cached
+            with self._stats_lock:
+                self.cache_misses += 1
         
         # 地名を正規化
         normalized_name = self.normalize_place_name(place_name)
@@ -200,20 +275,25 @@ class Geocoder:
         self.logger.info(f"ジオコーディング実行: {place_name} → {normalized_name}")
         
         # まずGoogle Maps APIを試す（利用可能な場合）
+        google_transient = None
         if self.google_client:
             result = self.geocode_with_google(normalized_name)
             if result.lat is not None:
-                self.cache[place_name] = result
-                time.sleep(0.1)  # レート制限対策
+                self._store(place_name, result)
                 return result
+            if result.transient:
+                google_transient = result
         
         # Nominatimを試す
         result = self.geocode_with_nominatim(normalized_name)
         if result.lat is not None:
-            self.cache[place_name] = result
-            time.sleep(1.0)  # Nominatimのレート制限対策
+            self._store(place_name, result)
             return result
         
+        # 一時的な失敗はキャッシュせずにそのまま返す（再試行で回復しうる）
+        if result.transient or google_transient:
+            return replace(result if result.transient else google_transient, place_name=place_name)
+        
         # どちらも失敗した場合
         result = GeocodingResult(
             place_name=place_name,
@@ -222,59 +302,105 @@ class Geocoder:
             error="全てのジオコーダーで失敗",
             source="none"
         )
-        self.cache[place_name] = result
+        self._store(place_name, result)
+        return result
+    
+    def _get_cached(self, place_name: str) -> Optional[GeocodingResult]:
+        """メモリ内キャッシュ → 永続キャッシュの順に参照"""
+        key = normalize_cache_key(place_name)
+        result = self.cache.get(key)
+        if result is None and self.cache_store is not None:
+            result = self.cache_store.get(place_name)
+            if result is not None:
+                self.cache[key] = result
+        
+        if result is not None:
+            with self._stats_lock:
+                self.cache_hits += 1
+            self.logger.debug(f"キャッシュヒット: {place_name}")
+        return result
+    
+    def _store(self, place_name: str, result: GeocodingResult) -> None:
+        """結果をキャッシュに保存"""
+        self.cache[normalize_cache_key(place_name)] = result
+        if self.cache_store is not None:
+            self.cache_store.put(place_name, result)
+    
+    def _geocode_with_retry(self, place_name: str, max_retry: int) -> GeocodingResult:
+        """一時的な失敗のみキャッシュを経由せずに再試行"""
+        result = self.geocode(place_name)
+        retry_count = 0
+        while result.transient and retry_count < max_retry:
+            retry_count += 1
+            self.logger.warning(f"リトライ {retry_count}/{max_retry}: {place_name} ({result.error})")
+            time.sleep(self.retry_delay * 2 ** (retry_count - 1))  # 指数バックオフ
+            result = self.geocode(place_name, use_cache=False)
+        
+        if result.lat is None:
+            self.logger.error(f"ジオコーディング失敗: {place_name}")
         return result
     
-    def batch_geocode(self, place_names: List[str], max_retry: int = 2) -> List[GeocodingResult]:
+    def batch_geocode(self, place_names: List[str], max_retry: int = 2,
+                      max_workers: Optional[int] = None) -> List[GeocodingResult]:
         """
         複数地名の一括ジオコーディング
         
+        正規化名で重複を除き、スレッドプールで並行してジオコーディングした結果を入力順に展開する。
+        送信ペースはプロバイダーごとのトークンバケットで制御する。
+        再試行は一時的な失敗（タイムアウト・5xx・レート制限）のみで、キャッシュを経由しない。
+        
         Args:
             place_names: 地名リスト
             max_retry: 最大リトライ回数
+            max_workers: 同時実行数（省略時は初期化時の値）
             
         Returns:
-            List[GeocodingResult]: ジオコーディング結果リスト
+            List[GeocodingResult]: ジオコーディング結果リスト（place_names と同じ順序）
         """
-        results = []
-        total = len(place_names)
+        unique = {}
+        for place_name in place_names:
+            unique.setdefault(normalize_cache_key(place_name), place_name)
         
-        self.logger.info(f"一括ジオコーディング開始: {total}件")
+        total = len(unique)
+        self.logger.info(f"一括ジオコーディング開始: {len(place_names)}件（ユニーク{total}件）")
         
-        for i, place_name in enumerate(place_names, 1):
-            self.logger.info(f"進行状況: {i}/{total} - {place_name}")
-            
-            retry_count = 0
-            while retry_count <= max_retry:
-                result = self.geocode(place_name)
-                
-                # 成功した場合
-                if result.lat is not None:
-                    results.append(result)
-                    break
-                
-                # 失敗した場合
-                retry_count += 1
-                if retry_count <= max_retry:
-                    self.logger.warning(f"リトライ {retry_count}/{max_retry}: {place_name}")
-                    time.sleep(2.0)  # リトライ前に待機
-                else:
-                    self.logger.error(f"ジオコーディング失敗: {place_name}")
-                    results.append(result)
+        workers = max(1, min(max_workers or self.max_workers, total or 1))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(self._geocode_with_retry, place_name, max_retry)
+                       for key, place_name in unique.items()}
+            resolved = {}
+            for i, (key, future) in enumerate(futures.items(), 1):
+                resolved[key] = future.result()
+                self.logger.info(f"進行状況: {i}/{total} - {unique[key]}")
+        
+        results = [replace(resolved[normalize_cache_key(name)], place_name=name) for name in place_names]
         
-        success_count = sum(1 for r in results if r.lat is not None)
+        success_count = sum(1 for r in resolved.values() if r.lat is not None)
         self.logger.info(f"一括ジオコーディング完了: {success_count}/{total} 成功")
         
         return results
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """キャッシュ統計情報"""
-        total = len(self.cache)
-        success = sum(1 for r in self.cache.values() if r.lat is not None)
+        """キャッシュ統計情報（永続キャッシュ利用時はその件数）"""
+        if self.cache_store is not None:
+            store_stats = self.cache_store.get_stats()
+            total = store_stats['entries']
+            success = store_stats['positive']
+        else:
+            store_stats = {}
+            total = len(self.cache)
+            success = sum(1 for r in self.cache.values() if r.lat is not None)
         
+        lookups = self.cache_hits + self.cache_misses
         return {
             "total_cached": total,
             "successful": success,
             "failed": total - success,
-            "success_rate": success / total if total > 0 else 0.0
+            "success_rate": success / total if total > 0 else 0.0,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups > 0 else 0.0,
+            "expired": store_stats.get('expired', 0),
+            "evicted": store_stats.get('evicted', 0),
+            "gazetteer_hits": self.gazetteer.hits if self.gazetteer is not None else 0
         } 
\ No newline at end of file
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ローカル地名辞書ジオコーダー
+GeoNames（JP.txt）や国土数値情報から作成したCSV/TSVを読み込み、ネットワークを使わずに座標を返す
+"""
+
+import csv
+import re
+import sys
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from bungo_map.core.gazetteer import normalize_place_name
+from .geocoder import GeocodingResult
+
+
+# GeoNames の列順（http://download.geonames.org/export/dump/readme.txt）
+GEONAMES_COLUMNS = 19
+_GN_NAME, _GN_ALTERNATES, _GN_LAT, _GN_LNG, _GN_CLASS, _GN_POPULATION = 1, 3, 4, 5, 6, 14
+
+# 地物クラスの優先度（行政区画・居住地 > 施設・駅 > 自然地形 > その他）
+FEATURE_CLASS_PRIORITY = {'A': 4, 'P': 4, 'S': 3, 'T': 2, 'H': 2, 'L': 2, 'V': 1, 'R': 1}
+
+# 照合段階ごとの信頼度
+CONFIDENCE = {'exact': 0.8, 'normalized': 0.75, 'alias': 0.6}
+
+# 末尾の行政区分・駅名を除いた別名（「松山市」→「松山」）
+_ALIAS_SUFFIXES = frozenset('都道府県市区町村郡駅')
+
+_JAPANESE = re.compile(r'[\u3040-\u30ff\u3400-\u9fff]')
+
+
+class LocalGazetteerGeocoder:
+    """ローカル地名辞書によるオフラインジオコーダー"""
+
+    def __init__(self, paths: Union[str, Path, Iterable[Union[str, Path]]] = (),
+                 japanese_alternates_only: bool = True, max_entries: Optional[int] = None):
+        """
+        初期化
+
+        Args:
+            paths: 地名辞書ファイル（GeoNames TSV、またはヘッダ付きCSV/TSV）
+            japanese_alternates_only: GeoNames の別名は日本語表記のみ索引する
+            max_entries: 読み込む地物数の上限（メモリ上限の目安）
+        """
+        self.japanese_alternates_only = japanese_alternates_only
+        self.max_entries = max_entries
+
+        # 地物ごとの値は配列で保持し、索引は名前 → 地物番号のみ
+        self._names: List[str] = []
+        self._lat = array('d')
+        self._lng = array('d')
+        self._population = array('q')
+        self._priority = array('b')
+
+        self._exact: Dict[str, int] = {}
+        self._normalized: Dict[str, int] = {}
+        self._alias: Dict[str, int] = {}
+
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.misses = 0
+
+        if isinstance(paths, (str, Path)):
+            paths = [paths]
+        for path in paths:
+            self.load(path)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def load(self, path: Union[str, Path]) -> int:
+        """
+        地名辞書ファイルを読み込んで索引に追加
+
+        ヘッダ付きの場合は name, lat, lng（latitude/longitude も可）と
+        任意の feature_class, population, alternate_names（| 区切り）列を使う。
+
+        Returns:
+            int: 追加した地物数
+        """
+        start = time.perf_counter()
+        added = 0
+        with open(path, encoding='utf-8', newline='') as f:
+            first_line = f.readline()
+            f.seek(0)
+            delimiter = '\t' if '\t' in first_line else ','
+            if delimiter == '\t' and len(first_line.rstrip('\r\n').split('\t')) >= GEONAMES_COLUMNS:
+                rows = self._read_geonames(f)
+            else:
+                rows = self._read_table(f, delimiter)
+
+            for names, lat, lng, feature_class, population in rows:
+                if self.max_entries is not None and len(self._names) >= self.max_entries:
+                    break
+                self._add(names, lat, lng, feature_class, population)
+                added += 1
+
+        self.load_seconds += time.perf_counter() - start
+        return added
+
+    def _read_geonames(self, f) -> Iterable[Tuple[List[str], float, float, str, int]]:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) < GEONAMES_COLUMNS:
+                continue
+            alternates = [name for name in row[_GN_ALTERNATES].split(',') if name]
+            if self.japanese_alternates_only:
+                alternates = [name for name in alternates if _JAPANESE.search(name)]
+            try:
+                yield ([row[_GN_NAME]] + alternates, float(row[_GN_LAT]), float(row[_GN_LNG]),
+                       row[_GN_CLASS], int(row[_GN_POPULATION] or 0))
+            except ValueError:
+                continue
+
+    def _read_table(self, f, delimiter: str) -> Iterable[Tuple[List[str], float, float, str, int]]:
+        for row in csv.DictReader(f, delimiter=delimiter):
+            alternates = [name for name in (row.get('alternate_names') or '').split('|') if name]
+            try:
+                yield ([row['name']] + alternates,
+                       float(row.get('lat') or row['latitude']),
+                       float(row.get('lng') or row['longitude']),
+                       row.get('feature_class') or '',
+                       int(row.get('population') or 0))
+            except (KeyError, ValueError):
+                continue
+
+    def _add(self, names: List[str], lat: float, lng: float, feature_class: str, population: int) -> None:
+        index = len(self._names)
+        self._names.append(names[0])
+        self._lat.append(lat)
+        self._lng.append(lng)
+        self._population.append(population)
+        self._priority.append(FEATURE_CLASS_PRIORITY.get(feature_class, 0))
+
+        for name in names:
+            name = name.strip()
+            if not name:
+                continue
+            self._index(self._exact, name, index)
+            normalized = normalize_place_name(name)
+            if normalized != name:
+                self._index(self._normalized, normalized, index)
+            if len(normalized) >= 3 and normalized[-1] in _ALIAS_SUFFIXES:
+                self._index(self._alias, normalized[:-1], index)
+
+    def _rank(self, index: int) -> Tuple[int, int]:
+        return self._priority[index], self._population[index]
+
+    def _index(self, table: Dict[str, int], key: str, index: int) -> None:
+        """同名の地物は地物クラス → 人口の順で上位のものを残す"""
+        current = table.get(key)
+        if current is None or self._rank(index) > self._rank(current):
+            table[key] = index
+
+    def lookup(self, place_name: str) -> Optional[GeocodingResult]:
+        """地名を検索（完全一致 → 正規化形 → 行政区分を除いた別名の順、見つからなければ None）"""
+        match, index = 'exact', self._exact.get(place_name)
+        if index is None:
+            key = normalize_place_name(place_name)
+            match, index = 'normalized', self._exact.get(key)
+            if index is None:
+                index = self._normalized.get(key)
+            if index is None:
+                match, index = 'alias', self._alias.get(key)
+
+        if index is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return GeocodingResult(
+            place_name=place_name,
+            lat=self._lat[index],
+            lng=self._lng[index],
+            formatted_address=self._names[index],
+            confidence=CONFIDENCE[match],
+            source="gazetteer"
+        )
+
+    def geocode(self, place_name: str) -> GeocodingResult:
+        """地名をジオコーディング（見つからない場合は error 付きの結果）"""
+        result = self.lookup(place_name)
+        if result is None:
+            return GeocodingResult(place_name=place_name, lat=None, lng=None,
+                                   error="場所が見つかりません", source="gazetteer")
+        return result
+
+    def memory_usage(self) -> int:
+        """索引と配列のおおよそのメモリ使用量（バイト）"""
+        total = sum(sys.getsizeof(a) for a in (self._lat, self._lng, self._population, self._priority))
+        total += sys.getsizeof(self._names) + sum(sys.getsizeof(name) for name in self._names)
+        for table in (self._exact, self._normalized, self._alias):
+            total += sys.getsizeof(table) + sum(sys.getsizeof(key) for key in table)
+        return total
+
+    def get_stats(self) -> Dict[str, Any]:
+        """件数・読み込み時間・メモリ使用量・ヒット率"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._names),
+            'keys': len(self._exact) + len(self._normalized) + len(self._alias),
+            'load_seconds': self.load_seconds,
+            'memory_bytes': self.memory_usage(),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups > 0 else 0.0,
+        }
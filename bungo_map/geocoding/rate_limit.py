@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+レート制限
+プロバイダーごとのトークンバケット（複数スレッドから共有可能）
+"""
+
+import threading
+import time
+from typing import Callable, Optional
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制限器"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        初期化
+
+        Args:
+            rate: 1秒あたりに補充するトークン数（= 許容QPS）
+            capacity: バケット容量（= 許容バースト数、省略時は max(1, rate)）
+            clock: 単調増加する現在時刻（秒）を返す関数
+            sleep: 待機関数
+        """
+        if rate <= 0:
+            raise ValueError(f"rate は正の値を指定してください: {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """待たずにトークンを取得（不足なら False）"""
+        with self._lock:
+            self._refill(self.clock())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """
+        トークンを取得できるまで待機
+
+        Returns:
+            float: 待機した秒数
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return waited
+                # 一時停止中なら再開時刻までの待ちを加える
+                wait = max(0.0, self._updated - now) + (tokens - self._tokens) / self.rate
+            # ロック外で待機し、他スレッドの補充確認を妨げない
+            self.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """指定秒数トークンを補充しない（429応答の Retry-After 等に従う）"""
+        with self._lock:
+            now = self.clock()
+            self._refill(now)
+            self._tokens = min(self._tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
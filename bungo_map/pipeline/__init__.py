@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""
+取り込みパイプラインモジュール
+ダウンロード → 正規化・地名抽出 → 書き込みの段階実行（青空文庫アーカイブからの一括取り込みを含む）
+"""
+
+from .engine import IngestionPipeline, PipelineStats, StageStats, register_works, works_from_db
+from .workers import ExtractedWork, FetchedText, WorkItem, default_extractors, simple_extractors
+from .archive import ArchiveFetcher, ArchiveWork, register_archive, scan_archive
+
+__all__ = [
+    "IngestionPipeline",
+    "PipelineStats",
+    "StageStats",
+    "WorkItem",
+    "FetchedText",
+    "ExtractedWork",
+    "default_extractors",
+    "simple_extractors",
+    "register_works",
+    "works_from_db",
+    "ArchiveWork",
+    "ArchiveFetcher",
+    "scan_archive",
+    "register_archive",
+]
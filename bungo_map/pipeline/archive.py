@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+青空文庫アーカイブからの一括取り込み
+aozorabunko リポジトリのクローン（cards/*/files/*.zip）やZIPファイルを走査し、
+通信せずにパイプラインへ本文を渡す
+"""
+
+import re
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from bungo_map.core.database import Database
+from .engine import register_works
+from .workers import FetchedText, WorkItem
+
+
+AOZORA_BASE_URL = "https://www.aozora.gr.jp"
+
+# 作品ファイル名（例: 752_ruby_2438.zip → 作品番号 752）
+_FILE_ID = re.compile(r'^(\d+)_')
+
+# 本文冒頭の作品情報として読むバイト数
+_HEADER_BYTES = 4096
+
+
+@dataclass
+class ArchiveWork:
+    """アーカイブ中の作品（ZIPファイル）"""
+    path: Path
+    url: str
+    title: str = ""
+    author_name: str = ""
+
+
+def iter_archive_zips(root: str) -> Iterator[Path]:
+    """
+    作品ZIPのパス
+
+    root がZIPファイルならそれのみ、aozorabunko のクローンなら cards/*/files/*.zip、
+    それ以外のディレクトリなら配下の *.zip を返す。同じ作品番号のZIPはルビ付きを優先して1つにする。
+    """
+    root_path = Path(root)
+    if root_path.is_file():
+        yield root_path
+        return
+    if (root_path / 'cards').is_dir():
+        paths = sorted(root_path.glob('cards/*/files/*.zip'))
+    else:
+        paths = sorted(root_path.rglob('*.zip'))
+
+    chosen: Dict[Tuple[str, str], Path] = {}
+    for path in paths:
+        match = _FILE_ID.match(path.name)
+        key = (str(path.parent), match.group(1) if match else path.stem)
+        if key not in chosen or ('_ruby_' in path.name and '_ruby_' not in chosen[key].name):
+            chosen[key] = path
+    yield from sorted(chosen.values())
+
+
+def archive_url(path: Path) -> str:
+    """ZIPのパスに対応する青空文庫のURL（cards/<作家番号>/files/<ファイル名>）"""
+    parts = path.parts
+    if len(parts) >= 3 and parts[-2] == 'files':
+        return f"{AOZORA_BASE_URL}/cards/{parts[-3]}/files/{path.name}"
+    return path.resolve().as_uri()
+
+
+def parse_header(text: str) -> Tuple[str, str]:
+    """
+    本文冒頭から作品名・著者名を取得
+
+    青空文庫のテキストは先頭が「作品名・（副題）・著者名（・訳者名）」で、空行か記号の説明の区切り線で終わる。
+    """
+    lines = []
+    for line in text.replace('\r\n', '\n').split('\n'):
+        line = line.strip()
+        if not line or line.startswith('---'):
+            break
+        lines.append(line)
+    if not lines:
+        return "", ""
+    authors = lines[1:]
+    if len(authors) > 1 and authors[-1].endswith('訳'):
+        authors = authors[:-1]
+    return lines[0], authors[-1] if authors else ""
+
+
+def read_zip_header(path: Path) -> Tuple[str, str]:
+    """ZIP中のテキストの冒頭だけを展開して作品名・著者名を取得"""
+    with zipfile.ZipFile(path) as archive:
+        names = sorted(name for name in archive.namelist() if name.lower().endswith('.txt'))
+        if not names:
+            return "", ""
+        with archive.open(names[0]) as f:
+            head = f.read(_HEADER_BYTES)
+    return parse_header(head.decode('cp932', errors='ignore'))
+
+
+def scan_archive(root: str, limit: Optional[int] = None, workers: int = 8) -> List[ArchiveWork]:
+    """
+    アーカイブを走査して作品一覧を作る（冒頭の展開はスレッドで並行実行）
+
+    作品名が読めないZIPは除く。
+    """
+    paths = list(iter_archive_zips(root))
+    if limit is not None:
+        paths = paths[:limit]
+
+    def read(path: Path) -> ArchiveWork:
+        try:
+            title, author_name = read_zip_header(path)
+        except (zipfile.BadZipFile, OSError) as e:
+            print(f"⚠️ ZIPを読めません: {path} ({e})")
+            title, author_name = "", ""
+        return ArchiveWork(path, archive_url(path), title, author_name)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        works = list(executor.map(read, paths))
+    return [work for work in works if work.title]
+
+
+def register_archive(db: Database, works: Iterable[ArchiveWork]) -> List[WorkItem]:
+    """アーカイブの作品を登録（著者名が読めない作品は「作者不明」、同じ作品は1件にまとめる）"""
+    items = register_works(db, (
+        {'author_name': work.author_name or "作者不明", 'title': work.title, 'text_url': work.url}
+        for work in works
+    ))
+    return list({item.work_id: item for item in items}.values())
+
+
+class ArchiveFetcher:
+    """ダウンロード段の代わりにアーカイブのZIPを読む（展開・正規化は抽出段で行う）"""
+
+    def __init__(self, works: Iterable[ArchiveWork]):
+        self.paths = {work.url: work.path for work in works}
+
+    def fetch(self, item: WorkItem) -> FetchedText:
+        path = self.paths.get(item.text_url)
+        if path is None:
+            raise FileNotFoundError(f"アーカイブにありません: {item.text_url}")
+        return FetchedText(item, content=path.read_bytes(), content_type='application/zip')
@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取り込みパイプライン
+ダウンロード（スレッド）→ 正規化・地名抽出（プロセスプール）→ 書き込み（単一ライター）を
+上限付きキューでつなぎ、段ごとの処理件数とスループットを記録する
+run_job ではジョブ台帳に作品ごとの進捗を記録し、中断・失敗したジョブを未完了の作品から再開する
+"""
+
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from bungo_map.core.database import Database
+from bungo_map.core.jobs import DEFAULT_MAX_ATTEMPTS, DONE, FAILED, JobLedger
+from bungo_map.core.models import Author, Work
+from .workers import (
+    AozoraFetcher, ExtractedWork, FetchedText, WorkItem, WorkProcessor,
+    default_extractors, init_worker, process_in_worker
+)
+
+
+STAGES = ('download', 'extract', 'write')
+
+# キューの終端
+_DONE = object()
+
+
+class StageStats:
+    """段ごとの処理件数・失敗件数・処理時間"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, items: int = 1) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+            if self.started is None:
+                self.started = now - seconds
+            self.finished = now
+
+    def fail(self) -> None:
+        with self._lock:
+            self.failures += 1
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None or self.finished is None:
+            return 0.0
+        return self.finished - self.started
+
+    @property
+    def throughput(self) -> float:
+        """件/秒（最初の処理開始から最後の処理終了まで）"""
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'items': self.items,
+            'failures': self.failures,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'throughput': round(self.throughput, 3),
+        }
+
+
+class PipelineStats:
+    """パイプライン全体の統計"""
+
+    def __init__(self):
+        self.stages = {name: StageStats(name) for name in STAGES}
+        self.failed: List[Tuple[WorkItem, str, str]] = []  # (作品, 段, エラー)
+        self.places = 0
+        self.unchanged = 0
+        self.elapsed = 0.0
+        self.job_id: Optional[int] = None
+        self.completed_before = 0                # 再開前に完了していた作品数
+        self.given_up: List[int] = []            # 試行回数の上限に達して対象外にした作品
+        self._lock = threading.Lock()
+
+    def add_failure(self, item: WorkItem, stage: str, error: Exception) -> None:
+        self.stages[stage].fail()
+        with self._lock:
+            self.failed.append((item, stage, str(error)))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'stages': {name: stage.as_dict() for name, stage in self.stages.items()},
+            'places': self.places,
+            'unchanged': self.unchanged,
+            'failed': len(self.failed),
+            'elapsed_seconds': round(self.elapsed, 3),
+            'job_id': self.job_id,
+            'completed_before': self.completed_before,
+            'given_up': len(self.given_up),
+        }
+
+
+class IngestionPipeline:
+    """ダウンロード・抽出・書き込みの3段パイプライン"""
+
+    def __init__(self, db: Database, fetcher=None,
+                 extractor_factory: Callable[[], list] = default_extractors,
+                 download_workers: int = 4, process_workers: Optional[int] = None,
+                 queue_size: int = 8, write_batch_size: int = 8,
+                 cache_dir: str = "data/aozora_cache"):
+        """
+        初期化
+
+        Args:
+            db: 書き込み先データベース
+            fetcher: ダウンロード段（fetch(WorkItem) -> FetchedText、省略時は青空文庫）
+            extractor_factory: 抽出器のリストを返す関数（プロセスに渡すためモジュールレベルの関数）
+            download_workers: ダウンロードのスレッド数
+            process_workers: 抽出のプロセス数（省略時はCPU数、0 ならプロセスを使わず同じプロセスで実行）
+            queue_size: 段間キューの上限（超えると前段が待機する）
+            write_batch_size: 1トランザクションで書き込む作品数
+            cache_dir: 青空文庫テキストのキャッシュディレクトリ
+        """
+        self.db = db
+        self.fetcher = fetcher or AozoraFetcher(cache_dir)
+        self.extractor_factory = extractor_factory
+        self.download_workers = max(1, download_workers)
+        self.process_workers = (os.cpu_count() or 1) if process_workers is None else process_workers
+        self.queue_size = max(1, queue_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.cache_dir = cache_dir
+        self.ledger = JobLedger(db)
+        self._job_id: Optional[int] = None
+        self._abort = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    # ===========================================
+    # 段間キュー（中断時は待機をやめる）
+    # ===========================================
+
+    def _put(self, q: queue.Queue, value: Any) -> bool:
+        while not self._abort.is_set():
+            try:
+                q.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _record(self, item: WorkItem, stage: str, error: Optional[Exception] = None) -> None:
+        """ジョブ実行中なら作品の段の結果を台帳に記録"""
+        if self._job_id is not None:
+            self.ledger.record(self._job_id, item.work_id, stage,
+                               FAILED if error is not None else DONE, None if error is None else str(error))
+
+    def _guard(self, target: Callable, *args) -> Callable[[], None]:
+        """段の処理中の想定外の例外でパイプライン全体を止める（例外は run から送出）"""
+        def run_stage():
+            try:
+                target(*args)
+            except BaseException as e:
+                self._error = self._error or e
+                self._abort.set()
+        return run_stage
+
+    # ===========================================
+    # 各段
+    # ===========================================
+
+    def _feed(self, items: Iterable[WorkItem], download_q: queue.Queue) -> None:
+        for item in items:
+            if not self._put(download_q, item):
+                return
+        for _ in range(self.download_workers):
+            self._put(download_q, _DONE)
+
+    def _download(self, download_q: queue.Queue, extract_q: queue.Queue, stats: PipelineStats,
+                  remaining: List[int], lock: threading.Lock) -> None:
+        while True:
+            item = self._get(download_q)
+            if item is _DONE:
+                break
+            start = time.perf_counter()
+            try:
+                fetched = self.fetcher.fetch(item)
+            except Exception as e:
+                print(f"❌ ダウンロード失敗: {item.title} ({e})")
+                stats.add_failure(item, 'download', e)
+                self._record(item, 'download', e)
+                continue
+            stats.stages['download'].record(time.perf_counter() - start)
+            self._record(item, 'download')
+            if not self._put(extract_q, fetched):
+                return
+
+        # 最後に終わったスレッドが抽出段に終端を送る
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            self._put(extract_q, _DONE)
+
+    def _extract(self, extract_q: queue.Queue, write_q: queue.Queue, stats: PipelineStats) -> None:
+        if self.process_workers <= 0:
+            processor = WorkProcessor(self.extractor_factory(), self.cache_dir)
+            while True:
+                fetched = self._get(extract_q)
+                if fetched is _DONE:
+                    break
+                try:
+                    result = processor.process(fetched)
+                except Exception as e:
+                    print(f"❌ 抽出失敗: {fetched.item.title} ({e})")
+                    stats.add_failure(fetched.item, 'extract', e)
+                    self._record(fetched.item, 'extract', e)
+                    continue
+                stats.stages['extract'].record(result.seconds)
+                self._record(fetched.item, 'extract')
+                if not self._put(write_q, result):
+                    return
+            self._put(write_q, _DONE)
+            return
+
+        # 他の段のスレッドが動いているため fork ではなく spawn でワーカーを起動する
+        with ProcessPoolExecutor(max_workers=self.process_workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_worker,
+                                 initargs=(self.extractor_factory, self.cache_dir)) as executor:
+            # 実行中の件数をワーカー数の2倍までに抑え、後段の詰まりを前段に伝える
+            in_flight: Dict[Future, FetchedText] = {}
+            limit = self.process_workers * 2
+
+            def forward(done) -> bool:
+                for future in done:
+                    fetched = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ 抽出失敗: {fetched.item.title} ({e})")
+                        stats.add_failure(fetched.item, 'extract', e)
+                        self._record(fetched.item, 'extract', e)
+                        continue
+                    stats.stages['extract'].record(result.seconds)
+                    self._record(fetched.item, 'extract')
+                    if not self._put(write_q, result):
+                        return False
+                return True
+
+            while True:
+                fetched = self._get(extract_q)
+                if fetched is _DONE:
+                    break
+                in_flight[executor.submit(process_in_worker, fetched)] = fetched
+                if len(in_flight) >= limit:
+                    done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                    if not forward(done):
+                        # 未着手の抽出を取り消す（shutdown の cancel_futures は Python 3.9 以降のため個別に取り消す）
+                        for future in in_flight:
+                            future.cancel()
+                        executor.shutdown(wait=False)
+                        return
+            if in_flight and not forward(wait(list(in_flight)).done):
+                return
+        self._put(write_q, _DONE)
+
+    def _write(self, batch: List[ExtractedWork], stats: PipelineStats) -> None:
+        changed = [result for result in batch if not result.unchanged]
+        start = time.perf_counter()
+        self.db.replace_works_places(
+            (result.item.work_id, result.places, result.content_hash, result.extractor_version)
+            for result in changed
+        )
+        stats.stages['write'].record(time.perf_counter() - start, items=len(batch))
+        stats.places += sum(len(result.places) for result in changed)
+        stats.unchanged += len(batch) - len(changed)
+        for result in batch:
+            self._record(result.item, 'write')
+            if result.unchanged:
+                print(f"⏭️  {result.item.title}: 変更なし")
+            else:
+                print(f"💾 {result.item.title}: {len(result.places)}地名 ({result.text_length:,}文字)")
+        if self._job_id is not None:
+            self.ledger.flush()
+
+    # ===========================================
+    # 実行
+    # ===========================================
+
+    def run(self, items: Iterable[WorkItem]) -> PipelineStats:
+        """
+        作品を取り込む（書き込みは呼び出し元のスレッドで行う）
+
+        Returns:
+            PipelineStats: 段ごとの件数・スループットと失敗した作品
+        """
+        stats = PipelineStats()
+        self._abort.clear()
+        self._error = None
+        download_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        extract_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        write_q: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        remaining = [self.download_workers]
+        lock = threading.Lock()
+        threads = [threading.Thread(target=self._guard(self._feed, items, download_q), daemon=True)]
+        threads += [threading.Thread(target=self._guard(self._download, download_q, extract_q, stats, remaining, lock),
+                                     daemon=True)
+                    for _ in range(self.download_workers)]
+        threads.append(threading.Thread(target=self._guard(self._extract, extract_q, write_q, stats), daemon=True))
+
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        batch: List[ExtractedWork] = []
+        try:
+            while True:
+                result = self._get(write_q)
+                if result is _DONE:
+                    break
+                batch.append(result)
+                if len(batch) >= self.write_batch_size:
+                    self._write(batch, stats)
+                    batch = []
+            if batch:
+                self._write(batch, stats)
+        except BaseException:
+            # 書き込み失敗・中断時は前段を止める
+            self._abort.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join(timeout=5)
+            stats.elapsed = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+        return stats
+
+    def run_job(self, name: str, items: Iterable[WorkItem], params: Optional[Dict[str, Any]] = None,
+                resume: bool = True, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> PipelineStats:
+        """
+        ジョブ台帳に進捗を記録しながら取り込む
+
+        同じ名前・パラメータの未完了ジョブがあれば、完了済みの作品を除いて再開する。
+        作品ごとの記録は書き込みバッチごとに保存するため、中断しても直前のバッチまでは再処理しない。
+
+        Args:
+            name: ジョブ名
+            items: 対象の作品
+            params: 再開の判定に使うパラメータ（作者・モードなど）
+            resume: False なら未完了ジョブがあっても新しいジョブを開始
+            max_attempts: 作品ごとの失敗回数の上限（達した作品は対象外、中断した作品は数えない）
+        """
+        items = list(items)
+        job = self.ledger.begin(name, (item.work_id for item in items), params,
+                                resume=resume, max_attempts=max_attempts)
+        targets = set(job.work_ids)
+        if job.resumed:
+            print(f"🔁 ジョブ #{job.job_id} を再開: 完了済み {job.completed_before}作品, "
+                  f"残り {len(targets)}作品 (上限到達 {len(job.given_up)}作品)")
+
+        self._job_id = job.job_id
+        interrupted = True
+        try:
+            stats = self.run(item for item in items if item.work_id in targets)
+            interrupted = False
+        finally:
+            self._job_id = None
+            self.ledger.finish(job.job_id, interrupted=interrupted)
+        stats.job_id = job.job_id
+        stats.completed_before = job.completed_before
+        stats.given_up = job.given_up
+        return stats
+
+
+def works_from_db(db: Database, author_names: Optional[Iterable[str]] = None,
+                  incremental: bool = False) -> List[WorkItem]:
+    """青空文庫URLが登録済みの作品（作者名の指定がなければ全作品）"""
+    if author_names:
+        authors = [author for name in author_names for author in db.search_authors(name)]
+    else:
+        authors = db.search_authors("", limit=1000000)
+    works = [work for work in db.get_works_by_authors(author['author_id'] for author in authors)
+             if work['aozora_url']]
+    fingerprints = db.get_work_fingerprints(work['work_id'] for work in works) if incremental else {}
+    return [WorkItem(work['work_id'], work['title'], work['aozora_url'], work['author_name'],
+                     fingerprints.get(work['work_id']))
+            for work in works]
+
+
+def register_works(db: Database, works: Iterable[Dict[str, str]]) -> List[WorkItem]:
+    """作者名・作品名・本文URL（author_name, title, text_url）の作品を一括登録"""
+    works = list(works)
+    author_ids = dict(zip(
+        (w['author_name'] for w in works),
+        db.insert_authors_bulk(Author(name=w['author_name']) for w in works)
+    ))
+    work_ids = db.insert_works_bulk(
+        Work(author_id=author_ids[w['author_name']], title=w['title'], aozora_url=w['text_url'])
+        for w in works
+    )
+    return [WorkItem(work_id, w['title'], w['text_url'], w['author_name'])
+            for work_id, w in zip(work_ids, works)]
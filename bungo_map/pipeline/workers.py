@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+パイプラインの各段の処理
+ダウンロード（スレッド）と正規化・地名抽出（プロセス、ワーカーごとにモデルを1回だけ読み込む）
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional, Tuple
+
+from bungo_map.core.fingerprint import content_hash, needs_extraction
+from bungo_map.core.models import Place
+from bungo_map.extractors.aozora_extractor import AozoraExtractor
+
+
+@dataclass
+class WorkItem:
+    """パイプラインで処理する作品（登録済みの work_id と本文URL）"""
+    work_id: int
+    title: str
+    text_url: str
+    author_name: str = ""
+    fingerprint: Optional[Tuple[Optional[str], Optional[str]]] = None  # 前回の (本文ハッシュ, 抽出器バージョン)
+
+
+@dataclass
+class FetchedText:
+    """ダウンロード段の出力（キャッシュ済みの正規化テキスト、または未処理の本文）"""
+    item: WorkItem
+    text: Optional[str] = None
+    content: Optional[bytes] = None
+    content_type: str = ""
+
+
+@dataclass
+class ExtractedWork:
+    """抽出段の出力"""
+    item: WorkItem
+    places: List[Place] = field(default_factory=list)
+    content_hash: str = ""
+    extractor_version: str = ""
+    text_length: int = 0
+    unchanged: bool = False   # 本文・抽出器とも前回と同じため抽出を省略
+    seconds: float = 0.0
+
+
+def default_extractors() -> list:
+    """
+    GiNZA（固有表現キャッシュ付き、未インストールなら省略）と正規表現の抽出器
+
+    GiNZA は文単位キャッシュの方式（文ごとに解析）で抽出し、version で区別される。
+    """
+    from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+    extractors = []
+    try:
+        from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
+        from bungo_map.extractors.ner_cache import EntityCache
+        extractors.append(GinzaPlaceExtractor(cache=EntityCache()))
+    except (ImportError, OSError):
+        # spaCy 未インストール（ImportError）・モデル未インストール（spacy.load の OSError）
+        print("⚠️ GiNZA が利用できないため正規表現の抽出器のみ使用します")
+    extractors.append(SimplePlaceExtractor())
+    return extractors
+
+
+def simple_extractors() -> list:
+    """正規表現の抽出器のみ"""
+    from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+    return [SimplePlaceExtractor()]
+
+
+class AozoraFetcher:
+    """ダウンロード段: 正規化済みキャッシュがあれば読み込み、なければ本文を取得
+    （ダウンローダーを全スレッドで共有し、ホストごとの同時接続数の上限を守る）"""
+
+    def __init__(self, cache_dir: str = "data/aozora_cache"):
+        self.cache_dir = cache_dir
+        self._extractor_instance: Optional[AozoraExtractor] = None
+        self._lock = threading.Lock()
+
+    def _extractor(self) -> AozoraExtractor:
+        with self._lock:
+            if self._extractor_instance is None:
+                self._extractor_instance = AozoraExtractor(self.cache_dir)
+            return self._extractor_instance
+
+    def fetch(self, item: WorkItem) -> FetchedText:
+        extractor = self._extractor()
+        cached = extractor.read_cached_text(item.text_url)
+        if cached is not None:
+            return FetchedText(item, text=cached)
+        content, content_type = extractor.fetch_raw(item.text_url)
+        return FetchedText(item, content=content, content_type=content_type)
+
+
+class WorkProcessor:
+    """正規化・地名抽出段"""
+
+    def __init__(self, extractors: list, cache_dir: str = "data/aozora_cache"):
+        self.extractors = extractors
+        self.version = '+'.join(extractor.version for extractor in extractors)
+        self.cache_dir = cache_dir
+        self._normalizer: Optional[AozoraExtractor] = None
+
+    def process(self, fetched: FetchedText) -> ExtractedWork:
+        start = time.perf_counter()
+        item = fetched.item
+        text = fetched.text
+        if text is None:
+            if self._normalizer is None:
+                self._normalizer = AozoraExtractor(self.cache_dir)
+            text = self._normalizer.extract_text(fetched.content or b'', fetched.content_type, item.text_url)
+        if not text:
+            raise ValueError(f"本文を取得できません: {item.text_url}")
+
+        text_hash = content_hash(text)
+        result = ExtractedWork(item, content_hash=text_hash, extractor_version=self.version,
+                               text_length=len(text))
+        if item.fingerprint is not None and not needs_extraction(item.fingerprint, text_hash, self.version):
+            result.unchanged = True
+        else:
+            for extractor in self.extractors:
+                result.places.extend(extractor.extract_places_from_text(item.work_id, text, item.text_url))
+        result.seconds = time.perf_counter() - start
+        return result
+
+
+# プロセスプールのワーカーごとに1つだけ作る抽出器（モデルの読み込みはワーカー起動時の1回のみ）
+_processor: Optional[WorkProcessor] = None
+
+
+def init_worker(extractor_factory: Callable[[], list], cache_dir: str) -> None:
+    global _processor
+    _processor = WorkProcessor(extractor_factory(), cache_dir)
+
+
+def process_in_worker(fetched: FetchedText) -> ExtractedWork:
+    return _processor.process(fetched)
@@ -5,9 +5,94 @@
 仕様書要件: 検索機能は0.5秒以内
 """
 
+import os
 import time
 import sys
+import tempfile
+import tracemalloc
+from statistics import median
 from bungo_map.core.database import BungoDatabase
+from bungo_map.core.models import Author, Work, Place
+from bungo_map.geocoding import LocalGazetteerGeocoder
+
+# ローカル地名辞書のメモリ上限（GeoNames JP.txt 相当の10万件で）
+GAZETTEER_MEMORY_BUDGET_MB = 64
+
+
+def _measure(func, repeat: int = 20) -> float:
+    """中央値の実行時間（ミリ秒）"""
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return median(timings)
+
+
+def benchmark_related_fetch(authors: int = 50, works_per_author: int = 20, places_per_work: int = 10):
+    """作者→作品、作品→地名の取得を1件ずつ（N+1）と一括取得で比較"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = BungoDatabase(os.path.join(temp_dir, 'bench.db'))
+        author_ids = db.insert_authors_bulk([Author(name=f"作家{i:03d}") for i in range(authors)])
+        work_ids = db.insert_works_bulk([Work(author_id=author_id, title=f"作品{author_id}-{j}")
+                                         for author_id in author_ids for j in range(works_per_author)])
+        db.insert_places_bulk([Place(work_id=work_id, place_name=f"地名{k}", sentence="本文")
+                               for work_id in work_ids for k in range(places_per_work)])
+
+        work_sample = work_ids[:authors]
+
+        def works_n_plus_one():
+            return [w for author_id in author_ids for w in db.get_works_by_author(author_id)]
+
+        def places_n_plus_one():
+            return [p for work_id in work_sample for p in db.get_places_by_work(work_id)]
+
+        assert works_n_plus_one() == db.get_works_by_authors(author_ids)
+        assert places_n_plus_one() == db.get_places_by_works(work_sample)
+
+        print(f"\n📊 関連データ取得（作者{authors}名・作品{len(work_sample)}件ヒット時）")
+        for label, loop, batched in [
+            ('作者→作品', works_n_plus_one, lambda: db.get_works_by_authors(author_ids)),
+            ('作品→地名', places_n_plus_one, lambda: db.get_places_by_works(work_sample)),
+        ]:
+            loop_ms = _measure(loop)
+            batch_ms = _measure(batched)
+            print(f"   {label}: 1件ずつ {loop_ms:.2f}ms → 一括 {batch_ms:.2f}ms ({loop_ms / batch_ms:.1f}倍)")
+        db.close()
+
+def benchmark_gazetteer(entries: int = 100000, lookups: int = 10000) -> bool:
+    """ローカル地名辞書の読み込み時間・メモリ・検索時間を計測"""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'JP.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(entries):
+                row = [str(i), f"Place{i}", f"Place{i}", f"地名{i}市,地名{i}", "35.0", "139.0", "P", "",
+                       "JP", "", "", "", "", "", str(i % 1000), "", "", "Asia/Tokyo", "2024-01-01"]
+                f.write("\t".join(row) + "\n")
+
+        gazetteer = LocalGazetteerGeocoder(path)
+
+        # tracemalloc は読み込みを遅くするため、メモリは別途読み込み直して計測
+        tracemalloc.start()
+        measured = LocalGazetteerGeocoder(path)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del measured
+
+    names = [f"地名{i * 7 % entries}" for i in range(lookups)]
+    start_time = time.perf_counter()
+    for name in names:
+        gazetteer.lookup(name)
+    lookup_us = (time.perf_counter() - start_time) / lookups * 1e6
+
+    retained_mb = retained / 1024 / 1024
+    within_budget = retained_mb <= GAZETTEER_MEMORY_BUDGET_MB
+    print(f"\n📚 ローカル地名辞書（{entries}件）")
+    print(f"   読み込み: {gazetteer.load_seconds:.2f}s, 検索: {lookup_us:.1f}µs/件")
+    print(f"   {'✅' if within_budget else '❌'} メモリ: {retained_mb:.1f}MB "
+          f"(ピーク {peak / 1024 / 1024:.1f}MB, 上限 {GAZETTEER_MEMORY_BUDGET_MB}MB)")
+    return within_budget
+
 
 def main():
     """性能テスト実行"""
@@ -36,6 +121,9 @@ def main():
             else:
                 print(f'✅ {method_name}: {execution_time:.3f}s')
         
+        benchmark_related_fetch()
+        all_passed = benchmark_gazetteer() and all_passed
+        
         if all_passed:
             print("🎉 全ての性能テストに合格しました！")
             sys.exit(0)
@@ -6,10 +6,10 @@
 """
 
 import time
+from bungo_map.cli.pipeline import print_stats
 from bungo_map.core.database import BungoDB
 from bungo_map.extractors.aozora_extractor import AozoraExtractor
-from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
-from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+from bungo_map.pipeline import IngestionPipeline, register_works
 
 
 def run_full_extraction():
@@ -25,111 +25,22 @@ def run_full_extraction():
     db = BungoDB()
     print("✅ データベース接続完了")
     
-    # 2. 青空文庫地名抽出システム初期化
-    print("\n🔍 2. 青空文庫地名抽出システム初期化")
+    # 2. サンプル作品の登録
+    print("\n🔍 2. サンプル作品登録")
     print("-" * 40)
     
-    aozora_extractor = AozoraExtractor()
-    ginza_extractor = GinzaPlaceExtractor() 
-    simple_extractor = SimplePlaceExtractor()
+    items = register_works(db, AozoraExtractor().get_sample_works())
+    for idx, item in enumerate(items, 1):
+        print(f"📚 {idx}. {item.author_name} - {item.title}")
     
-    print("✅ 全抽出器初期化完了")
-    
-    # 3. 青空文庫からの地名抽出実行
-    print("\n🏞️ 3. 青空文庫地名抽出実行")
+    # 3. 青空文庫からの地名抽出実行（ダウンロード・抽出・保存を段階並列で実行、中断後は未完了の作品から再開）
+    print("\n🏞️ 3. 青空文庫地名抽出実行（GiNZA + 正規表現）")
     print("-" * 40)
     
-    # サンプル作品で地名抽出
-    sample_works = aozora_extractor.get_sample_works()
-    total_places = 0
-    
-    for idx, work_info in enumerate(sample_works, 1):
-        print(f"\n📚 {idx}. {work_info['author_name']} - {work_info['title']}")
-        print("   " + "-" * 45)
-        
-        try:
-            # 作者登録
-            author_id = db.upsert_author(work_info['author_name'])
-            
-            # 作品登録
-            work_id = db.upsert_work(
-                author_id=author_id,
-                title=work_info['title'],
-                wiki_url=work_info.get('text_url', '')
-            )
-            
-            # 青空文庫テキスト取得
-            text = aozora_extractor.download_and_extract_text(work_info['text_url'])
-            
-            if not text:
-                print("   ❌ テキスト取得失敗")
-                continue
-            
-            print(f"   📄 テキスト長: {len(text):,}文字")
-            
-            # GiNZA地名抽出（テキストサイズ制限考慮）
-            test_text = text[:30000]  # 30KB制限
-            ginza_places = ginza_extractor.extract_places_from_text(
-                work_id=work_id, 
-                text=test_text, 
-                aozora_url=work_info['text_url']
-            )
-            
-            # 正規表現地名抽出（全テキスト）
-            simple_places = simple_extractor.extract_places_from_text(
-                work_id=work_id, 
-                text=text,
-                aozora_url=work_info['text_url']
-            )
-            
-            print(f"   🔬 GiNZA抽出: {len(ginza_places)}個")
-            print(f"   📝 正規表現抽出: {len(simple_places)}個")
-            
-            # データベースに地名保存
-            ginza_saved = 0
-            simple_saved = 0
-            
-            # GiNZA地名を保存
-            for place in ginza_places:
-                try:
-                    place_id = db.upsert_place(
-                        work_id=work_id,
-                        place_name=place.place_name,
-                        before_text=place.before_text,
-                        sentence=place.sentence,
-                        after_text=place.after_text,
-                        aozora_url=place.aozora_url,
-                        extraction_method=place.extraction_method,
-                        confidence=place.confidence
-                    )
-                    ginza_saved += 1
-                except Exception as e:
-                    print(f"     ⚠️ GiNZA地名保存エラー: {place.place_name} - {e}")
-            
-            # 正規表現地名を保存
-            for place in simple_places:
-                try:
-                    place_id = db.upsert_place(
-                        work_id=work_id,
-                        place_name=place.place_name,
-                        before_text=place.before_text,
-                        sentence=place.sentence,
-                        after_text=place.after_text,
-                        aozora_url=place.aozora_url,
-                        extraction_method=place.extraction_method,
-                        confidence=place.confidence
-                    )
-                    simple_saved += 1
-                except Exception as e:
-                    print(f"     ⚠️ 正規表現地名保存エラー: {place.place_name} - {e}")
-            
-            total_saved = ginza_saved + simple_saved
-            print(f"   💾 DB保存: {total_saved}個 (GiNZA: {ginza_saved}, 正規表現: {simple_saved})")
-            total_places += total_saved
-            
-        except Exception as e:
-            print(f"   ❌ 作品処理エラー: {e}")
-            continue
+    stats = IngestionPipeline(db).run_job('full_extraction', items)
+    print(f"\n🗂️ ジョブ #{stats.job_id}（前回までに完了: {stats.completed_before}作品）")
+    print(f"\n💾 DB保存: {stats.places}個")
+    print_stats(stats)
     
     # 4. 結果サマリー
     print("\n🎯 4. 実行結果サマリー")
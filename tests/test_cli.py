@@ -39,7 +39,16 @@ class TestCLICommands:
         """CLI実行用ランナー"""
         return CliRunner()
     
-    def test_status_command(self, cli_runner, temp_db_with_data):
+    @pytest.fixture
+    def default_db(self, temp_db_with_data, tmp_path, monkeypatch):
+        """既定パス（data/bungo_production.db）を使うコマンド用に一時ディレクトリへテストDBを配置"""
+        import shutil
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'data').mkdir()
+        shutil.copy2(temp_db_with_data, tmp_path / 'data' / 'bungo_production.db')
+        return str(tmp_path / 'data' / 'bungo_production.db')
+    
+    def test_status_command(self, cli_runner, default_db):
         """status コマンドテスト"""
         # status コマンド実行
         result = cli_runner.invoke(main, ['status'])
@@ -97,31 +106,21 @@ class TestCLICommands:
         assert "作品数:" in result.output
         assert "地名数:" in result.output
     
-    def test_export_geojson_preview(self, cli_runner, temp_db_with_data):
+    def test_export_geojson_preview(self, cli_runner, default_db):
         """export geojson プレビューテスト"""
-        # 一時的にDBをコピーして使用
-        import shutil
-        test_db = "test_temp.db"
-        shutil.copy2(temp_db_with_data, test_db)
+        result = cli_runner.invoke(
+            main, 
+            ['export', '--format', 'geojson', '--preview']
+        )
         
-        try:
-            result = cli_runner.invoke(
-                main, 
-                ['export', '--format', 'geojson', '--preview']
-            )
-            
-            # プレビューの場合は正常終了すること
-            assert result.exit_code == 0
-            
-        finally:
-            if os.path.exists(test_db):
-                os.unlink(test_db)
+        # プレビューの場合は正常終了すること
+        assert result.exit_code == 0
     
-    def test_collect_demo_command(self, cli_runner):
+    def test_collect_demo_command(self, cli_runner, monkeypatch):
         """collect demo コマンドテスト"""
         with tempfile.TemporaryDirectory() as temp_dir:
             # 一時ディレクトリで実行
-            os.chdir(temp_dir)
+            monkeypatch.chdir(temp_dir)
             
             result = cli_runner.invoke(
                 main, 
@@ -147,6 +146,247 @@ class TestCLICommands:
             # geocodeコマンドが存在しない場合はパス
             assert True
     
+    def test_db_rebuild_index_command(self, cli_runner, temp_db_with_data):
+        """db rebuild-index コマンドテスト"""
+        result = cli_runner.invoke(main, ['db', 'rebuild-index', '--db-path', temp_db_with_data])
+
+        assert result.exit_code == 0
+        assert "全文検索インデックス再構築完了" in result.output
+        assert "places_fts: 3件" in result.output
+        assert "空間インデックス再構築完了: 3件" in result.output
+
+    def test_db_migrate_command(self, cli_runner, temp_db_with_data):
+        """db migrate コマンドテスト"""
+        result = cli_runner.invoke(main, ['db', 'migrate', '--db-path', temp_db_with_data])
+        assert result.exit_code == 0
+        assert "スキーマは最新です" in result.output
+
+        result = cli_runner.invoke(main, ['db', 'migrate', '--status', '--db-path', temp_db_with_data])
+        assert result.exit_code == 0
+        assert "001 セカンダリインデックス追加" in result.output
+
+    def test_db_migrate_backs_up_before_destructive(self, cli_runner, tmp_path, monkeypatch):
+        """データのある旧スキーマは開いても分割せず、db migrate がバックアップ後に適用すること"""
+        import sqlite3
+
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / 'data').mkdir()
+        db_path = str(tmp_path / 'data' / 'bungo_production.db')
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+        CREATE TABLE places (place_id INTEGER PRIMARY KEY AUTOINCREMENT, work_id INTEGER NOT NULL,
+                             place_name TEXT NOT NULL, lat REAL, lng REAL, before_text TEXT,
+                             sentence TEXT, after_text TEXT, aozora_url TEXT, confidence REAL DEFAULT 0.0,
+                             extraction_method TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO places (work_id, place_name) VALUES (1, '松山');
+        """)
+        conn.close()
+
+        # 移行前は統計を出さず、bungo db migrate が必要なことだけを示す
+        result = cli_runner.invoke(search, ['stats', '--db', db_path])
+        assert f"❌ エラー: 未適用のマイグレーションがあります（005 地名マスタと地名言及の分割）。" \
+               f"`bungo db migrate --db-path {db_path}` で適用してください" in result.output
+        assert "データベース統計" not in result.output
+
+        for args in (['geocode', '--status'], ['geocode', '--warm-from-db'], ['jobs', 'status', '--db-path', db_path]):
+            result = cli_runner.invoke(main, args)
+            assert result.exit_code == 1, args
+            assert "bungo db migrate" in result.output, args
+
+        result = cli_runner.invoke(main, ['db', 'migrate', '--status', '--db-path', db_path])
+        assert "005 地名マスタと地名言及の分割（破壊的" in result.output
+
+        result = cli_runner.invoke(main, ['db', 'migrate', '--db-path', db_path])
+        assert result.exit_code == 0
+        assert f"バックアップ作成: {db_path}.v4.bak" in result.output
+        assert "005 地名マスタと地名言及の分割" in result.output
+
+        backup = sqlite3.connect(db_path + '.v4.bak')
+        assert backup.execute("SELECT type FROM sqlite_master WHERE name = 'places'").fetchone()[0] == 'table'
+        backup.close()
+
+        # 移行後は統計を表示
+        result = cli_runner.invoke(search, ['stats', '--db', db_path])
+        assert "地名数: 1箇所" in result.output
+
+    def test_geocode_missing_places_per_unique_name(self, temp_db_with_data):
+        """ジオコーディングは地名マスタ単位で1回ずつ行われること"""
+        from bungo_map.cli.geocode import GeocodeManager
+        from bungo_map.core.models import Place
+        from bungo_map.geocoding.geocoder import Geocoder, GeocodingResult
+
+        db = Database(temp_db_with_data)
+        work_id = db.search_works("坊っちゃん")[0]['work_id']
+        db.insert_places_bulk([Place(work_id=work_id, place_name="東京", sentence=f"東京{i}") for i in range(5)])
+
+        class StubGeocoder(Geocoder):
+            calls = []
+
+            def batch_geocode(self, names):
+                self.calls.extend(names)
+                return [GeocodingResult(name, 35.68, 139.76, source="stub", confidence=0.8) for name in names]
+
+        manager = GeocodeManager(temp_db_with_data, cache_path=temp_db_with_data + '.cache')
+        manager.geocoder = StubGeocoder()
+        result = manager.geocode_missing_places()
+
+        assert StubGeocoder.calls == ["東京"]
+        assert result == {"total": 1, "success": 1, "failed": 0, "mentions": 5}
+        assert db.get_places_without_coordinates() == []
+        os.unlink(temp_db_with_data + '.cache')
+
+    def test_geocode_warm_from_db(self, temp_db_with_data):
+        """登録済み座標でキャッシュを初期化できること"""
+        from bungo_map.cli.geocode import GeocodeManager
+
+        cache_path = temp_db_with_data + '.cache'
+        try:
+            manager = GeocodeManager(temp_db_with_data, cache_path=cache_path)
+            assert manager.warm_cache_from_db() == 3
+            assert manager.warm_cache_from_db() == 0
+            assert manager.cache.get("道後温泉").lat == 33.8504
+        finally:
+            os.unlink(cache_path)
+
+    def test_expand_places_incremental(self, temp_db_with_data):
+        """差分モードでは本文か抽出器が変わった作品だけ再抽出すること"""
+        from bungo_map.cli.expand import DataExpansionEngine
+        from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+
+        class StubAozora:
+            texts = {}
+            downloads = []
+
+            def search_aozora_work(self, title, author_name):
+                return None
+
+            def download_and_extract_text(self, url):
+                self.downloads.append(url)
+                return self.texts.get(url)
+
+        aozora = StubAozora()
+        url = "https://www.aozora.gr.jp/cards/000148/files/752_14964.html"
+        aozora.texts[url] = "東京の学校を出た。\n四国の松山に赴任した。"
+        extractor = SimplePlaceExtractor()
+        engine = DataExpansionEngine(temp_db_with_data, place_extractor=extractor,
+                                     aozora_extractor=aozora, request_interval=0)
+
+        def places():
+            return sorted(p['place_name'] for p in engine.db.get_places_by_work(1))
+
+        # 既定では地名登録済みの作品はスキップ
+        assert engine.expand_places_for_author("夏目漱石")['works_extracted'] == 0
+        assert aozora.downloads == []
+
+        # 初回の差分抽出はフィンガープリント未登録のため再抽出し、既存の地名を差し替える
+        assert engine.expand_places_for_author("夏目漱石", incremental=True)['works_extracted'] == 1
+        assert places() == ["松山"]
+
+        # 改行コード・空白だけの変更では再抽出しない
+        aozora.texts[url] = "東京の学校を出た。  \r\n\r\n四国の松山に赴任した。"
+        result = engine.expand_places_for_author("夏目漱石", incremental=True)
+        assert result['works_extracted'] == 0
+        assert result['results'][0]['status'] == 'unchanged'
+
+        # 本文の変更・抽出器バージョンの変更で再抽出
+        aozora.texts[url] = "東京の学校を出た。\n四国の松山から道後温泉の先の横浜市へ。"
+        assert engine.expand_places_for_author("夏目漱石", incremental=True)['works_extracted'] == 1
+        assert places() == ["松山", "横浜", "横浜市"]
+
+        extractor.version += "-next"
+        assert engine.expand_places_for_author("夏目漱石", incremental=True)['works_extracted'] == 1
+        assert engine.expand_places_for_author("夏目漱石", incremental=True)['works_extracted'] == 0
+
+    def test_expand_resume_and_jobs_status(self, cli_runner, temp_db_with_data):
+        """失敗した作品だけを再試行し、jobs status で進捗と失敗を表示すること"""
+        from bungo_map.cli.expand import DataExpansionEngine
+        from bungo_map.core.models import Work
+        from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+
+        db = Database(temp_db_with_data)
+        db.insert_work(Work(author_id=1, title="こころ", aozora_url="https://example.com/kokoro.html"))
+        db.close()
+
+        class StubAozora:
+            texts = {"https://www.aozora.gr.jp/cards/000148/files/752_14964.html": "松山に赴任した。"}
+            downloads = []
+
+            def search_aozora_work(self, title, author_name):
+                return None
+
+            def download_and_extract_text(self, url):
+                self.downloads.append(url)
+                return self.texts.get(url)
+
+        aozora = StubAozora()
+        engine = DataExpansionEngine(temp_db_with_data, place_extractor=SimplePlaceExtractor(),
+                                     aozora_extractor=aozora, request_interval=0)
+        result = engine.expand_places_for_author("夏目漱石", force_update=True)
+        assert [r['status'] for r in result['results']] == ['text_error', 'extracted']
+
+        result = cli_runner.invoke(main, ['jobs', 'status', '--db-path', temp_db_with_data])
+        assert result.exit_code == 0
+        assert "expand" in result.output and "1/2作品" in result.output
+
+        result = cli_runner.invoke(main, ['jobs', 'status', '1', '--db-path', temp_db_with_data])
+        assert result.exit_code == 0
+        assert "こころ [ダウンロード] 試行1回: 本文取得失敗" in result.output
+
+        # 再実行では失敗した作品だけをダウンロード
+        aozora.downloads.clear()
+        aozora.texts["https://example.com/kokoro.html"] = "鎌倉の海岸へ。"
+        result = engine.expand_places_for_author("夏目漱石", force_update=True)
+        assert result['job_id'] == 1
+        assert [r['status'] for r in result['results']] == ['extracted', 'resumed']
+        assert aozora.downloads == ["https://example.com/kokoro.html"]
+
+        result = cli_runner.invoke(main, ['jobs', 'status', '--db-path', temp_db_with_data])
+        assert "完了" in result.output and "2/2作品" in result.output
+
+    def test_cache_commands(self, cli_runner, temp_db_with_data):
+        """cache stats/gc/verify/import-legacy コマンドテスト"""
+        from bungo_map.extractors.text_store import TextStore
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with open(os.path.join(cache_dir, '752_14964.html.txt'), 'w', encoding='utf-8') as f:
+                f.write("親譲りの無鉄砲で小供の時から損ばかりしている。" * 100)
+            result = cli_runner.invoke(main, ['cache', 'import-legacy', '--cache-dir', cache_dir,
+                                              '--db-path', temp_db_with_data])
+            assert result.exit_code == 0 and "1件" in result.output
+
+            result = cli_runner.invoke(main, ['cache', 'stats', '--cache-dir', cache_dir])
+            assert result.exit_code == 0 and "正規化テキスト" in result.output and "倍" in result.output
+
+            result = cli_runner.invoke(main, ['cache', 'gc', '--legacy', '--cache-dir', cache_dir])
+            assert result.exit_code == 0 and "ファイル 1件" in result.output
+
+            digest = TextStore(cache_dir).get_entry("https://www.aozora.gr.jp/cards/000148/files/752_14964.html")['digest']
+            result = cli_runner.invoke(main, ['cache', 'verify', '--cache-dir', cache_dir])
+            assert result.exit_code == 0 and "問題なし" in result.output
+            os.unlink(TextStore(cache_dir).blob_path(digest))
+            result = cli_runner.invoke(main, ['cache', 'verify', '--cache-dir', cache_dir])
+            assert f"欠損: {digest}" in result.output
+
+    def test_catalog_commands(self, cli_runner):
+        """catalog load/search/stats コマンドテスト"""
+        from tests.test_extractors import catalog_csv
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_path = os.path.join(temp_dir, 'list_person_all_extended_utf8.csv')
+            catalog_path = os.path.join(temp_dir, 'catalog.db')
+            with open(csv_path, 'wb') as f:
+                f.write(catalog_csv())
+
+            result = cli_runner.invoke(main, ['catalog', 'load', csv_path, '--catalog-path', catalog_path])
+            assert result.exit_code == 0 and "作品 5件" in result.output
+
+            result = cli_runner.invoke(main, ['catalog', 'search', '羅生門', '--author', '芥川竜之介',
+                                              '--catalog-path', catalog_path])
+            assert result.exit_code == 0 and "exact" in result.output and "127_ruby_150.zip" in result.output
+
+            result = cli_runner.invoke(main, ['catalog', 'stats', '--catalog-path', catalog_path])
+            assert result.exit_code == 0 and "人物 5人" in result.output
+
     def test_performance_requirements(self, cli_runner, temp_db_with_data):
         """性能要件テスト（0.5秒以内）"""
         import time
@@ -172,12 +412,12 @@ class TestCLICommands:
             assert result.exit_code == 0, f"{description}が失敗"
             assert execution_time < 0.5, f"{description}が0.5秒を超過: {execution_time:.3f}秒"
     
-    def test_error_handling(self, cli_runner):
+    def test_error_handling(self, cli_runner, tmp_path):
         """エラーハンドリングテスト"""
-        # 存在しないデータベースでの検索
+        # 作成できない場所のデータベースでの検索
         result = cli_runner.invoke(
             search,
-            ['author', 'test', '--db', 'nonexistent.db']
+            ['author', 'test', '--db', str(tmp_path / 'missing' / 'dir' / 'nonexistent.db')]
         )
         
         # エラーが適切に処理されること
@@ -246,10 +486,10 @@ class TestIntegrationScenarios:
     def cli_runner(self):
         return CliRunner()
     
-    def test_full_workflow_scenario(self, cli_runner):
+    def test_full_workflow_scenario(self, cli_runner, monkeypatch):
         """フルワークフローシナリオテスト"""
         with tempfile.TemporaryDirectory() as temp_dir:
-            os.chdir(temp_dir)
+            monkeypatch.chdir(temp_dir)
             
             # 1. データ収集
             result = cli_runner.invoke(main, ['collect', '--demo'])
@@ -35,12 +35,14 @@ class TestDatabase:
         
         # テーブル存在確認
         with temp_db.get_connection() as conn:
-            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
+            cursor = conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'view')")
             tables = [row[0] for row in cursor.fetchall()]
             
             assert 'authors' in tables
             assert 'works' in tables
             assert 'places' in tables
+            assert 'place_master' in tables
+            assert 'place_mentions' in tables
     
     def test_author_operations(self, temp_db):
         """作者操作テスト（CRUD）"""
@@ -247,6 +249,777 @@ class TestBungoDatabase:
                 os.unlink(db_path)
 
 
+class TestConnectionPool:
+    """接続プールテスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        yield db
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def test_connection_reuse(self, temp_db):
+        """連続した操作で接続が再利用されること"""
+        before = temp_db.get_connection_stats()
+
+        author_id = temp_db.insert_author(Author(name="夏目漱石"))
+        for i in range(20):
+            temp_db.insert_work(Work(author_id=author_id, title=f"作品{i}"))
+        temp_db.get_stats()
+
+        stats = temp_db.get_connection_stats()
+        assert stats['opened'] == before['opened']
+        assert stats['reused'] >= before['reused'] + 22
+        assert stats['idle'] >= 1
+
+    def test_pragmas_applied(self, temp_db):
+        """WALモード等のPRAGMAが適用されること"""
+        with temp_db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    def test_nested_connection_shared(self, temp_db):
+        """同一スレッドの入れ子呼び出しは同じ接続を使うこと"""
+        with temp_db.get_connection() as outer:
+            with temp_db.get_connection() as inner:
+                assert inner is outer
+
+    def test_duplicate_insert_returns_existing_id(self, temp_db):
+        """再利用接続でも重複挿入時に既存IDを返すこと"""
+        author_id = temp_db.insert_author(Author(name="森鴎外"))
+        work_id = temp_db.insert_work(Work(author_id=author_id, title="舞姫"))
+
+        assert temp_db.insert_author(Author(name="森鴎外")) == author_id
+        assert temp_db.insert_work(Work(author_id=author_id, title="舞姫")) == work_id
+
+    def test_uncommitted_changes_rolled_back(self, temp_db):
+        """コミットされなかった変更は返却時に破棄されること"""
+        with temp_db.get_connection() as conn:
+            conn.execute("INSERT INTO authors (name) VALUES ('未コミット')")
+
+        assert temp_db.search_authors("未コミット") == []
+
+    def test_close_and_reopen(self, temp_db):
+        """close後も再接続して利用できること"""
+        temp_db.insert_author(Author(name="太宰治"))
+        temp_db.close()
+
+        assert temp_db.get_connection_stats()['idle'] == 0
+        assert len(temp_db.search_authors("太宰")) == 1
+
+    def test_multithreaded_access(self, temp_db):
+        """複数スレッドからの同時利用"""
+        import threading
+
+        author_id = temp_db.insert_author(Author(name="芥川龍之介"))
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(10):
+                    temp_db.insert_work(Work(author_id=author_id, title=f"t{n}-{i}"))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        assert len(temp_db.get_works_by_author(author_id)) == 40
+        assert temp_db.get_connection_stats()['idle'] <= temp_db.pool.pool_size
+
+
+class TestBulkInsert:
+    """一括挿入テスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        yield db
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def test_insert_authors_bulk(self, temp_db):
+        """作者一括挿入（既存作者・重複はIDを共有）"""
+        existing_id = temp_db.insert_author(Author(name="夏目漱石"))
+
+        authors = [Author(name="夏目漱石"), Author(name="森鴎外"), Author(name="森鴎外"),
+                   Author(name="太宰治")]
+        ids = temp_db.insert_authors_bulk(authors, batch_size=2)
+
+        assert len(ids) == 4
+        assert ids[0] == existing_id
+        assert ids[1] == ids[2]
+        assert len(set(ids)) == 3
+        assert temp_db.get_stats()['authors'] == 3
+
+    def test_insert_works_bulk(self, temp_db):
+        """作品一括挿入"""
+        author_id = temp_db.insert_author(Author(name="夏目漱石"))
+        existing_id = temp_db.insert_work(Work(author_id=author_id, title="こころ"))
+
+        works = [Work(author_id=author_id, title=title) for title in ["坊っちゃん", "こころ", "三四郎"]]
+        ids = temp_db.insert_works_bulk(works)
+
+        assert ids[1] == existing_id
+        titles = {w['work_id']: w['title'] for w in temp_db.get_works_by_author(author_id)}
+        assert [titles[work_id] for work_id in ids] == ["坊っちゃん", "こころ", "三四郎"]
+
+    def test_insert_places_bulk_ids(self, temp_db):
+        """地名一括挿入で挿入順のIDが返ること"""
+        author_id = temp_db.insert_author(Author(name="夏目漱石"))
+        work_id = temp_db.insert_work(Work(author_id=author_id, title="坊っちゃん"))
+        temp_db.insert_place(Place(work_id=work_id, place_name="東京"))
+
+        places = [Place(work_id=work_id, place_name=f"地名{i}", confidence=0.5) for i in range(25)]
+        ids = temp_db.insert_places_bulk(places, batch_size=10)
+
+        assert len(ids) == 25
+        with temp_db.get_connection() as conn:
+            for place_id, place in zip(ids, places):
+                row = conn.execute("SELECT place_name FROM places WHERE place_id = ?", (place_id,)).fetchone()
+                assert row[0] == place.place_name
+
+    def test_insert_places_bulk_rollback(self, temp_db):
+        """途中で失敗した場合は全件ロールバックされること"""
+        author_id = temp_db.insert_author(Author(name="夏目漱石"))
+        work_id = temp_db.insert_work(Work(author_id=author_id, title="坊っちゃん"))
+
+        places = [Place(work_id=work_id, place_name="東京"), Place(work_id=work_id, place_name=None)]
+        with pytest.raises(Exception):
+            temp_db.insert_places_bulk(places, batch_size=1)
+
+        assert temp_db.get_place_count() == 0
+
+    def test_get_related_in_batches(self, temp_db):
+        """作品・地名の一括取得が1件ずつの取得と同じ結果になること"""
+        author_ids = temp_db.insert_authors_bulk([Author(name=f"作家{i}") for i in range(7)])
+        work_ids = temp_db.insert_works_bulk([Work(author_id=author_id, title=f"作品{j}")
+                                              for author_id in author_ids for j in range(3)])
+        temp_db.insert_places_bulk([Place(work_id=work_id, place_name=f"地名{k}")
+                                    for work_id in work_ids for k in range(2)])
+
+        order = list(reversed(author_ids))
+        expected = [w for author_id in order for w in temp_db.get_works_by_author(author_id)]
+        assert temp_db.get_works_by_authors(order + order[:2], batch_size=3) == expected
+
+        expected = [p for work_id in work_ids for p in temp_db.get_places_by_work(work_id)]
+        assert temp_db.get_places_by_works(work_ids, batch_size=4) == expected
+        assert temp_db.get_places_by_works([]) == []
+
+    def test_insert_bulk_empty(self, temp_db):
+        """空入力"""
+        assert temp_db.insert_authors_bulk([]) == []
+        assert temp_db.insert_works_bulk([]) == []
+        assert temp_db.insert_places_bulk(iter([])) == []
+
+
+class TestFullTextSearch:
+    """全文検索（FTS5 trigram）テスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        author_id = db.insert_author(Author(name="夏目漱石"))
+        work_id = db.insert_work(Work(author_id=author_id, title="坊っちゃん"))
+        db.insert_work(Work(author_id=author_id, title="吾輩は猫である"))
+        other_id = db.insert_author(Author(name="芥川龍之介"))
+        db.insert_work(Work(author_id=other_id, title="羅生門"))
+        db.insert_places_bulk([
+            Place(work_id=work_id, place_name="松山市", sentence="汽車が松山市に着いた"),
+            Place(work_id=work_id, place_name="道後温泉", sentence="赤シャツと道後温泉へ行った"),
+        ])
+        yield db
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def test_fts_tables_created(self, temp_db):
+        """FTSテーブルが作成されること"""
+        assert temp_db.fts_enabled
+        with temp_db.get_connection() as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert {'authors_fts', 'works_fts', 'places_fts'} <= tables
+
+    def test_substring_search(self, temp_db):
+        """3文字以上の部分一致検索"""
+        assert [a['name'] for a in temp_db.search_authors("龍之介")] == ["芥川龍之介"]
+        assert [w['title'] for w in temp_db.search_works("猫である")] == ["吾輩は猫である"]
+        assert [p['place_name'] for p in temp_db.search_places("道後温")] == ["道後温泉"]
+
+    def test_search_by_related_names(self, temp_db):
+        """作者名・作品名からの検索"""
+        works = temp_db.search_works("夏目漱石")
+        assert {w['title'] for w in works} == {"坊っちゃん", "吾輩は猫である"}
+
+        places = temp_db.search_places("坊っちゃん")
+        assert {p['place_name'] for p in places} == {"松山市", "道後温泉"}
+
+    def test_short_query_fallback(self, temp_db):
+        """2文字以下のクエリはLIKE検索にフォールバック"""
+        assert [a['name'] for a in temp_db.search_authors("芥川")] == ["芥川龍之介"]
+        assert len(temp_db.search_places("松山")) == 1
+        assert len(temp_db.search_authors("")) == 2
+
+    def test_context_search(self, temp_db):
+        """文脈の全文検索"""
+        places = temp_db.search_place_contexts("赤シャツ")
+        assert [p['place_name'] for p in places] == ["道後温泉"]
+
+    def test_triggers_keep_index_in_sync(self, temp_db):
+        """更新・削除がインデックスに反映されること"""
+        place = temp_db.search_places("松山市")[0]
+        updated = Place(place_id=place['place_id'], place_name="伊予松山", sentence=place['sentence'])
+        assert temp_db.update_place(updated)
+
+        assert temp_db.search_places("松山市") == []
+        assert len(temp_db.search_places("伊予松山")) == 1
+
+        with temp_db.get_connection() as conn:
+            conn.execute("DELETE FROM places WHERE place_id = ?", (place['place_id'],))
+            conn.commit()
+        assert temp_db.search_places("伊予松山") == []
+
+    def test_index_built_for_existing_database(self):
+        """FTS導入前のデータベースでも初回接続時に索引が構築されること"""
+        import sqlite3
+
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        try:
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TABLE authors (author_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                         "name TEXT UNIQUE NOT NULL, wikipedia_url TEXT, birth_year INTEGER, "
+                         "death_year INTEGER, created_at TIMESTAMP)")
+            conn.execute("INSERT INTO authors (name) VALUES ('宮沢賢治')")
+            conn.commit()
+            conn.close()
+
+            db = Database(db_path)
+            assert [a['name'] for a in db.search_authors("宮沢賢治")] == ["宮沢賢治"]
+            assert db.rebuild_search_index()['authors_fts'] == 1
+            db.close()
+        finally:
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.unlink(db_path + suffix)
+
+
+class TestSpatialIndex:
+    """空間インデックス（R*Tree）テスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        import random
+
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        author_id = db.insert_author(Author(name="夏目漱石"))
+        work_id = db.insert_work(Work(author_id=author_id, title="坊っちゃん"))
+
+        rng = random.Random(0)
+        places = [Place(work_id=work_id, place_name=f"地点{i}",
+                        lat=rng.uniform(30.0, 45.0), lng=rng.uniform(128.0, 146.0))
+                  for i in range(2000)]
+        places.append(Place(work_id=work_id, place_name="座標なし"))
+        db.insert_places_bulk(places)
+        yield db
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def _all_points(self, db):
+        with db.get_connection() as conn:
+            return conn.execute("SELECT place_id, lat, lng FROM places WHERE lat IS NOT NULL").fetchall()
+
+    def test_bbox_matches_full_scan(self, temp_db):
+        """矩形検索結果が全件走査と一致すること"""
+        assert temp_db.spatial_enabled
+        bbox = (34.0, 132.0, 36.5, 136.0)
+
+        found = {p['place_id'] for p in temp_db.places_in_bbox(*bbox, limit=None)}
+        expected = {row[0] for row in self._all_points(temp_db)
+                    if bbox[0] <= row[1] <= bbox[2] and bbox[1] <= row[2] <= bbox[3]}
+
+        assert found == expected
+        assert len(temp_db.places_in_bbox(*bbox, limit=5)) == min(5, len(expected))
+
+    def test_places_near(self, temp_db):
+        """半径検索が距離順で半径内のみ返すこと"""
+        from bungo_map.core.spatial import haversine_m
+
+        center = (35.68, 139.76)
+        radius = 300000
+        results = temp_db.places_near(*center, radius_m=radius, limit=1000)
+
+        expected = {row[0] for row in self._all_points(temp_db)
+                    if haversine_m(center[0], center[1], row[1], row[2]) <= radius}
+        assert {p['place_id'] for p in results} == expected
+
+        distances = [p['distance_m'] for p in results]
+        assert distances == sorted(distances)
+        assert len(temp_db.places_near(*center, radius_m=radius, limit=3)) == min(3, len(expected))
+
+    def test_update_place_moves_point(self, temp_db):
+        """update_placeで座標を設定すると空間検索に反映されること"""
+        place = temp_db.get_places_without_coordinates()[0]
+        place.lat, place.lng = 33.8395, 132.7654
+        assert temp_db.update_place(place)
+
+        near = temp_db.places_near(33.8395, 132.7654, radius_m=10)
+        assert [p['place_name'] for p in near] == ["座標なし"]
+
+        place.lat, place.lng = None, None
+        temp_db.update_place(place)
+        assert temp_db.places_near(33.8395, 132.7654, radius_m=10) == []
+
+    def test_antimeridian_bbox(self, temp_db):
+        """日付変更線を跨ぐ矩形"""
+        work_id = temp_db.search_works("坊っちゃん")[0]['work_id']
+        temp_db.insert_places_bulk([
+            Place(work_id=work_id, place_name="東側", lat=0.0, lng=179.9),
+            Place(work_id=work_id, place_name="西側", lat=0.0, lng=-179.9),
+        ])
+
+        names = {p['place_name'] for p in temp_db.places_in_bbox(-1.0, 179.0, 1.0, -179.0)}
+        assert names == {"東側", "西側"}
+        assert {p['place_name'] for p in temp_db.places_near(0.0, 180.0, radius_m=20000)} == names
+
+
+class TestMigrations:
+    """スキーママイグレーションテスト"""
+
+    @pytest.fixture
+    def db_path(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+        yield db_path
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def _create_legacy_database(self, db_path):
+        """マイグレーション導入前（インデックスなし・places単一テーブル）のデータベース"""
+        import sqlite3
+
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+        CREATE TABLE authors (author_id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL,
+                              wikipedia_url TEXT, birth_year INTEGER, death_year INTEGER,
+                              created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE works (work_id INTEGER PRIMARY KEY AUTOINCREMENT, author_id INTEGER NOT NULL,
+                            title TEXT NOT NULL, wiki_url TEXT, aozora_url TEXT, content TEXT,
+                            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(author_id, title));
+        CREATE TABLE places (place_id INTEGER PRIMARY KEY AUTOINCREMENT, work_id INTEGER NOT NULL,
+                             place_name TEXT NOT NULL, lat REAL, lng REAL, before_text TEXT,
+                             sentence TEXT, after_text TEXT, aozora_url TEXT, confidence REAL DEFAULT 0.0,
+                             extraction_method TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        INSERT INTO authors (name) VALUES ('夏目漱石');
+        INSERT INTO works (author_id, title) VALUES (1, '坊っちゃん'), (1, 'こころ');
+        INSERT INTO places (work_id, place_name, lat, lng, sentence) VALUES
+            (1, '松山', 33.84, 132.77, '松山に着いた'),
+            (1, '東京', NULL, NULL, '東京を発った'),
+            (2, '東京', 35.68, 139.76, '東京の下宿'),
+            (2, '東　京', NULL, NULL, '東京へ戻る'),
+            (2, '鎌倉', NULL, NULL, '鎌倉の海');
+        """)
+        conn.close()
+
+    def _index_names(self, db):
+        with db.get_connection() as conn:
+            return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+    def test_new_database_is_latest(self, db_path):
+        """新規データベースは最新バージョン"""
+        from bungo_map.core.migrations import LATEST_VERSION
+
+        db = Database(db_path)
+        status = db.get_schema_status()
+        assert status['version'] == LATEST_VERSION
+        assert status['pending'] == []
+        assert {'idx_place_mentions_work_id', 'idx_place_mentions_master_id',
+                'idx_place_master_ungeocoded', 'idx_works_author_id'} <= self._index_names(db)
+        db.close()
+
+    def test_upgrade_legacy_database(self, db_path):
+        """既存データベースをその場でアップグレード"""
+        self._create_legacy_database(db_path)
+
+        db = Database(db_path, auto_migrate=False)
+        assert db.get_schema_status()['version'] == 0
+        assert 'idx_works_author_id' not in self._index_names(db)
+
+        applied = db.migrate()
+        assert [m.version for m in applied] == [1, 2, 3, 4, 5, 6, 7]
+        assert db.migrate() == []
+        assert db.fts_enabled and db.spatial_enabled
+        assert [p['place_name'] for p in db.search_places("松山")] == ["松山"]
+        assert [p['place_id'] for p in db.search_place_contexts("東京の下宿")] == [3]
+        # 表記ゆれを含む同名の言及は1件のマスタに集約され、座標を共有する
+        assert db.get_place_master_count() == 3
+        assert {p['place_id']: p['latitude'] for p in db.get_places_by_work(2)} == {3: 35.68, 4: 35.68, 5: None}
+        assert [p.place_name for p in db.get_places_without_coordinates()] == ["鎌倉"]
+        assert [p['place_name'] for p in db.places_near(35.68, 139.76, 1000)] == ["東京", "東京", "東　京"]
+        # 移行後も place_id の採番は継続する
+        assert db.insert_place(Place(work_id=1, place_name="京都")) == 6
+        db.close()
+
+    def test_open_requires_explicit_destructive_migration(self, db_path):
+        """データのあるデータベースは開くだけでは places を作り直さず、移行が必要なことをエラーで示すこと"""
+        from bungo_map.core.migrations import MigrationRequiredError
+
+        self._create_legacy_database(db_path)
+
+        with pytest.raises(MigrationRequiredError, match="bungo db migrate"):
+            Database(db_path)
+
+        db = Database(db_path, auto_migrate=False)
+        status = db.get_schema_status()
+        assert status['version'] == 4
+        assert [m.version for m in status['pending']] == [5]
+        with db.get_connection() as conn:
+            assert conn.execute("SELECT type FROM sqlite_master WHERE name = 'places'").fetchone()[0] == 'table'
+            assert conn.execute("SELECT COUNT(*) FROM places").fetchone()[0] == 5
+
+        # 明示的に適用（適用前にバックアップ）
+        backup_path = db.backup(db_path + '.bak')
+        assert [m.version for m in db.migrate()] == [5]
+        assert db.get_schema_status()['version'] == 7
+        db.close()
+
+        db = Database(db_path)
+        assert db.get_place_master_count() == 3
+        assert db.get_statistics()['places_count'] == 5
+        db.close()
+
+        backup = Database(backup_path, auto_migrate=False)
+        assert backup.get_schema_status()['version'] == 4
+        backup.close()
+        os.unlink(backup_path)
+
+    def test_skipped_destructive_keeps_independent_migrations(self, db_path):
+        """破壊的な手順を飛ばしても、依存しない後続の手順（ジョブ台帳）は適用すること"""
+        from bungo_map.core.jobs import JobLedger
+        from bungo_map.core.migrations import migrate
+
+        self._create_legacy_database(db_path)
+
+        db = Database(db_path, auto_migrate=False)
+        with db.get_connection() as conn:
+            assert [m.version for m in migrate(conn, allow_destructive=False)] == [1, 2, 3, 4, 6, 7]
+
+        ledger = JobLedger(db)
+        run = ledger.begin("expand", [1, 2])
+        assert run.work_ids == [1, 2]
+        assert ledger.finish(run.job_id) == 'incomplete'
+        assert db.get_schema_status()['version'] == 4
+        db.close()
+
+    def test_skipped_destructive_keeps_work_fingerprints(self, db_path):
+        """破壊的な手順を飛ばしても作品のフィンガープリント列を追加し、分割後も引き継ぐこと"""
+        from bungo_map.core.migrations import migrate
+
+        self._create_legacy_database(db_path)
+
+        db = Database(db_path, auto_migrate=False)
+        with db.get_connection() as conn:
+            migrate(conn, allow_destructive=False)
+            conn.execute("UPDATE works SET content_hash = 'abc', extractor_version = 'simple/3' WHERE work_id = 1")
+            conn.commit()
+        assert db.get_work_fingerprints([1, 2]) == {1: ("abc", "simple/3")}
+
+        assert [m.version for m in db.migrate()] == [5]
+        assert db.get_work_fingerprints([1, 2]) == {1: ("abc", "simple/3")}
+        db.close()
+
+    def test_fulltext_index_restored_when_available(self, db_path, monkeypatch):
+        """FTS5非対応の環境で適用したデータベースは、対応環境で開いたときに全文検索インデックスを作成すること"""
+        from bungo_map.core import migrations
+
+        self._create_legacy_database(db_path)
+        with monkeypatch.context() as m:
+            m.setattr(migrations, 'ensure_fulltext_index', lambda conn, specs=None: False)
+            m.setattr(migrations, 'fulltext_available', lambda conn: False)
+            db = Database(db_path, auto_migrate=False)
+            db.migrate()
+            assert db.get_schema_status()['version'] == 7
+            assert not db.fts_enabled
+            db.close()
+
+        db = Database(db_path)
+        assert db.fts_enabled
+        assert [p['place_id'] for p in db.search_place_contexts("東京の下宿")] == [3]
+        assert [w['title'] for w in db.search_works("夏目漱石")] == ["こころ", "坊っちゃん"]
+        db.close()
+
+    def test_target_version(self, db_path):
+        """指定バージョンまで適用"""
+        self._create_legacy_database(db_path)
+
+        db = Database(db_path, auto_migrate=False)
+        assert [m.version for m in db.migrate(target=1)] == [1]
+        assert [m.version for m in db.get_schema_status()['pending']] == [2, 3, 4, 5, 6, 7]
+        db.close()
+
+    def test_queries_use_indexes(self, db_path):
+        """作品別・座標未設定の取得でインデックスが使われること"""
+        db = Database(db_path)
+        with db.get_connection() as conn:
+            def plan(sql):
+                return " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+
+            assert 'idx_place_mentions_work_id' in plan("SELECT * FROM places WHERE work_id = 1")
+            assert 'idx_place_master_ungeocoded' in plan(
+                "SELECT * FROM place_master WHERE lat IS NULL OR lng IS NULL ORDER BY master_id")
+            assert 'idx_works_author_id' in plan("SELECT * FROM works WHERE author_id = 1")
+        db.close()
+
+
+class TestPlaceMaster:
+    """地名マスタ・地名言及テスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        author_id = db.insert_author(Author(name="夏目漱石"))
+        work_ids = db.insert_works_bulk([Work(author_id=author_id, title=t) for t in ["坊っちゃん", "こころ", "三四郎"]])
+        db.insert_places_bulk([Place(work_id=work_id, place_name=name)
+                               for work_id in work_ids for name in ["東京", "ＴＯＫＹＯ"]])
+        db.insert_place(Place(work_id=work_ids[0], place_name="松山", lat=33.84, lng=132.77))
+        yield db
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def test_normalize_place_name(self):
+        """表記ゆれの正規化"""
+        from bungo_map.core.gazetteer import normalize_place_name
+
+        assert normalize_place_name("ＴＯＫＹＯ") == "TOKYO"
+        assert normalize_place_name(" 霞ヶ関　") == normalize_place_name("霞ケ関")
+
+    def test_mentions_share_master(self, temp_db):
+        """同名の言及は1件のマスタにまとまること"""
+        assert temp_db.get_place_count() == 7
+        assert temp_db.get_place_master_count() == 3
+
+        masters = temp_db.get_place_masters_without_coordinates()
+        assert [(m.place_name, m.mention_count) for m in masters] == [("東京", 3), ("ＴＯＫＹＯ", 3)]
+
+    def test_update_master_coordinates(self, temp_db):
+        """マスタの座標更新が全言及と空間インデックスに反映されること"""
+        master = temp_db.get_place_masters_without_coordinates()[0]
+        assert temp_db.update_place_master_coordinates([(master.master_id, 35.68, 139.76, 'test', 0.9)]) == 1
+
+        assert temp_db.get_places_with_coordinates_count() == 4
+        assert len(temp_db.places_near(35.68, 139.76, 1000)) == 3
+        assert [m.place_name for m in temp_db.get_place_masters_without_coordinates()] == ["ＴＯＫＹＯ"]
+
+    def test_compat_view_writes(self, temp_db):
+        """互換ビュー経由の更新・削除"""
+        place = temp_db.get_places_without_coordinates(limit=1)[0]
+        place.place_name = "京都"
+        place.lat, place.lng = 35.01, 135.77
+        assert temp_db.update_place(place)
+
+        assert temp_db.get_place_master_count() == 4
+        assert [p['place_name'] for p in temp_db.places_near(35.01, 135.77, 1000)] == ["京都"]
+
+        with temp_db.get_connection() as conn:
+            conn.execute("DELETE FROM places WHERE place_id = ?", (place.place_id,))
+            conn.commit()
+        assert temp_db.get_place_count() == 6
+
+
+class TestWorkFingerprints:
+    """作品フィンガープリント・地名差し替えテスト"""
+
+    @pytest.fixture
+    def temp_db(self):
+        with tempfile.NamedTemporaryFile(suffix='.db', delete=False) as f:
+            db_path = f.name
+
+        db = Database(db_path)
+        author_id = db.insert_author(Author(name="夏目漱石"))
+        work_ids = db.insert_works_bulk([Work(author_id=author_id, title=t) for t in ["坊っちゃん", "こころ"]])
+        db.insert_places_bulk([Place(work_id=work_id, place_name=name, sentence=f"{name}へ")
+                               for work_id in work_ids for name in ["東京", "松山"]])
+        yield db, work_ids
+
+        db.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.unlink(db_path + suffix)
+
+    def test_content_hash_normalization(self):
+        """改行コード・行頭行末の空白・空行の違いは同じハッシュになること"""
+        from bungo_map.core.fingerprint import content_hash, needs_extraction
+
+        assert content_hash("東京へ。\n松山へ。") == content_hash("  東京へ。\r\n\r\n\u3000松山へ。 \n")
+        assert content_hash("東京へ。\n松山へ。") != content_hash("東京へ。\n松山に。")
+        assert needs_extraction(None, "abc", "v1")
+        assert needs_extraction(("abc", "v1"), "abc", "v2")
+        assert not needs_extraction(("abc", "v1"), "abc", "v1")
+
+    def test_replace_work_places(self, temp_db):
+        """対象作品の地名だけを差し替え、フィンガープリントを記録すること"""
+        db, work_ids = temp_db
+        assert db.get_work_fingerprints(work_ids) == {}
+
+        place_ids = db.replace_work_places(work_ids[0], [Place(work_id=work_ids[0], place_name="道後")],
+                                           content_hash="abc", extractor_version="simple/2")
+
+        assert [p['place_id'] for p in db.get_places_by_work(work_ids[0])] == place_ids
+        assert [p['place_name'] for p in db.get_places_by_work(work_ids[0])] == ["道後"]
+        assert len(db.get_places_by_work(work_ids[1])) == 2
+        assert db.get_work_fingerprints(work_ids) == {work_ids[0]: ("abc", "simple/2")}
+        assert [p['place_name'] for p in db.search_place_contexts("松山へ")] == ["松山"]
+
+    def test_replace_work_places_is_atomic(self, temp_db):
+        """挿入に失敗した場合は元の地名とフィンガープリントが残ること"""
+        db, work_ids = temp_db
+        db.replace_work_places(work_ids[0], [], content_hash="abc", extractor_version="v1")
+        db.insert_places_bulk([Place(work_id=work_ids[0], place_name="東京")])
+
+        broken = [Place(work_id=work_ids[0], place_name="京都"), Place(work_id=work_ids[0], place_name=None)]
+        with pytest.raises(Exception):
+            db.replace_work_places(work_ids[0], broken, content_hash="def", extractor_version="v2")
+
+        assert [p['place_name'] for p in db.get_places_by_work(work_ids[0])] == ["東京"]
+        assert db.get_work_fingerprints([work_ids[0]]) == {work_ids[0]: ("abc", "v1")}
+
+        with pytest.raises(ValueError):
+            db.replace_work_places(work_ids[0], [Place(work_id=work_ids[1], place_name="京都")])
+
+
+class TestJobLedger:
+    """ジョブ台帳テスト"""
+
+    @pytest.fixture
+    def ledger(self):
+        from bungo_map.core.jobs import JobLedger
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db = Database(os.path.join(temp_dir, 'jobs.db'))
+            clock = [1000.0]
+            yield JobLedger(db, clock=lambda: clock[0]), clock
+            db.close()
+
+    def test_resume_only_unfinished(self, ledger):
+        """再開時は完了済みの作品を除き、同じ条件の未完了ジョブを引き継ぐこと"""
+        from bungo_map.core.jobs import COMPLETED, FAILED, INCOMPLETE, INTERRUPTED
+
+        ledger, clock = ledger
+        run = ledger.begin('pipeline', [1, 2, 3], {'authors': ['夏目漱石']})
+        assert run.work_ids == [1, 2, 3] and not run.resumed
+
+        ledger.record(run.job_id, 1, 'download')
+        ledger.record(run.job_id, 1, 'write')
+        ledger.record(run.job_id, 2, 'extract', FAILED, "解析エラー")
+        # flush 前の記録は保存されない
+        assert ledger.get_progress(run.job_id).completed == 0
+        assert ledger.finish(run.job_id, interrupted=True) == INTERRUPTED
+
+        # 条件が異なるジョブは別扱い
+        assert not ledger.begin('pipeline', [1], {'authors': ['森鴎外']}).resumed
+
+        resumed = ledger.begin('pipeline', [1, 2, 3, 4], {'authors': ['夏目漱石']})
+        assert resumed.job_id == run.job_id and resumed.resumed
+        assert resumed.work_ids == [2, 3, 4] and resumed.completed_before == 1
+        assert ledger.get_failed_items(run.job_id) == []
+        ledger.record(run.job_id, 2, 'write')
+        ledger.record(run.job_id, 3, 'download', FAILED, "404")
+        ledger.record(run.job_id, 4, 'write')
+        assert ledger.finish(run.job_id) == INCOMPLETE
+
+        failed = ledger.get_failed_items(run.job_id)
+        assert [(item['work_id'], item['stage'], item['attempts'], item['error']) for item in failed] == \
+            [(3, 'download', 1, "404")]
+
+        # 失敗の回数が上限に達した作品は対象外
+        again = ledger.begin('pipeline', [1, 2, 3, 4], {'authors': ['夏目漱石']}, max_attempts=1)
+        assert again.work_ids == [] and again.given_up == [3] and again.completed_before == 3
+        ledger.record(run.job_id, 3, 'write')
+        assert ledger.finish(run.job_id) == COMPLETED
+
+        # 完了したジョブは再開せず新しいジョブになる
+        assert ledger.begin('pipeline', [1], {'authors': ['夏目漱石']}).job_id != run.job_id
+
+    def test_interrupted_resumes_never_give_up(self, ledger):
+        """中断を繰り返しても未処理の作品は試行回数に数えず、失敗した作品だけ回数を増やすこと"""
+        from bungo_map.core.jobs import FAILED
+
+        ledger, clock = ledger
+        for _ in range(5):
+            run = ledger.begin('pipeline', [1, 2, 3], max_attempts=2)
+            assert run.work_ids == [1, 2, 3] and run.given_up == []
+            ledger.record(run.job_id, 1, 'download')
+            ledger.finish(run.job_id, interrupted=True)
+
+        for expected in ([1, 2, 3], [1, 2, 3]):
+            run = ledger.begin('pipeline', [1, 2, 3], max_attempts=2)
+            assert run.work_ids == expected
+            ledger.record(run.job_id, 2, 'extract', FAILED, "解析エラー")
+            ledger.finish(run.job_id, interrupted=True)
+
+        run = ledger.begin('pipeline', [1, 2, 3], max_attempts=2)
+        assert run.work_ids == [1, 3] and run.given_up == [2]
+        assert [(item['work_id'], item['attempts']) for item in ledger.get_failed_items(run.job_id)] == [(2, 2)]
+
+    def test_progress_and_eta(self, ledger):
+        """今回の実行での完了速度から残り時間を見積もること"""
+        from bungo_map.core.jobs import RUNNING
+
+        ledger, clock = ledger
+        run = ledger.begin('expand', range(1, 11))
+        for work_id in (1, 2):
+            clock[0] += 30
+            ledger.record(run.job_id, work_id, 'write')
+        ledger.flush()
+
+        progress = ledger.get_progress(run.job_id)
+        assert progress.status == RUNNING
+        assert (progress.total, progress.completed, progress.percent) == (10, 2, 20.0)
+        assert progress.eta_seconds == pytest.approx(240.0)
+        assert progress.stages == {('download', 'pending'): 8, ('write', 'done'): 2}
+        assert [job.job_id for job in ledger.list_jobs()] == [run.job_id]
+
+        ledger.finish(run.job_id)
+        assert ledger.get_progress(run.job_id).eta_seconds is None
+        assert ledger.get_progress(run.job_id + 1) is None
+
+
 class TestDataIntegrity:
     """データ整合性テスト"""
     
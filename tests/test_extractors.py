@@ -0,0 +1,732 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+地名抽出器テスト
+辞書照合エンジン・軽量地名抽出器・GiNZA抽出器の動作確認
+"""
+
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from bungo_map.extractors.aozora_catalog import EXACT, FUZZY, NORMALIZED as NORMALIZED_MATCH, READING, AozoraCatalog
+from bungo_map.extractors.aozora_downloader import AozoraDownloader
+from bungo_map.extractors.aozora_extractor import AozoraExtractor
+from bungo_map.extractors.aozora_normalizer import normalize_aozora_text
+from bungo_map.extractors.dictionary_matcher import AhoCorasickMatcher, load_place_dictionary
+from bungo_map.extractors.ner_cache import CachedEntity, EntityCache, model_key
+from bungo_map.extractors.simple_place_extractor import SimplePlaceExtractor
+from bungo_map.extractors.text_chunker import chunk_spans, iter_chunks, sentence_spans, utf8_length
+from bungo_map.extractors.text_store import NORMALIZED, RAW, TextStore, legacy_cache_filename
+from bungo_map.core.models import Work
+
+
+class TestAhoCorasickMatcher:
+    """辞書照合エンジンテスト"""
+
+    def test_all_matches_with_offsets(self):
+        """重なりを含む全ての一致を位置付きで返すこと"""
+        matcher = AhoCorasickMatcher(["he", "she", "his", "hers"])
+        matches = sorted((m.start, m.end, m.word) for m in matcher.iter_matches("ushers"))
+        assert matches == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+    def test_matches_agree_with_brute_force(self):
+        """素朴な部分文字列検索と同じ結果になること"""
+        words = ["東京", "東京湾", "京都", "都", "湾岸", "大阪湾"]
+        text = "東京湾岸から京都を経て大阪湾へ。東京都。"
+        matcher = AhoCorasickMatcher(words)
+
+        expected = sorted((i, i + len(w)) for w in words for i in range(len(text)) if text.startswith(w, i))
+        assert sorted((m.start, m.end) for m in matcher.iter_matches(text)) == expected
+
+    def test_find_longest(self):
+        """重ならない最左最長一致を返すこと"""
+        matcher = AhoCorasickMatcher(["浅草", "浅草橋", "草橋", "両国"])
+        assert [m.word for m in matcher.find_longest("浅草橋から両国へ、浅草へ")] == ["浅草橋", "両国", "浅草"]
+
+    def test_find_first(self):
+        """同じ位置では先に登録した語を優先すること（登録順の正規表現の選択と同じ）"""
+        words = ["浅草", "浅草橋", "草橋", "両国", "大阪湾", "大阪"]
+        text = "浅草橋から両国へ、大阪湾の草橋"
+        matcher = AhoCorasickMatcher(words)
+        expected = re.findall('|'.join(words), text)
+
+        assert [m.word for m in matcher.find_first(text)] == expected == ["浅草", "両国", "大阪湾", "草橋"]
+
+    def test_values_and_membership(self):
+        """登録値は先に登録したものを残すこと"""
+        matcher = AhoCorasickMatcher([("松山", "有名地名")])
+        assert not matcher.add("松山", "地名辞書")
+        assert matcher.add("道後温泉", "地名辞書")
+        assert [m.value for m in matcher.find_longest("松山の道後温泉")] == ["有名地名", "地名辞書"]
+        assert "松山" in matcher and "松" not in matcher
+        assert len(matcher) == 2
+
+    def test_load_place_dictionary(self):
+        """1行1語・タブ区切り分類・コメント行の読み込み"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'places.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("# 地名辞書\n道後温泉\t温泉\n\n坊っちゃん団子\n")
+            assert list(load_place_dictionary(path, default_value='地名辞書')) == [
+                ("道後温泉", "温泉"), ("坊っちゃん団子", "地名辞書")
+            ]
+
+
+class TestSimplePlaceExtractor:
+    """軽量地名抽出器テスト"""
+
+    TEXT = "東京の学校を卒業してから、四国の松山に赴任した。　道後温泉も有名である！浅草橋で千代田区の人に会った"
+
+    def test_extract_places(self):
+        """正規表現と辞書照合の結果が文と前後文脈付きで返ること"""
+        places = SimplePlaceExtractor().extract_places_from_text(1, self.TEXT)
+        by_name = {place.place_name: place for place in places}
+
+        assert list(by_name) == ["松山", "千代田区", "浅草"]
+        assert by_name["松山"].extraction_method == "regex_有名地名"
+        assert by_name["松山"].sentence == "東京の学校を卒業してから、四国の松山に赴任した"
+        assert by_name["松山"].after_text == "道後温泉も有名である"
+        assert by_name["千代田区"].extraction_method == "regex_市区町村"
+        assert by_name["浅草"].before_text == "道後温泉も有名である"
+
+    def test_dictionary_keeps_list_order_priority(self):
+        """有名地名は FAMOUS_PLACES の順で優先し、従来の正規表現と同じ地名になること"""
+        extractor = SimplePlaceExtractor()
+        places = extractor.extract_places_from_text(1, "大阪湾を渡り浅草橋へ。信濃川と駿河湾を見た")
+        assert [p.place_name for p in places] == ["大阪", "浅草", "信濃", "駿河"]
+
+    def test_external_gazetteer(self):
+        """外部地名辞書の語も抽出されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'places.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("道後温泉\t温泉\n四国\n")
+            extractor = SimplePlaceExtractor(gazetteer_path=path)
+
+        places = {p.place_name: p for p in extractor.extract_places_from_text(1, self.TEXT)}
+        assert places["道後温泉"].extraction_method == "dictionary_温泉"
+        assert places["道後温泉"].sentence == "道後温泉も有名である"
+        assert places["四国"].extraction_method == "dictionary_地名辞書"
+        assert places["松山"].extraction_method == "regex_有名地名"
+
+    def test_single_pass_matches_per_sentence(self):
+        """全文1回の走査と文ごとの走査で抽出結果が一致すること"""
+        text = ("\n　東京都から京都府を経て大阪へ！　千代田区の先の北多摩郡で浅草橋を見物した。。"
+                "松山さんは言う？" + "長い文" * 300 + "の後に横浜市。\n 松山に戻った\n")
+
+        def fields(places):
+            return [(p.place_name, p.sentence, p.before_text, p.after_text, p.confidence, p.extraction_method)
+                    for p in places]
+
+        expected = fields(SimplePlaceExtractor(single_pass=False).extract_places_from_text(1, text))
+        assert fields(SimplePlaceExtractor().extract_places_from_text(1, text)) == expected
+        assert len(expected) >= 6
+
+    def test_sentence_spans(self):
+        """文の位置が _split_into_sentences と同じ文を指すこと"""
+        extractor = SimplePlaceExtractor()
+        text = "　一文目。\n二文目！  \t。三文目？\u3000 四文目  "
+        spans = extractor._sentence_spans(text)
+        assert [text[start:end] for start, end in spans] == extractor._split_into_sentences(text)
+
+
+class TestTextChunker:
+    """テキスト分割テスト"""
+
+    def test_spans_cover_text_within_limit(self):
+        """窓が隙間なく連続し、全てバイト上限以下であること"""
+        text = "吾輩は猫である。名前はまだ無い！\nどこで生れたか？" * 50 + "とんと見当がつかぬ"
+        spans = chunk_spans(text, 100)
+
+        assert "".join(text[start:end] for start, end in spans) == text
+        assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+        assert all(utf8_length(text[start:end]) <= 100 for start, end in spans)
+
+    def test_splits_on_sentence_boundaries(self):
+        """文の途中では分割しないこと"""
+        text = "一文目です。二文目です！三文目です？\n四文目"
+        chunks = [chunk for _, chunk in iter_chunks(text, utf8_length("一文目です。二文目です！"))]
+        assert chunks == ["一文目です。二文目です！", "三文目です？\n四文目"]
+
+    def test_long_sentence_fallback(self):
+        """上限を超える文は読点、なければ文字単位で分割すること"""
+        text = "あいうえお、かきくけこ、さしすせそ。" + "た" * 10
+        spans = chunk_spans(text, 36)
+        chunks = [text[start:end] for start, end in spans]
+
+        assert chunks[0] == "あいうえお、かきくけこ、"
+        assert "".join(chunks) == text
+        assert all(utf8_length(chunk) <= 36 for chunk in chunks)
+
+    def test_sentence_spans(self):
+        """前後の空白を除いた文の位置を返すこと"""
+        text = "　一文目。\n二文目！  \n\n三文目"
+        assert [text[start:end] for start, end in sentence_spans(text)] == ["一文目。", "二文目！", "三文目"]
+
+    def test_empty_and_invalid(self):
+        assert chunk_spans("", 10) == []
+        with pytest.raises(ValueError):
+            chunk_spans("本文", 0)
+
+
+class TestEntityCache:
+    """固有表現キャッシュテスト"""
+
+    @pytest.fixture
+    def cache(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = EntityCache(os.path.join(temp_dir, 'ner_cache.db'))
+            yield cache
+            cache.close()
+
+    def test_put_and_get(self, cache):
+        """保存した固有表現（なしも含む）を取得でき、モデルが違えば別扱いになること"""
+        cache.put_many("ja_ginza@5.1", [("松山に着いた。", [CachedEntity("松山", "City", 0, 2)]),
+                                        ("こんにちは。", [])])
+
+        assert cache.get("ja_ginza@5.1", "松山に着いた。") == [CachedEntity("松山", "City", 0, 2)]
+        assert cache.get("ja_ginza@5.1", "こんにちは。") == []
+        assert cache.get("ja_ginza@5.2", "松山に着いた。") is None
+
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 2)
+        assert stats['hit_rate'] == pytest.approx(2 / 3)
+
+    def test_evicts_least_recently_used_by_size(self):
+        """容量上限を超えると最終利用が古い順に削除すること"""
+        now = [1000.0]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = EntityCache(os.path.join(temp_dir, 'ner_cache.db'), max_bytes=60, clock=lambda: now[0])
+            entity = [CachedEntity("松山", "City", 0, 2)]
+            for i in range(4):
+                now[0] += 1
+                cache.put("m", f"文{i}", entity)
+            now[0] += 1
+            cache.get("m", "文0")
+
+            assert cache.evict() == 2
+            assert cache.get("m", "文0") is not None
+            assert cache.get("m", "文1") is None and cache.get("m", "文2") is None
+            assert cache.get_stats()['bytes'] <= 60
+            cache.close()
+
+    def test_model_key(self):
+        nlp = SimpleNamespace(meta={'lang': 'ja', 'name': 'ginza', 'version': '5.1.2'})
+        assert model_key(nlp) == "ja_ginza@5.1.2"
+
+
+class FakeNlp:
+    """「。」で文分割し、登録語を固有表現として返す解析器（呼び出し回数を記録）"""
+
+    def __init__(self, labels):
+        self.labels = labels
+        self.calls = []
+        self.pipe_names = ['tok2vec', 'parser', 'ner']
+        self.component_names = list(self.pipe_names)
+        self.disabled = set()
+        self.pipe_calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        sents = []
+        for piece in text.split("。"):
+            if not piece:
+                continue
+            ents = [SimpleNamespace(text=name, label_=label, start_char=piece.index(name),
+                                    end_char=piece.index(name) + len(name))
+                    for name, label in self.labels.items() if name in piece]
+            sents.append(SimpleNamespace(text=piece + "。", ents=ents))
+        return SimpleNamespace(sents=sents, ents=[ent for sent in sents for ent in sent.ents])
+
+    def pipe(self, items, as_tuples=False, batch_size=1000, n_process=1):
+        self.pipe_calls.append((batch_size, n_process))
+        self.disabled_during_pipe = set(self.disabled)
+        for item in items:
+            if as_tuples:
+                yield self(item[0]), item[1]
+            else:
+                yield self(item)
+
+    def add_pipe(self, factory, name, config=None):
+        self.component_names.append(name)
+        self.pipe_names.append(name)
+
+    def enable_pipe(self, name):
+        self.disabled.discard(name)
+
+    def disable_pipe(self, name):
+        self.disabled.add(name)
+
+    @contextmanager
+    def select_pipes(self, disable):
+        before = set(self.disabled)
+        self.disabled.update(disable)
+        try:
+            yield
+        finally:
+            self.disabled = before
+
+
+BOTCHAN_TEXT = ("坊っちゃん\n夏目漱石\n\n" + "親譲りの無鉄砲で｜小供《こども》の時から損ばかりしている。東京の学校を出て四国の松山へ赴任した。\n" * 5
+                + "\n底本：「坊っちゃん」新潮文庫\n")
+MELOS_HTML = ("<html><head><meta charset=\"Shift_JIS\"></head><body><h1>走れメロス</h1>"
+              "<div class=\"main_text\">" + "メロスは激怒した。シラクスの市に出て来た。<br />" * 10 + "</div></body></html>")
+
+
+class AozoraFixtureHandler(BaseHTTPRequestHandler):
+    """青空文庫を模したHTTPサーバー（Shift_JIS のテキスト・HTML、ETag/Last-Modified、一時的な障害）"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append(self.path)
+            server.clients.add(self.client_address)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            self._handle()
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _handle(self):
+        server = self.server
+        if self.path == "/cards/botchan.txt":
+            etag = f'"v{server.version}"'
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, headers={"ETag": etag})
+            body = server.botchan.encode("shift_jis")
+            return self._send(200, body, {"Content-Type": "text/plain; charset=Shift_JIS", "ETag": etag})
+        if self.path == "/cards/melos.html":
+            modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+            if self.headers.get("If-Modified-Since") == modified:
+                return self._send(304)
+            return self._send(200, MELOS_HTML.encode("shift_jis"),
+                              {"Content-Type": "text/html", "Last-Modified": modified})
+        if self.path == "/cards/flaky.txt":
+            server.flaky_failures -= 1
+            if server.flaky_failures >= 0:
+                return self._send(503, headers={"Retry-After": "0"})
+            return self._send(200, server.botchan.encode("shift_jis"), {"Content-Type": "text/plain"})
+        if self.path.startswith("/slow/"):
+            time.sleep(0.05)
+            return self._send(200, server.botchan.encode("shift_jis"), {"Content-Type": "text/plain"})
+        self._send(404)
+
+
+@pytest.fixture
+def aozora_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), AozoraFixtureHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.requests, server.clients = [], set()
+    server.active = server.max_active = 0
+    server.version, server.botchan, server.flaky_failures = 1, BOTCHAN_TEXT, 2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestAozoraDownloader:
+    """並行ダウンローダーテスト（ローカルHTTPサーバー）"""
+
+    def test_download_many_and_revalidate(self, aozora_server):
+        """Shift_JIS のテキスト・HTMLを取得・正規化し、再検証では 304 でキャッシュを使うこと"""
+        server, base = aozora_server
+        urls = [f"{base}/cards/botchan.txt", f"{base}/cards/melos.html", f"{base}/cards/missing.txt"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extractor = AozoraExtractor(temp_dir, downloader=AozoraDownloader(TextStore(temp_dir), backoff=0))
+            texts = extractor.download_many(urls, concurrency=4)
+
+            assert list(texts) == urls
+            assert "親譲りの無鉄砲で小供の時から" in texts[urls[0]] and "底本" not in texts[urls[0]]
+            assert "メロスは激怒した。" in texts[urls[1]]
+            assert texts[urls[2]] is None
+
+            # 正規化済みキャッシュは通信せずに使う
+            server.requests.clear()
+            assert extractor.download_many(urls[:2]) == {url: texts[url] for url in urls[:2]}
+            assert server.requests == []
+
+            # 再検証: 未更新なら 304、更新されていれば取り直して正規化し直す
+            server.version, server.botchan = 2, BOTCHAN_TEXT.replace("松山", "道後")
+            revalidated = extractor.download_many(urls[:2], revalidate=True)
+            assert "道後" in revalidated[urls[0]] and revalidated[urls[1]] == texts[urls[1]]
+            assert extractor.downloader.get_stats()['not_modified'] == 1
+            assert extractor.downloader.get_stats()['downloaded'] == 3
+
+    def test_retry_with_backoff(self, aozora_server):
+        """一時的な障害は待機して再試行し、上限を超えたら失敗を返すこと"""
+        server, base = aozora_server
+        delays = []
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = TextStore(temp_dir)
+            downloader = AozoraDownloader(store, max_retries=3, backoff=0.01, sleep=delays.append)
+            result = downloader.download(f"{base}/cards/flaky.txt")
+            assert result.ok and result.attempts == 3
+            assert delays == [0.01, 0.02]
+
+            server.flaky_failures = 5
+            result = AozoraDownloader(store, max_retries=1, backoff=0, sleep=delays.append).download(
+                f"{base}/cards/flaky.txt", revalidate=False)
+            # 保存済みの本文は再検証しなければそのまま使う
+            assert result.ok and result.not_modified and result.attempts == 0
+
+            store.remove(f"{base}/cards/flaky.txt")
+            result = AozoraDownloader(store, max_retries=1, backoff=0, sleep=delays.append).download(
+                f"{base}/cards/flaky.txt")
+            assert not result.ok and result.attempts == 2 and result.error == "HTTP 503"
+
+            result = downloader.download(f"{base}/cards/missing.txt")
+            assert not result.ok and result.attempts == 1
+
+    def test_invalid_url_is_per_url_failure(self, aozora_server):
+        """不正なURLは一括取得を中断せず、そのURLだけ失敗として返すこと"""
+        server, base = aozora_server
+        urls = ["not-a-url", f"{base}/cards/botchan.txt"]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results = AozoraDownloader(TextStore(temp_dir), backoff=0).download_many(urls)
+
+        assert list(results) == urls
+        assert not results["not-a-url"].ok and results["not-a-url"].attempts == 1
+        assert "Invalid URL" in results["not-a-url"].error
+        assert results[urls[1]].ok
+
+    def test_per_host_limit_and_keep_alive(self, aozora_server):
+        """ホストごとの同時接続数を守り、接続を再利用すること"""
+        server, base = aozora_server
+        urls = [f"{base}/slow/{i}.txt" for i in range(12)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            downloader = AozoraDownloader(TextStore(temp_dir), max_per_host=2)
+            results = downloader.download_many(urls, concurrency=6)
+
+        assert all(result.ok for result in results.values())
+        assert server.max_active == 2
+        # 12件のリクエストをスレッドごとの接続（最大6本）で処理
+        assert len(server.clients) <= 6
+
+
+class TestTextStore:
+    """内容アドレス方式テキストストアテスト"""
+
+    @pytest.fixture
+    def store(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = TextStore(temp_dir)
+            yield store
+            store.close()
+
+    def test_put_get_and_deduplicate(self, store):
+        """URLと種別ごとに保存し、同じ内容は1つのファイルにまとめること"""
+        text = "親譲りの無鉄砲で小供の時から損ばかりしている。" * 200
+        url_a = "https://www.aozora.gr.jp/cards/000148/files/752_14964.html"
+        url_b = "https://www.aozora.gr.jp/cards/000999/files/752_14964.html"   # 末尾のファイル名が同じ別作品
+
+        digest = store.put_text(url_a, text)
+        store.put(url_a, RAW, text.encode('shift_jis'), content_type="text/html", etag='"v1"')
+        store.put_text(url_b, "別の作品。")
+        assert store.put_text("https://example.com/copy.html", text) == digest
+
+        assert store.get_text(url_a) == text and store.get_text(url_b) == "別の作品。"
+        assert store.get(url_a, RAW).decode('shift_jis') == text
+        assert store.get_entry(url_a, RAW)['etag'] == '"v1"'
+        assert store.get_text("https://example.com/unknown.html") is None
+        assert store.blob_path(digest).exists() and store.blob_path(digest).parent.name == digest[:2]
+
+        stats = store.get_stats()
+        assert stats['blobs'] == 3 and stats['deduplicated'] == 1
+        assert stats['variants'][NORMALIZED]['entries'] == 3 and stats['variants'][RAW]['entries'] == 1
+        assert stats['compression_ratio'] > 3
+        with pytest.raises(ValueError):
+            store.put(url_a, "html", b"")
+
+    def test_gc_and_verify(self, store):
+        """参照されないファイルを削除し、欠損・破損したファイルを検出すること"""
+        keep = store.put_text("https://example.com/a.html", "東京へ行った。")
+        dropped = store.put_text("https://example.com/b.html", "松山へ行った。")
+        store.remove("https://example.com/b.html")
+        leftover = store.blob_path(keep).with_name("0000.tmp")
+        leftover.write_bytes(b"partial")
+
+        removed = store.gc()
+        assert removed['blobs'] == 1 and removed['files'] == 2
+        assert not store.blob_path(dropped).exists() and not leftover.exists()
+        assert store.verify() == {'checked': 1, 'missing': [], 'corrupt': [], 'repaired': False}
+
+        broken = store.put_text("https://example.com/c.html", "京都へ行った。")
+        store.blob_path(broken).write_bytes(b"not gzip")
+        result = store.verify(repair=True)
+        assert result['corrupt'] == [broken] and result['repaired']
+        assert store.get_text("https://example.com/c.html") is None
+        assert store.get_text("https://example.com/a.html") == "東京へ行った。"
+
+    def test_import_legacy(self, store):
+        """変更前の形式のキャッシュを取り込み、gc --legacy で削除できること"""
+        url = "https://www.aozora.gr.jp/cards/000148/files/752_14964.html"
+        legacy = store.root / legacy_cache_filename(url)
+        legacy.write_text("坊っちゃん本文", encoding='utf-8')
+
+        assert store.import_legacy([url, "https://example.com/none.html"]) == 1
+        assert store.get_text(url) == "坊っちゃん本文"
+        assert store.import_legacy([url]) == 0
+        assert store.gc(legacy=True)['files'] == 1 and not legacy.exists()
+
+
+CATALOG_HEADER = ("作品ID,作品名,作品名読み,ソート用読み,副題,副題読み,原題,初出,分類番号,文字遣い種別,"
+                  "作品著作権フラグ,公開日,最終更新日,図書カードURL,人物ID,姓,名,姓読み,名読み,役割フラグ,"
+                  "テキストファイルURL,XHTML/HTMLファイルURL")
+CATALOG_ROWS = [
+    ("752", "坊っちゃん", "ぼっちゃん", "000148", "夏目", "漱石", "なつめ", "そうせき", "著者",
+     "https://www.aozora.gr.jp/cards/000148/files/752_ruby_2438.zip",
+     "https://www.aozora.gr.jp/cards/000148/files/752_14964.html"),
+    ("789", "吾輩は猫である", "わがはいはねこである", "000148", "夏目", "漱石", "なつめ", "そうせき", "著者",
+     "https://www.aozora.gr.jp/cards/000148/files/789_ruby_5639.zip",
+     "https://www.aozora.gr.jp/cards/000148/files/789_14547.html"),
+    ("127", "羅生門", "らしょうもん", "000879", "芥川", "竜之介", "あくたがわ", "りゅうのすけ", "著者",
+     "https://www.aozora.gr.jp/cards/000879/files/127_ruby_150.zip",
+     "https://www.aozora.gr.jp/cards/000879/files/127_15260.html"),
+    ("2522", "舞姫", "まいひめ", "000129", "森", "鴎外", "もり", "おうがい", "著者",
+     "https://www.aozora.gr.jp/cards/000129/files/2522_ruby_4838.zip", ""),
+    ("1567", "走れメロス", "はしれめろす", "000035", "太宰", "治", "だざい", "おさむ", "著者",
+     "", "https://www.aozora.gr.jp/cards/000035/files/1567_14913.html"),
+    ("1567", "走れメロス", "はしれめろす", "001234", "山田", "太郎", "やまだ", "たろう", "校訂者",
+     "", "https://www.aozora.gr.jp/cards/000035/files/1567_14913.html"),
+]
+
+
+def catalog_csv(encoding: str = 'utf-8') -> bytes:
+    """list_person_all_extended 形式のCSV（一部の列のみ）"""
+    lines = [CATALOG_HEADER]
+    for work_id, title, reading, person_id, last, first, last_reading, first_reading, role, text_url, html_url in CATALOG_ROWS:
+        lines.append(",".join([
+            work_id, title, reading, reading, "", "", "", "", "NDC 913", "新字新仮名", "なし", "1999-01-01", "2020-01-01",
+            f"https://www.aozora.gr.jp/cards/{person_id}/card{work_id}.html", person_id, last, first,
+            last_reading, first_reading, role, text_url, html_url,
+        ]))
+    return ("\r\n".join(lines) + "\r\n").encode(encoding)
+
+
+class TestAozoraCatalog:
+    """青空文庫カタログテスト"""
+
+    @pytest.fixture
+    def catalog(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            catalog = AozoraCatalog(os.path.join(temp_dir, 'catalog.db'))
+            catalog.load_csv(catalog_csv('utf-8-sig'), 'test.csv')
+            yield catalog
+            catalog.close()
+
+    def test_load(self, catalog):
+        """CSV（BOM付きUTF-8・Shift_JIS・ZIP）を取り込み、再取り込みで置き換えること"""
+        assert catalog.get_stats()['works'] == 5 and catalog.get_stats()['source'] == 'test.csv'
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            archive.writestr('list_person_all_extended.csv', catalog_csv('cp932'))
+        assert catalog.load_csv(buffer.getvalue()) == len(CATALOG_ROWS)
+        assert catalog.get_stats()['authors'] == 5
+        assert [entry.title for entry in catalog.iter_entries('なつめ そうせき')] == ['坊っちゃん', '吾輩は猫である']
+
+    def test_search_stages(self, catalog):
+        """完全一致 → 正規化 → 読み → あいまい一致の順に照合すること"""
+        match = catalog.search("坊っちゃん", "夏目漱石")[0]
+        assert (match.kind, match.entry.work_id) == (EXACT, 752)
+        assert match.entry.url.endswith("752_ruby_2438.zip")
+
+        assert catalog.search("走れ メロス", "太宰 治")[0].kind == NORMALIZED_MATCH
+        assert catalog.find("舞姫", "森 鷗外").work_id == 2522           # 異体字
+        assert catalog.find("走れメロス").role == "著者"                 # 著者の行を優先
+        assert catalog.find("走れメロス").url.endswith("1567_14913.html")
+
+        match = catalog.search("ラショウモン", "芥川竜之介")[0]
+        assert (match.kind, match.entry.title) == (READING, "羅生門")
+
+        match = catalog.search("吾輩は猫", "夏目漱石")[0]
+        assert (match.kind, match.entry.work_id) == (FUZZY, 789) and match.score < 1
+        assert catalog.find("吾輩は猫", "夏目 嗽石").work_id == 789      # 著者名の誤記
+        assert catalog.find("羅生門", "夏目漱石", fuzzy=False) is None
+        assert catalog.find("存在しない作品名", "夏目漱石") is None
+
+    def test_extractor_uses_catalog(self, catalog):
+        """カタログがあれば通信せずに作品URLを返すこと"""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            extractor = AozoraExtractor(cache_dir, catalog=catalog)
+            extractor._check_api_availability = lambda: pytest.fail("APIに問い合わせました")
+            assert extractor.search_aozora_work("坊っちゃん", "夏目漱石").endswith("752_ruby_2438.zip")
+            assert extractor.search_aozora_work("存在しない作品名", "夏目漱石") is None
+            # あいまい一致（吾輩は猫 → 吾輩は猫である）は自動では採用しない
+            assert extractor.search_aozora_work("吾輩は猫", "夏目漱石") is None
+            assert extractor.search_aozora_work("ぼっちゃん", "夏目漱石").endswith("752_ruby_2438.zip")
+
+            extractor = AozoraExtractor(cache_dir, catalog_path=os.path.join(cache_dir, 'none.db'))
+            assert extractor.catalog is None and extractor._api_available is None
+
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), 'golden', 'aozora_normalizer')
+GOLDEN_CASES = sorted(name[:-4] for name in os.listdir(GOLDEN_DIR) if not name.endswith('.expected.txt'))
+CACHED_WORKS = os.path.join(os.path.dirname(__file__), '..', 'data', 'aozora_cache')
+CACHED_FILES = sorted(name for name in os.listdir(CACHED_WORKS) if name.endswith('.txt')) if os.path.isdir(CACHED_WORKS) else []
+
+
+def read_exact(path: str) -> str:
+    """改行コードを変換せずに読む"""
+    with open(path, encoding='utf-8', newline='') as f:
+        return f.read()
+
+
+class TestAozoraNormalizer:
+    """青空文庫テキスト正規化テスト（変更前の実装の出力をゴールデンファイルとして比較）"""
+
+    @pytest.mark.parametrize('name', GOLDEN_CASES)
+    def test_golden(self, name):
+        """青空文庫形式の本文（ヘッダー・ルビ・注記・※・フッター・CRLF）を変更前と同じに正規化すること"""
+        raw = read_exact(os.path.join(GOLDEN_DIR, f"{name}.txt"))
+        expected = read_exact(os.path.join(GOLDEN_DIR, f"{name}.expected.txt"))
+        assert normalize_aozora_text(raw) == expected
+
+    @pytest.mark.parametrize('filename', CACHED_FILES)
+    def test_cached_works_unchanged(self, filename):
+        """キャッシュ済みの作品（正規化済み）は変わらないこと"""
+        text = read_exact(os.path.join(CACHED_WORKS, filename))
+        assert normalize_aozora_text(text) == text
+
+    def test_extractor_uses_normalizer(self):
+        """抽出器の正規化が同じ結果を返すこと"""
+        raw = read_exact(os.path.join(GOLDEN_DIR, "edge_cases.txt"))
+        with tempfile.TemporaryDirectory() as cache_dir:
+            assert AozoraExtractor(cache_dir).normalize_aozora_text(raw) == normalize_aozora_text(raw)
+
+
+class TestGinzaPlaceExtractor:
+    """GiNZA抽出器テスト（spaCy がある環境のみ）"""
+
+    @pytest.fixture
+    def extractor(self):
+        pytest.importorskip("spacy")
+        from bungo_map.extractors.ginza_place_extractor import GinzaPlaceExtractor
+
+        extractor = GinzaPlaceExtractor.__new__(GinzaPlaceExtractor)
+        extractor.nlp = FakeNlp({"松山": "City", "坊っちゃん": "Person", "道後": "LOC"})
+        extractor.model_key = "ja_fake@1.0"
+        extractor.cache = None
+        return extractor
+
+    def test_version_includes_cache_mode(self, monkeypatch):
+        """文単位キャッシュの有無で抽出結果が異なりうるため version で区別すること"""
+        spacy = pytest.importorskip("spacy")
+        from bungo_map.extractors.ginza_place_extractor import EXTRACTOR_VERSION, GinzaPlaceExtractor
+
+        nlp = FakeNlp({})
+        nlp.meta = {'lang': 'ja', 'name': 'ginza', 'version': '5.1.2'}
+        monkeypatch.setattr(spacy, 'load', lambda name: nlp)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cache = EntityCache(os.path.join(temp_dir, 'ner_cache.db'))
+            cached = GinzaPlaceExtractor(cache=cache)
+            cache.close()
+
+        assert GinzaPlaceExtractor().version == f"ginza/{EXTRACTOR_VERSION}/ja_ginza@5.1.2"
+        assert cached.version == f"ginza/{EXTRACTOR_VERSION}/ja_ginza@5.1.2/sentence-cache"
+
+    def test_parses_each_chunk_once(self, extractor):
+        """チャンクごとに1回だけ解析し、文ごとに再解析しないこと"""
+        text = "東京を出た。四国の松山に着いた。坊っちゃんは道後の湯に入った。"
+        places = extractor.extract_places_from_text(1, text)
+
+        assert len(extractor.nlp.calls) == 1
+        assert [p.place_name for p in places] == ["松山", "道後"]
+        assert places[0].sentence == "四国の松山に着いた。"
+        assert places[0].before_text == "東京を出た。"
+        assert places[0].after_text == "坊っちゃんは道後の湯に入った。"
+
+    def test_extract_many(self, extractor):
+        """作品ごとの結果を入力順に返し、単独抽出と一致すること"""
+        works = [
+            Work(work_id=1, content="東京を出た。四国の松山に着いた。坊っちゃんは道後の湯に入った。"),
+            Work(work_id=2, content=""),
+            Work(work_id=3, content="道後から松山へ。", aozora_url="https://example.com/3"),
+        ]
+        results = extractor.extract_many(works, batch_size=8, n_process=2)
+
+        assert [[(p.work_id, p.place_name) for p in places] for places in results] == [
+            [(1, "松山"), (1, "道後")], [], [(3, "松山"), (3, "道後")]
+        ]
+        assert results[2][0].aozora_url == "https://example.com/3"
+        assert extractor.nlp.pipe_calls == [(8, 2)]
+
+        single = extractor.extract_places_from_text(1, works[0].content)
+        assert [(p.place_name, p.sentence, p.before_text, p.after_text) for p in single] == \
+            [(p.place_name, p.sentence, p.before_text, p.after_text) for p in results[0]]
+
+    def test_extract_many_disables_unused_pipes(self, extractor):
+        """parser を無効化し、句読点の文分割を一括抽出の間だけ有効にすること"""
+        from bungo_map.extractors.ginza_place_extractor import SENTENCIZER
+
+        extractor.extract_many([Work(work_id=1, content="松山に着いた。")])
+
+        assert extractor.nlp.disabled_during_pipe == {"parser"}
+        assert extractor.nlp.disabled == {SENTENCIZER}
+
+    def test_cache_skips_parsed_sentences(self, extractor):
+        """キャッシュ済みの文は再解析しないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extractor.cache = EntityCache(os.path.join(temp_dir, 'ner_cache.db'))
+            text = "東京を出た。四国の松山に着いた。東京を出た。\n坊っちゃんは道後の湯に入った。"
+            first = extractor.extract_places_from_text(1, text)
+            parsed = list(extractor.nlp.calls)
+
+            second = extractor.extract_places_from_text(2, text + "道後へ。")
+            extractor.cache.close()
+
+        assert parsed == ["東京を出た。", "四国の松山に着いた。", "坊っちゃんは道後の湯に入った。"]
+        assert extractor.nlp.calls[len(parsed):] == ["道後へ。"]
+        assert [(p.place_name, p.sentence, p.before_text) for p in first] == [
+            ("松山", "四国の松山に着いた。", "東京を出た。"), ("道後", "坊っちゃんは道後の湯に入った。", "東京を出た。")
+        ]
+        assert [p.place_name for p in second] == ["松山", "道後"]
+
+    def test_extract_many_with_cache_parses_once(self, extractor):
+        """キャッシュ利用時も全作品の未登録の文を重複なしで1回の nlp.pipe にまとめること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            extractor.cache = EntityCache(os.path.join(temp_dir, 'ner_cache.db'))
+            extractor.extract_places_from_text(1, "東京を出た。")
+            extractor.nlp.calls, extractor.nlp.pipe_calls = [], []
+
+            works = [
+                Work(work_id=1, content="東京を出た。四国の松山に着いた。"),
+                Work(work_id=2, content=""),
+                Work(work_id=3, content="四国の松山に着いた。道後へ。", aozora_url="https://example.com/3"),
+            ]
+            results = extractor.extract_many(works, batch_size=8, n_process=2)
+            extractor.cache.close()
+
+        assert extractor.nlp.pipe_calls == [(8, 2)]
+        assert extractor.nlp.calls == ["四国の松山に着いた。", "道後へ。"]
+        assert [[(p.work_id, p.place_name, p.before_text) for p in places] for places in results] == [
+            [(1, "松山", "東京を出た。")], [], [(3, "松山", ""), (3, "道後", "四国の松山に着いた。")]
+        ]
+        assert results[2][0].aozora_url == "https://example.com/3"
@@ -1 +1,390 @@
- 
\ No newline at end of file
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ジオコーディング機能テスト
+永続キャッシュ（TTL・LRU・統計）・一括ジオコーディング・レート制限・ローカル地名辞書の動作確認
+"""
+
+import pytest
+import tempfile
+import os
+import threading
+import time
+from dataclasses import replace
+from types import SimpleNamespace
+
+from geopy.exc import GeocoderRateLimited
+from googlemaps.exceptions import ApiError
+
+from bungo_map.geocoding import Geocoder, GeocodeCache, GeocodingResult, LocalGazetteerGeocoder
+from bungo_map.geocoding.geocoder import is_transient_error
+from bungo_map.geocoding.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """テスト用の時計"""
+
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestGeocodeCache:
+    """永続キャッシュテスト"""
+
+    @pytest.fixture
+    def cache_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield os.path.join(temp_dir, 'geocode_cache.db')
+
+    def test_persists_across_instances(self, cache_path):
+        """プロセス（インスタンス）をまたいで結果が残ること"""
+        cache = GeocodeCache(cache_path)
+        cache.put("東京", GeocodingResult("東京", 35.68, 139.76, confidence=0.7, source="nominatim"))
+        cache.close()
+
+        cache = GeocodeCache(cache_path)
+        result = cache.get("東京")
+        assert (result.lat, result.lng, result.source) == (35.68, 139.76, "nominatim")
+        # 正規化名で照合される
+        assert cache.get(" 東京　") is not None
+        assert cache.get("京都") is None
+
+        stats = cache.get_stats()
+        assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+        cache.close()
+
+    def test_ttl_positive_and_negative(self, cache_path):
+        """成功結果と失敗結果で有効期間が異なること"""
+        clock = FakeClock()
+        cache = GeocodeCache(cache_path, positive_ttl=100, negative_ttl=10, clock=clock)
+        cache.put("東京", GeocodingResult("東京", 35.68, 139.76))
+        cache.put("架空の町", GeocodingResult("架空の町", None, None, error="場所が見つかりません"))
+
+        clock.now += 11
+        assert cache.get("東京") is not None
+        assert cache.get("架空の町") is None
+
+        clock.now += 100
+        assert cache.purge_expired() == 1
+        assert cache.get_stats()['entries'] == 0
+        assert cache.get_stats()['expired'] == 2
+        cache.close()
+
+    def test_lru_eviction(self, cache_path):
+        """件数上限を超えると最終利用が古いものから削除されること"""
+        clock = FakeClock()
+        cache = GeocodeCache(cache_path, max_entries=3, clock=clock)
+        for i, name in enumerate(["東京", "京都", "大阪"]):
+            clock.now += 1
+            cache.put(name, GeocodingResult(name, 35.0 + i, 135.0))
+
+        clock.now += 1
+        assert cache.get("東京") is not None
+
+        clock.now += 1
+        cache.put_many([("松山", GeocodingResult("松山", 33.84, 132.77))])
+        assert cache.get("京都") is None
+        assert all(cache.get(name) is not None for name in ["東京", "大阪", "松山"])
+        assert cache.get_stats()['evicted'] == 1
+        cache.close()
+
+    def test_put_many_without_overwrite(self, cache_path):
+        """上書きしない一括保存"""
+        cache = GeocodeCache(cache_path)
+        cache.put("東京", GeocodingResult("東京", 35.68, 139.76, source="google"))
+
+        added = cache.put_many([("東京", GeocodingResult("東京", 0.0, 0.0, source="database")),
+                                ("京都", GeocodingResult("京都", 35.01, 135.77, source="database"))],
+                               overwrite=False)
+        assert added == 1
+        assert cache.get("東京").source == "google"
+        cache.close()
+
+    def test_geocoder_uses_persistent_cache(self, cache_path):
+        """Geocoder が永続キャッシュを参照し、外部APIを呼ばないこと"""
+        cache = GeocodeCache(cache_path)
+        cache.put("松山", GeocodingResult("松山", 33.84, 132.77, source="nominatim"))
+
+        geocoder = Geocoder(cache_store=cache)
+
+        def fail(name):
+            raise AssertionError(f"外部APIが呼ばれた: {name}")
+
+        geocoder.geocode_with_nominatim = fail
+        assert geocoder.geocode("松山").lat == 33.84
+        assert geocoder.geocode("松山").lat == 33.84
+
+        stats = geocoder.get_cache_stats()
+        assert (stats['hits'], stats['misses'], stats['total_cached']) == (2, 0, 1)
+        assert stats['hit_rate'] == 1.0
+        cache.close()
+
+
+class TestBatchGeocode:
+    """一括ジオコーディングテスト（外部APIはスタブに差し替え）"""
+
+    @pytest.fixture
+    def geocoder(self):
+        geocoder = Geocoder(nominatim_rate=1000)
+        geocoder.retry_delay = 0
+        geocoder.calls = []
+        return geocoder
+
+    def _stub(self, geocoder, responses):
+        """地名ごとの応答（リストなら呼び出し順）を返すスタブ"""
+        def geocode_with_nominatim(name):
+            geocoder.calls.append(name)
+            response = responses[name]
+            if isinstance(response, list):
+                response = response.pop(0)
+            return replace(response, place_name=name)
+
+        geocoder.geocode_with_nominatim = geocode_with_nominatim
+
+    def test_dedupe_by_normalized_name(self, geocoder):
+        """正規化名が同じ地名は1回だけ問い合わせ、入力順に展開すること"""
+        self._stub(geocoder, {"鎌倉市, 神奈川県": GeocodingResult("", 35.32, 139.55, source="nominatim"),
+                              "霞ヶ関": GeocodingResult("", 35.67, 139.75, source="nominatim")})
+
+        names = ["鎌倉", "霞ヶ関", "鎌倉", " 鎌倉", "霞ケ関"]
+        results = geocoder.batch_geocode(names)
+
+        assert geocoder.calls == ["鎌倉市, 神奈川県", "霞ヶ関"]
+        assert [r.place_name for r in results] == names
+        assert [r.lat for r in results] == [35.32, 35.67, 35.32, 35.32, 35.67]
+
+    def test_not_found_is_not_retried(self, geocoder):
+        """見つからない地名は再試行せず、失敗をキャッシュすること"""
+        self._stub(geocoder, {"架空の町": GeocodingResult("", None, None, error="場所が見つかりません")})
+
+        assert geocoder.batch_geocode(["架空の町"])[0].lat is None
+        assert geocoder.batch_geocode(["架空の町"])[0].lat is None
+        assert geocoder.calls == ["架空の町"]
+
+    def test_transient_error_retries_bypass_cache(self, geocoder):
+        """一時的なエラーはキャッシュを経由せずに再試行すること"""
+        timeout = GeocodingResult("", None, None, error="timed out", transient=True)
+        self._stub(geocoder, {"松山市, 愛媛県": [timeout, timeout,
+                                                GeocodingResult("", 33.84, 132.77, source="nominatim")]})
+
+        result = geocoder.batch_geocode(["松山"], max_retry=2)[0]
+        assert result.lat == 33.84
+        assert len(geocoder.calls) == 3
+
+    def test_transient_failure_is_not_cached(self, geocoder):
+        """再試行しても回復しなかった一時的エラーは次回も問い合わせること"""
+        timeout = GeocodingResult("", None, None, error="timed out", transient=True)
+        self._stub(geocoder, {"津軽地方, 青森県": [timeout, timeout,
+                                                  GeocodingResult("", 40.8, 140.4, source="nominatim")]})
+
+        assert geocoder.batch_geocode(["津軽"], max_retry=1)[0].transient
+        assert geocoder.batch_geocode(["津軽"], max_retry=0)[0].lat == 40.8
+        assert len(geocoder.calls) == 3
+
+    def test_transient_error_classification(self):
+        """一時的エラーの判定"""
+        from geopy.exc import (GeocoderTimedOut, GeocoderUnavailable, GeocoderRateLimited,
+                               GeocoderServiceError, GeocoderQueryError, GeocoderAuthenticationFailure)
+
+        assert is_transient_error(GeocoderTimedOut())
+        assert is_transient_error(GeocoderUnavailable())
+        assert is_transient_error(GeocoderRateLimited("429"))
+        assert is_transient_error(GeocoderServiceError("500"))
+        assert not is_transient_error(GeocoderQueryError())
+        assert not is_transient_error(GeocoderAuthenticationFailure())
+
+
+class StubProvider:
+    """遅延と429応答を再現するローカルのスタブAPI"""
+
+    def __init__(self, latency: float = 0.0, rate_limited: int = 0, error=None):
+        self.latency = latency
+        self.rate_limited = rate_limited
+        self.error = error or (lambda: GeocoderRateLimited("429 Too Many Requests"))
+        self.started = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _call(self, query):
+        with self._lock:
+            self.started.append(time.monotonic())
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            limited = self.rate_limited > 0
+            self.rate_limited -= 1
+        try:
+            time.sleep(self.latency)
+            if limited:
+                raise self.error()
+            return query
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class StubNominatim(StubProvider):
+    """geopy.Nominatim 互換のスタブ"""
+
+    def geocode(self, query, language=None, timeout=None):
+        query = self._call(query)
+        return SimpleNamespace(latitude=35.0, longitude=139.0, address=query)
+
+
+class StubGoogleClient(StubProvider):
+    """googlemaps.Client 互換のスタブ"""
+
+    def geocode(self, query, language=None):
+        query = self._call(query)
+        return [{'geometry': {'location': {'lat': 35.0, 'lng': 139.0}, 'location_type': 'ROOFTOP'},
+                 'formatted_address': query}]
+
+
+class TestRateLimit:
+    """レート制限・並行ジオコーディングテスト"""
+
+    def test_token_bucket(self):
+        """容量分は即時、以降は補充レートで待機すること"""
+        clock = FakeClock(0.0)
+
+        def sleep(seconds):
+            clock.now += seconds
+
+        bucket = TokenBucket(rate=2, capacity=1, clock=clock, sleep=sleep)
+        assert [bucket.acquire() for _ in range(3)] == [0.0, 0.5, 0.5]
+        assert not bucket.try_acquire()
+
+        bucket.pause(3)
+        assert bucket.acquire() == pytest.approx(3.5)
+
+    def test_google_requests_run_concurrently(self):
+        """Google はレート上限の範囲で複数リクエストを同時に送ること"""
+        geocoder = Geocoder(google_rate=1000, max_workers=10)
+        geocoder.google_client = StubGoogleClient(latency=0.05)
+
+        names = [f"地名{i}" for i in range(20)]
+        start = time.monotonic()
+        results = geocoder.batch_geocode(names)
+        elapsed = time.monotonic() - start
+
+        assert all(r.source == "google" for r in results)
+        assert geocoder.google_client.max_in_flight > 1
+        assert elapsed < 20 * 0.05 / 2
+
+    def test_nominatim_held_at_policy_rate(self):
+        """Nominatim はワーカー数に関係なく設定レート以下で送ること"""
+        geocoder = Geocoder(nominatim_rate=20, max_workers=5)
+        geocoder.nominatim = StubNominatim()
+
+        geocoder.batch_geocode([f"地名{i}" for i in range(5)])
+
+        started = sorted(geocoder.nominatim.started)
+        gaps = [b - a for a, b in zip(started, started[1:])]
+        assert len(started) == 5
+        assert min(gaps) >= 1 / 20 * 0.9
+
+    def test_rate_limited_responses_are_retried(self):
+        """429応答は一時的エラーとして再試行し、送信を一時停止すること"""
+        geocoder = Geocoder(nominatim_rate=1000, max_workers=3)
+        geocoder.retry_delay = 0.01
+        geocoder.nominatim = StubNominatim(rate_limited=2)
+
+        results = geocoder.batch_geocode(["甲", "乙", "丙"])
+
+        assert all(r.lat is not None for r in results)
+        assert len(geocoder.nominatim.started) == 5
+
+    def test_google_over_query_limit_is_retried(self):
+        """Google の OVER_QUERY_LIMIT も再試行されること"""
+        geocoder = Geocoder(google_rate=1000)
+        geocoder.retry_delay = 0.01
+        geocoder.google_client = StubGoogleClient(rate_limited=1,
+                                                  error=lambda: ApiError('OVER_QUERY_LIMIT'))
+        geocoder.nominatim = StubNominatim(rate_limited=1)
+
+        result = geocoder.batch_geocode(["甲"])[0]
+        assert (result.lat, result.source) == (35.0, "google")
+
+    def test_google_transient_failure_is_not_cached(self):
+        """Google が一時的エラーなら Nominatim で見つからなくても失敗をキャッシュしないこと"""
+        geocoder = Geocoder(google_rate=1000, nominatim_rate=1000)
+        geocoder.google_client = StubGoogleClient(rate_limited=1,
+                                                  error=lambda: ApiError('UNKNOWN_ERROR'))
+        geocoder.nominatim = StubNominatim()
+        geocoder.nominatim.geocode = lambda query, language=None, timeout=None: None
+
+        assert geocoder.geocode("甲").transient
+        assert geocoder.geocode("甲").source == "google"
+
+
+def geonames_row(geonameid, name, alternates, lat, lng, feature_class, population):
+    """GeoNames 形式（19列）の1行"""
+    row = [str(geonameid), name, name, ",".join(alternates), str(lat), str(lng), feature_class, "",
+           "JP", "", "", "", "", "", str(population), "", "", "Asia/Tokyo", "2024-01-01"]
+    return "\t".join(row) + "\n"
+
+
+class TestLocalGazetteer:
+    """ローカル地名辞書テスト"""
+
+    @pytest.fixture
+    def geonames_path(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'JP.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(geonames_row(1, "Matsuyama", ["松山市", "Matsuyama-shi"], 33.84, 132.77, "P", 500000))
+                f.write(geonames_row(2, "Matsuyama", ["松山"], 38.69, 139.87, "P", 1000))
+                f.write(geonames_row(3, "Tokyo", ["東京都"], 35.69, 139.69, "A", 13000000))
+                f.write(geonames_row(4, "Tokyo Station", ["東京駅"], 35.68, 139.77, "S", 0))
+                f.write(geonames_row(5, "Kasumigaseki", ["霞ヶ関"], 35.67, 139.75, "S", 0))
+            yield path
+
+    def test_exact_normalized_and_alias_lookup(self, geonames_path):
+        """完全一致・正規化形・行政区分を除いた別名で検索できること"""
+        gazetteer = LocalGazetteerGeocoder(geonames_path)
+        assert len(gazetteer) == 5
+
+        assert gazetteer.lookup("霞ヶ関").confidence == 0.8
+        assert gazetteer.lookup("霞ケ関").lat == 35.67
+        assert gazetteer.lookup("東京").formatted_address == "Tokyo"
+        assert gazetteer.lookup("架空の町") is None
+        # 日本語以外の別名は索引しない
+        assert gazetteer.lookup("Matsuyama-shi") is None
+        assert LocalGazetteerGeocoder(geonames_path, japanese_alternates_only=False).lookup("Matsuyama-shi")
+
+        stats = gazetteer.get_stats()
+        assert (stats['hits'], stats['misses']) == (3, 2)
+        assert stats['memory_bytes'] > 0
+
+    def test_ranking_by_feature_class_and_population(self, geonames_path):
+        """同名の地物は地物クラス・人口の順で選ばれること"""
+        gazetteer = LocalGazetteerGeocoder(geonames_path)
+        # 完全一致（人口1000の「松山」）は「松山市」から作った別名より優先
+        assert gazetteer.lookup("松山").lat == 38.69
+        # 同名「Matsuyama」は人口の多い方
+        assert gazetteer.lookup("Matsuyama").lat == 33.84
+
+    def test_csv_with_header_and_max_entries(self):
+        """ヘッダ付きCSVの読み込みと件数上限"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'provinces.csv')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write("name,lat,lng,feature_class,alternate_names\n")
+                f.write("武蔵国,35.86,139.65,A,武蔵|武州\n")
+                f.write("信濃国,36.23,138.18,A,信濃|信州\n")
+
+            assert LocalGazetteerGeocoder(path).lookup("信州").lat == 36.23
+            assert len(LocalGazetteerGeocoder(path, max_entries=1)) == 1
+
+    def test_geocoder_tries_gazetteer_first(self, geonames_path):
+        """地名辞書にあれば外部APIを呼ばず、なければ外部APIへフォールバックすること"""
+        geocoder = Geocoder(gazetteer=LocalGazetteerGeocoder(geonames_path), nominatim_rate=1000)
+        geocoder.nominatim = StubNominatim()
+
+        results = geocoder.batch_geocode(["東京", "霞ケ関", "架空の町"])
+        assert [r.source for r in results] == ["gazetteer", "gazetteer", "nominatim"]
+        assert len(geocoder.nominatim.started) == 1
+        assert geocoder.get_cache_stats()['gazetteer_hits'] == 2
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取り込みパイプラインテスト
+ダウンロード・抽出・書き込みの段階実行と統計の確認
+"""
+
+import os
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from bungo_map.core.database import Database
+from bungo_map.pipeline import (
+    ArchiveFetcher, FetchedText, IngestionPipeline, WorkItem, register_archive, register_works, scan_archive,
+    simple_extractors, works_from_db
+)
+from bungo_map.pipeline.archive import parse_header
+
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TEXTS = {
+    "https://example.com/botchan.html": "東京の学校を出た。\n四国の松山に赴任した。",
+    "https://example.com/kokoro.html": "鎌倉の海岸で先生に会った。\n東京に戻った。",
+    "https://example.com/melos.html": "メロスは激怒した。",
+}
+
+
+class StubFetcher:
+    """正規化済みテキストを返すダウンロード段（同時実行数を記録）"""
+
+    def __init__(self, texts, delay=0.0):
+        self.texts = texts
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, item):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if item.text_url not in self.texts:
+                raise IOError("404 Not Found")
+            return FetchedText(item, text=self.texts[item.text_url])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+@pytest.fixture
+def db():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # spawn で起動するワーカーは作業ディレクトリを参照するため、
+        # 他のテストで削除済みの一時ディレクトリに残っていても存在するディレクトリに移る
+        os.chdir(temp_dir)
+        database = Database(os.path.join(temp_dir, 'pipeline.db'))
+        try:
+            yield database
+        finally:
+            database.close()
+            os.chdir(PROJECT_ROOT)
+
+
+def register(db, urls=TEXTS):
+    return register_works(db, [
+        {'author_name': '夏目漱石', 'title': url.rsplit('/', 1)[-1], 'text_url': url} for url in urls
+    ])
+
+
+def cache_dir(db):
+    return str(db.db_path.parent / 'aozora_cache')
+
+
+def places_by_title(db):
+    works = db.get_works_by_authors(author['author_id'] for author in db.search_authors(""))
+    return {work['title']: sorted(p['place_name'] for p in db.get_places_by_work(work['work_id']))
+            for work in works}
+
+
+class TestIngestionPipeline:
+    """取り込みパイプラインテスト"""
+
+    @pytest.mark.parametrize('process_workers', [0, 2])
+    def test_run(self, db, process_workers):
+        """全作品を抽出して保存し、段ごとの件数を記録すること"""
+        items = register(db)
+        fetcher = StubFetcher(TEXTS, delay=0.05)
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=fetcher, extractor_factory=simple_extractors,
+                                   download_workers=3, process_workers=process_workers, write_batch_size=2)
+        stats = engine.run(items)
+
+        assert places_by_title(db) == {
+            'botchan.html': ['松山'], 'kokoro.html': ['鎌倉'], 'melos.html': []
+        }
+        assert {name: stage.items for name, stage in stats.stages.items()} == {
+            'download': 3, 'extract': 3, 'write': 3
+        }
+        assert stats.places == 2 and stats.failed == []
+        assert stats.stages['download'].throughput > 0
+        assert fetcher.max_active > 1
+        assert set(db.get_work_fingerprints(item.work_id for item in items)) == {item.work_id for item in items}
+
+    def test_failures_and_incremental(self, db):
+        """失敗した作品は記録して続行し、差分モードでは変更のない作品を書き換えないこと"""
+        items = register(db, list(TEXTS) + ["https://example.com/missing.html"])
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=StubFetcher(TEXTS), extractor_factory=simple_extractors,
+                                   process_workers=0)
+        stats = engine.run(items)
+        assert [(item.title, stage) for item, stage, _ in stats.failed] == [('missing.html', 'download')]
+        assert stats.stages['write'].items == 3
+
+        texts = dict(TEXTS)
+        texts["https://example.com/melos.html"] = "メロスは激怒した。シラクスの市に出て来た。千代田区にも。"
+        engine.fetcher = StubFetcher(texts)
+        stats = engine.run(works_from_db(db, incremental=True))
+
+        assert stats.unchanged == 2
+        assert stats.places == 1
+        assert places_by_title(db)['melos.html'] == ['千代田区']
+
+    def test_backpressure(self, db):
+        """書き込みが詰まるとキューの上限で前段が待機すること"""
+        items = register(db, [f"https://example.com/{i}.html" for i in range(20)])
+        texts = {item.text_url: "東京に行った。" for item in items}
+        fetcher = StubFetcher(texts)
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=fetcher, extractor_factory=simple_extractors,
+                                   download_workers=2, process_workers=0, queue_size=1, write_batch_size=1)
+
+        downloaded_at_first_write = []
+        original_write = engine._write
+
+        def slow_write(batch, stats):
+            if not downloaded_at_first_write:
+                time.sleep(0.3)
+                downloaded_at_first_write.append(stats.stages['download'].items)
+            original_write(batch, stats)
+
+        engine._write = slow_write
+        stats = engine.run(items)
+
+        # 書き込み待ちの間に進めるのはキュー2本分と各スレッドの処理中の分まで
+        assert downloaded_at_first_write[0] <= 6
+        assert stats.stages['write'].items == 20
+
+    def test_stage_error_is_raised(self, db):
+        """抽出器の初期化に失敗した場合は例外を送出して止まること"""
+        def broken_factory():
+            raise RuntimeError("モデルが見つかりません")
+
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=StubFetcher(TEXTS), extractor_factory=broken_factory,
+                                   process_workers=0)
+        with pytest.raises(RuntimeError):
+            engine.run(register(db))
+
+    def test_resume_job(self, db):
+        """中断・失敗したジョブは未完了の作品だけを処理して再開すること"""
+        from bungo_map.core.jobs import COMPLETED, INCOMPLETE, INTERRUPTED, JobLedger
+
+        items = register(db, list(TEXTS) + ["https://example.com/missing.html"])
+        fetcher = StubFetcher(TEXTS)
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=fetcher, extractor_factory=simple_extractors,
+                                   process_workers=0, write_batch_size=1)
+
+        # 2作品目の書き込み後に中断
+        original_write = engine._write
+        written = []
+
+        def interrupted_write(batch, stats):
+            if len(written) == 2:
+                raise KeyboardInterrupt
+            original_write(batch, stats)
+            written.extend(result.item.title for result in batch)
+
+        engine._write = interrupted_write
+        with pytest.raises(KeyboardInterrupt):
+            engine.run_job('test', items, {'sample': True})
+        ledger = JobLedger(db)
+        job_id = ledger.list_jobs()[0].job_id
+        assert ledger.get_progress(job_id).status == INTERRUPTED
+        assert ledger.get_progress(job_id).completed == 2
+
+        # 再開: 完了済みの2作品は処理せず、本文がない作品は失敗として記録
+        engine._write = original_write
+        stats = engine.run_job('test', items, {'sample': True})
+        assert stats.job_id == job_id and stats.completed_before == 2
+        assert stats.stages['download'].items == 1
+        assert [item.title for item, _, _ in stats.failed] == ['missing.html']
+        assert ledger.get_progress(job_id).status == INCOMPLETE
+        assert [item['stage'] for item in ledger.get_failed_items(job_id)] == ['download']
+
+        # 再実行では失敗した作品だけを再試行
+        fetcher.texts = dict(TEXTS, **{"https://example.com/missing.html": "京都へ行った。"})
+        stats = engine.run_job('test', items, {'sample': True})
+        assert stats.stages['write'].items == 1 and stats.completed_before == 3
+        assert ledger.get_progress(job_id).status == COMPLETED
+        assert places_by_title(db)['missing.html'] == ['京都']
+
+    def test_cli_without_works(self, db):
+        """青空文庫URLが登録された作品がない場合は案内を表示すること"""
+        from click.testing import CliRunner
+        from bungo_map.cli.main import main
+
+        result = CliRunner().invoke(main, ['pipeline', 'run', '--db-path', str(db.db_path)])
+        assert result.exit_code == 0
+        assert "青空文庫URLが登録された作品がありません" in result.output
+
+
+AOZORA_HEADER = "{title}\r\n{author}\r\n\r\n-------------------------------------------------------\r\n" \
+                "【テキスト中に現れる記号について】\r\n《》：ルビ\r\n-------------------------------------------------------\r\n"
+
+
+def write_zip(path, name, title, author, body):
+    """青空文庫形式（CP932 のテキスト1つ）のZIP"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    text = AOZORA_HEADER.format(title=title, author=author) + body + "\r\n\r\n底本：「テスト」\r\n"
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, text.encode('cp932'))
+
+
+@pytest.fixture
+def archive_root(db):
+    root = Path(db.db_path).parent / 'aozorabunko'
+    files = root / 'cards' / '000148' / 'files'
+    write_zip(files / '752_ruby_2438.zip', 'bocchan.txt', '坊っちゃん', '夏目漱石',
+              "親譲りの無鉄砲で｜小供《こども》の時から損ばかりしている。\r\n" * 5 + "四国の松山へ赴任した。")
+    write_zip(files / '752_txt_2437.zip', 'bocchan.txt', '坊っちゃん', '夏目漱石', "ルビなし版。" * 30)
+    write_zip(root / 'cards' / '000035' / 'files' / '1567_ruby_4948.zip', 'hashire_merosu.txt',
+              '走れメロス', '太宰治', "メロスは激怒した。" * 20 + "鎌倉へ向かった。")
+    (root / 'cards' / '000879' / 'files').mkdir(parents=True)
+    (root / 'cards' / '000879' / 'files' / '127_ruby_150.zip').write_bytes(b"not a zip")
+    return root
+
+
+class TestArchiveImport:
+    """青空文庫アーカイブ取り込みテスト"""
+
+    def test_parse_header(self):
+        """冒頭から作品名・著者名（訳者を除く）を取得すること"""
+        assert parse_header("坊っちゃん\r\n夏目漱石\r\n\r\n本文") == ("坊っちゃん", "夏目漱石")
+        assert parse_header("変身\nフランツ・カフカ\n原田義人訳\n---\n") == ("変身", "フランツ・カフカ")
+        assert parse_header("\n本文") == ("", "")
+
+    def test_scan_and_ingest(self, db, archive_root):
+        """ZIPを走査して登録し、通信せずに展開・正規化・抽出すること"""
+        works = scan_archive(str(archive_root))
+        assert [(w.title, w.author_name, w.url) for w in works] == [
+            ('走れメロス', '太宰治', 'https://www.aozora.gr.jp/cards/000035/files/1567_ruby_4948.zip'),
+            ('坊っちゃん', '夏目漱石', 'https://www.aozora.gr.jp/cards/000148/files/752_ruby_2438.zip'),
+        ]
+
+        items = register_archive(db, works)
+        engine = IngestionPipeline(db, cache_dir=cache_dir(db), fetcher=ArchiveFetcher(works),
+                                   extractor_factory=simple_extractors, process_workers=0)
+        stats = engine.run_job('archive', items, {'source': str(archive_root)})
+
+        assert stats.failed == [] and stats.stages['write'].items == 2
+        assert places_by_title(db) == {'坊っちゃん': ['松山'], '走れメロス': ['鎌倉']}
+
+    def test_cp932_only_characters(self, db, tmp_path):
+        """機種依存文字（①・髙）を含むZIPの冒頭と本文を化けずに読むこと"""
+        from bungo_map.extractors.aozora_extractor import AozoraExtractor
+        from bungo_map.pipeline.archive import read_zip_header
+
+        path = tmp_path / 'cards' / '000001' / 'files' / '1_ruby_1.zip'
+        write_zip(path, 'takashimaya.txt', '髙島屋①', '髙橋一郎', "①髙島屋の前を通って東京へ出た。" * 10)
+        assert read_zip_header(path) == ('髙島屋①', '髙橋一郎')
+
+        extractor = AozoraExtractor(cache_dir(db))
+        text = extractor._decode_content(extractor.read_zip_text(path.read_bytes()))
+        assert "①髙島屋の前を通って" in text
+
+    def test_cli_import_archive(self, db, archive_root):
+        """import-archive コマンドで取り込めること"""
+        from click.testing import CliRunner
+        from bungo_map.cli.main import main
+
+        result = CliRunner().invoke(main, ['pipeline', 'import-archive', str(archive_root / 'cards' / '000148'),
+                                           '--db-path', str(db.db_path), '--process-workers', '0', '--no-ginza'])
+        assert result.exit_code == 0, result.output
+        assert "1作品を登録" in result.output and "1作品, 1地名" in result.output